@@ -3,10 +3,15 @@
 import random
 import threading
 import time
+from program.core.board_geometry import TRADITIONAL_GEOMETRY
+from program.core.endgame import DRAW
 from program.core.game_rules import GameRules
-from program.controllers.game_config_manager import game_config
+from program.core.rule_set import RuleSet
 from program.utils import tools
-from program.core.chess_pieces import Ju, Ma, Xiang, Shi, King, Pao, Pawn
+from program.core.chess_pieces import Ju, Xiang, King, Pao, \
+    JU, MA, XIANG, SHI, KING, PAO, PAWN, PIECE_TYPE_COUNT, piece_type_table
+
+GEOMETRY = TRADITIONAL_GEOMETRY  # 传统象棋10行9列的紧凑棋盘
 
 
 def _can_capture_simple(game_state, attacker, target):
@@ -52,11 +57,7 @@ def _evaluate_piece_coordination_simple(game_state, color):
 def _evaluate_king_safety_simple(game_state, color):
     """简化版：评估王的安全性"""
     # 找出王
-    king = None
-    for piece in game_state.pieces:
-        if isinstance(piece, King) and piece.color == color:
-            king = piece
-            break
+    king = game_state.get_king(color)
 
     if not king:
         return -500  # 没有王，非常危险
@@ -65,10 +66,10 @@ def _evaluate_king_safety_simple(game_state, color):
 
     # 王在九宫格中央更安全
     if color == "red":
-        if 7 <= king.row <= 9 and 3 <= king.col <= 5:  # 红方王在九宫内
+        if GEOMETRY.in_palace("red", king.row, king.col):  # 红方王在九宫内
             safety_score += 30
     else:  # black
-        if 0 <= king.row <= 2 and 3 <= king.col <= 5:  # 黑方王在九宫内
+        if GEOMETRY.in_palace("black", king.row, king.col):  # 黑方王在九宫内
             safety_score += 30
 
     return safety_score
@@ -91,7 +92,7 @@ def _evaluate_special_abilities_simple(game_state, color):
                         for dc in [-2, 0, 2]:
                             if (dr != 0 and dc == 0) or (dr == 0 and dc != 0):  # 只考虑横竖方向
                                 target_row, target_col = piece.row + dr, piece.col + dc
-                                if 0 <= target_row < 10 and 0 <= target_col < 9:
+                                if GEOMETRY.on_board(target_row, target_col):
                                     # 检查中间是否有棋子（塞相眼）
                                     mid_row, mid_col = piece.row + dr // 2, piece.col + dc // 2
                                     if not game_state.get_piece_at(mid_row, mid_col):
@@ -108,7 +109,7 @@ def _evaluate_special_abilities_simple(game_state, color):
                         for dc in [-2, 0, 2]:
                             if (dr != 0 and dc == 0) or (dr == 0 and dc != 0):  # 只考虑横竖方向
                                 target_row, target_col = piece.row + dr, piece.col + dc
-                                if 0 <= target_row < 10 and 0 <= target_col < 9:
+                                if GEOMETRY.on_board(target_row, target_col):
                                     # 检查中间是否有棋子（塞相眼）
                                     mid_row, mid_col = piece.row + dr // 2, piece.col + dc // 2
                                     if not game_state.get_piece_at(mid_row, mid_col):
@@ -140,7 +141,7 @@ def _evaluate_special_abilities(game_state, color):
                         for dc in [-2, 0, 2]:
                             if (dr != 0 and dc == 0) or (dr == 0 and dc != 0):  # 只考虑横竖方向
                                 target_row, target_col = piece.row + dr, piece.col + dc
-                                if 0 <= target_row < 10 and 0 <= target_col < 9:
+                                if GEOMETRY.on_board(target_row, target_col):
                                     # 检查中间是否有棋子（塞相眼）
                                     mid_row, mid_col = piece.row + dr // 2, piece.col + dc // 2
                                     if not game_state.get_piece_at(mid_row, mid_col):
@@ -160,7 +161,7 @@ def _evaluate_special_abilities(game_state, color):
                         for dc in [-2, 0, 2]:
                             if (dr != 0 and dc == 0) or (dr == 0 and dc != 0):  # 只考虑横竖方向
                                 target_row, target_col = piece.row + dr, piece.col + dc
-                                if 0 <= target_row < 10 and 0 <= target_col < 9:
+                                if GEOMETRY.on_board(target_row, target_col):
                                     # 检查中间是否有棋子（塞相眼）
                                     mid_row, mid_col = piece.row + dr // 2, piece.col + dc // 2
                                     if not game_state.get_piece_at(mid_row, mid_col):
@@ -236,53 +237,9 @@ def _clone_game_state(game_state):
     return game_state.clone()
 
 
-def _make_move(game_state, from_pos, to_pos):
-    """在克隆的游戏状态中执行移动"""
-    from_row, from_col = from_pos
-    to_row, to_col = to_pos
-
-    # 找出要移动的棋子
-    moving_piece = None
-    for piece in game_state.pieces:
-        if piece.row == from_row and piece.col == from_col:
-            moving_piece = piece
-            break
-
-    if not moving_piece:
-        return False
-
-    # 查找目标位置是否有棋子（吃子）
-    target_piece = None
-    for piece in game_state.pieces:
-        if piece.row == to_row and piece.col == to_col:
-            target_piece = piece
-            break
-
-    # 如果有目标棋子，从列表中移除
-    if target_piece:
-        game_state.pieces.remove(target_piece)
-
-    # 更新棋子位置
-    moving_piece.row = to_row
-    moving_piece.col = to_col
-
-    # 切换回合
-    game_state.player_turn = "red" if game_state.player_turn == "black" else "black"
-
-    # 更新将军状态
-    game_state.is_check = False  # 在实际游戏中这个会根据规则更新，这里简化处理
-
-    return True
-
-
 def _get_state_key(game_state):
-    """生成棋盘状态的唯一键，用于置换表"""
-    # 简单实现，使用棋子位置组合
-    pieces_str = ""
-    for piece in sorted(game_state.pieces, key=lambda p: (p.color, p.name, p.row, p.col)):
-        pieces_str += f"{piece.name}:{piece.color}:{piece.row}:{piece.col}|"
-
-    return pieces_str + game_state.player_turn
+    """生成棋盘状态的唯一键，用于置换表（使用游戏状态增量维护的Zobrist键）"""
+    return game_state.zobrist_key
 
 
 class ChineseChessSearchAI:
@@ -298,6 +255,7 @@ class ChineseChessSearchAI:
         self.algorithm = algorithm.lower()
         self.ai_color = ai_color
         self.rules = GameRules()
+        self.rule_set = RuleSet.from_settings(traditional_mode=True)  # 对局规则，每次计算前从游戏状态获取
         self.lock = threading.Lock()  # 添加锁用于线程安全
 
         # 添加多线程相关属性
@@ -317,6 +275,8 @@ class ChineseChessSearchAI:
             '砲': 900, '炮': 900,        # 炮/砲
             '卒': 300, '兵': 300         # 卒/兵
         }
+        # 按 [type_code][color_code] 索引的棋子价值（由上面按名称的价值表生成）
+        self.piece_value_table = piece_type_table(self.piece_values)
 
         # 根据难度设置搜索参数
         if difficulty == "easy":
@@ -354,7 +314,7 @@ class ChineseChessSearchAI:
     def _init_position_tables(self):
         """初始化棋子位置价值表（适用于传统中国象棋9x10棋盘）"""
         # 基础位置价值矩阵，适用于9x10棋盘
-        base_pos_value = [[10 for _ in range(9)] for _ in range(10)]
+        base_pos_value = [[10 for _ in range(GEOMETRY.cols)] for _ in range(GEOMETRY.rows)]
 
         # 中心区域价值更高 (3-6行, 2-6列)
         for i in range(3, 7):
@@ -374,7 +334,7 @@ class ChineseChessSearchAI:
 
         # 楚河汉界区域价值降低 (4-5行)
         for i in [4, 5]:
-            for j in range(9):
+            for j in range(GEOMETRY.cols):
                 base_pos_value[i][j] = 5
 
         self.base_pos_value = base_pos_value
@@ -386,12 +346,12 @@ class ChineseChessSearchAI:
         # 调整兵/卒位置价值
         # 红方兵价值随着接近对方九宫而增加
         for i in range(5):  # 红方兵在0-4行
-            for j in range(9):
+            for j in range(GEOMETRY.cols):
                 self.pawn_pos_red[i][j] += (5 - i) * 5  # 越接近对方价值越高
 
         # 黑方兵价值随着接近对方九宫而增加
         for i in range(5, 10):  # 黑方兵在5-9行
-            for j in range(9):
+            for j in range(GEOMETRY.cols):
                 self.pawn_pos_black[i][j] += (i - 4) * 5  # 越接近对方价值越高
 
         # 车位置价值表（倾向于控制开放线路）
@@ -411,8 +371,8 @@ class ChineseChessSearchAI:
         self.bishop_pos_black = [row[:] for row in base_pos_value]
 
         # 限制相/象活动范围，但在敌方区域增强
-        for i in range(10):
-            for j in range(9):
+        for i in range(GEOMETRY.rows):
+            for j in range(GEOMETRY.cols):
                 # 红方相在敌方区域（0-4行）价值更高
                 if i <= 4:
                     self.bishop_pos_red[i][j] = 30  # 在敌方区域价值更高
@@ -429,13 +389,13 @@ class ChineseChessSearchAI:
         self.advisor_pos_black = [row[:] for row in base_pos_value]
 
         # 限制士/仕活动范围（只能在九宫）
-        for i in range(10):
-            for j in range(9):
+        for i in range(GEOMETRY.rows):
+            for j in range(GEOMETRY.cols):
                 # 红方仕偏好九宫格
-                if not (7 <= i <= 9 and 3 <= j <= 5):
+                if not GEOMETRY.in_palace("red", i, j):
                     self.advisor_pos_red[i][j] -= 5
                 # 黑方士偏好九宫格
-                if not (0 <= i <= 2 and 3 <= j <= 5):
+                if not GEOMETRY.in_palace("black", i, j):
                     self.advisor_pos_black[i][j] -= 5
 
         # 将/帅位置价值表（九宫格内）
@@ -443,19 +403,30 @@ class ChineseChessSearchAI:
         self.king_pos_black = [row[:] for row in base_pos_value]
 
         # 将/帅在九宫格内更有价值
-        for i in range(10):
-            for j in range(9):
+        for i in range(GEOMETRY.rows):
+            for j in range(GEOMETRY.cols):
                 # 红方将偏好九宫格
-                if 7 <= i <= 9 and 3 <= j <= 5:
+                if GEOMETRY.in_palace("red", i, j):
                     self.king_pos_red[i][j] = 40
                 else:
                     self.king_pos_red[i][j] = 10
                 # 黑方帅偏好九宫格
-                if 0 <= i <= 2 and 3 <= j <= 5:
+                if GEOMETRY.in_palace("black", i, j):
                     self.king_pos_black[i][j] = 40
                 else:
                     self.king_pos_black[i][j] = 10
 
+        # 按 [type_code][color_code] 索引的(位置价值表, 附加分)，未单独设置的棋子使用基础位置价值
+        base_entry = (self.base_pos_value, 0)
+        self.position_tables = [[base_entry, base_entry] for _ in range(PIECE_TYPE_COUNT)]
+        self.position_tables[PAWN] = [(self.pawn_pos_red, 0), (self.pawn_pos_black, 0)]
+        self.position_tables[JU] = [(self.rook_pos_red, 0), (self.rook_pos_black, 0)]
+        self.position_tables[MA] = [(self.knight_pos_red, 0), (self.knight_pos_black, 0)]
+        self.position_tables[PAO] = [(self.cannon_pos_red, 0), (self.cannon_pos_black, 0)]
+        self.position_tables[XIANG] = [(self.bishop_pos_red, 0), (self.bishop_pos_black, 0)]
+        self.position_tables[SHI] = [(self.advisor_pos_red, 0), (self.advisor_pos_black, 0)]
+        self.position_tables[KING] = [(self.king_pos_red, 50), (self.king_pos_black, 50)]  # 王在九宫格内更有价值
+
     def get_best_move(self, game_state):
         """
         获取最佳移动
@@ -464,6 +435,7 @@ class ChineseChessSearchAI:
         """
         pieces = game_state.pieces
         current_player = game_state.player_turn
+        self._use_rule_set(game_state.rule_set)
 
         # 根据算法类型选择不同的策略
         if self.algorithm == "minimax":
@@ -485,19 +457,26 @@ class ChineseChessSearchAI:
         """异步获取AI的最佳走法，启动多线程计算
 
         Args:
-            game_state: GameState对象，表示当前棋盘状态
+            game_state: GameState对象或其局面快照（PositionSnapshot），表示当前棋盘状态
         """
         # 重置状态
         self.computed_move = None
         self.computation_finished = False
         self.best_move_so_far = None
         self.best_value_so_far = float('-inf')
+        self._use_rule_set(game_state.rule_set)
 
         # 启动一个线程来执行AI计算
         self.ai_thread = threading.Thread(target=self._compute_move, args=(game_state,))
         self.ai_thread.daemon = True  # 设置为守护线程
         self.ai_thread.start()
 
+    def _use_rule_set(self, rule_set):
+        """采用对局的规则，传统中国象棋AI始终按传统象棋规则计算走法"""
+        if not rule_set.traditional_mode:
+            rule_set = rule_set.with_settings(traditional_mode=True)
+        self.rule_set = rule_set
+
     def _compute_move(self, game_state):
         """在单独线程中计算最佳走法"""
         try:
@@ -530,14 +509,8 @@ class ChineseChessSearchAI:
         possible_moves = []
         for piece in pieces:
             if piece.color == current_player:
-                # 在传统象棋模式下计算可能的移动
-                original_traditional_mode = game_config.get_setting("traditional_mode", False)
-                game_config.set_setting("traditional_mode", True)
-
-                moves, capturable = self.rules.calculate_possible_moves(pieces, piece)
-
-                # 恢复原来的设置
-                game_config.set_setting("traditional_mode", original_traditional_mode)
+                # 按传统象棋规则计算可能的移动
+                moves, capturable = self.rules.calculate_possible_moves(pieces, piece, self.rule_set)
 
                 all_moves = moves + capturable
                 for to_row, to_col in all_moves:
@@ -556,15 +529,8 @@ class ChineseChessSearchAI:
 
         for piece in pieces:
             if piece.color == current_player:
-                # 在传统象棋模式下计算可能的移动
-                original_traditional_mode = game_config.get_setting("traditional_mode", False)
-                game_config.set_setting("traditional_mode", True)
-
-                moves, capturable = self.rules.calculate_possible_moves(pieces, piece)
-
-                # 恢复原来的设置
-                game_config.set_setting("traditional_mode", original_traditional_mode)
-
+                # 按传统象棋规则计算可能的移动
+                moves, capturable = self.rules.calculate_possible_moves(pieces, piece, self.rule_set)
 
                 for to_row, to_col in capturable:
                     target_piece = self._get_piece_at(pieces, to_row, to_col)
@@ -578,7 +544,7 @@ class ChineseChessSearchAI:
 
         if capture_moves:
 
-            capture_moves.sort(key=lambda x: self.piece_values.get(x[3].name, 0), reverse=True)
+            capture_moves.sort(key=lambda x: self._get_piece_value(x[3]), reverse=True)
             best_capture = capture_moves[0]
             return best_capture[0], best_capture[1], best_capture[2]
 
@@ -652,11 +618,11 @@ class ChineseChessSearchAI:
                 if (time.time() - start_time) * 1000 > self.max_think_time:
                     break
 
-                cloned_state = _clone_game_state(game_state)
-                _make_move(cloned_state, from_pos, to_pos)
+                game_state.make_move(*from_pos, *to_pos)
 
                 # 递归搜索
-                eval = self._minimax(cloned_state, depth - 1, False, start_time)
+                eval = self._minimax(game_state, depth - 1, False, start_time)
+                game_state.unmake_move()
 
                 max_eval = max(max_eval, eval)
 
@@ -668,11 +634,11 @@ class ChineseChessSearchAI:
                 if (time.time() - start_time) * 1000 > self.max_think_time:
                     break
 
-                cloned_state = _clone_game_state(game_state)
-                _make_move(cloned_state, from_pos, to_pos)
+                game_state.make_move(*from_pos, *to_pos)
 
                 # 递归搜索
-                eval = self._minimax(cloned_state, depth - 1, True, start_time)
+                eval = self._minimax(game_state, depth - 1, True, start_time)
+                game_state.unmake_move()
 
                 min_eval = min(min_eval, eval)
 
@@ -698,15 +664,13 @@ class ChineseChessSearchAI:
 
         for move in moves:
             # 执行移动
-            original_pieces = self._copy_pieces(game_state.pieces)
-            game_state.move_piece(move[0], move[1], move[2], move[3])
+            game_state.make_move(move[0], move[1], move[2], move[3])
 
             value, _ = self._negamax(game_state, depth - 1, -color)
             value = -value  # Negamax的关键：翻转值
 
             # 撤销移动
-            game_state.pieces = original_pieces
-            game_state.update_pieces_positions(original_pieces)
+            game_state.unmake_move()
 
             if value > max_value:
                 max_value = value
@@ -732,14 +696,12 @@ class ChineseChessSearchAI:
             moves = self._get_all_possible_moves(game_state, self.ai_color)
             for move in moves:
                 # 执行移动
-                original_pieces = self._copy_pieces(game_state.pieces)
-                game_state.move_piece(move[0], move[1], move[2], move[3])
+                game_state.make_move(move[0], move[1], move[2], move[3])
 
                 eval_score, _ = self._alpha_beta(game_state, depth - 1, alpha, beta, False)
 
                 # 撤销移动
-                game_state.pieces = original_pieces
-                game_state.update_pieces_positions(original_pieces)
+                game_state.unmake_move()
 
                 if eval_score > max_eval:
                     max_eval = eval_score
@@ -755,14 +717,12 @@ class ChineseChessSearchAI:
             moves = self._get_all_possible_moves(game_state, opponent_color)
             for move in moves:
                 # 执行移动
-                original_pieces = self._copy_pieces(game_state.pieces)
-                game_state.move_piece(move[0], move[1], move[2], move[3])
+                game_state.make_move(move[0], move[1], move[2], move[3])
 
                 eval_score, _ = self._alpha_beta(game_state, depth - 1, alpha, beta, True)
 
                 # 撤销移动
-                game_state.pieces = original_pieces
-                game_state.update_pieces_positions(original_pieces)
+                game_state.unmake_move()
 
                 if eval_score < min_eval:
                     min_eval = eval_score
@@ -778,14 +738,8 @@ class ChineseChessSearchAI:
         moves = []
         for piece in game_state.pieces:
             if piece.color == player_color:
-                # 在传统象棋模式下计算可能的移动
-                original_traditional_mode = game_config.get_setting("traditional_mode", False)
-                game_config.set_setting("traditional_mode", True)
-
-                possible_moves, capturable = self.rules.calculate_possible_moves(game_state.pieces, piece)
-
-                # 恢复原来的设置
-                game_config.set_setting("traditional_mode", original_traditional_mode)
+                # 按传统象棋规则计算可能的移动
+                possible_moves, capturable = self.rules.calculate_possible_moves(game_state.pieces, piece, self.rule_set)
 
                 # 添加所有可能的移动
                 for to_row, to_col in possible_moves + capturable:
@@ -796,9 +750,9 @@ class ChineseChessSearchAI:
         """评估游戏状态"""
         score = 0
         for piece in game_state.pieces:
-            value = self.piece_values.get(piece.name, 0)
+            value = self._get_piece_value(piece)
             pos_value = 0
-            if 0 <= piece.row < 10 and 0 <= piece.col < 9:
+            if GEOMETRY.on_board(piece.row, piece.col):
                 pos_value = self._get_position_value_at_pos(piece, piece.row, piece.col)
             piece_score = value + pos_value
 
@@ -808,16 +762,6 @@ class ChineseChessSearchAI:
                 score -= piece_score
         return score
 
-    def _copy_pieces(self, pieces):
-        """复制棋子列表"""
-        copied_pieces = []
-        for piece in pieces:
-            # 创建新棋子实例，保持相同的位置和属性
-            import copy
-            new_piece = copy.copy(piece)
-            copied_pieces.append(new_piece)
-        return copied_pieces
-
     def _minimax_move(self, pieces, current_player, depth=2):
         """使用minimax算法计算最佳移动"""
         best_move = None
@@ -826,14 +770,8 @@ class ChineseChessSearchAI:
         # 获取所有可能的移动
         for piece in pieces:
             if piece.color == current_player:
-                # 在传统象棋模式下计算可能的移动
-                original_traditional_mode = game_config.get_setting("traditional_mode", False)
-                game_config.set_setting("traditional_mode", True)
-
-                moves, capturable = self.rules.calculate_possible_moves(pieces, piece)
-
-                # 恢复原来的设置
-                game_config.set_setting("traditional_mode", original_traditional_mode)
+                # 按传统象棋规则计算可能的移动
+                moves, capturable = self.rules.calculate_possible_moves(pieces, piece, self.rule_set)
 
                 all_moves = moves + capturable
                 for to_row, to_col in all_moves:
@@ -878,8 +816,8 @@ class ChineseChessSearchAI:
         """评估整个棋盘的状态"""
         score = 0
         for piece in pieces:
-            value = self.piece_values.get(piece.name, 0)
-            pos_value = self._get_position_value_at_pos(piece, piece.row, piece.col) if 0 <= piece.row < 10 and 0 <= piece.col < 9 else 0
+            value = self._get_piece_value(piece)
+            pos_value = self._get_position_value_at_pos(piece, piece.row, piece.col) if GEOMETRY.on_board(piece.row, piece.col) else 0
             piece_score = value + pos_value
 
             if piece.color == player:
@@ -893,7 +831,7 @@ class ChineseChessSearchAI:
         value = 0
 
         # 位置价值
-        if 0 <= to_row < 10 and 0 <= to_col < 9:
+        if GEOMETRY.on_board(to_row, to_col):
             value += self._get_position_value_at_pos(piece, to_row, to_col)
 
         # 棋子安全性：避免被吃
@@ -910,16 +848,13 @@ class ChineseChessSearchAI:
         # 检查是否能攻击对方棋子
         attacked_pieces = self._get_attacked_pieces(pieces, piece, to_row, to_col)
         for attacked_piece in attacked_pieces:
-            value += self.piece_values.get(attacked_piece.name, 0) * 0.8  # 攻击奖励
+            value += self._get_piece_value(attacked_piece) * 0.8  # 攻击奖励
 
         return value
 
     def _get_piece_at(self, pieces, row, col):
         """获取指定位置的棋子"""
-        for piece in pieces:
-            if piece.row == row and piece.col == col:
-                return piece
-        return None
+        return self.rules.get_piece_at(pieces, row, col)
 
     def _would_be_attacked(self, pieces, piece, current_player):
         """检查移动后棋子是否会被攻击"""
@@ -928,14 +863,8 @@ class ChineseChessSearchAI:
         # 检查是否有敌方棋子能攻击到这个位置
         for enemy_piece in pieces:
             if enemy_piece.color == enemy_color:
-                # 在传统象棋模式下计算可能的移动
-                original_traditional_mode = game_config.get_setting("traditional_mode", False)
-                game_config.set_setting("traditional_mode", True)
-
-                moves, capturable = self.rules.calculate_possible_moves(pieces, enemy_piece)
-
-                # 恢复原来的设置
-                game_config.set_setting("traditional_mode", original_traditional_mode)
+                # 按传统象棋规则计算可能的移动
+                moves, capturable = self.rules.calculate_possible_moves(pieces, enemy_piece, self.rule_set)
 
                 all_moves = moves + capturable
                 for move_row, move_col in all_moves:
@@ -949,9 +878,9 @@ class ChineseChessSearchAI:
         enemy_color = "black" if piece.color == "red" else "red"
 
         # 检查这个位置是否能攻击敌方棋子
-        for target_piece in pieces:
-            if target_piece.color == enemy_color and target_piece.row == to_row and target_piece.col == to_col:
-                attacked.append(target_piece)
+        target_piece = self._get_piece_at(pieces, to_row, to_col)
+        if target_piece and target_piece.color == enemy_color:
+            attacked.append(target_piece)
         return attacked
 
     def _get_best_move(self, game_state):
@@ -971,6 +900,10 @@ class ChineseChessSearchAI:
         self.best_move_so_far = None
         self.best_value_so_far = float('-inf')
 
+        # 只在根节点复制一次游戏状态，搜索过程在副本上通过 make_move/unmake_move 原地走子和撤销，
+        # 不影响界面线程正在使用的游戏状态
+        game_state = _clone_game_state(game_state)
+
         # 获取所有可能的走法
         valid_moves = tools.get_valid_moves(game_state, self.ai_color)
 
@@ -1023,19 +956,19 @@ class ChineseChessSearchAI:
                         break
 
                     # 模拟移动
-                    cloned_state = _clone_game_state(game_state)
-                    _make_move(cloned_state, from_pos, to_pos)
+                    game_state.make_move(*from_pos, *to_pos)
 
                     # 根据算法类型选择搜索方法
                     if self.algorithm == "minimax":
-                        value = self._minimax(cloned_state, current_depth - 1, False, start_time)
+                        value = self._minimax(game_state, current_depth - 1, False, start_time)
                         value = -value  # 反转值，因为是对手的回合
                     elif self.algorithm == "alpha-beta":
-                        value = self._alpha_beta_search(cloned_state, current_depth - 1, alpha, beta, False, start_time)
+                        value = self._alpha_beta_search(game_state, current_depth - 1, alpha, beta, False, start_time)
                         value = -value  # 反转值，因为是对手的回合
                     else:  # 默认使用negamax
-                        value = self._negamax_search_with_time(cloned_state, current_depth - 1, -beta, -alpha, False, start_time)
+                        value = self._negamax_search_with_time(game_state, current_depth - 1, -beta, -alpha, False, start_time)
                         value = -value  # 反转值，因为是对手的回合
+                    game_state.unmake_move()
 
                     # 更新最佳走法
                     if value > current_best_value:
@@ -1070,19 +1003,19 @@ class ChineseChessSearchAI:
                     break
 
                 # 模拟移动
-                cloned_state = _clone_game_state(game_state)
-                _make_move(cloned_state, from_pos, to_pos)
+                game_state.make_move(*from_pos, *to_pos)
 
                 # 根据算法类型选择搜索方法
                 if self.algorithm == "minimax":
-                    value = self._minimax(cloned_state, effective_depth - 1, False, start_time)
+                    value = self._minimax(game_state, effective_depth - 1, False, start_time)
                     value = -value  # 反转值，因为是对手的回合
                 elif self.algorithm == "alpha-beta":
-                    value = self._alpha_beta_search(cloned_state, effective_depth - 1, alpha, beta, False, start_time)
+                    value = self._alpha_beta_search(game_state, effective_depth - 1, alpha, beta, False, start_time)
                     value = -value  # 反转值，因为是对手的回合
                 else:  # 默认使用negamax
-                    value = self._negamax_search_with_time(cloned_state, effective_depth - 1, -beta, -alpha, False, start_time)
+                    value = self._negamax_search_with_time(game_state, effective_depth - 1, -beta, -alpha, False, start_time)
                     value = -value  # 反转值，因为是对手的回合
+                game_state.unmake_move()
 
                 # 更新最佳走法
                 if value > best_value:
@@ -1152,12 +1085,16 @@ class ChineseChessSearchAI:
             }
             return value
 
+        # 子力上已是死和的局面（见 program.core.endgame）不再展开
+        if game_state.endgame_verdict(self.rule_set)[0] == DRAW:
+            return 0
+
         # 空着剪枝（Null Move Pruning）
         if depth >= 3 and not _is_in_check_for_current_player(game_state):
-            # 创建一个克隆状态并执行空移动
-            cloned_state = _clone_game_state(game_state)
-            cloned_state.player_turn = "red" if cloned_state.player_turn == "black" else "black"
-            null_score = -self._negamax_search_with_time(cloned_state, depth - 3, -beta, -beta + 1, not is_maximizing, start_time)
+            # 在原局面上执行空移动（只交换走子方），搜索后换回
+            game_state.player_turn = "red" if game_state.player_turn == "black" else "black"
+            null_score = -self._negamax_search_with_time(game_state, depth - 3, -beta, -beta + 1, not is_maximizing, start_time)
+            game_state.player_turn = "red" if game_state.player_turn == "black" else "black"
             if null_score >= beta:
                 return beta
 
@@ -1182,11 +1119,11 @@ class ChineseChessSearchAI:
             if (time.time() - start_time) * 1000 > self.max_think_time:
                 break
 
-            cloned_state = _clone_game_state(game_state)
-            _make_move(cloned_state, from_pos, to_pos)
+            game_state.make_move(*from_pos, *to_pos)
 
             # 递归搜索
-            eval = -self._negamax_search_with_time(cloned_state, depth - 1, -beta, -alpha, not is_maximizing, start_time)
+            eval = -self._negamax_search_with_time(game_state, depth - 1, -beta, -alpha, not is_maximizing, start_time)
+            game_state.unmake_move()
 
             if eval > best_value:
                 best_value = eval
@@ -1239,13 +1176,8 @@ class ChineseChessSearchAI:
             to_row, to_col = to_pos
 
             # 获取移动的棋子和目标棋子
-            moving_piece = None
-            target_piece = None
-            for piece in game_state.pieces:
-                if piece.row == from_row and piece.col == from_col:
-                    moving_piece = piece
-                elif piece.row == to_row and piece.col == to_col:
-                    target_piece = piece
+            moving_piece = game_state.get_piece_at(from_row, from_col)
+            target_piece = game_state.get_piece_at(to_row, to_col)
 
             # 检查是否为杀手着法（导致beta剪枝的走法）
             if (hasattr(self, 'killer_moves') and
@@ -1263,12 +1195,12 @@ class ChineseChessSearchAI:
                 score += mvv_lva_score * 2  # 增加吃子权重
 
             # 模拟移动，检查是否将军
-            cloned_state = _clone_game_state(game_state)
-            _make_move(cloned_state, from_pos, to_pos)
+            game_state.make_move(*from_pos, *to_pos)
 
             opponent_color = "red" if self.ai_color == "black" else "black"
-            if _is_check(cloned_state, opponent_color):
+            if _is_check(game_state, opponent_color):
                 score += 300  # 将军得高分，增加将军权重
+            game_state.unmake_move()
 
             # 位置价值启发：移动到更好位置的加权
             if moving_piece:
@@ -1341,6 +1273,10 @@ class ChineseChessSearchAI:
             }
             return value
 
+        # 子力上已是死和的局面（见 program.core.endgame）不再展开
+        if game_state.endgame_verdict(self.rule_set)[0] == DRAW:
+            return 0
+
         # 获取当前玩家颜色
         if is_maximizing:
             player_color = self.ai_color
@@ -1365,11 +1301,11 @@ class ChineseChessSearchAI:
                 if (time.time() - start_time) * 1000 > self.max_think_time:
                     break
 
-                cloned_state = _clone_game_state(game_state)
-                _make_move(cloned_state, from_pos, to_pos)
+                game_state.make_move(*from_pos, *to_pos)
 
                 # 递归搜索
-                eval = self._alpha_beta_search(cloned_state, depth - 1, alpha, beta, False, start_time)
+                eval = self._alpha_beta_search(game_state, depth - 1, alpha, beta, False, start_time)
+                game_state.unmake_move()
 
                 max_eval = max(max_eval, eval)
                 alpha = max(alpha, eval)
@@ -1397,11 +1333,11 @@ class ChineseChessSearchAI:
                 if (time.time() - start_time) * 1000 > self.max_think_time:
                     break
 
-                cloned_state = _clone_game_state(game_state)
-                _make_move(cloned_state, from_pos, to_pos)
+                game_state.make_move(*from_pos, *to_pos)
 
                 # 递归搜索
-                eval = self._alpha_beta_search(cloned_state, depth - 1, alpha, beta, True, start_time)
+                eval = self._alpha_beta_search(game_state, depth - 1, alpha, beta, True, start_time)
+                game_state.unmake_move()
 
                 min_eval = min(min_eval, eval)
                 beta = min(beta, eval)
@@ -1579,21 +1515,13 @@ class ChineseChessSearchAI:
         # 检查移动棋子后是否暴露了己方其他棋子
         own_pieces_before_move = [p for p in game_state.pieces if p.color == piece.color and p != piece]
 
-        # 创建一个模拟移动后的新状态
-        cloned_state = _clone_game_state(game_state)
-        # 在模拟状态中执行移动
-        for sim_piece in cloned_state.pieces:
-            if sim_piece.row == original_row and sim_piece.col == original_col and sim_piece.color == piece.color:
-                sim_piece.row, sim_piece.col = to_row, to_col
-                break
-
-        # 检查移动后是否暴露了有价值的己方棋子
+        # 棋子已临时移到目标位置，直接在当前局面上检查移动后是否暴露了有价值的己方棋子
         opponent_color = "red" if piece.color == "black" else "black"
-        for opp_piece in cloned_state.pieces:
+        for opp_piece in game_state.pieces:
             if opp_piece.color == opponent_color:
-                possible_moves, capturable = cloned_state.calculate_possible_moves(opp_piece.row, opp_piece.col)
+                possible_moves, capturable = game_state.calculate_possible_moves(opp_piece.row, opp_piece.col)
                 for move_row, move_col in capturable:
-                    target = cloned_state.get_piece_at(move_row, move_col)
+                    target = game_state.get_piece_at(move_row, move_col)
                     if target and target.color == piece.color and target != piece:
                         # 如果移动棋子后暴露了己方其他棋子，扣分
                         risk_value -= self._get_piece_value(target) * 0.3
@@ -1664,11 +1592,7 @@ class ChineseChessSearchAI:
     def _evaluate_king_safety(self, game_state):
         """评估王的安全性"""
         # 找出王
-        king = None
-        for piece in game_state.pieces:
-            if isinstance(piece, King) and piece.color == self.ai_color:
-                king = piece
-                break
+        king = game_state.get_king(self.ai_color)
 
         if not king:
             return -5000  # 没有王，极度危险
@@ -1677,7 +1601,7 @@ class ChineseChessSearchAI:
 
         # 王在九宫格内更安全
         if self.ai_color == "red":
-            if 7 <= king.row <= 9 and 3 <= king.col <= 5:  # 红方王在九宫内
+            if GEOMETRY.in_palace("red", king.row, king.col):  # 红方王在九宫内
                 safety_score += 100
             else:
                 # 王在九宫外，检查周围保护情况
@@ -1692,7 +1616,7 @@ class ChineseChessSearchAI:
                             protected_count += 1
                 safety_score += protected_count * 15
         else:  # black
-            if 0 <= king.row <= 2 and 3 <= king.col <= 5:  # 黑方王在九宫内
+            if GEOMETRY.in_palace("black", king.row, king.col):  # 黑方王在九宫内
                 safety_score += 100
             else:
                 # 王在九宫外，检查周围保护情况
@@ -1724,7 +1648,7 @@ class ChineseChessSearchAI:
         """获取棋子基础价值"""
         if not piece:
             return 0
-        return self.piece_values.get(piece.name, 0)
+        return self.piece_value_table[piece.type_code][piece.color_code]
 
     def _get_position_value(self, piece):
         """获取棋子在特定位置的附加价值"""
@@ -1738,50 +1662,9 @@ class ChineseChessSearchAI:
         if not piece:
             return 0
 
-        # 根据棋子类型选择相应的位置价值表
-        if isinstance(piece, Pawn):
-            if piece.color == "red":
-                return self.pawn_pos_red[row][col]
-            else:
-                return self.pawn_pos_black[row][col]
-
-        elif isinstance(piece, Ju):
-            if piece.color == "red":
-                return self.rook_pos_red[row][col]
-            else:
-                return self.rook_pos_black[row][col]
-
-        elif isinstance(piece, Ma):
-            if piece.color == "red":
-                return self.knight_pos_red[row][col]
-            else:
-                return self.knight_pos_black[row][col]
-
-        elif isinstance(piece, Pao):
-            if piece.color == "red":
-                return self.cannon_pos_red[row][col]
-            else:
-                return self.cannon_pos_black[row][col]
-
-        elif isinstance(piece, Xiang):
-            if piece.color == "red":
-                return self.bishop_pos_red[row][col]
-            else:
-                return self.bishop_pos_black[row][col]
-
-        elif isinstance(piece, Shi):
-            if piece.color == "red":
-                return self.advisor_pos_red[row][col]
-            else:
-                return self.advisor_pos_black[row][col]
-
-        elif isinstance(piece, King):
-            if piece.color == "red":
-                return self.king_pos_red[row][col] + 50  # 王在九宫格内更有价值
-            else:
-                return self.king_pos_black[row][col] + 50
-
-        return self.base_pos_value[row][col]
+        # 按棋子类型和颜色编号查表
+        table, bonus = self.position_tables[piece.type_code][piece.color_code]
+        return table[row][col] + bonus
 
     def _evaluate_piece_threats_simple(self, game_state, piece):
         """简化版：评估棋子受到的威胁"""
@@ -8,9 +8,17 @@ from collections import deque  # 这个队列用来判断长将或长捉
 import numpy as np
 
 import  program.ai.mcts.mcts_config as mcts_config
+from program.core.chess_pieces import XIANG, SHI, KING, WEI, JIA, CI, DUN, XUN
+from program.core.encoding import MCTS_CODES, MCTS_EMPTY
+from program.core.endgame import EndgameTable, DRAW
 
 CONFIG = mcts_config.CONFIG
 
+# 这里的走法只实现了车、马、相、士、将帅、炮、兵、檑、射，将帅和士不出九宫、相不过河，
+# 残局判断时把不能走动或不能威胁对方将帅的棋子都视为无威胁
+ENDGAME_HARMLESS = (XIANG, SHI, KING, WEI, JIA, CI, DUN, XUN)
+_endgame_table = None
+
 
 # 边界检查
 def check_bounds(toY, toX):
@@ -753,6 +761,24 @@ def is_isolated(state_list, row, col):
     return True
 
 
+def count_material(state_list):
+    """统计棋盘上各方各类棋子的数量（子力签名的可变形式，见 program.core.endgame）"""
+    material = bytearray(len(MCTS_CODES) - 1)
+    for row in state_list:
+        for name in row:
+            if name != MCTS_EMPTY:
+                material[MCTS_CODES[name] - 1] += 1
+    return material
+
+
+def get_endgame_table():
+    """本走法规则下的残局分类表（首次使用时生成）"""
+    global _endgame_table
+    if _endgame_table is None:
+        _endgame_table = EndgameTable(ENDGAME_HARMLESS)
+    return _endgame_table
+
+
 # 棋盘逻辑控制
 class Board(object):
 
@@ -763,6 +789,8 @@ class Board(object):
         self.state_deque = copy.deepcopy(state_deque_init)
         self.last_move = -1  # 添加缺失的属性
         self.kill_action = 0  # 添加缺失的属性
+        self.backhand_player = 2  # 后手玩家，init_board 时按先手玩家重新设置
+        self.material = count_material(self.state_list)  # 各类棋子数量，吃子时增量更新
 
     # 初始化棋盘的方法
     def init_board(self, start_player=1):  # 传入先手玩家的id
@@ -788,6 +816,7 @@ class Board(object):
         self.last_move = -1
         # 记录游戏中吃子的回合数
         self.kill_action = 0
+        self.material = count_material(self.state_list)
         self.game_start = False
         self.action_count = 0  # 游戏动作计数器
         self.winner = None
@@ -841,6 +870,7 @@ class Board(object):
         if state_list[end_y][end_x] != '一一':
             # 如果吃掉对方的帅，则返回当前的current_player胜利
             self.kill_action = 0
+            self.material[MCTS_CODES[state_list[end_y][end_x]] - 1] -= 1
             if self.current_player_color == '黑' and '红漢' in state_list[end_y][end_x]:
                 self.winner = self.color2id['黑']
             elif self.current_player_color == '红' and '黑汗' in state_list[end_y][end_x]:
@@ -864,8 +894,14 @@ class Board(object):
         elif self.kill_action >= CONFIG['kill_action']:  # 平局先手判负
             # return False, -1
             return True, self.backhand_player
+        elif self.is_dead_draw():  # 子力上已是死和，不必等到和棋回合数，同样先手判负
+            return True, self.backhand_player
         return False, -1
 
+    def is_dead_draw(self):
+        """按子力查询残局分类表，双方都不可能取胜时提前结束自我对弈"""
+        return get_endgame_table().classify(bytes(self.material))[0] == DRAW
+
     # 检查当前棋局是否结束
     def game_end(self):
         win, winner = self.has_a_winner()
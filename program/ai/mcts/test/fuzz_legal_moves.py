@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+合法走法差分模糊测试：对比游戏本体与MCTS规则实现给出的合法走法
+
+随机对局在游戏本体（GameState）中进行，每一步都经 XionghanChessMctsAdapter 转换为MCTS棋盘，
+分别取两个引擎的合法走法，记录走法集合不一致的每一个局面；比较MCTS时同一步走法也在MCTS棋盘上执行，
+走后局面与本体不一致（如甲/胄连线吃子、刺的兑子）时同样记录，并从本体局面重新同步。
+
+可比较的引擎：
+  - rules: GameRules 逐格校验（program.core.perft.rules_legal_moves），作为参照
+  - generator: program.core.move_generator 走法生成器
+  - mcts: program.ai.mcts.mcts_game.get_legal_moves
+
+每局的随机种子由 --seed 与对局编号决定，记录中的 moves 可以复现到出现差异的局面。
+使用多进程并行对局，适合长时间运行大量局面。
+
+用法:
+    python -m program.ai.mcts.test.fuzz_legal_moves --games 100 --workers 8
+    python -m program.ai.mcts.test.fuzz_legal_moves --engines generator rules --games 1000
+    python -m program.ai.mcts.test.fuzz_legal_moves --output diffs.jsonl
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import random
+import sys
+import time
+from collections import Counter
+
+from program.ai.mcts.mcts_game import change_state, move_id2move_action
+from program.ai.xionghan_chess_mcts_adapter import XionghanChessMctsAdapter, convert_move_format
+from program.core import perft
+
+ENGINES = ("rules", "generator", "mcts")
+
+_adapter = None  # 每个工作进程一个适配器
+
+
+def _get_adapter():
+    global _adapter
+    if _adapter is None:
+        _adapter = XionghanChessMctsAdapter()
+    return _adapter
+
+
+def engine_moves(engine, game_state, mcts_board):
+    """指定引擎在当前局面下的合法走法集合 {(from_row, from_col, to_row, to_col), ...}"""
+    if engine == "rules":
+        return set(perft.rules_legal_moves(game_state))
+    if engine == "generator":
+        return set(perft.legal_moves(game_state))
+    moves = set()
+    for move_id in mcts_board.availables:
+        action = move_id2move_action[move_id]
+        moves.add((int(action[0:2]), int(action[2:4]), int(action[4:6]), int(action[6:8])))
+    return moves
+
+
+def _describe(state_list, moves):
+    """走法列表附带走子的棋子名称（MCTS棋盘上的名称）"""
+    return [[state_list[move[0]][move[1]], *move] for move in sorted(moves)]
+
+
+def fuzz_game(task):
+    """进行一局随机对局，返回 (局面数, 差异记录列表)
+
+    Args:
+        task (tuple): (对局编号, 随机种子, 比较的两个引擎, 每局最多步数)
+    """
+    game_index, seed, engines, max_plies = task
+    adapter = _get_adapter()
+    rnd = random.Random(f"{seed}:{game_index}")
+    engine_a, engine_b = engines
+    positions = 0
+    diffs = []
+    history = []
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        game_state = perft.create_position("xionghan")
+        mcts_state = adapter.convert_to_mcts_board(game_state).state_list
+        for ply in range(max_plies):
+            if game_state.game_over:
+                break
+            # 合法走法对比使用由本体局面重新转换的棋盘（历史局面相同，不触发MCTS的重复局面过滤）
+            mcts_board = adapter.convert_to_mcts_board(game_state)
+            moves_a = engine_moves(engine_a, game_state, mcts_board)
+            moves_b = engine_moves(engine_b, game_state, mcts_board)
+            positions += 1
+            state_list = mcts_board.state_list
+            if moves_a != moves_b:
+                diffs.append({
+                    "kind": "moves",
+                    "game": game_index,
+                    "ply": ply,
+                    "player": game_state.player_turn,
+                    "moves": list(history),
+                    f"only_{engine_a}": _describe(state_list, moves_a - moves_b),
+                    f"only_{engine_b}": _describe(state_list, moves_b - moves_a),
+                })
+
+            # 本体的合法走法作为对局的走法来源
+            candidates = sorted(moves_a if engine_a != "mcts" else moves_b)
+            if not candidates:
+                break
+            move = rnd.choice(candidates)
+            piece_name = state_list[move[0]][move[1]]
+            game_state.make_move(*move)
+            history.append(list(move))
+
+            if "mcts" not in engines:
+                continue
+            # 同一步在MCTS棋盘上执行，对比走后局面
+            mcts_state = change_state(mcts_state, convert_move_format(move[:2], move[2:]))
+            synced_state = adapter.convert_to_mcts_board(game_state).state_list
+            if mcts_state != synced_state:
+                diffs.append({
+                    "kind": "result",
+                    "game": game_index,
+                    "ply": ply,
+                    "player": "black" if game_state.player_turn == "red" else "red",
+                    "moves": list(history),
+                    "piece": piece_name,
+                    "squares": [[row, col, mcts_state[row][col], synced_state[row][col]]
+                                for row in range(13) for col in range(13)
+                                if mcts_state[row][col] != synced_state[row][col]],
+                })
+                mcts_state = synced_state
+    return positions, diffs
+
+
+def summarize(diffs, engines):
+    """按棋子统计差异走法的数量"""
+    counter = Counter()
+    for diff in diffs:
+        if diff["kind"] == "result":
+            counter[("走后局面不同", diff["piece"])] += 1
+            continue
+        for engine in engines:
+            for move in diff[f"only_{engine}"]:
+                counter[(f"仅{engine}", move[0])] += 1
+    return counter
+
+
+def run_fuzz(games=100, workers=None, seed=0, engines=("rules", "mcts"), max_plies=120,
+             output=None, out=sys.stdout):
+    """运行差分模糊测试
+
+    Args:
+        games (int): 对局数
+        workers (int): 工作进程数，默认为CPU核数，1 表示在当前进程中运行
+        seed (int): 随机种子
+        engines (tuple): 比较的两个引擎
+        max_plies (int): 每局最多步数
+        output (str): 差异记录的输出文件（JSON Lines），默认不写文件
+        out: 输出流
+
+    Returns:
+        tuple: (局面数, 有差异的局面数)
+    """
+    tasks = [(index, seed, tuple(engines), max_plies) for index in range(games)]
+    workers = workers or multiprocessing.cpu_count()
+    start = time.perf_counter()
+    positions = 0
+    diff_positions = set()
+    counter = Counter()
+    report = open(output, "w", encoding="utf-8") if output else None
+    try:
+        if workers == 1:
+            results = map(fuzz_game, tasks)
+            pool = None
+        else:
+            pool = multiprocessing.Pool(workers)
+            results = pool.imap_unordered(fuzz_game, tasks, chunksize=max(1, games // (workers * 8)))
+        for finished, (game_positions, diffs) in enumerate(results, start=1):
+            positions += game_positions
+            diff_positions.update((diff["game"], diff["ply"]) for diff in diffs)
+            counter.update(summarize(diffs, engines))
+            if report:
+                for diff in diffs:
+                    report.write(json.dumps(diff, ensure_ascii=False) + "\n")
+            if finished % 100 == 0:
+                print(f"已完成 {finished}/{games} 局, {positions} 个局面, "
+                      f"{len(diff_positions)} 个局面有差异", file=out)
+        if pool:
+            pool.close()
+            pool.join()
+    finally:
+        if report:
+            report.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"{engines[0]} vs {engines[1]}: {games} 局, {positions} 个局面, {len(diff_positions)} 个局面有差异 "
+          f"({elapsed:.1f}s, {positions / elapsed if elapsed > 0 else 0:.0f} 局面/s)", file=out)
+    for (kind, piece), count in counter.most_common():
+        print(f"  {kind} {piece}: {count}", file=out)
+    return positions, len(diff_positions)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="游戏本体与MCTS规则实现的合法走法差分模糊测试")
+    parser.add_argument("--games", type=int, default=100, help="随机对局数")
+    parser.add_argument("--workers", type=int, help="工作进程数，默认为CPU核数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--engines", nargs=2, choices=ENGINES, default=["rules", "mcts"],
+                        help="比较的两个引擎，对局走法取自第一个非mcts引擎")
+    parser.add_argument("--max-plies", type=int, default=120, help="每局最多步数")
+    parser.add_argument("--output", help="差异记录输出文件（JSON Lines）")
+    args = parser.parse_args(argv)
+    if args.engines[0] == args.engines[1]:
+        parser.error("需要两个不同的引擎")
+
+    _, diff_count = run_fuzz(args.games, args.workers, args.seed, args.engines, args.max_plies, args.output)
+    return 1 if diff_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,27 +7,23 @@
 import random
 from typing import Tuple, Optional
 
-from program.ai.mcts.mcts_game import Game
-from program.core.chess_pieces import Ju, Ma, Xiang, Shi, King, Pao, Pawn, Lei, She, Xun, Wei, \
-    Jia, Ci, Dun
+from program.ai.mcts.mcts_game import Game, Board, move_id2move_action, move_action2move_id
+from program.core.chess_pieces import PIECE_CLASS_BY_NAME
+from program.core.encoding import position_to_state_list, positions_to_move, move_to_action
 from program.core.game_state import GameState
-from program.utils import tools
+from program.core.move_generator import generate_legal_moves
 
 # 添加MCTS和神经网络相关导入
 try:
     from program.ai.mcts.mcts import MCTSPlayer
     from program.ai.mcts.pytorch_net import PolicyValueNet
     from program.ai.mcts.mcts_config import CONFIG as MCTS_CONFIG
-    from program.ai.mcts.mcts_game import Board, move_id2move_action, move_action2move_id
     MCTS_AVAILABLE = True
 except ImportError:
     MCTS_AVAILABLE = False
     MCTSPlayer = None  # 确保 MCTSPlayer 在 except 块中已定义
     PolicyValueNet = None  # 确保其他 MCTS 相关类也已定义
     MCTS_CONFIG = None
-    Board = None
-    move_id2move_action = {}
-    move_action2move_id = {}
     print("Warning: MCTS modules not available. Only traditional algorithms will be supported.")
 
 
@@ -57,9 +53,10 @@ def _get_random_valid_move(game_state: GameState) -> Optional[Tuple[Tuple[int, i
         tuple: ((from_row, from_col), (to_row, to_col)) 表示移动的起点和终点
     """
     # 获取所有有效移动
-    valid_moves = tools.get_valid_moves(game_state, game_state.player_turn)
+    valid_moves = generate_legal_moves(game_state, game_state.player_turn)
     if valid_moves:
-        return random.choice(valid_moves)
+        move = random.choice(valid_moves)
+        return (move.from_row, move.from_col), (move.to_row, move.to_col)
     return None
 
 
@@ -71,10 +68,8 @@ def convert_game_move_to_mcts_format(from_pos, to_pos):
         to_pos: 目标位置 (row, col)
 
     Returns:
-        int: MCTS移动ID
+        int: MCTS移动ID，不在MCTS动作空间内时为None
     """
-    if not MCTS_AVAILABLE:
-        return None
     # 使用convert_move_format函数生成移动字符串
     move_str = convert_move_format(from_pos, to_pos)
     if move_str in move_action2move_id:
@@ -109,9 +104,9 @@ def validate_move(game_state: GameState, from_pos: Tuple[int, int], to_pos: Tupl
     if piece.color != game_state.player_turn:
         return False
 
-    # 使用游戏规则验证移动
-    from program.core.game_rules import GameRules
-    return GameRules.is_valid_move(game_state.pieces, piece, from_row, from_col, to_row, to_col)
+    # 使用合法走法生成器验证移动（同时排除送将的走法）
+    return any(move.to_row == to_row and move.to_col == to_col
+               for move in generate_legal_moves(game_state, piece.color, piece))
 
 
 
@@ -125,24 +120,7 @@ def get_piece_class_by_name(name: str):
     Returns:
         class: 棋子类
     """
-    piece_classes = {
-        '車': Ju, '俥': Ju,
-        '馬': Ma, '傌': Ma,
-        '象': Xiang, '相': Xiang,
-        '士': Shi, '仕': Shi,
-        '汗': King, '漢': King,
-        '砲': Pao, '炮': Pao,
-        '卒': Pawn, '兵': Pawn,
-        '礌': Lei, '檑': Lei,
-        '䠶': She, '射': She,
-        '廵': Xun, '巡': Xun,
-        '衛': Wei, '尉': Wei,
-        '胄': Jia, '甲': Jia,
-        '刺': Ci, '伺': Ci,
-        '楯': Dun, '碷': Dun
-    }
-
-    return piece_classes.get(name)
+    return PIECE_CLASS_BY_NAME.get(name)
 
 
 def convert_move_format(from_pos: Tuple[int, int], to_pos: Tuple[int, int]) -> str:
@@ -155,12 +133,7 @@ def convert_move_format(from_pos: Tuple[int, int], to_pos: Tuple[int, int]) -> s
     Returns:
         str: MCTS格式的移动字符串
     """
-    from_row, from_col = from_pos
-    to_row, to_col = to_pos
-
-    # 生成MCTS格式的移动字符串
-    move_action = f"{from_row:02d}{from_col:02d}{to_row:02d}{to_col:02d}"
-    return move_action
+    return move_to_action(positions_to_move(from_pos, to_pos))
 
 def get_mcts_player(policy_value_function, c_puct: float = 5, n_playout: int = 2000, is_selfplay: int = 0):
     """获取MCTS玩家实例
@@ -249,19 +222,16 @@ class XionghanChessMctsAdapter:
         self.piece_name_mapping = GAME_TO_MCTS_NAME_MAP
         self.reverse_piece_name_mapping = MCTS_TO_GAME_NAME_MAP
 
-        # 特殊规则设置，从游戏配置中获取
-        from program.controllers.game_config_manager import game_config
-        self.king_can_leave_palace = game_config.get_setting("king_can_leave_palace", True)  # 汉/汗是否可以出九宫
-        self.king_lose_diagonal_outside_palace = game_config.get_setting("king_lose_diagonal_outside_palace",
-                                                                         True)  # 汉/汗出九宫后是否失去斜走能力
-        self.king_can_diagonal_in_palace = game_config.get_setting("king_can_diagonal_in_palace", True)  # 汉/汗在九宫内是否可以斜走
-        self.shi_can_leave_palace = game_config.get_setting("shi_can_leave_palace", True)  # 士是否可以出九宫
-        self.shi_gain_straight_outside_palace = game_config.get_setting("shi_gain_straight_outside_palace",
-                                                                        True)  # 士出九宫后是否获得直走能力
-        self.xiang_can_cross_river = game_config.get_setting("xiang_can_cross_river", True)  # 相是否可以过河
-        self.xiang_gain_jump_two_outside_river = game_config.get_setting("xiang_gain_jump_two_outside_river",
-                                                                         True)  # 相过河后是否获得隔两格吃子能力
-        self.ma_can_straight_three = game_config.get_setting("ma_can_straight_three", True)  # 马是否可以获得直走三格的能力
+        # 特殊规则设置，从对局规则中获取
+        rule_set = self.game_state.rule_set
+        self.king_can_leave_palace = rule_set.king_can_leave_palace  # 汉/汗是否可以出九宫
+        self.king_lose_diagonal_outside_palace = rule_set.king_lose_diagonal_outside_palace  # 汉/汗出九宫后是否失去斜走能力
+        self.king_can_diagonal_in_palace = rule_set.king_can_diagonal_in_palace  # 汉/汗在九宫内是否可以斜走
+        self.shi_can_leave_palace = rule_set.shi_can_leave_palace  # 士是否可以出九宫
+        self.shi_gain_straight_outside_palace = rule_set.shi_gain_straight_outside_palace  # 士出九宫后是否获得直走能力
+        self.xiang_can_cross_river = rule_set.xiang_can_cross_river  # 相是否可以过河
+        self.xiang_gain_jump_two_outside_river = rule_set.xiang_gain_jump_two_outside_river  # 相过河后是否获得隔两格吃子能力
+        self.ma_can_straight_three = rule_set.ma_can_straight_three  # 马是否可以获得直走三格的能力
 
     def convert_to_mcts_board(self, game_state: GameState) -> Board:
         """将游戏本体的GameState转换为MCTS的Board
@@ -272,23 +242,15 @@ class XionghanChessMctsAdapter:
         Returns:
             Board: MCTS的Board对象
         """
-        if not MCTS_AVAILABLE:
-            raise RuntimeError("MCTS modules not available")
-        
         from collections import deque
 
         # 创建MCTS Board实例
         mcts_board = Board()
 
-        # 将游戏状态复制到MCTS Board
-        # 首先清空MCTS Board的初始状态
-        mcts_board.state_list = [['一一' for _ in range(13)] for _ in range(13)]
-
-        # 将游戏本体的棋子复制到MCTS棋盘
-        for piece in game_state.pieces:
-            # 转换棋子名称
-            mcts_name = self._convert_piece_name(piece.name, piece.color)
-            mcts_board.state_list[piece.row][piece.col] = mcts_name
+        # 由局面的紧凑编码直接生成MCTS棋盘
+        position = game_state.encode_position()
+        mcts_board.state_list = position_to_state_list(position)
+        mcts_board.material = bytearray(game_state.material_signature)
 
         # 设置当前玩家颜色
         mcts_board.current_player_color = '红' if game_state.player_turn == 'red' else '黑'
@@ -305,11 +267,7 @@ class XionghanChessMctsAdapter:
         mcts_board.state_deque = deque(maxlen=4)
         for _ in range(4):
             # 添加当前状态的副本
-            current_state_copy = [['一一' for _ in range(13)] for _ in range(13)]
-            for piece in game_state.pieces:
-                mcts_name = self._convert_piece_name(piece.name, piece.color)
-                current_state_copy[piece.row][piece.col] = mcts_name
-            mcts_board.state_deque.append(current_state_copy)
+            mcts_board.state_deque.append(position_to_state_list(position))
 
         return mcts_board
 
@@ -351,6 +309,7 @@ class XionghanChessMctsAdapter:
         self.mcts_board.state_list = board_state
         if len(self.mcts_board.state_deque) > 0:
             self.mcts_board.state_deque[-1] = board_state
+        self.mcts_board.material = bytearray(game_state_obj.material_signature)
 
         # 设置当前玩家
         self.mcts_board.current_player_id = 1 if game_state_obj.player_turn == 'red' else 2
@@ -397,12 +356,6 @@ class XionghanChessMctsAdapter:
                     # 查找游戏本体的棋子名称
                     game_piece_name = self.reverse_piece_name_mapping.get(mcts_piece, piece_type)
 
-                    # 根据棋子名称创建对应类型的棋子对象
-                    from program.core.chess_pieces import (
-                        Ju, Ma, Xiang, Shi, King, Pao, Pawn,
-                        She, Lei, Xun, Wei, Jia, Ci, Dun
-                    )
-
                     # 根据棋子名称创建对应的棋子类
                     piece_class = get_piece_class_by_name(game_piece_name)
                     if piece_class:
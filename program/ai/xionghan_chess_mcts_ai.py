@@ -74,7 +74,7 @@ class XionghanChessMctsAI(BaseAI):
         """异步获取AI的最佳走法，启动多线程计算
 
         Args:
-            game_state: GameState对象，表示当前棋盘状态
+            game_state: GameState对象或其局面快照（PositionSnapshot），表示当前棋盘状态
         """
         # 重置状态
         self.computed_move = None
@@ -102,6 +102,8 @@ class XionghanChessMctsAI(BaseAI):
 
     def _compute_move(self, game_state):
         """在单独线程中计算最佳走法"""
+        # 传入的可能是局面快照，在工作线程中生成独立的游戏状态
+        game_state = game_state.clone()
         try:
             # 执行实际的AI计算
             self.computed_move = self._get_best_move(game_state)
@@ -4,10 +4,12 @@ import random
 import threading
 import time
 
+from program.core.endgame import DRAW
 from program.core.game_rules import GameRules
-from program.controllers.game_config_manager import game_config
+from program.core.rule_set import current_rule_set
 from program.utils import tools
-from program.core.chess_pieces import Ju, Ma, Xiang, Shi, King, Pao, Pawn, Wei, She, Lei, Jia, Ci, Dun
+from program.core.chess_pieces import Ju, Xiang, King, Pao, Wei, Lei, Jia, Ci, Dun, \
+    JU, MA, XIANG, SHI, KING, PAO, PAWN, WEI, SHE, LEI, JIA, PIECE_TYPE_COUNT, piece_type_table
 
 
 def _can_capture_simple(game_state, attacker, target):
@@ -75,11 +77,7 @@ def _evaluate_piece_coordination_simple(game_state, color):
 def _evaluate_king_safety_simple(game_state, color):
     """简化版：评估王的安全性"""
     # 找出王
-    king = None
-    for piece in game_state.pieces:
-        if isinstance(piece, King) and piece.color == color:
-            king = piece
-            break
+    king = game_state.get_king(color)
 
     if not king:
         return -500  # 没有王，非常危险
@@ -521,53 +519,9 @@ def _clone_game_state(game_state):
     return game_state.clone()
 
 
-def _make_move(game_state, from_pos, to_pos):
-    """在克隆的游戏状态中执行移动"""
-    from_row, from_col = from_pos
-    to_row, to_col = to_pos
-
-    # 找出要移动的棋子
-    moving_piece = None
-    for piece in game_state.pieces:
-        if piece.row == from_row and piece.col == from_col:
-            moving_piece = piece
-            break
-
-    if not moving_piece:
-        return False
-
-    # 查找目标位置是否有棋子（吃子）
-    target_piece = None
-    for piece in game_state.pieces:
-        if piece.row == to_row and piece.col == to_col:
-            target_piece = piece
-            break
-
-    # 如果有目标棋子，从列表中移除
-    if target_piece:
-        game_state.pieces.remove(target_piece)
-
-    # 更新棋子位置
-    moving_piece.row = to_row
-    moving_piece.col = to_col
-
-    # 切换回合
-    game_state.player_turn = "red" if game_state.player_turn == "black" else "black"
-
-    # 更新将军状态
-    game_state.is_check = False  # 在实际游戏中这个会根据规则更新，这里简化处理
-
-    return True
-
-
 def _get_state_key(game_state):
-    """生成棋盘状态的唯一键，用于置换表"""
-    # 简单实现，使用棋子位置组合
-    pieces_str = ""
-    for piece in sorted(game_state.pieces, key=lambda p: (p.color, p.name, p.row, p.col)):
-        pieces_str += f"{piece.name}:{piece.color}:{piece.row}:{piece.col}|"
-
-    return pieces_str + game_state.player_turn
+    """生成棋盘状态的唯一键，用于置换表（使用游戏状态增量维护的Zobrist键）"""
+    return game_state.zobrist_key
 
 
 class XionghanChessSearchAI:
@@ -583,6 +537,7 @@ class XionghanChessSearchAI:
         self.algorithm = algorithm.lower()
         self.ai_color = ai_color
         self.rules = GameRules()
+        self.rule_set = current_rule_set()  # 对局规则，每次计算前从游戏状态获取
         self.lock = threading.Lock()  # 添加锁用于线程安全
 
         # 添加多线程相关属性
@@ -646,6 +601,8 @@ class XionghanChessSearchAI:
             "刺": 250, "伺": 250,  # 刺（兑子）
             "楯": 300, "碷": 250,  # 盾（保护价值）
         }
+        # 按 [type_code][color_code] 索引的棋子价值（由上面按名称的价值表生成）
+        self.piece_value_table = piece_type_table(self.piece_values)
 
         # 位置价值表
         self._init_position_tables()
@@ -780,17 +737,33 @@ class XionghanChessSearchAI:
         self.armor_pos_red = [row[:] for row in base_pos_value]
         self.armor_pos_black = [row[:] for row in base_pos_value]
 
+        # 按 [type_code][color_code] 索引的(位置价值表, 附加分)，未单独设置的棋子使用基础位置价值
+        base_entry = (self.base_pos_value, 0)
+        self.position_tables = [[base_entry, base_entry] for _ in range(PIECE_TYPE_COUNT)]
+        self.position_tables[PAWN] = [(self.pawn_pos_red, 0), (self.pawn_pos_black, 0)]
+        self.position_tables[JU] = [(self.rook_pos_red, 0), (self.rook_pos_black, 0)]
+        self.position_tables[MA] = [(self.knight_pos_red, 0), (self.knight_pos_black, 0)]
+        self.position_tables[PAO] = [(self.cannon_pos_red, 0), (self.cannon_pos_black, 0)]
+        self.position_tables[XIANG] = [(self.bishop_pos_red, 0), (self.bishop_pos_black, 0)]
+        self.position_tables[SHI] = [(self.advisor_pos_red, 0), (self.advisor_pos_black, 0)]
+        self.position_tables[KING] = [(self.base_pos_value, 50), (self.base_pos_value, 50)]  # 王在九宫格内更有价值
+        self.position_tables[WEI] = [(self.guard_pos_red, 0), (self.guard_pos_black, 0)]
+        self.position_tables[SHE] = [(self.archer_pos_red, 0), (self.archer_pos_black, 0)]
+        self.position_tables[LEI] = [(self.rock_pos_red, 0), (self.rock_pos_black, 0)]
+        self.position_tables[JIA] = [(self.armor_pos_red, 0), (self.armor_pos_black, 0)]
+
     def get_move_async(self, game_state):
         """异步获取AI的最佳走法，启动多线程计算
 
         Args:
-            game_state: GameState对象，表示当前棋盘状态
+            game_state: GameState对象或其局面快照（PositionSnapshot），表示当前棋盘状态
         """
         # 重置状态
         self.computed_move = None
         self.computation_finished = False
         self.best_move_so_far = None
         self.best_value_so_far = float('-inf')
+        self.rule_set = game_state.rule_set
 
         # 启动一个线程来执行AI计算
         self.ai_thread = threading.Thread(target=self._compute_move, args=(game_state,))
@@ -831,6 +804,7 @@ class XionghanChessSearchAI:
         """
         pieces = game_state.pieces
         current_player = game_state.player_turn
+        self.rule_set = game_state.rule_set
 
         # 根据算法类型选择不同的策略
         if self.algorithm == "minimax":
@@ -887,7 +861,7 @@ class XionghanChessSearchAI:
         # 优先选择吃子移动
         if capture_moves:
             # 按照被吃棋子的价值排序，优先吃价值高的棋子
-            capture_moves.sort(key=lambda x: self.piece_values.get(x[3].name, 0), reverse=True)
+            capture_moves.sort(key=lambda x: self._get_piece_value(x[3]), reverse=True)
             best_capture = capture_moves[0]
             return best_capture[0], best_capture[1], best_capture[2]
 
@@ -929,6 +903,10 @@ class XionghanChessSearchAI:
         self.best_move_so_far = None
         self.best_value_so_far = float('-inf')
 
+        # 只在根节点复制一次游戏状态，搜索过程在副本上通过 make_move/unmake_move 原地走子和撤销，
+        # 不影响界面线程正在使用的游戏状态
+        game_state = _clone_game_state(game_state)
+
         # 获取所有可能的走法
         valid_moves = tools.get_valid_moves(game_state, self.ai_color)
 
@@ -981,19 +959,19 @@ class XionghanChessSearchAI:
                         break
 
                     # 模拟移动
-                    cloned_state = _clone_game_state(game_state)
-                    _make_move(cloned_state, from_pos, to_pos)
+                    game_state.make_move(*from_pos, *to_pos)
 
                     # 根据算法类型选择搜索方法
                     if self.algorithm == "minimax":
-                        value = self._minimax(cloned_state, current_depth - 1, False, start_time)
+                        value = self._minimax(game_state, current_depth - 1, False, start_time)
                         value = -value  # 反转值，因为是对手的回合
                     elif self.algorithm == "alpha-beta":
-                        value = self._alpha_beta_search(cloned_state, current_depth - 1, alpha, beta, False, start_time)
+                        value = self._alpha_beta_search(game_state, current_depth - 1, alpha, beta, False, start_time)
                         value = -value  # 反转值，因为是对手的回合
                     else:  # 默认使用negamax
-                        value = self._negamax(cloned_state, current_depth - 1, -beta, -alpha, False, start_time)
+                        value = self._negamax(game_state, current_depth - 1, -beta, -alpha, False, start_time)
                         value = -value  # 反转值，因为是对手的回合
+                    game_state.unmake_move()
 
                     # 更新最佳走法
                     if value > current_best_value:
@@ -1028,19 +1006,19 @@ class XionghanChessSearchAI:
                     break
 
                 # 模拟移动
-                cloned_state = _clone_game_state(game_state)
-                _make_move(cloned_state, from_pos, to_pos)
+                game_state.make_move(*from_pos, *to_pos)
 
                 # 根据算法类型选择搜索方法
                 if self.algorithm == "minimax":
-                    value = self._minimax(cloned_state, effective_depth - 1, False, start_time)
+                    value = self._minimax(game_state, effective_depth - 1, False, start_time)
                     value = -value  # 反转值，因为是对手的回合
                 elif self.algorithm == "alpha-beta":
-                    value = self._alpha_beta_search(cloned_state, effective_depth - 1, alpha, beta, False, start_time)
+                    value = self._alpha_beta_search(game_state, effective_depth - 1, alpha, beta, False, start_time)
                     value = -value  # 反转值，因为是对手的回合
                 else:  # 默认使用negamax
-                    value = self._negamax(cloned_state, effective_depth - 1, -beta, -alpha, False, start_time)
+                    value = self._negamax(game_state, effective_depth - 1, -beta, -alpha, False, start_time)
                     value = -value  # 反转值，因为是对手的回合
+                game_state.unmake_move()
 
                 # 更新最佳走法
                 if value > best_value:
@@ -1116,11 +1094,11 @@ class XionghanChessSearchAI:
                 if (time.time() - start_time) * 1000 > self.max_think_time:
                     break
 
-                cloned_state = _clone_game_state(game_state)
-                _make_move(cloned_state, from_pos, to_pos)
+                game_state.make_move(*from_pos, *to_pos)
 
                 # 递归搜索
-                eval = self._minimax(cloned_state, depth - 1, False, start_time)
+                eval = self._minimax(game_state, depth - 1, False, start_time)
+                game_state.unmake_move()
 
                 max_eval = max(max_eval, eval)
 
@@ -1132,11 +1110,11 @@ class XionghanChessSearchAI:
                 if (time.time() - start_time) * 1000 > self.max_think_time:
                     break
 
-                cloned_state = _clone_game_state(game_state)
-                _make_move(cloned_state, from_pos, to_pos)
+                game_state.make_move(*from_pos, *to_pos)
 
                 # 递归搜索
-                eval = self._minimax(cloned_state, depth - 1, True, start_time)
+                eval = self._minimax(game_state, depth - 1, True, start_time)
+                game_state.unmake_move()
 
                 min_eval = min(min_eval, eval)
 
@@ -1162,15 +1140,13 @@ class XionghanChessSearchAI:
 
         for move in moves:
             # 执行移动
-            original_pieces = self._copy_pieces(game_state.pieces)
-            game_state.move_piece(move[0], move[1], move[2], move[3])
+            game_state.make_move(move[0], move[1], move[2], move[3])
 
             value, _ = self._negamax(game_state, depth - 1, -color)
             value = -value  # Negamax的关键：翻转值
 
             # 撤销移动
-            game_state.pieces = original_pieces
-            game_state.update_pieces_positions(original_pieces)
+            game_state.unmake_move()
 
             if value > max_value:
                 max_value = value
@@ -1196,14 +1172,12 @@ class XionghanChessSearchAI:
             moves = self._get_all_possible_moves(game_state, self.ai_color)
             for move in moves:
                 # 执行移动
-                original_pieces = self._copy_pieces(game_state.pieces)
-                game_state.move_piece(move[0], move[1], move[2], move[3])
+                game_state.make_move(move[0], move[1], move[2], move[3])
 
                 eval_score, _ = self._alpha_beta(game_state, depth - 1, alpha, beta, False)
 
                 # 撤销移动
-                game_state.pieces = original_pieces
-                game_state.update_pieces_positions(original_pieces)
+                game_state.unmake_move()
 
                 if eval_score > max_eval:
                     max_eval = eval_score
@@ -1219,14 +1193,12 @@ class XionghanChessSearchAI:
             moves = self._get_all_possible_moves(game_state, opponent_color)
             for move in moves:
                 # 执行移动
-                original_pieces = self._copy_pieces(game_state.pieces)
-                game_state.move_piece(move[0], move[1], move[2], move[3])
+                game_state.make_move(move[0], move[1], move[2], move[3])
 
                 eval_score, _ = self._alpha_beta(game_state, depth - 1, alpha, beta, True)
 
                 # 撤销移动
-                game_state.pieces = original_pieces
-                game_state.update_pieces_positions(original_pieces)
+                game_state.unmake_move()
 
                 if eval_score < min_eval:
                     min_eval = eval_score
@@ -1250,28 +1222,14 @@ class XionghanChessSearchAI:
         return moves
 
     def _get_piece_possible_moves(self, pieces, piece):
-        """获取棋子的所有可能移动"""
-        # 根据当前的游戏模式来确定使用哪种规则
-        is_traditional_mode = game_config.get_setting("traditional_mode", False)
-
-        # 临时保存当前的传统模式设置
-        original_traditional_mode = game_config.get_setting("traditional_mode", False)
-        # 设置为当前游戏模式以获取正确的移动规则
-        game_config.set_setting("traditional_mode", is_traditional_mode)
-
-        # 获取可能的移动
-        moves, capturable = self.rules.calculate_possible_moves(pieces, piece)
-
-        # 恢复原始模式设置
-        game_config.set_setting("traditional_mode", original_traditional_mode)
-
-        return moves, capturable
+        """获取棋子的所有可能移动（按当前对局的规则）"""
+        return self.rules.calculate_possible_moves(pieces, piece, self.rule_set)
 
     def _evaluate_state(self, game_state):
         """评估游戏状态"""
         score = 0
         for piece in game_state.pieces:
-            value = self.piece_values.get(piece.name, 0)
+            value = self._get_piece_value(piece)
             piece_score = value
 
             if piece.color == self.ai_color:
@@ -1280,20 +1238,10 @@ class XionghanChessSearchAI:
                 score -= piece_score
         return score
 
-    def _copy_pieces(self, pieces):
-        """复制棋子列表"""
-        copied_pieces = []
-        for piece in pieces:
-            # 创建新棋子实例，保持相同的位置和属性
-            import copy
-            new_piece = copy.copy(piece)
-            copied_pieces.append(new_piece)
-        return copied_pieces
-
     def _evaluate_move(self, pieces, piece, to_row, to_col, current_player):
         """评估移动的价值"""
         # 根据游戏模式选择不同的评估逻辑
-        is_traditional_mode = game_config.get_setting("traditional_mode", False)
+        is_traditional_mode = self.rule_set.traditional_mode
 
         value = 0
 
@@ -1332,16 +1280,13 @@ class XionghanChessSearchAI:
         # 检查是否能攻击对方棋子
         attacked_pieces = self._get_attacked_pieces(pieces, piece, to_row, to_col)
         for attacked_piece in attacked_pieces:
-            value += self.piece_values.get(attacked_piece.name, 0) * 0.8  # 攻击奖励
+            value += self._get_piece_value(attacked_piece) * 0.8  # 攻击奖励
 
         return value
 
     def _get_piece_at(self, pieces, row, col):
         """获取指定位置的棋子"""
-        for piece in pieces:
-            if piece.row == row and piece.col == col:
-                return piece
-        return None
+        return self.rules.get_piece_at(pieces, row, col)
 
     def _would_be_attacked(self, pieces, piece, current_player):
         """检查移动后棋子是否会被攻击"""
@@ -1350,20 +1295,8 @@ class XionghanChessSearchAI:
         # 检查是否有敌方棋子能攻击到这个位置
         for enemy_piece in pieces:
             if enemy_piece.color == enemy_color:
-                # 使用规则检查敌方棋子是否能攻击到这个位置
-                # 根据当前模式获取正确的移动规则
-                is_traditional_mode = game_config.get_setting("traditional_mode", False)
-
-                # 临时保存当前的传统模式设置
-                original_traditional_mode = game_config.get_setting("traditional_mode", False)
-                # 设置为当前游戏模式以获取正确的移动规则
-                game_config.set_setting("traditional_mode", is_traditional_mode)
-
-                moves, capturable = self.rules.calculate_possible_moves(pieces, enemy_piece)
-
-                # 恢复原始模式设置
-                game_config.set_setting("traditional_mode", original_traditional_mode)
-
+                # 使用当前对局的规则检查敌方棋子是否能攻击到这个位置
+                moves, capturable = self.rules.calculate_possible_moves(pieces, enemy_piece, self.rule_set)
                 all_moves = moves + capturable
                 for move_row, move_col in all_moves:
                     if move_row == piece.row and move_col == piece.col:
@@ -1376,9 +1309,9 @@ class XionghanChessSearchAI:
         enemy_color = "black" if piece.color == "red" else "red"
 
         # 检查这个位置是否能攻击敌方棋子
-        for target_piece in pieces:
-            if target_piece.color == enemy_color and target_piece.row == to_row and target_piece.col == to_col:
-                attacked.append(target_piece)
+        target_piece = self._get_piece_at(pieces, to_row, to_col)
+        if target_piece and target_piece.color == enemy_color:
+            attacked.append(target_piece)
         return attacked
 
     def _sort_moves(self, game_state, moves):
@@ -1394,13 +1327,8 @@ class XionghanChessSearchAI:
             to_row, to_col = to_pos
 
             # 获取移动的棋子和目标棋子
-            moving_piece = None
-            target_piece = None
-            for piece in game_state.pieces:
-                if piece.row == from_row and piece.col == from_col:
-                    moving_piece = piece
-                elif piece.row == to_row and piece.col == to_col:
-                    target_piece = piece
+            moving_piece = game_state.get_piece_at(from_row, from_col)
+            target_piece = game_state.get_piece_at(to_row, to_col)
 
             # 检查是否为杀手着法（导致beta剪枝的走法）
             if (hasattr(self, 'killer_moves') and
@@ -1418,12 +1346,12 @@ class XionghanChessSearchAI:
                 score += mvv_lva_score * 2  # 增加吃子权重
 
             # 模拟移动，检查是否将军
-            cloned_state = _clone_game_state(game_state)
-            _make_move(cloned_state, from_pos, to_pos)
+            game_state.make_move(*from_pos, *to_pos)
 
             opponent_color = "red" if self.ai_color == "black" else "black"
-            if _is_check(cloned_state, opponent_color):
+            if _is_check(game_state, opponent_color):
                 score += 300  # 将军得高分，增加将军权重
+            game_state.unmake_move()
 
             # 位置价值启发：移动到更好位置的加权
             if moving_piece:
@@ -1453,17 +1381,14 @@ class XionghanChessSearchAI:
 
     def _evaluate_future_threats(self, piece, game_state, to_row, to_col):
         """评估移动后可能面临的威胁"""
-        # 创建一个临时移动后的新状态
-        cloned_state = _clone_game_state(game_state)
-        
-        # 找到要移动的棋子
-        moving_piece = None
-        for p in cloned_state.pieces:
-            if p.row == piece.row and p.col == piece.col and p.name == piece.name:
-                moving_piece = p
-                break
+        # 找到要移动的棋子（在原局面上临时移动，评估后放回原处）
+        moving_piece = game_state.get_piece_at(piece.row, piece.col)
+        if moving_piece and moving_piece.name != piece.name:
+            moving_piece = None
         
         if moving_piece:
+            original_row, original_col = moving_piece.row, moving_piece.col
+
             # 执行移动
             moving_piece.row = to_row
             moving_piece.col = to_col
@@ -1472,11 +1397,11 @@ class XionghanChessSearchAI:
             opponent_color = "black" if moving_piece.color == "red" else "red"
             threats = 0
             
-            for enemy_piece in cloned_state.pieces:
+            for enemy_piece in game_state.pieces:
                 if enemy_piece.color == opponent_color:
                     # 使用规则检查敌方棋子是否能攻击到这个位置
                     if self.rules.is_valid_move(
-                        cloned_state.pieces, 
+                        game_state.pieces, 
                         enemy_piece, 
                         enemy_piece.row, 
                         enemy_piece.col, 
@@ -1486,21 +1411,20 @@ class XionghanChessSearchAI:
                         # 根据攻击棋子的价值给予不同权重
                         threats += 1
             
+            # 恢复原位置
+            moving_piece.row = original_row
+            moving_piece.col = original_col
+
             return threats
         
         return 0
 
     def _evaluate_exposure_risk(self, piece, game_state, to_row, to_col):
         """评估移动后对我方重要棋子的暴露风险"""
-        # 创建一个临时移动后的新状态
-        cloned_state = _clone_game_state(game_state)
-        
-        # 找到要移动的棋子
-        moving_piece = None
-        for p in cloned_state.pieces:
-            if p.row == piece.row and p.col == piece.col and p.name == piece.name:
-                moving_piece = p
-                break
+        # 找到要移动的棋子（在原局面上临时移动，评估后放回原处）
+        moving_piece = game_state.get_piece_at(piece.row, piece.col)
+        if moving_piece and moving_piece.name != piece.name:
+            moving_piece = None
         
         if moving_piece:
             # 保存原来的位置
@@ -1515,20 +1439,16 @@ class XionghanChessSearchAI:
             risk = 0
             
             # 检查是否阻挡了对我方将/帅的保护
-            general_piece = None
-            for p in cloned_state.pieces:
-                if isinstance(p, King) and p.color == my_color:
-                    general_piece = p
-                    break
+            general_piece = game_state.get_king(my_color)
             
             if general_piece:
                 # 检查移动是否使我方将/帅更容易被攻击
                 opponent_color = "black" if my_color == "red" else "red"
                 
-                for enemy_piece in cloned_state.pieces:
+                for enemy_piece in game_state.pieces:
                     if enemy_piece.color == opponent_color:
                         if self.rules.is_valid_move(
-                            cloned_state.pieces,
+                            game_state.pieces,
                             enemy_piece,
                             enemy_piece.row,
                             enemy_piece.col,
@@ -1537,23 +1457,24 @@ class XionghanChessSearchAI:
                         ):
                             risk += 2  # 将/帅被攻击风险权重较高
             
+            # 恢复原位置
+            moving_piece.row = original_row
+            moving_piece.col = original_col
+
             return risk
         
         return 0
 
     def _evaluate_tactical_combinations(self, piece, game_state, to_row, to_col):
         """评估移动可能产生的战术组合价值"""
-        # 创建一个临时移动后的新状态
-        cloned_state = _clone_game_state(game_state)
-        
-        # 找到要移动的棋子
-        moving_piece = None
-        for p in cloned_state.pieces:
-            if p.row == piece.row and p.col == piece.col and p.name == piece.name:
-                moving_piece = p
-                break
+        # 找到要移动的棋子（在原局面上临时移动，评估后放回原处）
+        moving_piece = game_state.get_piece_at(piece.row, piece.col)
+        if moving_piece and moving_piece.name != piece.name:
+            moving_piece = None
         
         if moving_piece:
+            original_row, original_col = moving_piece.row, moving_piece.col
+
             # 执行移动
             moving_piece.row = to_row
             moving_piece.col = to_col
@@ -1565,10 +1486,10 @@ class XionghanChessSearchAI:
             opponent_color = "black" if moving_piece.color == "red" else "red"
             attack_count = 0
             
-            for enemy_piece in cloned_state.pieces:
+            for enemy_piece in game_state.pieces:
                 if enemy_piece.color == opponent_color:
                     if self.rules.is_valid_move(
-                        cloned_state.pieces,
+                        game_state.pieces,
                         moving_piece,
                         moving_piece.row,
                         moving_piece.col,
@@ -1585,6 +1506,10 @@ class XionghanChessSearchAI:
             if (to_row, to_col) in center_positions:
                 tactical_value += 0.3  # 控制中心价值
             
+            # 恢复原位置
+            moving_piece.row = original_row
+            moving_piece.col = original_col
+
             return tactical_value
         
         return 0
@@ -1634,6 +1559,10 @@ class XionghanChessSearchAI:
             }
             return value
 
+        # 子力上已是死和的局面（见 program.core.endgame）不再展开
+        if game_state.endgame_verdict(self.rule_set)[0] == DRAW:
+            return 0
+
         # 获取当前玩家颜色
         if is_maximizing:
             player_color = self.ai_color
@@ -1658,11 +1587,11 @@ class XionghanChessSearchAI:
                 if (time.time() - start_time) * 1000 > self.max_think_time:
                     break
 
-                cloned_state = _clone_game_state(game_state)
-                _make_move(cloned_state, from_pos, to_pos)
+                game_state.make_move(*from_pos, *to_pos)
 
                 # 递归搜索
-                eval = self._alpha_beta_search(cloned_state, depth - 1, alpha, beta, False, start_time)
+                eval = self._alpha_beta_search(game_state, depth - 1, alpha, beta, False, start_time)
+                game_state.unmake_move()
 
                 max_eval = max(max_eval, eval)
                 alpha = max(alpha, eval)
@@ -1690,11 +1619,11 @@ class XionghanChessSearchAI:
                 if (time.time() - start_time) * 1000 > self.max_think_time:
                     break
 
-                cloned_state = _clone_game_state(game_state)
-                _make_move(cloned_state, from_pos, to_pos)
+                game_state.make_move(*from_pos, *to_pos)
 
                 # 递归搜索
-                eval = self._alpha_beta_search(cloned_state, depth - 1, alpha, beta, True, start_time)
+                eval = self._alpha_beta_search(game_state, depth - 1, alpha, beta, True, start_time)
+                game_state.unmake_move()
 
                 min_eval = min(min_eval, eval)
                 beta = min(beta, eval)
@@ -1761,12 +1690,16 @@ class XionghanChessSearchAI:
             }
             return value
 
+        # 子力上已是死和的局面（见 program.core.endgame）不再展开
+        if game_state.endgame_verdict(self.rule_set)[0] == DRAW:
+            return 0
+
         # 空着剪枝（Null Move Pruning）
         if depth >= 3 and not _is_in_check_for_current_player(game_state):
-            # 创建一个克隆状态并执行空移动
-            cloned_state = _clone_game_state(game_state)
-            cloned_state.player_turn = "red" if cloned_state.player_turn == "black" else "black"
-            null_score = -self._negamax(cloned_state, depth - 3, -beta, -beta + 1, not is_maximizing, start_time)
+            # 在原局面上执行空移动（只交换走子方），搜索后换回
+            game_state.player_turn = "red" if game_state.player_turn == "black" else "black"
+            null_score = -self._negamax(game_state, depth - 3, -beta, -beta + 1, not is_maximizing, start_time)
+            game_state.player_turn = "red" if game_state.player_turn == "black" else "black"
             if null_score >= beta:
                 return beta
 
@@ -1791,11 +1724,11 @@ class XionghanChessSearchAI:
             if (time.time() - start_time) * 1000 > self.max_think_time:
                 break
 
-            cloned_state = _clone_game_state(game_state)
-            _make_move(cloned_state, from_pos, to_pos)
+            game_state.make_move(*from_pos, *to_pos)
 
             # 递归搜索
-            eval = -self._negamax(cloned_state, depth - 1, -beta, -alpha, not is_maximizing, start_time)
+            eval = -self._negamax(game_state, depth - 1, -beta, -alpha, not is_maximizing, start_time)
+            game_state.unmake_move()
 
             if eval > best_value:
                 best_value = eval
@@ -1987,11 +1920,7 @@ class XionghanChessSearchAI:
     def _evaluate_king_safety(self, game_state):
         """评估王的安全性"""
         # 找出王
-        king = None
-        for piece in game_state.pieces:
-            if isinstance(piece, King) and piece.color == self.ai_color:
-                king = piece
-                break
+        king = game_state.get_king(self.ai_color)
 
         if not king:
             return -5000  # 没有王，极度危险
@@ -2047,7 +1976,7 @@ class XionghanChessSearchAI:
         """获取棋子基础价值"""
         if not piece:
             return 0
-        return self.piece_values.get(piece.name, 0)
+        return self.piece_value_table[piece.type_code][piece.color_code]
 
     def _get_position_value(self, piece):
         """获取棋子在特定位置的附加价值"""
@@ -2061,74 +1990,9 @@ class XionghanChessSearchAI:
         if not piece:
             return 0
 
-        # 根据棋子类型选择相应的位置价值表
-        if isinstance(piece, Pawn):
-            if piece.color == "red":
-                return self.pawn_pos_red[row][col]
-            else:
-                return self.pawn_pos_black[row][col]
-
-        elif isinstance(piece, Ju):
-            if piece.color == "red":
-                return self.rook_pos_red[row][col]
-            else:
-                return self.rook_pos_black[row][col]
-
-        elif isinstance(piece, Ma):
-            if piece.color == "red":
-                return self.knight_pos_red[row][col]
-            else:
-                return self.knight_pos_black[row][col]
-
-        elif isinstance(piece, Pao):
-            if piece.color == "red":
-                return self.cannon_pos_red[row][col]
-            else:
-                return self.cannon_pos_black[row][col]
-
-        elif isinstance(piece, Xiang):
-            if piece.color == "red":
-                return self.bishop_pos_red[row][col]
-            else:
-                return self.bishop_pos_black[row][col]
-
-        elif isinstance(piece, Shi):
-            if piece.color == "red":
-                return self.advisor_pos_red[row][col]
-            else:
-                return self.advisor_pos_black[row][col]
-
-        elif isinstance(piece, King):
-            if piece.color == "red":
-                return self.base_pos_value[row][col] + 50  # 王在九宫格内更有价值
-            else:
-                return self.base_pos_value[row][col] + 50
-
-        elif isinstance(piece, Wei):
-            if piece.color == "red":
-                return self.guard_pos_red[row][col]
-            else:
-                return self.guard_pos_black[row][col]
-
-        elif isinstance(piece, She):
-            if piece.color == "red":
-                return self.archer_pos_red[row][col]
-            else:
-                return self.archer_pos_black[row][col]
-
-        elif isinstance(piece, Lei):
-            if piece.color == "red":
-                return self.rock_pos_red[row][col]
-            else:
-                return self.rock_pos_black[row][col]
-
-        elif isinstance(piece, Jia):
-            if piece.color == "red":
-                return self.armor_pos_red[row][col]
-            else:
-                return self.armor_pos_black[row][col]
-
-        return self.base_pos_value[row][col]
+        # 按棋子类型和颜色编号查表
+        table, bonus = self.position_tables[piece.type_code][piece.color_code]
+        return table[row][col] + bonus
 
     def _evaluate_piece_threats_simple(self, game_state, piece):
         """简化版：评估棋子受到的威胁"""
@@ -87,9 +87,11 @@ class AIManager:
         
         Args:
             game_state: 当前游戏状态
+
+        AI线程拿到的是局面快照，界面线程之后对游戏状态的修改不会影响正在进行的计算
         """
         if self.ai:
-            self.ai.get_move_async(game_state)
+            self.ai.get_move_async(game_state.snapshot())
     
     def process_async_ai_result(self):
         """处理异步AI计算结果
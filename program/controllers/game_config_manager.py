@@ -471,6 +471,8 @@ class GameConfigManager:
     """游戏配置管理类"""
 
     def __init__(self):
+        # 配置版本号，每次修改设置时递增，供缓存了规则相关数据的模块判断是否需要更新
+        self.revision = 0
         # 初始化默认设置
         self.settings = {
             # 汉/汗设置
@@ -527,6 +529,7 @@ class GameConfigManager:
         # 确保只设置已定义的配置键
         if key in self.settings:
             self.settings[key] = value
+            self.revision += 1
 
     def get_all_settings(self):
         """获取所有设置"""
@@ -539,6 +542,7 @@ class GameConfigManager:
                 # 确保只更新已定义的配置键，防止添加意外的配置项
                 if key in self.settings:
                     self.settings[key] = value
+            self.revision += 1
 
 
 # 创建全局配置实例
@@ -54,66 +54,26 @@ class GameIOController:
             # 序列化走子历史 - 将棋子对象转换为基本信息
             serialized_move_history = []
             for move in target_game_state.move_history:
-                if len(move) >= 8:  # 包含甲/胄吃子信息和刺兑子信息
-                    piece, from_row, from_col, to_row, to_col, captured_piece, jia_captured_pieces, ci_captured_pieces = move
-                    serialized_move = [
-                        {
-                            'name': piece.name,
-                            'color': piece.color,
-                            'type': piece.__class__.__name__,
-                            'row': piece.row,
-                            'col': piece.col
-                        },
-                        from_row, from_col, to_row, to_col,
-                        {
-                            'name': captured_piece.name,
-                            'color': captured_piece.color,
-                            'type': captured_piece.__class__.__name__,
-                            'row': captured_piece.row,
-                            'col': captured_piece.col
-                        } if captured_piece else None,
-                        [{'name': p.name, 'color': p.color, 'type': p.__class__.__name__, 'row': p.row, 'col': p.col} for p in jia_captured_pieces],
-                        [{'name': p.name, 'color': p.color, 'type': p.__class__.__name__, 'row': p.row, 'col': p.col} for p in ci_captured_pieces]
-                    ]
-                elif len(move) >= 7:  # 包含甲/胄吃子信息
-                    piece, from_row, from_col, to_row, to_col, captured_piece, jia_captured_pieces = move
-                    serialized_move = [
-                        {
-                            'name': piece.name,
-                            'color': piece.color,
-                            'type': piece.__class__.__name__,
-                            'row': piece.row,
-                            'col': piece.col
-                        },
-                        from_row, from_col, to_row, to_col,
-                        {
-                            'name': captured_piece.name,
-                            'color': captured_piece.color,
-                            'type': captured_piece.__class__.__name__,
-                            'row': captured_piece.row,
-                            'col': captured_piece.col
-                        } if captured_piece else None,
-                        [{'name': p.name, 'color': p.color, 'type': p.__class__.__name__, 'row': p.row, 'col': p.col} for p in jia_captured_pieces]
-                    ]
-                else:  # 旧格式
-                    piece, from_row, from_col, to_row, to_col, captured_piece = move
-                    serialized_move = [
-                        {
-                            'name': piece.name,
-                            'color': piece.color,
-                            'type': piece.__class__.__name__,
-                            'row': piece.row,
-                            'col': piece.col
-                        },
-                        from_row, from_col, to_row, to_col,
-                        {
-                            'name': captured_piece.name,
-                            'color': captured_piece.color,
-                            'type': captured_piece.__class__.__name__,
-                            'row': captured_piece.row,
-                            'col': captured_piece.col
-                        } if captured_piece else None
-                    ]
+                piece, from_row, from_col, to_row, to_col, captured_piece, jia_captured_pieces, ci_captured_pieces = move
+                serialized_move = [
+                    {
+                        'name': piece.name,
+                        'color': piece.color,
+                        'type': piece.__class__.__name__,
+                        'row': piece.row,
+                        'col': piece.col
+                    },
+                    from_row, from_col, to_row, to_col,
+                    {
+                        'name': captured_piece.name,
+                        'color': captured_piece.color,
+                        'type': captured_piece.__class__.__name__,
+                        'row': captured_piece.row,
+                        'col': captured_piece.col
+                    } if captured_piece else None,
+                    [{'name': p.name, 'color': p.color, 'type': p.__class__.__name__, 'row': p.row, 'col': p.col} for p in jia_captured_pieces],
+                    [{'name': p.name, 'color': p.color, 'type': p.__class__.__name__, 'row': p.row, 'col': p.col} for p in ci_captured_pieces]
+                ]
                 serialized_move_history.append(serialized_move)
             
             # 序列化阵亡棋子
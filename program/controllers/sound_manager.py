@@ -187,6 +187,17 @@ class SoundManager:
             if sound_name in _sound_cache:
                 _sound_cache[sound_name].set_volume(volume)
 
+    def subscribe(self, events):
+        """订阅对局事件（program.core.game_events）：走子后播放落子或吃子音效"""
+        from program.core.game_events import PIECE_MOVED
+        events.subscribe(PIECE_MOVED, self._on_piece_moved)
+
+    def _on_piece_moved(self, game_state, piece, from_row, from_col, to_row, to_col, captured_piece):
+        try:
+            self.play_sound('eat' if captured_piece else 'drop')  # 使用chess-master的吃子/落子音效
+        except (pygame.error, KeyError, FileNotFoundError):
+            pass
+
     def check_and_play_game_sound(self, game_state):
         """检查并播放将军/绝杀音效"""
         # 优先处理绝杀情况，因为绝杀时is_check和is_checkmate都为True
@@ -1,5 +1,10 @@
-"""匈汉象棋数据统计管理模块"""
+"""匈汉象棋数据统计管理模块
 
+统计数据的更新只修改内存中的数据，由 flush 统一写入文件：订阅对局事件后在对局结束时写入，
+程序退出时也会写入尚未保存的修改，走子和吃子不再同步读写文件。
+"""
+
+import atexit
 import json
 import os
 from datetime import datetime
@@ -15,6 +20,8 @@ class StatisticsManager:
     def __init__(self):
         self.statistics_file = STATISTICS_FILE
         self.data = self._load_statistics()
+        self._dirty = False  # 是否有尚未写入文件的修改
+        atexit.register(self.flush)
     
     def _load_statistics(self) -> Dict[str, Any]:
         """加载统计数据，如果不存在则创建默认数据"""
@@ -102,14 +109,38 @@ class StatisticsManager:
                 
             with open(self.statistics_file, 'w', encoding='utf-8') as file:
                 json.dump(self.data, file, ensure_ascii=False, indent=4)  # type: ignore
+            self._dirty = False
         except Exception as e:
             print(f"保存统计数据失败: {e}")
 
+    def flush(self):
+        """将尚未保存的修改写入文件"""
+        if self._dirty:
+            self.save_statistics()
+
+    def subscribe(self, events):
+        """订阅对局事件（program.core.game_events）：记录走子、吃子和对局结果，对局结束时写入文件"""
+        from program.core.game_events import PIECE_MOVED, PIECE_CAPTURED, GAME_OVER
+        events.subscribe(PIECE_MOVED, self._on_piece_moved)
+        events.subscribe(PIECE_CAPTURED, self._on_piece_captured)
+        events.subscribe(GAME_OVER, self._on_game_over)
+
+    def _on_piece_moved(self, game_state, piece, from_row, from_col, to_row, to_col, captured_piece):
+        self.update_total_moves(1)
+
+    def _on_piece_captured(self, game_state, captured_piece):
+        self.update_pieces_captured(captured_piece.__class__.__name__.lower(), 1)
+
+    def _on_game_over(self, game_state, winner, total_time):
+        self.update_games_played(1)
+        self.update_game_result(winner or "draw", total_time)
+        self.flush()
+
     def update_games_played(self, increment: int = 1):
         """更新游戏次数"""
         self.data["games_played"] += increment
         self.data["last_played"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.save_statistics()
+        self._dirty = True
 
     def update_game_result(self, winner: str, game_duration: float = 0):
         """更新游戏结果
@@ -141,7 +172,7 @@ class StatisticsManager:
             if game_duration > self.data["longest_game"]:
                 self.data["longest_game"] = game_duration
 
-        self.save_statistics()
+        self._dirty = True
 
     def update_pieces_captured(self, piece_type: str, increment: int = 1):
         """更新被吃棋子统计
@@ -151,12 +182,12 @@ class StatisticsManager:
         """
         if piece_type in self.data["pieces_captured"]:
             self.data["pieces_captured"][piece_type] += increment
-        self.save_statistics()
+        self._dirty = True
 
     def update_total_moves(self, increment: int = 1):
         """更新总走子数"""
         self.data["total_moves_made"] += increment
-        self.save_statistics()
+        self._dirty = True
 
     def get_statistics(self) -> Dict[str, Any]:
         """获取所有统计数据"""
@@ -0,0 +1,364 @@
+"""批量局面分析
+
+以 NumPy 数组一次处理大量局面，供训练数据校验、数据扩充和棋谱分析使用：
+  - 局面张量为 (N, 13, 13) 的 int8 数组，元素为棋子编码（见 program.core.encoding，0为空格），
+    走子方为 (N,) 数组（0红1黑）；传统象棋只使用左上角10行9列
+  - legal_move_masks: 各局面在MCTS动作空间（ACTION_COUNT 个走法编号）上的合法走法掩码
+  - check_flags: 各局面红、黑双方是否被将军
+  - analyze_positions: 一次得到合法走法、吃子走法和将军标志
+  - material_counts: 各局面按 颜色编号*14+类型编号 排列的棋子数量
+
+张量的格式检查、子力统计、局面去重以及走法编号的写入按整批向量化完成。
+将军判断也按整批计算：车、炮、将帅对脸沿将/帅所在的四条射线查找第一、第二个棋子，马按攻击表检查蹩腿；
+只有将/帅附近有相、士、兵、射、檑、巡等短程棋子（其吃子受照面、盾和落单规则限制）且尚未判定被将军的局面，
+才直接由位棋盘逐个判断，不创建游戏状态。结果与 GameRules.is_check 完全一致。
+甲/胄连线、檑/礌落单、盾的邻接、尉的照面等规则不能写成固定的数组运算，合法走法仍由位棋盘走法生成器
+（program.core.move_generator）逐个局面计算，结果与对局中完全一致；训练数据中重复出现的局面只计算一次，
+workers 大于1时按进程并行。不在动作空间中的走法（如甲/胄连线吃子）不出现在掩码中，与 encoding.move_to_mcts_id 一致。
+
+每个局面的掩码占 ACTION_COUNT 字节，数据量很大时应分批调用。
+"""
+import multiprocessing
+from collections import namedtuple
+
+import numpy as np
+
+from program.core.bitboard import DIRECTIONS, ORTHOGONAL, get_tables, iter_squares
+from program.core.chess_pieces import PIECE_TYPE_COUNT, COLOR_NAMES, JU, MA, XIANG, SHI, KING, PAO, PAWN, SHE, LEI, XUN
+from program.core.encoding import BOARD_STRIDE, BOARD_SQUARES, POSITION_BYTES, decode_position
+from program.core.rule_set import current_rule_set
+
+ACTION_COUNT = 7712  # MCTS动作空间的走法编号数量（见 program.ai.mcts.mcts_game.move_id2move_action）
+CODE_COUNT = 1 + 2 * PIECE_TYPE_COUNT  # 棋子编码的取值个数（含空格）
+
+# 分析结果：legal、captures 为 (N, ACTION_COUNT) 的布尔掩码，in_check 为 (N, 2) 的布尔数组（红、黑是否被将军）
+BatchAnalysis = namedtuple("BatchAnalysis", ["legal", "captures", "in_check"])
+
+_action_table = None  # 起点格*169+终点格 -> 走法编号（不在动作空间中为-1）
+_check_tables = {}  # RuleSet -> 将军判断用的查找表（见 _get_check_tables）
+
+
+def get_action_table():
+    """走法到MCTS走法编号的查找表（只生成一次）
+
+    Returns:
+        numpy.ndarray: 长度为 BOARD_SQUARES*BOARD_SQUARES 的 int16 数组，下标为 起点格*BOARD_SQUARES+终点格
+    """
+    global _action_table
+    if _action_table is None:
+        from program.ai.mcts.mcts_game import move_id2move_action
+        table = np.full(BOARD_SQUARES * BOARD_SQUARES, -1, dtype=np.int16)
+        for move_id, action in move_id2move_action.items():
+            from_square = int(action[0:2]) * BOARD_STRIDE + int(action[2:4])
+            to_square = int(action[4:6]) * BOARD_STRIDE + int(action[6:8])
+            table[from_square * BOARD_SQUARES + to_square] = move_id
+        _action_table = table
+    return _action_table
+
+
+def positions_to_boards(positions):
+    """局面编码列表转换为局面张量
+
+    Args:
+        positions: POSITION_BYTES 字节的局面编码序列
+
+    Returns:
+        tuple: ((N, 13, 13) int8 局面张量, (N,) int8 走子方)
+    """
+    data = np.frombuffer(b"".join(positions), dtype=np.uint8).reshape(-1, POSITION_BYTES)
+    boards = data[:, :BOARD_SQUARES].astype(np.int8).reshape(-1, BOARD_STRIDE, BOARD_STRIDE)
+    return boards, data[:, BOARD_SQUARES].astype(np.int8)
+
+
+def boards_to_positions(boards, players=None):
+    """局面张量转换为局面编码列表（positions_to_boards 的逆变换）"""
+    data = _position_array(*_as_batch(boards, players))
+    return [row.tobytes() for row in data]
+
+
+def material_counts(boards):
+    """各局面每类棋子的数量
+
+    Returns:
+        numpy.ndarray: (N, 28) 的 int16 数组，按 颜色编号*14+类型编号 排列（同 Bitboard.material_signature）
+    """
+    boards, _ = _as_batch(boards)
+    count = len(boards)
+    codes = boards.reshape(count, BOARD_SQUARES).astype(np.intp) + CODE_COUNT * np.arange(count)[:, None]
+    counts = np.bincount(codes.ravel(), minlength=CODE_COUNT * count).reshape(count, CODE_COUNT)
+    return counts[:, 1:].astype(np.int16)
+
+
+def legal_move_masks(boards, players=None, rule_set=None, workers=1):
+    """各局面走子方的合法走法掩码
+
+    Args:
+        boards: (N, 13, 13) 局面张量
+        players: (N,) 走子方（0红1黑），默认全部为红方
+        rule_set (RuleSet): 对局规则，默认由当前配置编译
+        workers (int): 并行进程数
+
+    Returns:
+        numpy.ndarray: (N, ACTION_COUNT) 的布尔掩码
+    """
+    return analyze_positions(boards, players, rule_set, workers).legal
+
+
+def check_flags(boards, rule_set=None, workers=1):
+    """各局面红、黑双方是否被将军（与走子方无关）
+
+    Returns:
+        numpy.ndarray: (N, 2) 的布尔数组，按颜色编号排列
+    """
+    boards, _ = _as_batch(boards)
+    return _check_flags(boards, _resolve_rule_set(boards, rule_set), workers)
+
+
+def analyze_positions(boards, players=None, rule_set=None, workers=1):
+    """批量分析局面：合法走法、吃子走法以及双方的将军状态
+
+    参数同 legal_move_masks。
+
+    Returns:
+        BatchAnalysis: 分析结果
+    """
+    boards, players = _as_batch(boards, players)
+    rule_set = _resolve_rule_set(boards, rule_set)
+    unique, inverse = _unique_rows(_position_array(boards, players))
+    results = _run(_analyze_moves, unique, rule_set, workers)
+
+    table = get_action_table()
+    legal = np.zeros((len(unique), ACTION_COUNT), dtype=bool)
+    captures = np.zeros((len(unique), ACTION_COUNT), dtype=bool)
+    for mask, index in ((legal, 0), (captures, 1)):
+        keys = [result[index] for result in results]
+        owners = np.repeat(np.arange(len(keys)), [len(key) for key in keys])
+        move_ids = table[np.concatenate(keys).astype(np.intp)] if len(owners) else owners
+        mapped = move_ids >= 0
+        mask[owners[mapped], move_ids[mapped]] = True
+    return BatchAnalysis(legal[inverse], captures[inverse], _check_flags(boards, rule_set, workers))
+
+
+def _as_batch(boards, players=None):
+    """检查并规范局面张量和走子方
+
+    Raises:
+        ValueError: 形状不正确、棋子编码或走子方越界
+    """
+    boards = np.asarray(boards)
+    if boards.shape[-2:] != (BOARD_STRIDE, BOARD_STRIDE):
+        raise ValueError(f"局面张量形状应为 (N, {BOARD_STRIDE}, {BOARD_STRIDE})，实际为 {boards.shape}")
+    boards = boards.reshape(-1, BOARD_STRIDE, BOARD_STRIDE)
+    if boards.size and (boards.min() < 0 or boards.max() >= CODE_COUNT):
+        raise ValueError(f"棋子编码应在 0~{CODE_COUNT - 1} 之间")
+    boards = boards.astype(np.int8, copy=False)
+
+    if players is None:
+        players = np.zeros(len(boards), dtype=np.int8)
+    players = np.asarray(players).reshape(-1)
+    if len(players) != len(boards):
+        raise ValueError(f"走子方数量 {len(players)} 与局面数量 {len(boards)} 不一致")
+    if players.size and (players.min() < 0 or players.max() > 1):
+        raise ValueError("走子方应为0（红）或1（黑）")
+    return boards, players.astype(np.int8, copy=False)
+
+
+def _resolve_rule_set(boards, rule_set):
+    """确定对局规则，并检查棋子都在该规则的棋盘范围内"""
+    if rule_set is None:
+        rule_set = current_rule_set()
+    if rule_set.rows < BOARD_STRIDE or rule_set.cols < BOARD_STRIDE:
+        outside = boards[:, rule_set.rows:, :].any(axis=(1, 2)) | boards[:, :, rule_set.cols:].any(axis=(1, 2))
+        if outside.any():
+            raise ValueError(f"第{int(np.argmax(outside))}个局面有棋子超出{rule_set.rows}行{rule_set.cols}列的棋盘")
+    return rule_set
+
+
+def _position_array(boards, players):
+    """(N, POSITION_BYTES) 的 uint8 局面编码数组"""
+    data = np.empty((len(boards), POSITION_BYTES), dtype=np.uint8)
+    data[:, :BOARD_SQUARES] = boards.reshape(len(boards), BOARD_SQUARES)
+    data[:, BOARD_SQUARES] = players
+    return data
+
+
+def _unique_rows(data):
+    """局面去重
+
+    Returns:
+        tuple: (不重复的局面编码列表, 每个局面在其中的下标)
+    """
+    keys = np.ascontiguousarray(data).view(np.dtype((np.void, data.shape[1]))).ravel()
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return [key.tobytes() for key in unique], inverse.reshape(-1)
+
+
+def _run(function, positions, rule_set, workers):
+    """逐个分析不重复的局面，workers 大于1时分块交给进程池"""
+    if workers <= 1 or len(positions) < 2 * workers:
+        return function((positions, rule_set))
+    chunk_size = -(-len(positions) // (workers * 4))
+    tasks = [(positions[start:start + chunk_size], rule_set) for start in range(0, len(positions), chunk_size)]
+    with multiprocessing.Pool(workers) as pool:
+        return [result for chunk in pool.map(function, tasks) for result in chunk]
+
+
+def _analyze_moves(task):
+    """生成一组局面的合法走法
+
+    Args:
+        task (tuple): (局面编码列表, 对局规则)
+
+    Returns:
+        list: 每个局面一个 (合法走法键数组, 吃子走法键数组)，走法键为 起点格*BOARD_SQUARES+终点格
+    """
+    from program.core.game_state import GameState
+    from program.core.move_generator import iter_legal_moves
+    from program.core.snapshot import PositionSnapshot
+
+    positions, rule_set = task
+    results = []
+    for position in positions:
+        # 走法按 GameState 的规则生成（被尉照面的棋子不能移动）
+        game_state = GameState.from_snapshot(PositionSnapshot.from_position(position, rule_set))
+        legal = []
+        captures = []
+        for move in iter_legal_moves(game_state, game_state.player_turn):
+            key = ((move.from_row * BOARD_STRIDE + move.from_col) * BOARD_SQUARES
+                   + move.to_row * BOARD_STRIDE + move.to_col)
+            legal.append(key)
+            if move.capture:
+                captures.append(key)
+        results.append((np.array(legal, dtype=np.int32), np.array(captures, dtype=np.int32)))
+    return results
+
+
+def _analyze_checks(task):
+    """由位棋盘逐个判断一组局面中红、黑双方是否被将军（不创建游戏状态）
+
+    Args:
+        task (tuple): (局面编码列表, 对局规则)
+
+    Returns:
+        list: 每个局面一个 (红方被将军, 黑方被将军)
+    """
+    from program.core.bitboard import Bitboard
+
+    positions, rule_set = task
+    results = []
+    for position in positions:
+        pieces, _ = decode_position(position)
+        board = Bitboard.from_pieces(pieces, rule_set=rule_set)
+        results.append(tuple(board.is_check(color, pieces) for color in COLOR_NAMES))
+    return results
+
+
+def _get_check_tables(rule_set):
+    """将军判断用的查找表（每种规则只生成一次）
+
+    按位棋盘格子编号索引，表中的格子已换算为局面张量中的编号（行*13+列），BOARD_SQUARES 表示空位：
+      - ma_sources: (格子数, K) 能以马步到达该格的起点
+      - ma_blocks: (格子数, K, 2) 对应的蹩腿格（直走三格时为路径上的两格）
+      - near: (格子数, BOARD_SQUARES+1) 短程棋子能吃到该格时所在的区域（同 Bitboard.is_check）
+    """
+    tables = _check_tables.get(rule_set)
+    if tables is None:
+        cols = rule_set.cols
+        geometry = get_tables(rule_set.rows, cols)
+        ma_attackers = rule_set.move_tables.ma_attackers
+        width = max(len(attackers) for attackers in ma_attackers)
+        ma_sources = np.full((geometry.size, width), BOARD_SQUARES, dtype=np.intp)
+        ma_blocks = np.full((geometry.size, width, 2), BOARD_SQUARES, dtype=np.intp)
+        near = np.zeros((geometry.size, BOARD_SQUARES + 1), dtype=bool)
+        for square in range(geometry.size):
+            for index, (source, block) in enumerate(ma_attackers[square]):
+                ma_sources[square, index] = _stride_square(source, cols)
+                for slot, blocker in enumerate(iter_squares(block)):
+                    ma_blocks[square, index, slot] = _stride_square(blocker, cols)
+            mask = geometry.adjacent8[square] | geometry.xiang_mask[square] | geometry.she_mask[square]
+            for target in iter_squares(mask):
+                near[square, _stride_square(target, cols)] = True
+        tables = (ma_sources, ma_blocks, near)
+        _check_tables[rule_set] = tables
+    return tables
+
+
+def _stride_square(square, cols):
+    """位棋盘格子编号换算为局面张量中的格子编号"""
+    row, col = divmod(square, cols)
+    return row * BOARD_STRIDE + col
+
+
+def _piece_code(color_code, type_code):
+    return color_code * PIECE_TYPE_COUNT + type_code + 1
+
+
+def _check_flags(boards, rule_set, workers):
+    """各局面红、黑双方是否被将军：先按整批判断，未能确定的局面再由位棋盘逐个判断"""
+    in_check, undecided = _mask_checks(boards, rule_set)
+    rows = np.flatnonzero(undecided.any(axis=1))
+    if len(rows):
+        unique, inverse = _unique_rows(_position_array(boards[rows], np.zeros(len(rows), dtype=np.int8)))
+        exact = np.array(_run(_analyze_checks, unique, rule_set, workers), dtype=bool).reshape(-1, 2)[inverse]
+        in_check[rows] = np.where(undecided[rows], exact, in_check[rows])
+    return in_check
+
+
+def _mask_checks(boards, rule_set):
+    """按整批判断将军（与 Bitboard.is_check 的判断顺序一致）
+
+    车、炮、将帅对脸和马的攻击不受照面、盾等规则影响，可以直接由数组判断；
+    其余能吃子的棋子只在将/帅附近时才可能将军，这些局面标记为未确定。
+
+    Returns:
+        tuple: ((N, 2) 是否被将军, (N, 2) 是否未确定)，按颜色编号排列
+    """
+    count = len(boards)
+    flat = np.zeros((count, BOARD_SQUARES + 1), dtype=np.int8)  # 末尾多一个恒为空的格子，越界的查找都指向它
+    flat[:, :BOARD_SQUARES] = boards.reshape(count, BOARD_SQUARES)
+    ma_sources, ma_blocks, near = _get_check_tables(rule_set)
+    index = np.arange(count)
+    distances = np.arange(1, BOARD_STRIDE)
+
+    in_check = np.zeros((count, 2), dtype=bool)
+    undecided = np.zeros((count, 2), dtype=bool)
+    for color_code in range(2):
+        enemy = 1 - color_code
+        kings = flat == _piece_code(color_code, KING)
+        has_king = kings.any(axis=1)
+        # 同色多个将帅时以编号最小的为准（与按格子顺序解码的棋子列表一致）
+        king_rows, king_cols = np.divmod(np.argmax(kings, axis=1), BOARD_STRIDE)
+
+        # 车：直线第一个棋子；炮：直线第二个棋子；将帅对脸：同列第一个棋子
+        attacked = np.zeros(count, dtype=bool)
+        for d in ORTHOGONAL:
+            d_row, d_col = DIRECTIONS[d]
+            ray_rows = king_rows[:, None] + d_row * distances
+            ray_cols = king_cols[:, None] + d_col * distances
+            on_board = (ray_rows >= 0) & (ray_rows < rule_set.rows) & (ray_cols >= 0) & (ray_cols < rule_set.cols)
+            codes = np.take_along_axis(flat, np.where(on_board, ray_rows * BOARD_STRIDE + ray_cols, BOARD_SQUARES),
+                                       axis=1)
+            occupied = codes != 0
+            first = np.argmax(occupied, axis=1)
+            first_code = codes[index, first]
+            attacked |= first_code == _piece_code(enemy, JU)
+            if d_col == 0:
+                attacked |= first_code == _piece_code(enemy, KING)
+            beyond = occupied & (distances > first[:, None] + 1)
+            attacked |= beyond.any(axis=1) & (codes[index, np.argmax(beyond, axis=1)] == _piece_code(enemy, PAO))
+
+        # 马：日字与直走三格，只检查蹩腿
+        king_squares = king_rows * rule_set.cols + king_cols
+        sources = np.take_along_axis(flat, ma_sources[king_squares], axis=1)
+        blocks = np.take_along_axis(flat, ma_blocks[king_squares].reshape(count, -1), axis=1).reshape(sources.shape + (2,))
+        attacked |= ((sources == _piece_code(enemy, MA)) & (blocks == 0).all(axis=2)).any(axis=1)
+
+        # 其他能吃子的短程棋子在将/帅附近，或巡/廵与将/帅同行时，需要逐个判断
+        others = np.isin(flat, [_piece_code(enemy, piece_type) for piece_type in (XIANG, SHI, PAWN, SHE, LEI)])
+        nearby = (others & near[king_squares]).any(axis=1)
+        king_rank = flat[:, :BOARD_SQUARES].reshape(count, BOARD_STRIDE, BOARD_STRIDE)[index, king_rows]
+        nearby |= (king_rank == _piece_code(enemy, XUN)).any(axis=1)
+
+        in_check[:, color_code] = ~has_king | attacked  # 没有将/帅视为被将死
+        undecided[:, color_code] = has_king & ~attacked & nearby
+    return in_check, undecided
@@ -0,0 +1,1056 @@
+import random
+import zlib
+
+from program.core.chess_pieces import Ju, Ma, Xiang, Shi, King, Pao, Pawn, Wei, She, Lei, Jia, Dun, Xun, LEI, \
+    COLOR_NAMES, COLOR_CODES, PIECE_TYPE_COUNT, DUN
+from program.core.board_geometry import XIONGHAN_GEOMETRY
+from program.core.rule_set import current_rule_set
+
+# 方向顺序：上、下、左、右、左上、右上、左下、右下（与规则代码中的方向顺序一致）
+DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1))
+ORTHOGONAL = (0, 1, 2, 3)
+DIAGONAL = (4, 5, 6, 7)
+ALL_DIRECTIONS = ORTHOGONAL + DIAGONAL
+# 沿该方向格子编号是否递增（递增方向的第一个阻挡取最低位，递减方向取最高位）
+POSITIVE = (False, True, False, True, False, False, True, True)
+# 相反方向的下标
+OPPOSITE = (1, 0, 3, 2, 7, 6, 5, 4)
+
+KNIGHT_OFFSETS = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+# 甲/胄三子连线的方向：横、竖、左上到右下、右上到左下（顺序与 GameRules 全盘扫描的顺序一致）
+JIA_LINE_DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+_tables_cache = {}
+
+# Zobrist 哈希：每个(颜色, 棋子类型, 格子)对应一个固定的64位随机数，局面键为所有棋子键的异或
+# 随机数由固定种子和棋子类名生成，保证不同进程、联机双方得到相同的键
+ZOBRIST_SEED = 0x58494F4E
+ZOBRIST_SQUARES = 13 * 13  # 按最大棋盘生成，传统象棋棋盘使用其前90个
+ZOBRIST_BLACK_TO_MOVE = random.Random(ZOBRIST_SEED).getrandbits(64)
+_zobrist_cache = {}
+
+_move_tables_cache = {}  # (行数, 列数, RuleSet) -> MoveTables
+
+
+def get_tables(rows, cols):
+    """获取指定棋盘尺寸的预计算表（首次使用时生成并缓存）"""
+    key = (rows, cols)
+    tables = _tables_cache.get(key)
+    if tables is None:
+        tables = BitboardTables(rows, cols)
+        _tables_cache[key] = tables
+    return tables
+
+
+def get_move_tables(rows, cols, rule_set=None):
+    """获取指定规则下的走法表（每种棋盘尺寸与规则只生成一次）
+
+    Args:
+        rows (int): 棋盘行数
+        cols (int): 棋盘列数
+        rule_set (RuleSet): 对局规则，默认由当前配置编译
+    """
+    if rule_set is None:
+        rule_set = current_rule_set()
+    key = (rows, cols, rule_set)
+    tables = _move_tables_cache.get(key)
+    if tables is None:
+        tables = MoveTables(get_tables(rows, cols), rule_set)
+        _move_tables_cache[key] = tables
+    return tables
+
+
+def zobrist_keys(color, piece_type):
+    """获取某方某类棋子在各格子上的Zobrist键列表"""
+    key = (color, piece_type)
+    keys = _zobrist_cache.get(key)
+    if keys is None:
+        seed = zlib.crc32(f"{piece_type.__name__}:{color}".encode()) ^ ZOBRIST_SEED
+        rnd = random.Random(seed)
+        keys = [rnd.getrandbits(64) for _ in range(ZOBRIST_SQUARES)]
+        _zobrist_cache[key] = keys
+    return keys
+
+
+if hasattr(int, "bit_count"):
+    popcount = int.bit_count
+else:
+    def popcount(mask):
+        """位棋盘中的格子数（Python 3.10 以前没有 int.bit_count）"""
+        return bin(mask).count("1")
+
+
+def iter_squares(mask):
+    """按编号从小到大遍历位棋盘中的格子"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class BitboardTables:
+    """某一棋盘尺寸下的预计算表
+
+    格子编号为 row * cols + col，位棋盘用Python整数表示（匈汉象棋169位，传统象棋90位）。
+    滑动类棋子（车、炮、檑、刺、盾、尉、射）使用按方向的射线掩码，配合最低/最高位
+    快速找到第一个阻挡；跳跃类棋子（马、相、士、将、射、尉）使用预先展开的目标掩码与蹩腿格。
+    """
+
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+        self.full = (1 << self.size) - 1
+
+        size = self.size
+        self.rays = [[0] * size for _ in DIRECTIONS]  # 各方向射线（不含起点）
+        self.ray_squares = [[None] * size for _ in DIRECTIONS]  # 射线上的格子，按距离排序
+        self.she_rays = [[0] * size for _ in DIRECTIONS]  # 斜向至多3格的射线
+        self.adjacent8 = [0] * size  # 横竖斜相邻8格
+        self.adjacent4 = [0] * size  # 上下左右相邻4格
+        self.near3 = [0] * size  # 横竖距离均不超过3的区域（含本格），覆盖所有短程攻击及其阻挡格
+        self.cross = [0] * size  # 本格所在的整行与整列（含本格），尉照面只受这些格子影响
+        self.steps_orthogonal = [None] * size  # 横竖一步的目标格
+        self.steps_diagonal = [None] * size  # 斜向一步的目标格
+        self.steps_all = [None] * size  # 相邻8格
+        self.knight_moves = [None] * size  # 马走日：[(目标格, 马腿格)]
+        self.knight_attackers = [None] * size  # 能以日字到达该格的马：[(起点格, 马腿格)]
+        self.straight_three = [None] * size  # 马直走三格：[(目标格, 路径掩码)]
+        self.xiang_diagonal = [None] * size  # 相走田：[(目标格, 象眼格)]
+        self.xiang_orthogonal = [None] * size  # 相隔一格直走：[(目标格, 中间格, 侧翼格1, 侧翼格2)]
+
+        # 跳跃类棋子的目标掩码
+        self.ma_mask = [0] * size
+        self.xiang_mask = [0] * size
+        self.shi_mask = [0] * size
+        self.she_mask = [0] * size
+        self.wei_mask = [0] * size
+
+        for row in range(rows):
+            for col in range(cols):
+                square = row * cols + col
+                for d, (dr, dc) in enumerate(DIRECTIONS):
+                    mask = 0
+                    squares = []
+                    r, c = row + dr, col + dc
+                    while self.on_board(r, c):
+                        s = r * cols + c
+                        mask |= 1 << s
+                        squares.append(s)
+                        r += dr
+                        c += dc
+                    self.rays[d][square] = mask
+                    self.ray_squares[d][square] = squares
+                    if d in DIAGONAL:
+                        for s in squares[:3]:
+                            self.she_rays[d][square] |= 1 << s
+                        self.she_mask[square] |= self.she_rays[d][square]
+                    self.wei_mask[square] |= mask
+                    if d in ORTHOGONAL:
+                        self.cross[square] |= mask
+                self.cross[square] |= 1 << square
+
+                for r in range(max(0, row - 3), min(rows, row + 4)):
+                    for c in range(max(0, col - 3), min(cols, col + 4)):
+                        self.near3[square] |= 1 << (r * cols + c)
+
+                orthogonal = []
+                diagonal = []
+                for d, (dr, dc) in enumerate(DIRECTIONS):
+                    r, c = row + dr, col + dc
+                    if self.on_board(r, c):
+                        s = r * cols + c
+                        self.adjacent8[square] |= 1 << s
+                        if d in ORTHOGONAL:
+                            self.adjacent4[square] |= 1 << s
+                            orthogonal.append(s)
+                        else:
+                            diagonal.append(s)
+                self.steps_orthogonal[square] = orthogonal
+                self.steps_diagonal[square] = diagonal
+                self.steps_all[square] = orthogonal + diagonal
+                self.shi_mask[square] = self.adjacent8[square]
+
+                knight = []
+                attackers = []
+                for dr, dc in KNIGHT_OFFSETS:
+                    r, c = row + dr, col + dc
+                    if not self.on_board(r, c):
+                        continue
+                    # 从本格出发的马腿
+                    if abs(dr) == 2:
+                        leg = (row + dr // 2) * cols + col
+                    else:
+                        leg = row * cols + col + dc // 2
+                    knight.append((r * cols + c, leg))
+                    self.ma_mask[square] |= 1 << (r * cols + c)
+                    # 从(r, c)出发跳到本格时的马腿
+                    if abs(dr) == 2:
+                        reverse_leg = (r - dr // 2) * cols + c
+                    else:
+                        reverse_leg = r * cols + c - dc // 2
+                    attackers.append((r * cols + c, reverse_leg))
+                self.knight_moves[square] = knight
+                self.knight_attackers[square] = attackers
+
+                straight = []
+                for dr, dc in ((-3, 0), (3, 0), (0, -3), (0, 3)):
+                    r, c = row + dr, col + dc
+                    if self.on_board(r, c):
+                        sr, sc = dr // 3, dc // 3
+                        path = (1 << ((row + sr) * cols + col + sc)) | (1 << ((row + 2 * sr) * cols + col + 2 * sc))
+                        straight.append((r * cols + c, path))
+                self.straight_three[square] = straight
+
+                xiang_diagonal = []
+                for dr, dc in ((-2, -2), (-2, 2), (2, -2), (2, 2)):
+                    r, c = row + dr, col + dc
+                    if self.on_board(r, c):
+                        eye = (row + dr // 2) * cols + col + dc // 2
+                        xiang_diagonal.append((r * cols + c, eye))
+                        self.xiang_mask[square] |= 1 << (r * cols + c)
+                self.xiang_diagonal[square] = xiang_diagonal
+
+                xiang_orthogonal = []
+                for dr, dc in ((-2, 0), (2, 0), (0, -2), (0, 2)):
+                    r, c = row + dr, col + dc
+                    if not self.on_board(r, c):
+                        continue
+                    mid_row, mid_col = row + dr // 2, col + dc // 2
+                    # 与移动方向垂直的两个侧翼格，超出棋盘记为-1
+                    if dr:
+                        sides = ((mid_row, mid_col - 1), (mid_row, mid_col + 1))
+                    else:
+                        sides = ((mid_row - 1, mid_col), (mid_row + 1, mid_col))
+                    side_squares = [sr * cols + sc if self.on_board(sr, sc) else -1 for sr, sc in sides]
+                    xiang_orthogonal.append((r * cols + c, mid_row * cols + mid_col, side_squares[0], side_squares[1]))
+                    self.xiang_mask[square] |= 1 << (r * cols + c)
+                self.xiang_orthogonal[square] = xiang_orthogonal
+
+        # 平移占位掩码时用于屏蔽跨行的列
+        self.not_first_col = 0
+        self.not_last_col = 0
+        for row in range(rows):
+            for col in range(cols):
+                if col != 0:
+                    self.not_first_col |= 1 << (row * cols + col)
+                if col != cols - 1:
+                    self.not_last_col |= 1 << (row * cols + col)
+
+    def on_board(self, row, col):
+        return 0 <= row < self.rows and 0 <= col < self.cols
+
+
+class MoveTables:
+    """某一规则设置下跳跃类与九宫类棋子的走法表
+
+    按[颜色编号][格子]列出候选目标及其阻挡格（马腿、直三路径、象眼），九宫、过河等
+    受规则设置影响的判断在生成时完成，走法生成只需遍历短列表检查占位。
+    """
+
+    def __init__(self, geometry, rules):
+        """
+        Args:
+            geometry (BitboardTables): 同尺寸棋盘的几何表
+            rules (RuleSet): 对局规则
+        """
+        size = geometry.size
+        cols = geometry.cols
+        board = rules.geometry
+        # 相的河界、士和将帅的合法性校验沿用匈汉象棋的几何（与 GameRules 一致），传统模式下同样如此
+        xionghan = XIONGHAN_GEOMETRY
+
+        # 马：[(目标格, 阻挡掩码)]，攻击表为能到达该格的 [(起点格, 阻挡掩码)]，与颜色无关
+        self.ma = [None] * size
+        self.ma_attackers = [None] * size
+        for square in range(size):
+            moves = [(target, 1 << leg) for target, leg in geometry.knight_moves[square]]
+            attackers = [(source, 1 << leg) for source, leg in geometry.knight_attackers[square]]
+            if rules.ma_can_straight_three:
+                moves += geometry.straight_three[square]
+                attackers += geometry.straight_three[square]
+            self.ma[square] = moves
+            self.ma_attackers[square] = attackers
+
+        self.xiang_diagonal = [[None] * size for _ in COLOR_NAMES]  # [(目标格, 象眼格)]
+        self.xiang_orthogonal = [[()] * size for _ in COLOR_NAMES]  # [(目标格, 中间格, 侧翼格1, 侧翼格2)]
+        self.shi = [[0] * size for _ in COLOR_NAMES]  # 目标掩码
+        self.king = [[0] * size for _ in COLOR_NAMES]  # 目标掩码
+        self.king_facing = [[0] * size for _ in COLOR_NAMES]  # 目标中不能直接吃敌方将帅的格子（将帅对脸）
+
+        can_cross_river = rules.xiang_can_cross_river
+        xiang_jump = rules.xiang_gain_jump_two_outside_river and can_cross_river
+        shi_can_leave = rules.shi_can_leave_palace
+        shi_straight = shi_can_leave and rules.shi_gain_straight_outside_palace
+        king_can_leave = rules.king_can_leave_palace
+
+        for color_code, color in enumerate(COLOR_NAMES):
+            enemy = COLOR_NAMES[1 - color_code]
+            for square in range(size):
+                row, col = divmod(square, cols)
+
+                # 相：不能过河时只保留本方一侧的田字目标，在敌方区域（敌方未过河的一侧，含中间的河界行）
+                # 获得横竖隔一格的走法
+                diagonal = []
+                for target, eye in geometry.xiang_diagonal[square]:
+                    if not can_cross_river and xionghan.has_crossed_river(color, target // cols):
+                        continue
+                    diagonal.append((target, eye))
+                self.xiang_diagonal[color_code][square] = diagonal
+                in_enemy_territory = not xionghan.has_crossed_river(enemy, row)
+                if xiang_jump and in_enemy_territory:
+                    self.xiang_orthogonal[color_code][square] = geometry.xiang_orthogonal[square]
+
+                # 士：候选走法按当前模式的九宫判断，合法性校验沿用匈汉象棋九宫坐标
+                in_palace = board.in_palace(color, row, col)
+                in_rule_palace = xionghan.in_palace(color, row, col)
+                targets = 0
+                for target in geometry.steps_diagonal[square]:
+                    in_target_palace = xionghan.in_palace(color, *divmod(target, cols))
+                    if in_target_palace or shi_can_leave:
+                        targets |= 1 << target
+                if shi_straight and not in_palace and not in_rule_palace:
+                    for target in geometry.steps_orthogonal[square]:
+                        targets |= 1 << target
+                self.shi[color_code][square] = targets
+
+                # 将帅：九宫内外的斜走能力、能否出宫
+                if in_palace:
+                    diagonal_steps = rules.king_can_diagonal_in_palace
+                else:
+                    diagonal_steps = not rules.king_lose_diagonal_outside_palace
+                candidates = geometry.steps_orthogonal[square]
+                if diagonal_steps:
+                    candidates = candidates + geometry.steps_diagonal[square]
+                targets = 0
+                facing = 0
+                for target in candidates:
+                    to_row, to_col = divmod(target, cols)
+                    if not king_can_leave and not xionghan.in_palace(color, to_row, to_col):
+                        continue
+                    targets |= 1 << target
+                    if to_col == col and not board.in_palace(enemy, to_row, to_col):
+                        facing |= 1 << target
+                self.king[color_code][square] = targets
+                self.king_facing[color_code][square] = facing
+
+
+class Bitboard:
+    """位棋盘局面
+
+    保存按格子编号的棋子数组，以及每种颜色、每种(颜色, 棋子类型)的占位掩码和局面的Zobrist键。
+    PieceList 会在棋子增删和移动时增量维护这些掩码和键；对普通列表则可以通过
+    from_pieces 临时构建。走法生成与将军判断的结果与 GameRules 中逐格校验的规则完全一致。
+    """
+
+    def __init__(self, rows=None, cols=None, rule_set=None):
+        """
+        Args:
+            rows (int): 棋盘行数，默认取规则中的棋盘尺寸
+            cols (int): 棋盘列数，默认取规则中的棋盘尺寸
+            rule_set (RuleSet): 对局规则，默认由当前配置编译
+
+        Raises:
+            ValueError: 给出的棋盘尺寸与规则的棋盘几何不一致
+        """
+        if rule_set is None:
+            rule_set = current_rule_set()
+        if rows is None or cols is None:
+            rows, cols = rule_set.rows, rule_set.cols
+        elif (rows, cols) != (rule_set.rows, rule_set.cols):
+            raise ValueError(f"棋盘尺寸 {rows}x{cols} 与规则的棋盘几何 {rule_set.rows}x{rule_set.cols} 不一致")
+        self.rows = rows
+        self.cols = cols
+        self.rule_set = rule_set
+        self.tables = get_tables(rows, cols)
+        self.move_tables = get_move_tables(rows, cols, rule_set)
+        self.board = [None] * (rows * cols)
+        self.occupied = 0
+        self.color_masks = {"red": 0, "black": 0}
+        self.type_masks = {}
+        # 各方各类棋子的数量，下标为 颜色编号*14+类型编号（与局面编码中的棋子编码减一相同）
+        self.material = bytearray(2 * PIECE_TYPE_COUNT)
+        # 相邻计数，按颜色编号分层：neighbors 为每格上下左右的该色棋子数（檑/礌的落单判断），
+        # dun_neighbors 为每格横竖斜8邻域内的该色盾数（盾的吃子限制），随棋子增删增量维护
+        self.neighbors = (bytearray(rows * cols), bytearray(rows * cols))
+        self.dun_neighbors = (bytearray(rows * cols), bytearray(rows * cols))
+        self.zobrist = 0  # 棋子布局的Zobrist键（不含走子方）
+        # 尉照面关系：尉所在格 -> 被照面的敌子（没有为None），只在相关行列有变动时重新计算
+        self._facing = {}
+        self._facing_restricted = {}  # 被照面的棋子 -> 照面它的尉的数量
+        self._facing_dirty = 0  # 上次更新照面关系后有变动的格子
+
+    @classmethod
+    def from_pieces(cls, pieces, rows=None, cols=None, rule_set=None):
+        """根据棋子列表构建位棋盘（同一格有多个棋子时以列表中靠前的为准）"""
+        bitboard = cls(rows, cols, rule_set)
+        for piece in pieces:
+            if 0 <= piece.row < bitboard.rows and 0 <= piece.col < bitboard.cols:
+                square = piece.row * bitboard.cols + piece.col
+                if bitboard.board[square] is None:
+                    bitboard.put(square, piece)
+        return bitboard
+
+    @staticmethod
+    def of(pieces, rule_set=None):
+        """获取棋子列表对应的位棋盘，带索引的棋子列表直接复用其增量维护的位棋盘
+
+        指定的规则与棋子列表所属对局的规则不同时，按指定规则临时构建。
+        """
+        bitboard = getattr(pieces, "bitboard", None)
+        if bitboard is not None and (rule_set is None or rule_set == bitboard.rule_set):
+            return bitboard
+        return Bitboard.from_pieces(pieces, rule_set=rule_set)
+
+    # ---------- 局面维护 ----------
+
+    def put(self, square, piece):
+        """设置格子上的棋子（piece为None表示清空），同步更新各掩码和Zobrist键"""
+        old = self.board[square]
+        if old is piece:
+            return
+        bit = 1 << square
+        if old is not None:
+            self.occupied &= ~bit
+            self.color_masks[old.color] &= ~bit
+            key = (old.color, type(old))
+            self.type_masks[key] &= ~bit
+            self.material[old.color_code * PIECE_TYPE_COUNT + old.type_code] -= 1
+            self.zobrist ^= zobrist_keys(*key)[square]
+            self._count_neighbors(old, square, -1)
+        self.board[square] = piece
+        self._facing_dirty |= bit
+        if piece is not None:
+            self.occupied |= bit
+            self.color_masks[piece.color] = self.color_masks.get(piece.color, 0) | bit
+            key = (piece.color, type(piece))
+            self.type_masks[key] = self.type_masks.get(key, 0) | bit
+            self.material[piece.color_code * PIECE_TYPE_COUNT + piece.type_code] += 1
+            self.zobrist ^= zobrist_keys(*key)[square]
+            self._count_neighbors(piece, square, 1)
+
+    def _count_neighbors(self, piece, square, delta):
+        """棋子放到/离开格子时更新周围格子的相邻计数"""
+        tables = self.tables
+        neighbors = self.neighbors[piece.color_code]
+        for s in tables.steps_orthogonal[square]:
+            neighbors[s] += delta
+        if piece.type_code == DUN:
+            dun_neighbors = self.dun_neighbors[piece.color_code]
+            for s in tables.steps_all[square]:
+                dun_neighbors[s] += delta
+
+    def clear(self):
+        self.board = [None] * (self.rows * self.cols)
+        self.occupied = 0
+        self.color_masks = {"red": 0, "black": 0}
+        self.type_masks = {}
+        self.material = bytearray(2 * PIECE_TYPE_COUNT)
+        self.neighbors = (bytearray(self.rows * self.cols), bytearray(self.rows * self.cols))
+        self.dun_neighbors = (bytearray(self.rows * self.cols), bytearray(self.rows * self.cols))
+        self.zobrist = 0
+        self._facing = {}
+        self._facing_restricted = {}
+        self._facing_dirty = 0
+
+    def piece_at(self, row, col):
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return self.board[row * self.cols + col]
+        return None
+
+    def pieces_mask(self, color, piece_type):
+        """获取某方某类棋子的占位掩码"""
+        return self.type_masks.get((color, piece_type), 0)
+
+    def count(self, color, piece_type):
+        """某方某类棋子的数量"""
+        return self.material[COLOR_CODES[color] * PIECE_TYPE_COUNT + piece_type.type_code]
+
+    def material_signature(self):
+        """子力签名：按 颜色编号*14+类型编号 排列的各类棋子数量，可直接作为字典键"""
+        return bytes(self.material)
+
+    def pieces_of(self, color, piece_type):
+        """某方某类的棋子（按格子编号排列）"""
+        board = self.board
+        return [board[square] for square in iter_squares(self.type_masks.get((color, piece_type), 0))]
+
+    def positions(self, mask):
+        """将位棋盘转换为坐标列表 [(row, col), ...]"""
+        cols = self.cols
+        return [divmod(square, cols) for square in iter_squares(mask)]
+
+    # ---------- 射线工具 ----------
+
+    def _first_blocker(self, d, square, mask):
+        """沿方向d找到掩码中离起点最近的格子，没有返回-1"""
+        hits = self.tables.rays[d][square] & mask
+        if not hits:
+            return -1
+        if POSITIVE[d]:
+            return (hits & -hits).bit_length() - 1
+        return hits.bit_length() - 1
+
+    def _between(self, d, square, stop):
+        """起点与stop之间（均不含）的格子"""
+        rays = self.tables.rays[d]
+        return rays[square] ^ rays[stop] ^ (1 << stop)
+
+    def _pinch_mask(self, d):
+        """斜向方向d的夹逼格：该格在(0, dc)与(dr, 0)两个侧向位置上都有棋子"""
+        dr, dc = DIRECTIONS[d]
+        occupied = self.occupied
+        tables = self.tables
+        if dc > 0:
+            side_col = (occupied >> 1) & tables.not_last_col
+        else:
+            side_col = (occupied << 1) & tables.not_first_col
+        if dr > 0:
+            side_row = occupied >> self.cols
+        else:
+            side_row = occupied << self.cols
+        return side_col & side_row & tables.full
+
+    def _is_isolated(self, square):
+        """格子上的棋子上下左右是否没有同色棋子"""
+        return not self.neighbors[self.board[square].color_code][square]
+
+    def near_dun(self, color, row, col):
+        """格子横竖斜8邻域内是否有某方的盾"""
+        return bool(self.dun_neighbors[COLOR_CODES[color]][row * self.cols + col])
+
+    # ---------- 规则限制 ----------
+
+    def facing_restricted(self):
+        """被尉/衛照面而禁止移动的棋子（可用 in 判断的映射：棋子 -> 照面它的尉的数量）
+
+        照面关系增量维护：只有行或列上的格子发生过变动的尉才重新沿四个方向查找照面对象，
+        其余尉沿用上次的结果。返回的映射随棋盘变动更新，需要在局面改变后重新获取。
+        """
+        if self._facing_dirty:
+            self._update_facing()
+        return self._facing_restricted
+
+    def facing_pairs(self):
+        """当前的尉照面关系 [(尉, 被照面的敌子), ...]，按尉所在格编号排列"""
+        if self._facing_dirty:
+            self._update_facing()
+        board = self.board
+        return [(board[square], target) for square, target in sorted(self._facing.items()) if target is not None]
+
+    def facing_target(self, square):
+        """尉/衛沿上、下、左、右依次查找，第一个以敌子为第一个阻挡的方向上的敌子即为照面对象"""
+        color = self.board[square].color
+        occupied = self.occupied
+        for d in ORTHOGONAL:
+            blocker = self._first_blocker(d, square, occupied)
+            if blocker >= 0 and self.board[blocker].color != color:
+                return self.board[blocker]
+        return None
+
+    def _update_facing(self):
+        """重新计算行列上有变动的尉的照面对象"""
+        dirty = self._facing_dirty
+        self._facing_dirty = 0
+        cross = self.tables.cross
+        facing = self._facing
+        restricted = self._facing_restricted
+        for square in [square for square in facing if dirty & cross[square]]:
+            target = facing.pop(square)
+            if target is not None:
+                count = restricted[target] - 1
+                if count:
+                    restricted[target] = count
+                else:
+                    del restricted[target]
+        weis = self.type_masks.get(("red", Wei), 0) | self.type_masks.get(("black", Wei), 0)
+        for square in iter_squares(weis):
+            if square in facing:
+                continue
+            target = self.facing_target(square)
+            facing[square] = target
+            if target is not None:
+                restricted[target] = restricted.get(target, 0) + 1
+
+    def _filter_captures(self, square, color, captures):
+        """按盾的规则过滤吃子目标"""
+        enemy = "black" if color == "red" else "red"
+        enemy_duns = self.type_masks.get((enemy, Dun), 0)
+        if enemy_duns:
+            # 与敌方盾相邻的棋子不能吃子
+            if self.dun_neighbors[COLOR_CODES[enemy]][square]:
+                return 0
+            # 盾不可被吃
+            captures &= ~enemy_duns
+        if self.type_masks.get((color, Dun), 0):
+            # 与己方盾相邻的敌方棋子不能被吃
+            own_dun_neighbors = self.dun_neighbors[COLOR_CODES[color]]
+            for target in iter_squares(captures):
+                if own_dun_neighbors[target]:
+                    captures &= ~(1 << target)
+        return captures
+
+    # ---------- 走法生成 ----------
+
+    def piece_targets(self, piece, restricted=None):
+        """计算棋子的可走目标
+
+        Args:
+            piece (ChessPiece): 要计算的棋子
+            restricted (set): 被照面限制的棋子集合，None表示现场计算
+
+        Returns:
+            tuple: (可走目标掩码, 可吃子目标掩码)，与 GameRules.calculate_possible_moves 的结果一致
+                   （甲/胄的三子连线吃子由 GameRules 另行追加）
+        """
+        square = piece.row * self.cols + piece.col
+        if restricted is None:
+            restricted = self.facing_restricted() if self._has_wei() else ()
+        if piece in restricted:
+            quiet = captures = 0
+        else:
+            quiet, captures = self._base_targets(piece, square)
+            if captures:
+                captures = self._filter_captures(square, piece.color, captures)
+
+        if piece.type_code == LEI:
+            # 檑/礌可以直接攻击相邻8格中落单的敌方棋子（不受盾与照面限制）
+            enemies = self.occupied & ~self.color_masks.get(piece.color, 0)
+            for target in iter_squares(self.tables.adjacent8[square] & enemies):
+                if self._is_isolated(target):
+                    captures |= 1 << target
+
+        return quiet | captures, captures
+
+    def _has_wei(self):
+        return bool(self.type_masks.get(("red", Wei), 0) or self.type_masks.get(("black", Wei), 0))
+
+    def _base_targets(self, piece, square):
+        """不考虑照面与盾的限制时棋子的目标，返回(空位掩码, 敌子掩码)"""
+        type_code = piece.type_code
+        if type_code < 0:
+            return 0, 0
+        return _BASE_TARGET_DISPATCH[type_code](self, piece, square)
+
+    def _wei_targets(self, piece, square):
+        return self._jump_targets(square, ALL_DIRECTIONS), 0
+
+    def _dun_targets(self, piece, square):
+        return self._jump_targets(square, ORTHOGONAL), 0
+
+    def _jia_targets(self, piece, square):
+        return self._slide_targets(square, ORTHOGONAL), 0
+
+    def _split(self, piece, targets):
+        """将目标掩码拆分为(空位, 敌子)"""
+        occupied = self.occupied
+        enemies = occupied & ~self.color_masks.get(piece.color, 0)
+        return targets & ~occupied, targets & enemies
+
+    def _slide_targets(self, square, directions):
+        """沿各方向直到第一个阻挡之前的空位"""
+        quiet = 0
+        rays = self.tables.rays
+        occupied = self.occupied
+        for d in directions:
+            blocker = self._first_blocker(d, square, occupied)
+            if blocker < 0:
+                quiet |= rays[d][square]
+            else:
+                quiet |= self._between(d, square, blocker)
+        return quiet
+
+    def _jump_targets(self, square, directions):
+        """尉/盾：跨过第一个棋子后，在碰到下一个棋子前的空位"""
+        quiet = 0
+        rays = self.tables.rays
+        occupied = self.occupied
+        for d in directions:
+            blocker = self._first_blocker(d, square, occupied)
+            if blocker < 0:
+                continue
+            second = self._first_blocker(d, blocker, occupied)
+            if second < 0:
+                quiet |= rays[d][blocker]
+            else:
+                quiet |= self._between(d, blocker, second)
+        return quiet
+
+    def _ju_targets(self, piece, square):
+        quiet = 0
+        captures = 0
+        rays = self.tables.rays
+        occupied = self.occupied
+        enemies = occupied & ~self.color_masks.get(piece.color, 0)
+        for d in ORTHOGONAL:
+            blocker = self._first_blocker(d, square, occupied)
+            if blocker < 0:
+                quiet |= rays[d][square]
+            else:
+                quiet |= self._between(d, square, blocker)
+                captures |= (1 << blocker) & enemies
+        return quiet, captures
+
+    def _pao_targets(self, piece, square):
+        quiet = 0
+        captures = 0
+        rays = self.tables.rays
+        occupied = self.occupied
+        enemies = occupied & ~self.color_masks.get(piece.color, 0)
+        for d in ORTHOGONAL:
+            screen = self._first_blocker(d, square, occupied)
+            if screen < 0:
+                quiet |= rays[d][square]
+                continue
+            quiet |= self._between(d, square, screen)
+            target = self._first_blocker(d, screen, occupied)
+            if target >= 0:
+                captures |= (1 << target) & enemies
+        return quiet, captures
+
+    def _ci_targets(self, piece, square):
+        """刺：直线移动到空位；起点反方向同距离处有敌子时需满足兑子条件"""
+        quiet = 0
+        tables = self.tables
+        occupied = self.occupied
+        board = self.board
+        color = piece.color
+        blocked_by_dun = bool(self.dun_neighbors[1 - piece.color_code][square])
+        for d in ORTHOGONAL:
+            reverse_squares = tables.ray_squares[OPPOSITE[d]][square]
+            for distance, target in enumerate(tables.ray_squares[d][square]):
+                if occupied >> target & 1:
+                    break
+                if distance < len(reverse_squares):
+                    reverse_piece = board[reverse_squares[distance]]
+                    if reverse_piece is not None and reverse_piece.color != color:
+                        if isinstance(reverse_piece, Dun) or blocked_by_dun:
+                            continue
+                quiet |= 1 << target
+        return quiet, 0
+
+    def _diagonal_reach(self, d, square, limit_mask):
+        """斜向滑动：遇到棋子或夹逼点停止，返回(可达空位, 第一个阻挡棋子的格子或-1)"""
+        rays = self.tables.rays[d]
+        stops = (self.occupied | self._pinch_mask(d)) & rays[square]
+        if not stops:
+            return rays[square] & limit_mask, -1
+        if POSITIVE[d]:
+            stop = (stops & -stops).bit_length() - 1
+        else:
+            stop = stops.bit_length() - 1
+        reach = rays[square] ^ rays[stop] ^ (1 << stop)
+        if self.occupied >> stop & 1:
+            return reach & limit_mask, stop
+        # 夹逼点本身为空位，可以停在这里，但不能继续前进
+        return (reach | (1 << stop)) & limit_mask, -1
+
+    def _she_targets(self, piece, square):
+        quiet = 0
+        captures = 0
+        tables = self.tables
+        enemies = self.occupied & ~self.color_masks.get(piece.color, 0)
+        for d in DIAGONAL:
+            limit = tables.she_rays[d][square]
+            reach, blocker = self._diagonal_reach(d, square, limit)
+            quiet |= reach
+            if blocker >= 0:
+                captures |= (1 << blocker) & enemies & limit
+        return quiet, captures
+
+    def _lei_targets(self, piece, square):
+        quiet = 0
+        captures = 0
+        tables = self.tables
+        full = tables.full
+        adjacent8 = tables.adjacent8[square]
+        enemies = self.occupied & ~self.color_masks.get(piece.color, 0)
+        for d in ALL_DIRECTIONS:
+            if d in DIAGONAL:
+                reach, blocker = self._diagonal_reach(d, square, full)
+            else:
+                blocker = self._first_blocker(d, square, self.occupied)
+                if blocker < 0:
+                    reach = tables.rays[d][square]
+                else:
+                    reach = self._between(d, square, blocker)
+            quiet |= reach
+            # 只能攻击相邻且落单的敌方棋子
+            if blocker >= 0 and (1 << blocker) & adjacent8 & enemies and self._is_isolated(blocker):
+                captures |= 1 << blocker
+        return quiet, captures
+
+    def _ma_targets(self, piece, square):
+        occupied = self.occupied
+        targets = 0
+        for target, block in self.move_tables.ma[square]:
+            if not occupied & block:
+                targets |= 1 << target
+        return self._split(piece, targets)
+
+    def _xiang_targets(self, piece, square):
+        move_tables = self.move_tables
+        occupied = self.occupied
+        board = self.board
+        color = piece.color
+        color_code = piece.color_code
+        targets = 0
+        for target, eye in move_tables.xiang_diagonal[color_code][square]:
+            if not occupied >> eye & 1:  # 未被塞象眼
+                targets |= 1 << target
+
+        # 在敌方区域横竖隔一格移动
+        for target, middle, side_a, side_b in move_tables.xiang_orthogonal[color_code][square]:
+            if occupied >> middle & 1:
+                continue
+            if board[target] is None:
+                # 中间格两侧分别是敌子与己子时，不能移动到空位
+                piece_a = board[side_a] if side_a >= 0 else None
+                piece_b = board[side_b] if side_b >= 0 else None
+                if piece_a is not None and piece_b is not None and (
+                        (piece_a.color != color and piece_b.color == color) or
+                        (piece_b.color != color and piece_a.color == color)):
+                    continue
+            targets |= 1 << target
+        return self._split(piece, targets)
+
+    def _shi_targets(self, piece, square):
+        return self._split(piece, self.move_tables.shi[piece.color_code][square])
+
+    def _king_targets(self, piece, square):
+        move_tables = self.move_tables
+        color_code = piece.color_code
+        targets = move_tables.king[color_code][square]
+        facing = move_tables.king_facing[color_code][square]
+        if facing:
+            # 将帅对脸：同列相邻的敌方将帅不能直接吃
+            targets &= ~(facing & self.type_masks.get((COLOR_NAMES[1 - color_code], King), 0))
+        return self._split(piece, targets)
+
+    def _pawn_targets(self, piece, square):
+        tables = self.tables
+        board = self.board
+        cols = self.cols
+        color = piece.color
+        row, col = piece.row, piece.col
+        targets = 0
+        rule_set = self.rule_set
+        if rule_set.traditional_mode:
+            forward = -1 if color == "red" else 1
+            crossed = row <= rule_set.river_rows[0] if color == "red" else row >= rule_set.river_rows[1]
+            candidates = [(row + forward, col)]
+            if crossed:
+                candidates += [(row, col - 1), (row, col + 1)]
+            for r, c in candidates:
+                if tables.on_board(r, c):
+                    targets |= 1 << (r * cols + c)
+        else:
+            if color == "red":
+                forward, wall, base = -1, rule_set.river_rows[0], 0
+                before_wall = row > wall
+            else:
+                forward, wall, base = 1, rule_set.river_rows[1], self.rows - 1
+                before_wall = row < wall
+            if before_wall:
+                # 未跨越长城：直线向前，可连续走到长城为止，多步移动不能吃子也不能越子
+                for step in range(1, abs(wall - row) + 1):
+                    target = (row + step * forward) * cols + col
+                    if board[target] is not None:
+                        if step == 1:
+                            targets |= 1 << target
+                        break
+                    targets |= 1 << target
+            else:
+                candidates = [(row, col - 1), (row, col + 1)]
+                if row != base:
+                    candidates.append((row + forward, col))
+                elif color != "red" or rule_set.pawn_full_movement_at_base_enabled \
+                        or rule_set.pawn_backward_at_base_enabled:
+                    # 到达底线后可以后退
+                    candidates.append((row - forward, col))
+                for r, c in candidates:
+                    if tables.on_board(r, c):
+                        targets |= 1 << (r * cols + c)
+        return self._split(piece, targets)
+
+    def _xun_targets(self, piece, square):
+        if piece.row not in XIONGHAN_GEOMETRY.river_rows:
+            # 巡/廵只能在长城所在的两行活动
+            return 0, 0
+        tables = self.tables
+        occupied = self.occupied
+        enemies = occupied & ~self.color_masks.get(piece.color, 0)
+        quiet = 0
+        captures = 0
+        for d in (2, 3):
+            for distance, target in enumerate(tables.ray_squares[d][square], 1):
+                if occupied >> target & 1:
+                    # 只能吃左右第二格的敌子
+                    if distance == 2:
+                        captures |= (1 << target) & enemies
+                    break
+                if distance % 2 == 0:
+                    quiet |= 1 << target
+        return quiet, captures
+
+    # ---------- 甲/胄连线吃子 ----------
+
+    def jia_captures(self, color):
+        """甲/胄可以吃的子：包含己方甲/胄的2己1敌三子横竖斜连线中的敌子
+
+        只检查经过己方各甲/胄的连线（每个甲/胄每个方向3条），结果与
+        GameRules.scan_jia_capture_moves 的全盘扫描一致，包括返回顺序。
+
+        Returns:
+            list: 可以吃掉的敌方棋子
+        """
+        jias = self.type_masks.get((color, Jia), 0)
+        if not jias:
+            return []
+        enemy_dun_neighbors = self.dun_neighbors[1 - COLOR_CODES[color]]
+        board = self.board
+        cols = self.cols
+        on_board = self.tables.on_board
+
+        lines = {}  # (方向, 扫描顺序坐标) -> 连线中的敌子
+        for jia_square in iter_squares(jias):
+            jia_row, jia_col = divmod(jia_square, cols)
+            for order, (dr, dc) in enumerate(JIA_LINE_DIRECTIONS):
+                for offset in range(3):
+                    start_row, start_col = jia_row - offset * dr, jia_col - offset * dc
+                    if not (on_board(start_row, start_col) and on_board(start_row + 2 * dr, start_col + 2 * dc)):
+                        continue
+                    # 竖线按列优先扫描，其余按行优先
+                    key = (order, start_col, start_row) if order == 1 else (order, start_row, start_col)
+                    if key in lines:
+                        continue
+                    lines[key] = self._jia_line_capture(
+                        [board[(start_row + i * dr) * cols + start_col + i * dc] for i in range(3)],
+                        color, enemy_dun_neighbors)
+
+        captures = []
+        for key in sorted(lines):
+            captured = lines[key]
+            if captured is not None and captured not in captures:
+                captures.append(captured)
+        return captures
+
+    def _jia_line_capture(self, line, color, enemy_dun_neighbors):
+        """判断一条三子连线能否触发甲/胄吃子，返回被吃的敌子或None"""
+        if None in line:
+            return None
+        ally_count = 0
+        has_ally_jia = False
+        captured = None
+        for piece in line:
+            if piece.color == color:
+                if isinstance(piece, Dun):
+                    return None  # 盾不参与甲/胄的连线吃子
+                ally_count += 1
+                if isinstance(piece, Jia):
+                    has_ally_jia = True
+            else:
+                captured = piece
+        if ally_count != 2 or not has_ally_jia:
+            return None
+        # 连线中的己方棋子与敌方盾8邻域相接时不能吃子
+        cols = self.cols
+        for piece in line:
+            if piece.color == color and enemy_dun_neighbors[piece.row * cols + piece.col]:
+                return None
+        return captured
+
+    # ---------- 将军判断 ----------
+
+    def find_king_square(self, color, pieces=None):
+        """获取某方将/帅所在格子，没有返回-1"""
+        kings = self.type_masks.get((color, King), 0)
+        if not kings:
+            return -1
+        if kings & (kings - 1) and pieces is not None:
+            # 同色多个将帅时以列表中的第一个为准
+            for piece in pieces:
+                if isinstance(piece, King) and piece.color == color:
+                    return piece.row * self.cols + piece.col
+        return (kings & -kings).bit_length() - 1
+
+    def king(self, color, pieces=None):
+        """获取某方的将/帅，没有返回None"""
+        square = self.find_king_square(color, pieces)
+        return self.board[square] if square >= 0 else None
+
+    def is_check(self, color, pieces=None):
+        """检查某方是否被将军，结果与 GameRules.is_check 的逐子判断一致"""
+        king_square = self.find_king_square(color, pieces)
+        if king_square < 0:
+            return True  # 没有找到将/帅，视为被将死
+
+        enemy = "black" if color == "red" else "red"
+        tables = self.tables
+        occupied = self.occupied
+        type_masks = self.type_masks
+
+        # 车：直线第一个棋子；炮：直线第二个棋子；将帅对脸：同列第一个棋子
+        ju = type_masks.get((enemy, Ju), 0)
+        pao = type_masks.get((enemy, Pao), 0)
+        king = type_masks.get((enemy, King), 0)
+        for d in ORTHOGONAL:
+            blocker = self._first_blocker(d, king_square, occupied)
+            if blocker < 0:
+                continue
+            bit = 1 << blocker
+            if bit & ju or (d < 2 and bit & king):
+                return True
+            if pao:
+                second = self._first_blocker(d, blocker, occupied)
+                if second >= 0 and (1 << second) & pao:
+                    return True
+
+        # 马：日字与直走三格，只检查蹩腿
+        ma = type_masks.get((enemy, Ma), 0)
+        if ma:
+            for source, block in self.move_tables.ma_attackers[king_square]:
+                if ma >> source & 1 and not occupied & block:
+                    return True
+
+        # 其他棋子按普通走法校验（受照面与盾的限制）；尉、甲、刺、盾不能吃子
+        others = 0
+        for piece_type in (Xiang, Shi, Pawn, She, Lei, Xun):
+            others |= type_masks.get((enemy, piece_type), 0)
+        if not others:
+            return False
+        near = tables.adjacent8[king_square] | tables.xiang_mask[king_square] | tables.she_mask[king_square]
+        for xun_square in iter_squares(type_masks.get((enemy, Xun), 0)):
+            near |= 1 << xun_square
+        others &= near
+        if not others:
+            return False
+        restricted = self.facing_restricted() if self._has_wei() else ()
+        king_bit = 1 << king_square
+        for square in iter_squares(others):
+            piece = self.board[square]
+            if piece in restricted:
+                continue
+            _, captures = self._base_targets(piece, square)
+            if captures & king_bit and self._filter_captures(square, enemy, king_bit):
+                return True
+        return False
+
+
+# 按棋子类型编号（ChessPiece.type_code）分派的目标计算方法
+_BASE_TARGET_DISPATCH = (
+    Bitboard._ju_targets,     # JU
+    Bitboard._ma_targets,     # MA
+    Bitboard._xiang_targets,  # XIANG
+    Bitboard._shi_targets,    # SHI
+    Bitboard._king_targets,   # KING
+    Bitboard._pao_targets,    # PAO
+    Bitboard._pawn_targets,   # PAWN
+    Bitboard._wei_targets,    # WEI
+    Bitboard._she_targets,    # SHE
+    Bitboard._lei_targets,    # LEI
+    Bitboard._jia_targets,    # JIA
+    Bitboard._ci_targets,     # CI
+    Bitboard._dun_targets,    # DUN
+    Bitboard._xun_targets,    # XUN
+)
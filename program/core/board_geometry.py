@@ -0,0 +1,70 @@
+"""棋盘几何
+
+BoardGeometry 描述一种棋盘的尺寸、九宫、河界和格子编号，与具体规则开关无关：
+  - XIONGHAN_GEOMETRY: 匈汉象棋 13行13列，169格
+  - TRADITIONAL_GEOMETRY: 传统象棋 10行9列，90格
+格子编号为 行*列数+列，与同尺寸位棋盘（见 program.core.bitboard）的位序一致。
+传统象棋直接使用紧凑的90格编号，遍历棋盘、判断越界时不再按13×13处理，也不需要按模式分支。
+"""
+from collections import namedtuple
+
+from program.core.chess_pieces import COLOR_CODES
+
+
+class BoardGeometry(namedtuple("BoardGeometry", ["rows", "cols", "palaces", "river_rows", "pawn_rows"])):
+    """不可变的棋盘几何
+
+    - rows, cols: 棋盘行列数
+    - palaces: 按颜色编号排列的九宫范围 (起始行, 结束行, 起始列, 结束列)
+    - river_rows: (红方过河行, 黑方过河行)，红方到达该行及以上、黑方到达该行及以下即为过河
+      （匈汉象棋为长城所在行）
+    - pawn_rows: 按颜色编号排列的兵/卒初始行，兵/卒隔列排列在该行的偶数列上
+    """
+
+    __slots__ = ()
+
+    @property
+    def size(self):
+        """格子总数"""
+        return self.rows * self.cols
+
+    def on_board(self, row, col):
+        """坐标是否在棋盘范围内"""
+        return 0 <= row < self.rows and 0 <= col < self.cols
+
+    def in_palace(self, color, row, col):
+        """坐标是否在指定颜色的九宫内"""
+        first_row, last_row, first_col, last_col = self.palaces[COLOR_CODES[color]]
+        return first_row <= row <= last_row and first_col <= col <= last_col
+
+    def has_crossed_river(self, color, row):
+        """指定颜色的棋子位于该行时是否已过河"""
+        if color == "red":
+            return row <= self.river_rows[0]
+        return row >= self.river_rows[1]
+
+    def pawn_squares(self, color):
+        """指定颜色的兵/卒初始位置 [(行, 列)]（兵/卒复活的位置）"""
+        row = self.pawn_rows[COLOR_CODES[color]]
+        return [(row, col) for col in range(0, self.cols, 2)]
+
+    def square(self, row, col):
+        """坐标对应的格子编号"""
+        return row * self.cols + col
+
+    def coords(self, square):
+        """格子编号对应的 (行, 列)"""
+        return divmod(square, self.cols)
+
+    def squares(self):
+        """按编号遍历全部格子"""
+        return range(self.rows * self.cols)
+
+
+XIONGHAN_GEOMETRY = BoardGeometry(13, 13, ((9, 11, 5, 7), (1, 3, 5, 7)), (5, 7), (8, 4))
+TRADITIONAL_GEOMETRY = BoardGeometry(10, 9, ((7, 9, 3, 5), (0, 2, 3, 5)), (4, 5), (6, 3))
+
+
+def geometry_for(traditional_mode):
+    """按模式选择棋盘几何"""
+    return TRADITIONAL_GEOMETRY if traditional_mode else XIONGHAN_GEOMETRY
@@ -1,9 +1,27 @@
 from program.controllers.game_config_manager import BOARD_SIZE
 from program.controllers.game_config_manager import game_config
 
+# 颜色编号
+RED, BLACK = 0, 1
+COLOR_NAMES = ("red", "black")
+COLOR_CODES = {"red": RED, "black": BLACK}
+
+# 棋子类型编号，即各棋子类的 type_code，可直接作为按类型索引的表的下标
+JU, MA, XIANG, SHI, KING, PAO, PAWN, WEI, SHE, LEI, JIA, CI, DUN, XUN = range(14)
+PIECE_TYPE_COUNT = 14
+
 
 class ChessPiece:
-    """棋子基类"""
+    """棋子基类
+
+    使用 __slots__ 存储，每个棋子只保留颜色、名称、坐标等少量字段；
+    类型和颜色另有整数编号（type_code、color_code），热点代码用它们查表分派，不再逐个 isinstance 判断。
+    """
+
+    __slots__ = ("_owner", "color", "color_code", "name", "row", "col")
+
+    type_code = -1  # 棋子类型编号
+    display_names = ("", "")  # 显示名称 (红方, 黑方)
 
     def __init__(self, color, name, row, col):
         """初始化棋子
@@ -19,17 +37,45 @@ class ChessPiece:
         if not (0 <= row < BOARD_SIZE and 0 <= col < BOARD_SIZE):
             raise ValueError(f"棋子位置必须在棋盘范围内 (0-{BOARD_SIZE - 1}, 0-{BOARD_SIZE - 1})")
 
+        self._owner = None  # 所属的带索引棋子列表（PieceList），坐标变化时通知其更新棋盘索引
         self.color = color  # 颜色：red或black
+        self.color_code = COLOR_CODES[color]  # 颜色编号：RED或BLACK
         self.name = name  # 棋子名称
         self.row = row  # 行坐标
         self.col = col  # 列坐标
 
+    @classmethod
+    def display_name(cls, color):
+        """该类棋子在指定颜色下的显示名称"""
+        return cls.display_names[COLOR_CODES.get(color, RED)]
+
     def move_to(self, row, col):
         """移动棋子到新位置"""
         if not (0 <= row < BOARD_SIZE and 0 <= col < BOARD_SIZE):
             raise ValueError(f"棋子移动位置必须在棋盘范围内 (0-{BOARD_SIZE - 1}, 0-{BOARD_SIZE - 1})")
-        self.row = row
-        self.col = col
+        old_row, old_col = self.row, self.col
+        object.__setattr__(self, "row", row)
+        object.__setattr__(self, "col", col)
+        if self._owner is not None:
+            self._owner._relocate(self, old_row, old_col)
+
+    def __setattr__(self, name, value):
+        """修改行列坐标时同步所属棋子列表的棋盘索引"""
+        if (name == "row" or name == "col") and self._owner is not None:
+            old_row, old_col = self.row, self.col
+            object.__setattr__(self, name, value)
+            self._owner._relocate(self, old_row, old_col)
+        else:
+            object.__setattr__(self, name, value)
+
+    def __getstate__(self):
+        """拷贝或序列化棋子时不携带所属列表"""
+        return {slot: getattr(self, slot) for slot in ChessPiece.__slots__ if slot != "_owner"}
+
+    def __setstate__(self, state):
+        object.__setattr__(self, "_owner", None)
+        for slot, value in state.items():
+            object.__setattr__(self, slot, value)
 
 
 def should_include_piece(piece_class_name):
@@ -65,114 +111,182 @@ def should_include_piece(piece_class_name):
 class Ju(ChessPiece):
     """車/俥"""
 
+    __slots__ = ()
+    type_code = JU
+    display_names = ("俥", "車")
+
     def __init__(self, color, row, col):
-        name = "車" if color == "black" else "俥"
-        super().__init__(color, name, row, col)
+        super().__init__(color, self.display_name(color), row, col)
 
 
 class Ma(ChessPiece):
     """馬/傌"""
 
+    __slots__ = ()
+    type_code = MA
+    display_names = ("傌", "馬")
+
     def __init__(self, color, row, col):
-        name = "馬" if color == "black" else "傌"
-        super().__init__(color, name, row, col)
+        super().__init__(color, self.display_name(color), row, col)
 
 
 class Xiang(ChessPiece):
     """相/象"""
 
+    __slots__ = ()
+    type_code = XIANG
+    display_names = ("相", "象")
+
     def __init__(self, color, row, col):
-        name = "象" if color == "black" else "相"
-        super().__init__(color, name, row, col)
+        super().__init__(color, self.display_name(color), row, col)
 
 
 class Shi(ChessPiece):
     """士/仕"""
 
+    __slots__ = ()
+    type_code = SHI
+    display_names = ("仕", "士")
+
     def __init__(self, color, row, col):
-        name = "士" if color == "black" else "仕"
-        super().__init__(color, name, row, col)
+        super().__init__(color, self.display_name(color), row, col)
 
 
 class King(ChessPiece):
     """漢/汗"""
 
+    __slots__ = ()
+    type_code = KING
+    # 匈汉象棋中黑方为"汗"，红方为"漢"
+    display_names = ("漢", "汗")
+
     def __init__(self, color, row, col):
-        # 匈汉象棋中黑方为"汗"，红方为"漢"
-        name = "汗" if color == "black" else "漢"
-        super().__init__(color, name, row, col)
+        super().__init__(color, self.display_name(color), row, col)
 
 
 class Pao(ChessPiece):
     """炮/砲"""
 
+    __slots__ = ()
+    type_code = PAO
+    display_names = ("炮", "砲")
+
     def __init__(self, color, row, col):
-        name = "砲" if color == "black" else "炮"
-        super().__init__(color, name, row, col)
+        super().__init__(color, self.display_name(color), row, col)
 
 
 class Pawn(ChessPiece):
     """兵/卒"""
 
+    __slots__ = ()
+    type_code = PAWN
+    display_names = ("兵", "卒")
+
     def __init__(self, color, row, col):
-        name = "卒" if color == "black" else "兵"
-        super().__init__(color, name, row, col)
+        super().__init__(color, self.display_name(color), row, col)
 
 
 # 匈汉象棋特有棋子
 class Wei(ChessPiece):
     """尉/衛"""
 
+    __slots__ = ()
+    type_code = WEI
+    display_names = ("尉", "衛")
+
     def __init__(self, color, row, col):
-        name = "衛" if color == "black" else "尉"
-        super().__init__(color, name, row, col)
+        super().__init__(color, self.display_name(color), row, col)
 
 
 class She(ChessPiece):
     """射/䠶"""
 
+    __slots__ = ()
+    type_code = SHE
+    display_names = ("射", "䠶")
+
     def __init__(self, color, row, col):
-        name = "䠶" if color == "black" else "射"
-        super().__init__(color, name, row, col)
+        super().__init__(color, self.display_name(color), row, col)
 
 
 class Lei(ChessPiece):
     """檑/礌"""
 
+    __slots__ = ()
+    type_code = LEI
+    display_names = ("檑", "礌")
+
     def __init__(self, color, row, col):
-        name = "礌" if color == "black" else "檑"
-        super().__init__(color, name, row, col)
+        super().__init__(color, self.display_name(color), row, col)
 
 class Jia(ChessPiece):
     """甲/胄"""
 
+    __slots__ = ()
+    type_code = JIA
+    display_names = ("甲", "胄")
+
     def __init__(self, color, row, col):
-        name = "胄" if color == "black" else "甲"
-        super().__init__(color, name, row, col)
+        super().__init__(color, self.display_name(color), row, col)
 
 
 class Ci(ChessPiece):
     """刺/伺"""
 
+    __slots__ = ()
+    type_code = CI
+    display_names = ("刺", "伺")
+
     def __init__(self, color, row, col):
-        name = "伺" if color == "black" else "刺"
-        super().__init__(color, name, row, col)
+        super().__init__(color, self.display_name(color), row, col)
 
 
 class Dun(ChessPiece):
     """楯/碷"""
 
+    __slots__ = ()
+    type_code = DUN
+    display_names = ("楯", "碷")
+
     def __init__(self, color, row, col):
-        name = "碷" if color == "black" else "楯"
-        super().__init__(color, name, row, col)
+        super().__init__(color, self.display_name(color), row, col)
 
 
 class Xun(ChessPiece):
     """巡/廵"""
 
+    __slots__ = ()
+    type_code = XUN
+    display_names = ("巡", "廵")
+
     def __init__(self, color, row, col):
-        name = "廵" if color == "black" else "巡"
-        super().__init__(color, name, row, col)
+        super().__init__(color, self.display_name(color), row, col)
+
+
+# 按类型编号排列的棋子类
+PIECE_CLASSES = (Ju, Ma, Xiang, Shi, King, Pao, Pawn, Wei, She, Lei, Jia, Ci, Dun, Xun)
+
+# 显示名称到棋子类的映射（红黑双方的名称都包含在内）
+PIECE_CLASS_BY_NAME = {name: piece_class for piece_class in PIECE_CLASSES for name in piece_class.display_names}
+
+
+def get_piece_class_by_name(name):
+    """根据棋子显示名称获取棋子类，未知名称返回None"""
+    return PIECE_CLASS_BY_NAME.get(name)
+
+
+def piece_type_table(values_by_name, default=0):
+    """把按显示名称给出的数值表转换为按 [type_code][color_code] 索引的表
+
+    Args:
+        values_by_name (dict): 显示名称 -> 数值
+        default: 名称不在表中时的取值
+
+    Returns:
+        list: table[type_code][color_code]
+    """
+    return [[values_by_name.get(name, default) for name in piece_class.display_names]
+            for piece_class in PIECE_CLASSES]
 
 
 def create_initial_pieces():
@@ -332,16 +446,8 @@ def create_initial_pieces():
 class PieceFactory:
     """棋子工厂类，用于根据名称创建棋子"""
     
-    # 棋子名称到类的映射
-    NAME_TO_CLASS_MAP = {
-        # 黑方棋子
-        '汗': King, '車': Ju, '馬': Ma, '象': Xiang, '士': Shi, '砲': Pao, '卒': Pawn,
-        '衛': Wei, '䠶': She, '礌': Lei, '胄': Jia, '伺': Ci, '碷': Dun, '廵': Xun,
-        # 红方棋子
-        '漢': King, '俥': Ju, '傌': Ma, '相': Xiang, '仕': Shi, '炮': Pao, '兵': Pawn,
-        '尉': Wei, '射': She, '檑': Lei, '甲': Jia, '刺': Ci, '楯': Dun, '巡': Xun
-    }
-    
+    # 棋子名称到类的映射见 PIECE_CLASS_BY_NAME（由各棋子类的显示名称生成）
+
     @classmethod
     def create_piece_by_name(cls, name, color, row, col):
         """根据棋子名称创建棋子实例
@@ -355,7 +461,7 @@ class PieceFactory:
         Returns:
             ChessPiece: 棋子实例，如果找不到对应名称则返回None
         """
-        if name in cls.NAME_TO_CLASS_MAP:
-            piece_class = cls.NAME_TO_CLASS_MAP[name]
+        piece_class = PIECE_CLASS_BY_NAME.get(name)
+        if piece_class is not None:
             return piece_class(color, row, col)
         return None
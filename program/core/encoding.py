@@ -0,0 +1,244 @@
+"""局面与走法的紧凑编码
+
+局面编码为 POSITION_BYTES (170) 字节：前169字节按 行*13+列 逐格记录棋子编码（0为空格），
+最后一字节为走子方（0红1黑）。传统象棋只使用左上角10行9列，格子编号与匈汉象棋相同，
+因此同一份编码可以在界面、搜索、MCTS、联机和存档之间直接传递，不需要再解析字符串。
+
+棋子编码 = 1 + 类型编号 + 颜色编号*14，红方为1~14，黑方为15~28（类型编号见 chess_pieces.type_code）。
+
+走法编码为整数：低8位为起点格、8~15位为终点格，move & MOVE_MASK 即16位的走法本体；
+13x13棋盘的起终点已占满16位，走法附带的副作用标志放在16位以上（吃子、甲/胄连线吃子、刺兑子、兵/卒升变），
+带标志的走法可以放进32位无符号整数。
+
+这里的函数负责紧凑编码与已有各种格式之间的转换：
+  - 棋子列表 / GameState: encode_position, decode_position
+  - FEN（GameState.export_position/import_position 的格式）: position_to_fen, fen_to_position
+  - MCTS的13x13棋子名称列表: position_to_state_list, state_list_to_position
+  - 走法元组 (from_row, from_col, to_row, to_col)、((r, c), (r, c))、MCTS走法字符串和走法编号
+"""
+import program.utils.tools as tools
+from program.core.chess_pieces import PIECE_CLASSES, PIECE_TYPE_COUNT, COLOR_CODES, COLOR_NAMES, Jia, Ci
+
+# 局面编码
+BOARD_STRIDE = 13  # 编码中每行的格子数（最大棋盘的列数）
+BOARD_SQUARES = BOARD_STRIDE * BOARD_STRIDE
+POSITION_BYTES = BOARD_SQUARES + 1
+EMPTY = 0
+
+# 走法编码
+MOVE_MASK = 0xFFFF
+MOVE_CAPTURE = 1 << 16  # 直接吃子
+MOVE_JIA_CAPTURE = 1 << 17  # 走后形成甲/胄连线吃子
+MOVE_CI_EXCHANGE = 1 << 18  # 刺兑子
+MOVE_PROMOTION = 1 << 19  # 兵/卒到达对方底线，等待升变
+MOVE_FLAGS = MOVE_CAPTURE | MOVE_JIA_CAPTURE | MOVE_CI_EXCHANGE | MOVE_PROMOTION
+
+# FEN字符，按类型编号排列（红方大写，黑方小写）
+FEN_CHARS = "rnbakcpwsljiux"
+MCTS_COLOR_PREFIXES = ("红", "黑")
+MCTS_EMPTY = "一一"
+
+# 棋子编码 -> (棋子类, 颜色)
+CODE_PIECES = [None] + [(piece_class, color) for color in COLOR_NAMES for piece_class in PIECE_CLASSES]
+# FEN字符 -> 棋子编码
+FEN_CODES = {char: 1 + type_code for type_code, char in enumerate(FEN_CHARS.upper())}
+FEN_CODES.update({char: 1 + type_code + PIECE_TYPE_COUNT for type_code, char in enumerate(FEN_CHARS)})
+# MCTS棋子名称 <-> 棋子编码
+MCTS_NAMES = [MCTS_EMPTY] + [MCTS_COLOR_PREFIXES[COLOR_CODES[color]] + piece_class.display_name(color)
+                             for piece_class, color in CODE_PIECES[1:]]
+MCTS_CODES = {name: code for code, name in enumerate(MCTS_NAMES)}
+
+
+def piece_code(piece):
+    """棋子的编码"""
+    return 1 + piece.type_code + piece.color_code * PIECE_TYPE_COUNT
+
+
+def square_of(row, col):
+    """坐标对应的格子编号"""
+    return row * BOARD_STRIDE + col
+
+
+def encode_position(position, player_turn=None):
+    """编码局面
+
+    Args:
+        position: GameState 或棋子列表
+        player_turn (str): 走子方，默认取 GameState 的走子方（棋子列表默认为红方）
+
+    Returns:
+        bytes: POSITION_BYTES 字节的局面编码
+    """
+    pieces = getattr(position, "pieces", position)
+    if player_turn is None:
+        player_turn = getattr(position, "player_turn", "red")
+    buffer = bytearray(POSITION_BYTES)
+    for piece in pieces:
+        buffer[piece.row * BOARD_STRIDE + piece.col] = 1 + piece.type_code + piece.color_code * PIECE_TYPE_COUNT
+    buffer[BOARD_SQUARES] = COLOR_CODES[player_turn]
+    return bytes(buffer)
+
+
+def decode_position(buffer):
+    """由局面编码创建棋子
+
+    Returns:
+        tuple: (棋子列表, 走子方)，棋子按格子编号排列
+    """
+    pieces = []
+    for square in range(BOARD_SQUARES):
+        code = buffer[square]
+        if code:
+            piece_class, color = CODE_PIECES[code]
+            pieces.append(piece_class(color, *divmod(square, BOARD_STRIDE)))
+    return pieces, COLOR_NAMES[buffer[BOARD_SQUARES]]
+
+
+def position_to_fen(buffer, rows=13, cols=13):
+    """局面编码转换为FEN字符串（传统象棋传入10行9列）"""
+    fen_rows = []
+    for row in range(rows):
+        fen_row = ""
+        empty_count = 0
+        for code in buffer[row * BOARD_STRIDE:row * BOARD_STRIDE + cols]:
+            if not code:
+                empty_count += 1
+                continue
+            if empty_count:
+                fen_row += str(empty_count)
+                empty_count = 0
+            type_code = (code - 1) % PIECE_TYPE_COUNT
+            fen_row += FEN_CHARS[type_code] if code > PIECE_TYPE_COUNT else FEN_CHARS[type_code].upper()
+        if empty_count:
+            fen_row += str(empty_count)
+        fen_rows.append(fen_row)
+    return "/".join(fen_rows) + (" b" if buffer[BOARD_SQUARES] else " r")
+
+
+def fen_to_position(fen_string):
+    """FEN字符串转换为局面编码（行列数由FEN本身决定）
+
+    Raises:
+        ValueError: FEN格式错误
+    """
+    parts = fen_string.strip().split()
+    if len(parts) < 2:
+        raise ValueError("FEN格式错误：缺少必要参数")
+    rows = parts[0].split("/")
+    if len(rows) > BOARD_STRIDE:
+        raise ValueError("FEN格式错误：棋盘行数不正确")
+    buffer = bytearray(POSITION_BYTES)
+    for row, fen_row in enumerate(rows):
+        col = 0
+        empty_count = ""
+        for char in fen_row + "/":
+            if char.isdigit():
+                empty_count += char
+                continue
+            if empty_count:
+                col += int(empty_count)
+                empty_count = ""
+            if char == "/":
+                break
+            if char not in FEN_CODES or col >= BOARD_STRIDE:
+                raise ValueError(f"FEN格式错误：第{row}行无法解析 '{fen_row}'")
+            buffer[row * BOARD_STRIDE + col] = FEN_CODES[char]
+            col += 1
+        if col > BOARD_STRIDE:
+            raise ValueError(f"FEN格式错误：第{row}行列数不正确")
+    buffer[BOARD_SQUARES] = 0 if parts[1].lower() in ("r", "red") else 1
+    return bytes(buffer)
+
+
+def position_to_state_list(buffer):
+    """局面编码转换为MCTS的13x13棋子名称列表"""
+    return [[MCTS_NAMES[code] for code in buffer[row * BOARD_STRIDE:(row + 1) * BOARD_STRIDE]]
+            for row in range(BOARD_STRIDE)]
+
+
+def state_list_to_position(state_list, player_color="红"):
+    """MCTS的棋子名称列表转换为局面编码
+
+    Args:
+        state_list (list): 13x13棋子名称列表
+        player_color (str): MCTS的走子方（'红'或'黑'）
+    """
+    buffer = bytearray(POSITION_BYTES)
+    for row, names in enumerate(state_list):
+        for col, name in enumerate(names):
+            buffer[row * BOARD_STRIDE + col] = MCTS_CODES[name]
+    buffer[BOARD_SQUARES] = MCTS_COLOR_PREFIXES.index(player_color)
+    return bytes(buffer)
+
+
+def encode_move(from_row, from_col, to_row, to_col, flags=0):
+    """编码走法"""
+    return (from_row * BOARD_STRIDE + from_col) | (to_row * BOARD_STRIDE + to_col) << 8 | flags
+
+
+def decode_move(move):
+    """解码走法
+
+    Returns:
+        tuple: (from_row, from_col, to_row, to_col)
+    """
+    from_row, from_col = divmod(move & 0xFF, BOARD_STRIDE)
+    to_row, to_col = divmod(move >> 8 & 0xFF, BOARD_STRIDE)
+    return from_row, from_col, to_row, to_col
+
+
+def move_to_positions(move):
+    """走法编码转换为 ((from_row, from_col), (to_row, to_col))"""
+    from_row, from_col, to_row, to_col = decode_move(move)
+    return (from_row, from_col), (to_row, to_col)
+
+
+def positions_to_move(from_pos, to_pos, flags=0):
+    """((from_row, from_col), (to_row, to_col)) 转换为走法编码"""
+    return encode_move(from_pos[0], from_pos[1], to_pos[0], to_pos[1], flags)
+
+
+def move_to_action(move):
+    """走法编码转换为MCTS走法字符串，如 '00000101'"""
+    return "%02d%02d%02d%02d" % decode_move(move)
+
+
+def action_to_move(action):
+    """MCTS走法字符串转换为走法编码（不带标志）"""
+    return encode_move(int(action[0:2]), int(action[2:4]), int(action[4:6]), int(action[6:8]))
+
+
+def move_to_mcts_id(move):
+    """走法编码转换为MCTS动作空间中的走法编号，不在动作空间中（如甲/胄连线吃子）时返回None"""
+    from program.ai.mcts.mcts_game import move_action2move_id
+    return move_action2move_id.get(move_to_action(move))
+
+
+def mcts_id_to_move(move_id):
+    """MCTS走法编号转换为走法编码"""
+    from program.ai.mcts.mcts_game import move_id2move_action
+    return action_to_move(move_id2move_action[move_id])
+
+
+def encode_game_move(game_state, from_row, from_col, to_row, to_col):
+    """在当前局面下编码一步走法，并标出它的副作用
+
+    甲/胄连线吃子和刺兑子由 make_move/unmake_move 实际走一步得到，局面保持不变。
+
+    Returns:
+        int: 带标志的走法编码
+    """
+    piece = game_state.get_piece_at(from_row, from_col)
+    move = encode_move(from_row, from_col, to_row, to_col)
+    if piece is None:
+        return move
+    target = game_state.get_piece_at(to_row, to_col)
+    if target is not None and target.color != piece.color:
+        move |= MOVE_CAPTURE
+    if isinstance(piece, (Jia, Ci)):
+        game_state.make_move(from_row, from_col, to_row, to_col)
+        move |= game_state.last_move_flags() & (MOVE_JIA_CAPTURE | MOVE_CI_EXCHANGE)
+        game_state.unmake_move()
+    elif tools.is_pawn_at_opponent_base(piece, to_row) and game_state.rule_set.pawn_promotion_enabled:
+        move |= MOVE_PROMOTION
+    return move
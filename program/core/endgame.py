@@ -0,0 +1,151 @@
+"""按子力判定的残局分类表
+
+残局结论只取决于双方剩余的子力时，可以不看具体局面直接给出：
+  - DRAW: 死和，双方都没有能威胁对方将/帅的棋子
+  - WIN: 子力上的必胜残局（例如传统象棋单车对单将），胜方另行给出
+  - UNKNOWN: 需要搜索或继续对局才能判断
+
+分类表以棋盘索引增量维护的子力签名（见 Bitboard.material_signature，按 颜色编号*14+类型编号 排列的
+各类棋子数量）为键，按对局规则生成：能否威胁对方取决于规则设置，例如汉/汗能出九宫时可以走进敌方九宫取胜，
+士、相被限制在本方九宫、本方半场时则不能参与进攻。双方除将/帅外各至多 TABLE_PIECES 个棋子的签名预先算好，
+更大的签名按同样的规则现场判断，查询都是O(1)。
+
+兵/卒复活是玩家在界面上的额外操作，不计入子力判断。
+"""
+from itertools import combinations_with_replacement
+
+from program.core.chess_pieces import PIECE_TYPE_COUNT, COLOR_NAMES, JU, MA, XIANG, SHI, KING, PAO, PAWN, WEI, DUN
+
+DRAW = "draw"
+WIN = "win"
+UNKNOWN = "unknown"
+
+TABLE_PIECES = 2  # 预先计算的残局中每方除将/帅外的最多棋子数
+
+# 任何规则下都不能吃子的棋子：尉/衛、盾
+ALWAYS_HARMLESS = (WEI, DUN)
+# 传统象棋的棋子类型
+TRADITIONAL_TYPES = (JU, MA, XIANG, SHI, KING, PAO, PAWN)
+
+_endgame_tables = {}  # RuleSet -> EndgameTable
+
+
+def harmless_types(rule_set):
+    """规则下不能威胁对方将/帅的棋子类型
+
+    汉/汗不能出九宫、士不能出九宫、相不能过河时分别只能在本方区域活动，对方的将/帅进入这些区域之前就已经获胜
+    （汉/汗进入敌方九宫直接获胜）或根本无法到达。
+    """
+    types = list(ALWAYS_HARMLESS)
+    if not rule_set.king_can_leave_palace:
+        types.append(KING)
+    if not rule_set.shi_can_leave_palace:
+        types.append(SHI)
+    if not rule_set.xiang_can_cross_river:
+        types.append(XIANG)
+    return tuple(types)
+
+
+def is_classical(rule_set):
+    """是否为标准的传统象棋规则（将帅、士、相都受九宫与河界限制，将帅不能斜走），已知的必胜残局只在这种规则下成立"""
+    return (rule_set.traditional_mode and not rule_set.king_can_leave_palace
+            and not rule_set.king_can_diagonal_in_palace and not rule_set.shi_can_leave_palace
+            and not rule_set.xiang_can_cross_river)
+
+
+class EndgameTable:
+    """某一规则下的残局分类表
+
+    - harmless: 不能威胁对方将/帅的棋子类型
+    - classical: 是否使用传统象棋的已知必胜残局
+    """
+
+    __slots__ = ("harmless", "classical", "_offensive", "_entries")
+
+    def __init__(self, harmless, classical=False, piece_types=None):
+        """
+        Args:
+            harmless (tuple): 不能威胁对方将/帅的棋子类型编号
+            classical (bool): 是否使用传统象棋的已知必胜残局
+            piece_types (tuple): 预先计算时使用的棋子类型，默认为全部类型
+        """
+        self.harmless = tuple(harmless)
+        self.classical = classical
+        self._offensive = tuple(type_code for type_code in range(PIECE_TYPE_COUNT) if type_code not in self.harmless)
+        self._entries = {}
+
+        if piece_types is None:
+            piece_types = range(PIECE_TYPE_COUNT)
+        others = [type_code for type_code in piece_types if type_code != KING]
+        sides = [group for size in range(TABLE_PIECES + 1) for group in combinations_with_replacement(others, size)]
+        for red in sides:
+            for black in sides:
+                material = bytearray(2 * PIECE_TYPE_COUNT)
+                material[KING] = material[PIECE_TYPE_COUNT + KING] = 1
+                for type_code in red:
+                    material[type_code] += 1
+                for type_code in black:
+                    material[PIECE_TYPE_COUNT + type_code] += 1
+                signature = bytes(material)
+                self._entries[signature] = self._evaluate(signature)
+
+    @classmethod
+    def for_rule_set(cls, rule_set):
+        """按对局规则生成分类表"""
+        classical = is_classical(rule_set)
+        return cls(harmless_types(rule_set), classical, TRADITIONAL_TYPES if rule_set.traditional_mode else None)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def classify(self, signature):
+        """查询子力签名的残局结论
+
+        Args:
+            signature (bytes): 子力签名
+
+        Returns:
+            tuple: (结论, 胜方)，结论为 DRAW、WIN 或 UNKNOWN，只有 WIN 时胜方为 "red" 或 "black"
+        """
+        entry = self._entries.get(signature)
+        if entry is None:
+            entry = self._evaluate(signature)
+        return entry
+
+    def _evaluate(self, signature):
+        """按子力判断残局结论"""
+        sides = (signature[:PIECE_TYPE_COUNT], signature[PIECE_TYPE_COUNT:2 * PIECE_TYPE_COUNT])
+        if not (sides[0][KING] and sides[1][KING]):
+            return UNKNOWN, None  # 一方没有将/帅时对局已经结束
+        harmless = [not any(side[type_code] for type_code in self._offensive) for side in sides]
+        if all(harmless):
+            return DRAW, None
+        if not self.classical:
+            return UNKNOWN, None
+
+        for color_code, color in enumerate(COLOR_NAMES):
+            attacker, defender = sides[color_code], sides[1 - color_code]
+            if not harmless[1 - color_code]:
+                continue
+            defenders = sum(defender) - defender[KING]
+            # 单车胜士象不全（至多两个士/相），双车胜士象全；单马胜单士或单相
+            if attacker[JU] >= 2 or (attacker[JU] and defenders <= 2) or (attacker[MA] and defenders <= 1):
+                return WIN, color
+            # 单炮不能胜单将
+            if sum(attacker) == 2 and attacker[PAO] and not defenders:
+                return DRAW, None
+        return UNKNOWN, None
+
+
+def get_endgame_table(rule_set):
+    """获取规则对应的残局分类表（每种规则只生成一次）"""
+    table = _endgame_tables.get(rule_set)
+    if table is None:
+        table = EndgameTable.for_rule_set(rule_set)
+        _endgame_tables[rule_set] = table
+    return table
+
+
+def classify(signature, rule_set):
+    """按规则查询子力签名的残局结论，返回 (结论, 胜方)"""
+    return get_endgame_table(rule_set).classify(signature)
@@ -0,0 +1,97 @@
+"""对局事件
+
+GameState 执行走子时只修改局面并发出事件，打印棋盘、写统计数据、播放音效等副作用都由订阅者完成。
+新建的游戏状态没有订阅者，AI、复盘和测试中的走子不产生任何I/O；界面对局创建游戏状态后再挂上订阅者。
+复制（clone、deepcopy、pickle）得到的游戏状态不带订阅者。
+
+事件及处理函数的参数：
+  - PIECE_MOVED: (game_state, piece, from_row, from_col, to_row, to_col, captured_piece)
+  - PIECE_CAPTURED: (game_state, captured_piece)
+  - CHECK: (game_state, checked_color)
+  - PROMOTION_PENDING: (game_state, pawn)
+  - TURN_CHANGED: (game_state, player_turn)
+  - GAME_OVER: (game_state, winner, total_time)，和棋时 winner 为 None
+"""
+from program.controllers.step_counter import step_counter
+
+PIECE_MOVED = "piece_moved"
+PIECE_CAPTURED = "piece_captured"
+CHECK = "check"
+PROMOTION_PENDING = "promotion_pending"
+TURN_CHANGED = "turn_changed"
+GAME_OVER = "game_over"
+
+
+class GameEvents:
+    """一个游戏状态的事件订阅表"""
+
+    __slots__ = ("_handlers",)
+
+    def __init__(self):
+        self._handlers = {}  # 事件 -> [处理函数, ...]
+
+    def subscribe(self, event, handler):
+        """订阅事件（同一处理函数重复订阅只生效一次）"""
+        handlers = self._handlers.setdefault(event, [])
+        if handler not in handlers:
+            handlers.append(handler)
+
+    def unsubscribe(self, event, handler):
+        """取消订阅"""
+        handlers = self._handlers.get(event)
+        if handlers and handler in handlers:
+            handlers.remove(handler)
+            if not handlers:
+                del self._handlers[event]
+
+    def emit(self, event, *args):
+        """按订阅顺序调用事件的处理函数，没有订阅者时直接返回"""
+        handlers = self._handlers.get(event)
+        if handlers:
+            for handler in handlers[:]:
+                handler(*args)
+
+    def clear(self):
+        """取消全部订阅"""
+        self._handlers.clear()
+
+    def __bool__(self):
+        return bool(self._handlers)
+
+    def __deepcopy__(self, memo):
+        # 订阅者属于原游戏状态，副本不继承
+        return GameEvents()
+
+    def __reduce__(self):
+        return GameEvents, ()
+
+
+def _print_moved_board(game_state, piece, from_row, from_col, to_row, to_col, captured_piece):
+    from program.utils.utils import print_board
+    print_board(game_state.pieces, [step_counter.get_step()], show_step=True)
+
+
+def _print_check(game_state, checked_color):
+    print(f"[DEBUG] 检测到将军状态，被将军方: {checked_color}")
+
+
+def _print_promotion(game_state, pawn):
+    print(f"[DEBUG] 兵到达对方底线: {pawn.color}兵到达({pawn.row},{pawn.col})")
+
+
+def _print_turn(game_state, player_turn):
+    print(f"[DEBUG] 移动后切换玩家: {player_turn}")
+
+
+def subscribe_console_output(events, debug=False):
+    """订阅控制台输出：每步打印棋盘
+
+    Args:
+        events (GameEvents): 游戏状态的事件订阅表
+        debug (bool): 是否同时输出将军、升变和换手的调试信息（默认关闭）
+    """
+    events.subscribe(PIECE_MOVED, _print_moved_board)
+    if debug:
+        events.subscribe(CHECK, _print_check)
+        events.subscribe(PROMOTION_PENDING, _print_promotion)
+        events.subscribe(TURN_CHANGED, _print_turn)
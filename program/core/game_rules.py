@@ -1,6 +1,9 @@
 from program.core.chess_pieces import ChessPiece, Ju, Ma, Xiang, Shi, King, Pao, Pawn, Wei, She, Lei, Jia, Ci, Dun, Xun
-from program.controllers.game_config_manager import game_config
-from program.utils import utils
+from program.core.endgame import classify as classify_endgame, DRAW
+from program.core.piece_list import PieceList
+from program.core.bitboard import Bitboard, popcount
+from program.core.board_geometry import XIONGHAN_GEOMETRY
+from program.core.rule_set import current_rule_set
 
 
 class GameRules:
@@ -18,13 +21,62 @@ class GameRules:
         Returns:
             ChessPiece or None: 位置上的棋子，如果没有则返回None
         """
+        if isinstance(pieces, PieceList):
+            return pieces.get_piece_at(row, col)
         for piece in pieces:
             if piece.row == row and piece.col == col:
                 return piece
         return None
 
     @staticmethod
-    def is_valid_move(pieces, piece, from_row, from_col, to_row, to_col):
+    def get_rule_set(pieces, rule_set=None):
+        """获取判定使用的规则
+
+        优先使用显式传入的规则，其次是棋子列表所属对局的规则（见 GameState.rule_set），
+        普通列表则使用由当前配置编译的规则。
+
+        Args:
+            pieces (list): 棋子列表
+            rule_set (RuleSet): 显式指定的规则
+
+        Returns:
+            RuleSet: 对局规则
+        """
+        if rule_set is not None:
+            return rule_set
+        rule_set = getattr(pieces, "rule_set", None)
+        if rule_set is not None:
+            return rule_set
+        return current_rule_set()
+
+    @staticmethod
+    def is_near_dun(pieces, color, row, col, rule_set=None):
+        """检查格子的横竖斜8邻域内是否有某方的盾
+
+        Args:
+            pieces (list): 棋子列表
+            color (str): 盾的颜色
+            row (int): 行坐标
+            col (int): 列坐标
+            rule_set (RuleSet): 对局规则，默认使用棋子列表所属对局的规则
+
+        Returns:
+            bool: 是否与该方的盾相邻
+        """
+        board = Bitboard.of(pieces, rule_set)
+        if popcount(board.occupied) == len(pieces) and 0 <= row < board.rows and 0 <= col < board.cols:
+            # 盾的相邻计数由位棋盘增量维护
+            return board.near_dun(color, row, col)
+        for p in pieces:
+            if isinstance(p, Dun) and p.color == color:
+                row_diff = abs(p.row - row)
+                col_diff = abs(p.col - col)
+                if row_diff <= 1 and col_diff <= 1 and (row_diff != 0 or col_diff != 0):
+                    return True
+        return False
+
+    @staticmethod
+    def is_valid_move(pieces, piece, from_row, from_col, to_row, to_col, rule_set=None):
         """检查移动是否合法
         
         Args:
@@ -34,6 +86,7 @@ class GameRules:
             from_col (int): 起始列
             to_row (int): 目标行
             to_col (int): 目标列
+            rule_set (RuleSet): 对局规则，默认使用棋子列表所属对局的规则
             
         Returns:
             bool: 移动是否合法
@@ -43,7 +96,8 @@ class GameRules:
             return False
 
         # 检查目标位置是否在棋盘范围内
-        if not utils.is_position_on_board(to_row, to_col):
+        rule_set = GameRules.get_rule_set(pieces, rule_set)
+        if not rule_set.on_board(to_row, to_col):
             return False
 
         # 检查目标位置是否有己方棋子
@@ -56,92 +110,66 @@ class GameRules:
             # 任何棋子都不能吃盾
             return False
 
-        # 检查盾的特殊效果：与己方盾横竖斜相连的敌方棋子禁止执行吃子操作
-        # 如果移动的棋子是敌方棋子，并且与己方盾相邻，则不能吃子
-        if target_piece and piece.color != GameRules.get_piece_at(pieces, from_row, from_col).color:
-            # 检查移动的敌方棋子是否与某个己方盾相邻
-            for p in pieces:
-                if isinstance(p, Dun) and p.color == GameRules.get_piece_at(pieces, from_row, from_col).color:
-                    # 检查该己方盾是否与移动的敌方棋子相邻（8邻域）
-                    row_diff = abs(p.row - from_row)
-                    col_diff = abs(p.col - from_col)
-                    if row_diff <= 1 and col_diff <= 1 and (row_diff != 0 or col_diff != 0):  # 相邻8格
-                        # 如果敌方棋子与己方盾相邻，且这次移动是吃子，则不允许
-                        return False
-
-        # 检查盾的特殊效果：与敌方盾横竖斜相连的己方棋子禁止执行吃子操作
-        # 如果移动的棋子与敌方盾相邻，则不能吃子（丧失攻击能力）
         if target_piece:  # 如果是吃子移动
-            for p in pieces:
-                if isinstance(p, Dun) and p.color != piece.color:  # 找到敌方盾
-                    # 检查移动的棋子是否与敌方盾相邻（8邻域）
-                    row_diff = abs(p.row - from_row)
-                    col_diff = abs(p.col - from_col)
-                    if row_diff <= 1 and col_diff <= 1 and (row_diff != 0 or col_diff != 0):  # 相邻8格
-                        # 如果移动的棋子与敌方盾相邻，且这次移动是吃子，则不允许
-                        return False
+            # 检查盾的特殊效果：与己方盾横竖斜相连的敌方棋子禁止执行吃子操作
+            mover = GameRules.get_piece_at(pieces, from_row, from_col)
+            if piece.color != mover.color and GameRules.is_near_dun(pieces, mover.color, from_row, from_col, rule_set):
+                return False
 
-                        pass
-                elif isinstance(p, Dun) and p.color != piece.color:
-                    # 检查敌方盾是否与移动的棋子相邻（8邻域）
-                    row_diff = abs(p.row - from_row)
-                    col_diff = abs(p.col - from_col)
-                    if row_diff <= 1 and col_diff <= 1 and (row_diff != 0 or col_diff != 0):  # 相邻8格
-                        # 如果移动的棋子与敌方盾相邻，且这次移动是吃子，则不允许
-                        # 实际上，根据规则，应该是己方棋子与敌方盾相邻时，己方棋子不能吃子
-                        if piece.color != p.color:  # 移动的是己方棋子，盾是敌方的
-                            pass  # 不限制己方棋子与敌方盾相邻
-                        else:  # 移动的是敌方棋子，盾是己方的
-                            pass  # 不限制敌方棋子与己方盾相邻
-        # 正确的逻辑是：如果敌方棋子与己方盾相邻，则该敌方棋子不能吃子
-        if target_piece:  # 如果是吃子移动
-            for p in pieces:
-                if isinstance(p, Dun) and p.color != target_piece.color:  # 找到与目标棋子颜色不同的盾（即己方盾）
-                    # 检查目标棋子（被吃的棋子）是否与己方盾相邻
-                    row_diff = abs(p.row - to_row)
-                    col_diff = abs(p.col - to_col)
-                    if row_diff <= 1 and col_diff <= 1 and (row_diff != 0 or col_diff != 0):  # 相邻8格
-                        # 如果目标棋子与己方盾相邻，则不能吃该棋子
-                        return False
+            # 与敌方盾横竖斜相连的己方棋子禁止执行吃子操作（丧失攻击能力）
+            enemy = "black" if piece.color == "red" else "red"
+            if GameRules.is_near_dun(pieces, enemy, from_row, from_col, rule_set):
+                return False
+
+            # 与己方盾相邻的棋子不能被吃
+            own = "black" if target_piece.color == "red" else "red"
+            if GameRules.is_near_dun(pieces, own, to_row, to_col, rule_set):
+                return False
 
         # 检查是否有被尉/衛照面限制的棋子
-        for p in pieces:
-            # 检查是否是被尉/衛照面的敌方棋子
-            if isinstance(p, Wei) and GameRules.is_facing_enemy(p, pieces):
-                facing_target = GameRules.get_facing_piece(p, pieces)
-                # 如果移动的正是被照面限制的棋子，且不是尉/衛本身，则不允许移动
-                if piece == facing_target and piece != p:
-                    return False
+        board = Bitboard.of(pieces, rule_set)
+        if popcount(board.occupied) == len(pieces):
+            # 照面关系由位棋盘增量维护，直接查询
+            if board._has_wei() and piece in board.facing_restricted():
+                return False
+        else:
+            for p in pieces:
+                # 检查是否是被尉/衛照面的敌方棋子
+                if isinstance(p, Wei) and GameRules.is_facing_enemy(p, pieces):
+                    facing_target = GameRules.get_facing_piece(p, pieces)
+                    # 如果移动的正是被照面限制的棋子，且不是尉/衛本身，则不允许移动
+                    if piece == facing_target and piece != p:
+                        return False
 
         # 根据棋子类型检查移动是否符合规则
         if isinstance(piece, Ju):
             return GameRules.is_valid_ju_move(pieces, from_row, from_col, to_row, to_col)
         elif isinstance(piece, Ma):
-            return GameRules.is_valid_ma_move(pieces, from_row, from_col, to_row, to_col)
+            return GameRules.is_valid_ma_move(pieces, from_row, from_col, to_row, to_col, rule_set)
         elif isinstance(piece, Xiang):
-            return GameRules.is_valid_xiang_move(pieces, piece.color, from_row, from_col, to_row, to_col)
+            return GameRules.is_valid_xiang_move(pieces, piece.color, from_row, from_col, to_row, to_col, rule_set)
         elif isinstance(piece, Shi):
-            return GameRules.is_valid_shi_move(piece.color, from_row, from_col, to_row, to_col)
+            return GameRules.is_valid_shi_move(piece.color, from_row, from_col, to_row, to_col, rule_set)
         elif isinstance(piece, King):
-            return GameRules.is_valid_king_move(pieces, piece.color, from_row, from_col, to_row, to_col)
+            return GameRules.is_valid_king_move(pieces, piece.color, from_row, from_col, to_row, to_col, rule_set)
         elif isinstance(piece, Pao):
             return GameRules.is_valid_pao_move(pieces, from_row, from_col, to_row, to_col)
         elif isinstance(piece, Pawn):
-            return GameRules.is_valid_pawn_move(pieces, piece.color, from_row, from_col, to_row, to_col)
+            return GameRules.is_valid_pawn_move(pieces, piece.color, from_row, from_col, to_row, to_col, rule_set)
         elif isinstance(piece, Wei):
-            return GameRules.is_valid_wei_move(pieces, from_row, from_col, to_row, to_col)
+            return GameRules.is_valid_wei_move(pieces, from_row, from_col, to_row, to_col, rule_set)
         elif isinstance(piece, She):
-            return GameRules.is_valid_she_move(pieces, from_row, from_col, to_row, to_col)
+            return GameRules.is_valid_she_move(pieces, from_row, from_col, to_row, to_col, rule_set)
         elif isinstance(piece, Lei):
-            return GameRules.is_valid_lei_move(pieces, from_row, from_col, to_row, to_col)
+            return GameRules.is_valid_lei_move(pieces, from_row, from_col, to_row, to_col, rule_set)
         elif isinstance(piece, Jia):
-            return GameRules.is_valid_jia_move(pieces, from_row, from_col, to_row, to_col)
+            return GameRules.is_valid_jia_move(pieces, from_row, from_col, to_row, to_col, rule_set)
         elif isinstance(piece, Ci):
-            return GameRules.is_valid_ci_move(pieces, piece.color, from_row, from_col, to_row, to_col)
+            return GameRules.is_valid_ci_move(pieces, piece.color, from_row, from_col, to_row, to_col, rule_set)
         elif isinstance(piece, Dun):
-            return GameRules.is_valid_dun_move(pieces, from_row, from_col, to_row, to_col)
+            return GameRules.is_valid_dun_move(pieces, from_row, from_col, to_row, to_col, rule_set)
         elif isinstance(piece, Xun):
-            return GameRules.is_valid_xun_move(pieces, from_row, from_col, to_row, to_col)
+            return GameRules.is_valid_xun_move(pieces, from_row, from_col, to_row, to_col, rule_set)
 
         return False
 
@@ -208,7 +236,7 @@ class GameRules:
         return True
 
     @staticmethod
-    def is_valid_ma_move(pieces, from_row, from_col, to_row, to_col):
+    def is_valid_ma_move(pieces, from_row, from_col, to_row, to_col, rule_set=None):
         """检查马的移动是否合法"""
         # 计算行列差
         row_diff = abs(to_row - from_row)
@@ -225,7 +253,7 @@ class GameRules:
         # 检查是否允许直走三格
         is_straight_three_move = False
 
-        if game_config.get_setting("ma_can_straight_three", True):
+        if GameRules.get_rule_set(pieces, rule_set).ma_can_straight_three:
             is_straight_three_move = ((row_diff == 3 and col_diff == 0) or (row_diff == 0 and col_diff == 3))  # 直三
 
         # 马移动必须是日字或直三（如果设置允许）
@@ -257,7 +285,7 @@ class GameRules:
         return True
 
     @staticmethod
-    def can_ma_attack(pieces, from_row, from_col, to_row, to_col):
+    def can_ma_attack(pieces, from_row, from_col, to_row, to_col, rule_set=None):
         """检查马是否能攻击到目标位置（不考虑目标位置棋子颜色）
         
         Args:
@@ -279,7 +307,7 @@ class GameRules:
 
         # 检查是否允许直走三格
         is_straight_three_move = False
-        if game_config.get_setting("ma_can_straight_three", True):
+        if GameRules.get_rule_set(pieces, rule_set).ma_can_straight_three:
             is_straight_three_move = ((row_diff == 3 and col_diff == 0) or (row_diff == 0 and col_diff == 3))  # 直三
 
         # 马攻击必须是日字或直三（如果设置允许）
@@ -311,7 +339,7 @@ class GameRules:
         return True
 
     @staticmethod
-    def is_valid_xiang_move(pieces, color, from_row, from_col, to_row, to_col):
+    def is_valid_xiang_move(pieces, color, from_row, from_col, to_row, to_col, rule_set=None):
         """检查相/象的移动是否合法（匈汉象棋中相/象可以过河）
         
         当相在敌方区域时，获得横竖隔一格吃子的能力，但也会被塞相眼
@@ -327,7 +355,8 @@ class GameRules:
             return False
 
         # 判断相是否可以过河
-        can_cross_river = game_config.get_setting("xiang_can_cross_river", True)
+        rule_set = GameRules.get_rule_set(pieces, rule_set)
+        can_cross_river = rule_set.xiang_can_cross_river
 
         # 检查是否是正常的田字移动（斜向移动2格，形如"田"）
         if abs(to_row - from_row) == 2 and abs(to_col - from_col) == 2:
@@ -348,18 +377,18 @@ class GameRules:
                 if color == "red":
                     # 红方相：起始位置应该在下方区域（索引较大的行）
                     # 如果目标位置在上方区域（索引较小的行），则是过河
-                    if to_row < 6:  # 6是河界线，红方相不能到索引小于6的行
+                    if XIONGHAN_GEOMETRY.has_crossed_river(color, to_row):  # 红方相不能到长城及以上的行
                         return False
                 else:  # color == "black"
                     # 黑方相：起始位置应该在上方区域（索引较小的行）
                     # 如果目标位置在下方区域（索引较大的行），则是过河
-                    if to_row > 6:  # 6是河界线，黑方相不能到索引大于6的行
+                    if XIONGHAN_GEOMETRY.has_crossed_river(color, to_row):  # 黑方相不能到长城及以下的行
                         return False
 
             return True
 
         # 如果不是田字移动，检查是否是横竖隔一格移动（特殊能力）
-        if game_config.get_setting("xiang_gain_jump_two_outside_river", True):
+        if rule_set.xiang_gain_jump_two_outside_river:
             row_diff = abs(to_row - from_row)
             col_diff = abs(to_col - from_col)
 
@@ -374,15 +403,9 @@ class GameRules:
                     return False  # 中间有棋子，被塞相眼
 
                 # 判断是否在敌方区域
-                is_in_enemy_territory = False
-                if color == "red":
-                    # 红方相在黑方区域（1-6行，即索引0-6）
-                    if from_row <= 6:
-                        is_in_enemy_territory = True
-                else:  # black
-                    # 黑方相在红方区域（6-12行，即索引6-12）
-                    if from_row >= 6:
-                        is_in_enemy_territory = True
+                # 红方相在黑方区域（索引0-6），黑方相在红方区域（索引6-12），即敌方未过长城的一侧
+                enemy = "black" if color == "red" else "red"
+                is_in_enemy_territory = not XIONGHAN_GEOMETRY.has_crossed_river(enemy, from_row)
 
                 # 只有在敌方区域才能使用隔两格的能力
                 if is_in_enemy_territory:
@@ -398,12 +421,12 @@ class GameRules:
                         # 检查水平方向相邻位置
                         for offset in [-1, 1]:
                             adj_col = mid_col + offset
-                            if 0 <= adj_col < 13:
+                            if 0 <= adj_col < rule_set.cols:
                                 adj_piece = GameRules.get_piece_at(pieces, mid_row, adj_col)
                                 if adj_piece and adj_piece.color != color:  # 敌方棋子
                                     # 检查另一个方向是否有同色棋子
                                     opp_adj_col = mid_col - offset
-                                    if 0 <= opp_adj_col < 13:
+                                    if 0 <= opp_adj_col < rule_set.cols:
                                         opp_adj_piece = GameRules.get_piece_at(pieces, mid_row, opp_adj_col)
                                         if opp_adj_piece and opp_adj_piece.color == color:  # 己方棋子
                                             # 两个子与相横向相连，隔一格棋子不能被吃
@@ -414,12 +437,12 @@ class GameRules:
                         # 检查垂直方向相邻位置
                         for offset in [-1, 1]:
                             adj_row = mid_row + offset
-                            if 0 <= adj_row < 13:
+                            if 0 <= adj_row < rule_set.rows:
                                 adj_piece = GameRules.get_piece_at(pieces, adj_row, mid_col)
                                 if adj_piece and adj_piece.color != color:  # 敌方棋子
                                     # 检查另一个方向是否有同色棋子
                                     opp_adj_row = mid_row - offset
-                                    if 0 <= opp_adj_row < 13:
+                                    if 0 <= opp_adj_row < rule_set.rows:
                                         opp_adj_piece = GameRules.get_piece_at(pieces, opp_adj_row, mid_col)
                                         if opp_adj_piece and opp_adj_piece.color == color:  # 己方棋子
                                             # 两个子与相横向相连，隔一格棋子不能被吃
@@ -433,31 +456,28 @@ class GameRules:
         return False
 
     @staticmethod
-    def is_valid_shi_move(color, from_row, from_col, to_row, to_col):
+    def is_valid_shi_move(color, from_row, from_col, to_row, to_col, rule_set=None):
         """检查士/仕的移动是否合法（匈汉象棋中士/仕可以过河）
         
         士/仕移动规则：
         - 在九宫内：可斜走一格
         - 离开九宫：根据设置决定是否增加直走一格的能力
         """
+        if rule_set is None:
+            rule_set = current_rule_set()
+
         # 计算移动距离
         row_diff = to_row - from_row
         col_diff = to_col - from_col
 
-        # 判断是否在九宫内
-        if color == "red":
-            in_palace = (9 <= from_row <= 11 and 5 <= from_col <= 7)  # 红方九宫
-        else:  # black
-            in_palace = (1 <= from_row <= 3 and 5 <= from_col <= 7)  # 黑方九宫
+        # 判断是否在九宫内（按匈汉象棋的九宫坐标）
+        in_palace = XIONGHAN_GEOMETRY.in_palace(color, from_row, from_col)
 
         # 检查目标位置是否在九宫内
-        if color == "red":
-            in_target_palace = (9 <= to_row <= 11 and 5 <= to_col <= 7)  # 红方九宫
-        else:  # black
-            in_target_palace = (1 <= to_row <= 3 and 5 <= to_col <= 7)  # 黑方九宫
+        in_target_palace = XIONGHAN_GEOMETRY.in_palace(color, to_row, to_col)
 
         # 如果当前在九宫内，但目标位置在九宫外，且不允许出九宫，则禁止移动
-        if in_palace and not in_target_palace and not game_config.get_setting("shi_can_leave_palace", True):
+        if in_palace and not in_target_palace and not rule_set.shi_can_leave_palace:
             return False
 
         # 如果当前在九宫外，且不允许出九宫，但目标位置在九宫内，这种情况下允许返回九宫
@@ -472,7 +492,8 @@ class GameRules:
             # 移动距离不符合规则
             return False
 
-        if in_palace:
+        # 传统象棋的九宫与匈汉象棋不同，在本模式的九宫内同样只能斜走（与走法生成一致）
+        if in_palace or rule_set.in_palace(color, from_row, from_col):
             # 在九宫内，只允许斜走
             if is_diagonal_move:
                 return True
@@ -480,7 +501,7 @@ class GameRules:
                 return False
         else:
             # 不在九宫内
-            if not game_config.get_setting("shi_can_leave_palace", True):
+            if not rule_set.shi_can_leave_palace:
                 # 如果不允许出九宫，但当前已经不在九宫内，说明规则设置与当前状态冲突
                 # 按照规则，不允许出九宫的士不应该在九宫外，但为了兼容性，我们限制其移动
                 # 如果目标位置也在九宫外，不允许移动
@@ -494,7 +515,7 @@ class GameRules:
                 if is_diagonal_move:
                     # 斜走始终允许
                     return True
-                elif game_config.get_setting("shi_gain_straight_outside_palace", True) and (is_horizontal_move or is_vertical_move):
+                elif rule_set.shi_gain_straight_outside_palace and (is_horizontal_move or is_vertical_move):
                     # 如果设置允许出九宫后获得直走能力，且是直走，则允许
                     return True
                 else:
@@ -502,10 +523,12 @@ class GameRules:
                     return False
 
     @staticmethod
-    def is_valid_king_move(pieces, color, from_row, from_col, to_row, to_col):
+    def is_valid_king_move(pieces, color, from_row, from_col, to_row, to_col, rule_set=None):
         """检查将/帅/汉/汗的移动是否合法"""
+        rule_set = GameRules.get_rule_set(pieces, rule_set)
+
         # 检查是否在棋盘范围内
-        if not utils.is_position_on_board(to_row, to_col):
+        if not rule_set.on_board(to_row, to_col):
             return False
 
         # 检查目标位置是否有己方棋子
@@ -517,25 +540,13 @@ class GameRules:
         row_diff = to_row - from_row
         col_diff = to_col - from_col
 
-        # 判断是否在九宫内,匈汉象棋与中国象棋的九宫位置不同
-        if game_config.get_setting("traditional_mode", False):
-            if color == "red":
-                # 9*10的中国象棋的九宫（红方：第7-9行，第3-5列）
-                in_own_palace = (7 <= from_row <= 9 and 3 <= from_col <= 5)
-            else:  # black
-                # 9*10的中国象棋的九宫（黑方：第0-2行，第3-5列）
-                in_own_palace = (0 <= from_row <= 2 and 3 <= from_col <= 5)
-        else:
-            if color == "red":
-                # 13*13的匈汉象棋的九宫
-                in_own_palace = (9 <= from_row <= 11 and 5 <= from_col <= 7)  # 红方在自己九宫内
-            else:  # black
-                in_own_palace = (1 <= from_row <= 3 and 5 <= from_col <= 7)  # 黑方在自己九宫内
+        # 判断是否在九宫内，匈汉象棋与中国象棋的九宫位置不同（由规则中的棋盘几何给出）
+        in_own_palace = rule_set.in_palace(color, from_row, from_col)
 
         # 根据位置应用不同的移动规则
         if in_own_palace:
             # 在九宫内，根据设置决定是否可以斜走
-            if game_config.get_setting("king_can_diagonal_in_palace", True):
+            if rule_set.king_can_diagonal_in_palace:
                 # 在九宫内，可以横竖斜走一格
                 if max(abs(row_diff), abs(col_diff)) != 1:
                     return False
@@ -545,7 +556,7 @@ class GameRules:
                     return False
         else:
             # 在九宫外，根据设置决定是否失去斜走能力
-            if game_config.get_setting("king_lose_diagonal_outside_palace", True):
+            if rule_set.king_lose_diagonal_outside_palace:
                 # 在九宫外，失去斜走能力，只能横竖走一格
                 if not ((abs(row_diff) == 1 and col_diff == 0) or (row_diff == 0 and abs(col_diff) == 1)):
                     return False
@@ -555,33 +566,14 @@ class GameRules:
                     return False
 
         # 检查是否允许汉/汗出九宫
-        if not game_config.get_setting("king_can_leave_palace", True):
-            # 如果不允许出九宫，判断目标位置是否在九宫内
-            if color == "red":
-                in_target_palace = (9 <= to_row <= 11 and 5 <= to_col <= 7)  # 红方九宫
-            else:  # black
-                in_target_palace = (1 <= to_row <= 3 and 5 <= to_col <= 7)  # 黑方九宫
-
-            if not in_target_palace:
+        if not rule_set.king_can_leave_palace:
+            # 如果不允许出九宫，判断目标位置是否在九宫内（按匈汉象棋的九宫坐标）
+            if not XIONGHAN_GEOMETRY.in_palace(color, to_row, to_col):
                 return False
 
         # 汉/汗进入敌方九宫直接获胜（在移动合法的基础上）
-        if game_config.get_setting("traditional_mode", False):
-            # 传统中国象棋：将/帅进入敌方九宫获胜
-            if color == "red":  # 红方将进入黑方九宫(0-2行, 3-5列)获胜
-                if 0 <= to_row <= 2 and 3 <= to_col <= 5:
-                    return True
-            else:  # 黑方帅进入红方九宫(7-9行, 3-5列)获胜
-                if 7 <= to_row <= 9 and 3 <= to_col <= 5:
-                    return True
-        else:
-            # 匈汉象棋：汉/汗进入敌方九宫获胜
-            if color == "red":  # 红方汉进入黑方九宫(1-3行, 5-7列)获胜
-                if 1 <= to_row <= 3 and 5 <= to_col <= 7:
-                    return True
-            else:  # 黑方汗进入红方九宫(9-11行, 5-7列)获胜
-                if 9 <= to_row <= 11 and 5 <= to_col <= 7:
-                    return True
+        if rule_set.in_palace("black" if color == "red" else "red", to_row, to_col):
+            return True
 
         # 将帅对脸规则（禁止照面）
         if target_piece and isinstance(target_piece, King) and target_piece.color != color:
@@ -673,7 +665,7 @@ class GameRules:
         return pieces_in_path == 1
 
     @staticmethod
-    def is_valid_pawn_move(pieces, color, from_row, from_col, to_row, to_col):
+    def is_valid_pawn_move(pieces, color, from_row, from_col, to_row, to_col, rule_set=None):
         """检查兵/卒的移动是否合法（匈汉象棋规则）"""
         row_diff = to_row - from_row
         col_diff = to_col - from_col
@@ -684,14 +676,16 @@ class GameRules:
             return False
 
         # 检查是否在棋盘范围内
-        if not utils.is_position_on_board(to_row, to_col):
+        rule_set = GameRules.get_rule_set(pieces, rule_set)
+        if not rule_set.on_board(to_row, to_col):
             return False
 
-        if game_config.get_setting("traditional_mode", False):
+        if rule_set.traditional_mode:
             # 传统中国象棋兵/卒规则
+            crossed = rule_set.geometry.has_crossed_river(color, from_row)
             if color == "red":
                 # 红兵规则
-                if from_row >= 5:  # 未过河（在己方半场：第5-9行）
+                if not crossed:  # 未过河（在己方半场：第5-9行）
                     # 只能向前走一格
                     if to_row == from_row - 1 and to_col == from_col:
                         return True
@@ -706,7 +700,7 @@ class GameRules:
                         return False
             else:  # black
                 # 黑卒规则
-                if from_row <= 4:  # 未过河（在己方半场：第0-4行）
+                if not crossed:  # 未过河（在己方半场：第0-4行）
                     # 只能向前走一格
                     if to_row == from_row + 1 and to_col == from_col:
                         return True
@@ -787,11 +781,11 @@ class GameRules:
                 # 3. 进入底线阶段（对方最后一行）
                 elif from_row == 0:
                     # 检查是否启用完整移动能力
-                    if game_config.get_setting("pawn_full_movement_at_base_enabled", False):
+                    if rule_set.pawn_full_movement_at_base_enabled:
                         # 启用完整移动能力，可以前后左右移动
                         if not (abs(row_diff) <= 1 and abs(col_diff) <= 1 and abs(row_diff) + abs(col_diff) == 1):
                             return False
-                    elif game_config.get_setting("pawn_backward_at_base_enabled", False):
+                    elif rule_set.pawn_backward_at_base_enabled:
                         # 启用后退能力，可以前后左右移动
                         if not (abs(row_diff) <= 1 and abs(col_diff) <= 1 and abs(row_diff) + abs(col_diff) == 1):
                             return False
@@ -879,7 +873,7 @@ class GameRules:
         return False
 
     @staticmethod
-    def is_valid_wei_move(pieces, from_row, from_col, to_row, to_col):
+    def is_valid_wei_move(pieces, from_row, from_col, to_row, to_col, rule_set=None):
         """检查尉/衛的移动是否合法（修改后规则：跳跃过棋子后在碰撞前的区间内移动，支持直线和斜线跨越）"""
         # 获取当前尉棋子
         wei_piece = GameRules.get_piece_at(pieces, from_row, from_col)
@@ -892,7 +886,8 @@ class GameRules:
             return False  # 目标位置不为空，无法跳跃
 
         # 检查目标位置是否在棋盘范围内
-        if not utils.is_position_on_board(to_row, to_col):
+        geometry = GameRules.get_rule_set(pieces, rule_set).geometry
+        if not geometry.on_board(to_row, to_col):
             return False
 
         # 不能原地不动
@@ -912,7 +907,7 @@ class GameRules:
                 current_col = from_col + step
 
                 # 寻找第一个被跨越的棋子
-                while 0 <= current_col < 13 and current_col != to_col:
+                while 0 <= current_col < geometry.cols and current_col != to_col:
                     if GameRules.get_piece_at(pieces, from_row, current_col):
                         crossed_piece_pos = current_col
                         break
@@ -925,7 +920,7 @@ class GameRules:
                 # 从跨越点的下一个位置开始，检查到目标位置之间是否有棋子
                 current_col = crossed_piece_pos + step
                 while current_col != to_col:
-                    if 0 <= current_col < 13:
+                    if 0 <= current_col < geometry.cols:
                         if GameRules.get_piece_at(pieces, from_row, current_col):
                             # 在跨越棋子后的路径中遇到棋子，无效
                             return False
@@ -956,7 +951,7 @@ class GameRules:
                 current_row = from_row + step
 
                 # 寻找第一个被跨越的棋子
-                while 0 <= current_row < 13 and current_row != to_row:
+                while 0 <= current_row < geometry.rows and current_row != to_row:
                     if GameRules.get_piece_at(pieces, current_row, from_col):
                         crossed_piece_pos = current_row
                         break
@@ -969,7 +964,7 @@ class GameRules:
                 # 从跨越点的下一个位置开始，检查到目标位置之间是否有棋子
                 current_row = crossed_piece_pos + step
                 while current_row != to_row:
-                    if 0 <= current_row < 13:
+                    if 0 <= current_row < geometry.rows:
                         if GameRules.get_piece_at(pieces, current_row, from_col):
                             # 在跨越棋子后的路径中遇到棋子，无效
                             return False
@@ -1002,7 +997,7 @@ class GameRules:
 
             # 寻找第一个被跨越的棋子
             # 我们需要确保在到达目标位置之前先遇到一个棋子
-            while 0 <= current_row < 13 and 0 <= current_col < 13 and (current_row != to_row or current_col != to_col):
+            while geometry.on_board(current_row, current_col) and (current_row != to_row or current_col != to_col):
                 if GameRules.get_piece_at(pieces, current_row, current_col):
                     crossed_piece_pos = (current_row, current_col)
                     break
@@ -1017,7 +1012,7 @@ class GameRules:
             current_row = crossed_piece_pos[0] + row_step
             current_col = crossed_piece_pos[1] + col_step
             while current_row != to_row or current_col != to_col:
-                if 0 <= current_row < 13 and 0 <= current_col < 13:
+                if geometry.on_board(current_row, current_col):
                     if GameRules.get_piece_at(pieces, current_row, current_col):
                         # 在跨越棋子后的路径中遇到棋子，无效
                         return False
@@ -1048,7 +1043,7 @@ class GameRules:
         return False
 
     @staticmethod
-    def is_valid_she_move(pieces, from_row, from_col, to_row, to_col):
+    def is_valid_she_move(pieces, from_row, from_col, to_row, to_col, rule_set=None):
         """检查射/䠶的移动是否合法（匈汉象棋规则）"""
         # 射/䠶斜向移动至无碰撞点位
         row_diff = to_row - from_row
@@ -1067,7 +1062,8 @@ class GameRules:
             return False
 
         # 检查目标位置是否在棋盘范围内
-        if not (0 <= to_row < 13 and 0 <= to_col < 13):
+        geometry = GameRules.get_rule_set(pieces, rule_set).geometry
+        if not geometry.on_board(to_row, to_col):
             return False
 
         # 检查目标位置是否有己方棋子
@@ -1097,7 +1093,7 @@ class GameRules:
                 for cross_dr, cross_dc in cross_dirs:
                     adj_row = check_row + cross_dr
                     adj_col = check_col + cross_dc
-                    if 0 <= adj_row < 13 and 0 <= adj_col < 13:
+                    if geometry.on_board(adj_row, adj_col):
                         if GameRules.get_piece_at(pieces, adj_row, adj_col):
                             adjacent_pieces.append((adj_row, adj_col))
 
@@ -1109,7 +1105,7 @@ class GameRules:
         return True
 
     @staticmethod
-    def is_valid_lei_move(pieces, from_row, from_col, to_row, to_col):
+    def is_valid_lei_move(pieces, from_row, from_col, to_row, to_col, rule_set=None):
         """检查檑/礌的移动是否合法（匈汉象棋规则）
         
         檑/礌移动规则：
@@ -1123,15 +1119,10 @@ class GameRules:
         if not piece:
             return False
 
-        # 检查目标位置是否在棋盘范围内（根据模式选择棋盘大小）
-        if game_config.get_setting("traditional_mode", False):
-            # 传统中国象棋：9列 x 10行 (0-8列, 0-9行)
-            if not (0 <= to_row < 10 and 0 <= to_col < 9):
-                return False
-        else:
-            # 匈汉象棋：13列 x 13行 (0-12列, 0-12行)
-            if not (0 <= to_row < 13 and 0 <= to_col < 13):
-                return False
+        # 检查目标位置是否在棋盘范围内（棋盘大小由规则给出）
+        rule_set = GameRules.get_rule_set(pieces, rule_set)
+        if not rule_set.on_board(to_row, to_col):
+            return False
 
         # 不能不动
         if from_row == to_row and from_col == to_col:
@@ -1185,7 +1176,7 @@ class GameRules:
                         for cross_dr, cross_dc in cross_dirs:
                             adj_row = check_row + cross_dr
                             adj_col = check_col + cross_dc
-                            if 0 <= adj_row < 13 and 0 <= adj_col < 13:
+                            if rule_set.on_board(adj_row, adj_col):
                                 if GameRules.get_piece_at(pieces, adj_row, adj_col):
                                     adjacent_pieces.append((adj_row, adj_col))
 
@@ -1197,7 +1188,7 @@ class GameRules:
         return True
 
     @staticmethod
-    def is_valid_jia_move(pieces, from_row, from_col, to_row, to_col):
+    def is_valid_jia_move(pieces, from_row, from_col, to_row, to_col, rule_set=None):
         """检查甲/胄的移动是否合法（修改后规则：使用炮的移动方式，但仅用于移动，不能直接吃子）
         
         甲/胄移动规则：
@@ -1209,15 +1200,10 @@ class GameRules:
         if from_row != to_row and from_col != to_col:
             return False
 
-        # 检查目标位置是否在棋盘范围内（根据模式选择棋盘大小）
-        if game_config.get_setting("traditional_mode", False):
-            # 传统中国象棋：9列 x 10行 (0-8列, 0-9行)
-            if not (0 <= to_row < 10 and 0 <= to_col < 9):
-                return False
-        else:
-            # 匈汉象棋：13列 x 13行 (0-12列, 0-12行)
-            if not (0 <= to_row < 13 and 0 <= to_col < 13):
-                return False
+        # 检查目标位置是否在棋盘范围内（棋盘大小由规则给出）
+        rule_set = GameRules.get_rule_set(pieces, rule_set)
+        if not rule_set.on_board(to_row, to_col):
+            return False
 
         # 检查目标位置是否有棋子（甲/胄不能直接吃子，只能移动到空位置）
         target_piece = GameRules.get_piece_at(pieces, to_row, to_col)
@@ -1256,6 +1242,11 @@ class GameRules:
         if not piece:
             return False
 
+        board = Bitboard.of(pieces)
+        if popcount(board.occupied) == len(pieces) and board.piece_at(piece.row, piece.col) is piece:
+            # 位棋盘增量维护每格上下左右的同色棋子数，直接读取
+            return board._is_isolated(piece.row * board.cols + piece.col)
+
         # 检查四个方向：上、下、左、右
         directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
         row, col = piece.row, piece.col
@@ -1265,7 +1256,7 @@ class GameRules:
             adjacent_row, adjacent_col = row + dr, col + dc
 
             # 检查相邻位置是否在棋盘范围内
-            if 0 <= adjacent_row < 13 and 0 <= adjacent_col < 13:
+            if board.tables.on_board(adjacent_row, adjacent_col):
                 adjacent_piece = GameRules.get_piece_at(pieces, adjacent_row, adjacent_col)
                 # 如果相邻位置有棋子且颜色相同，则目标棋子不是孤立的
                 if adjacent_piece and adjacent_piece.color == piece.color:
@@ -1305,7 +1296,7 @@ class GameRules:
         return True
 
     @staticmethod
-    def is_valid_ci_move(pieces, color, from_row, from_col, to_row, to_col):
+    def is_valid_ci_move(pieces, color, from_row, from_col, to_row, to_col, rule_set=None):
         """检查刺（拖吃者）的移动是否合法
 
         刺棋子的规则：
@@ -1327,15 +1318,10 @@ class GameRules:
         if from_row != to_row and from_col != to_col:
             return False
 
-        # 检查目标位置是否在棋盘范围内（根据模式选择棋盘大小）
-        if game_config.get_setting("traditional_mode", False):
-            # 传统中国象棋：9列 x 10行 (0-8列, 0-9行)
-            if not (0 <= to_row < 10 and 0 <= to_col < 9):
-                return False
-        else:
-            # 匈汉象棋：13列 x 13行 (0-12列, 0-12行)
-            if not (0 <= to_row < 13 and 0 <= to_col < 13):
-                return False
+        # 检查目标位置是否在棋盘范围内（棋盘大小由规则给出）
+        rule_set = GameRules.get_rule_set(pieces, rule_set)
+        if not rule_set.on_board(to_row, to_col):
+            return False
 
         # 检查路径上是否有阻挡
         if from_row == to_row:  # 横向移动
@@ -1363,55 +1349,25 @@ class GameRules:
         reverse_row = from_row - row_diff
         reverse_col = from_col - col_diff
 
-        # 检查反方向位置是否在棋盘范围内（根据模式选择棋盘大小）
-        if game_config.get_setting("traditional_mode", False):
-            # 传统中国象棋：9列 x 10行 (0-8列, 0-9行)
-            if 0 <= reverse_row < 10 and 0 <= reverse_col < 9:
-                reverse_piece = GameRules.get_piece_at(pieces, reverse_row, reverse_col)
-                # 如果反方向有敌方棋子，那么刺可以移动（但需要后续处理兑子逻辑）
-                if reverse_piece and reverse_piece.color != color:
-                    # 检查是否是盾棋子（不能攻击盾）
-                    if isinstance(reverse_piece, Dun):
-                        return False
-                    # 检查是否被敌方盾阻挡（8邻域）
-                    # 检查移动的刺是否与敌方盾相邻
-                    for p in pieces:
-                        if isinstance(p, Dun) and p.color != color:  # 只考虑敌方盾
-                            # 检查该敌方盾是否与移动的刺相邻（8邻域）
-                            row_diff_to_dun = abs(p.row - from_row)
-                            col_diff_to_dun = abs(p.col - from_col)
-                            if row_diff_to_dun <= 1 and col_diff_to_dun <= 1 and (
-                                    row_diff_to_dun != 0 or col_diff_to_dun != 0):
-                                # 如果刺与敌方盾相邻，则不能触发拖吃
-                                return False
-                    return True
-        else:
-            # 匈汉象棋：13列 x 13行 (0-12列, 0-12行)
-            if 0 <= reverse_row < 13 and 0 <= reverse_col < 13:
-                reverse_piece = GameRules.get_piece_at(pieces, reverse_row, reverse_col)
-                # 如果反方向有敌方棋子，那么刺可以移动（但需要后续处理兑子逻辑）
-                if reverse_piece and reverse_piece.color != color:
-                    # 检查是否是盾棋子（不能攻击盾）
-                    if isinstance(reverse_piece, Dun):
-                        return False
-                    # 检查是否被敌方盾阻挡（8邻域）
-                    # 检查移动的刺是否与敌方盾相邻
-                    for p in pieces:
-                        if isinstance(p, Dun) and p.color != color:  # 只考虑敌方盾
-                            # 检查该敌方盾是否与移动的刺相邻（8邻域）
-                            row_diff_to_dun = abs(p.row - from_row)
-                            col_diff_to_dun = abs(p.col - from_col)
-                            if row_diff_to_dun <= 1 and col_diff_to_dun <= 1 and (
-                                    row_diff_to_dun != 0 or col_diff_to_dun != 0):
-                                # 如果刺与敌方盾相邻，则不能触发拖吃
-                                return False
-                    return True
+        # 检查反方向位置是否在棋盘范围内（棋盘大小由规则给出）
+        if rule_set.on_board(reverse_row, reverse_col):
+            reverse_piece = GameRules.get_piece_at(pieces, reverse_row, reverse_col)
+            # 如果反方向有敌方棋子，那么刺可以移动（但需要后续处理兑子逻辑）
+            if reverse_piece and reverse_piece.color != color:
+                # 检查是否是盾棋子（不能攻击盾）
+                if isinstance(reverse_piece, Dun):
+                    return False
+                # 刺与敌方盾相邻（8邻域）时被阻挡，不能触发拖吃
+                enemy = "black" if color == "red" else "red"
+                if GameRules.is_near_dun(pieces, enemy, from_row, from_col, rule_set):
+                    return False
+                return True
 
         # 如果没有满足兑子条件，普通移动也是允许的（只是不触发兑子）
         return True
 
     @staticmethod
-    def is_valid_dun_move(pieces, from_row, from_col, to_row, to_col):
+    def is_valid_dun_move(pieces, from_row, from_col, to_row, to_col, rule_set=None):
         """检查盾的移动是否合法
 
         盾棋子的规则：
@@ -1434,7 +1390,8 @@ class GameRules:
             return False
 
         # 检查目标位置是否在棋盘范围内
-        if not (0 <= to_row < 13 and 0 <= to_col < 13):
+        geometry = GameRules.get_rule_set(pieces, rule_set).geometry
+        if not geometry.on_board(to_row, to_col):
             return False
 
         # 水平移动
@@ -1446,7 +1403,7 @@ class GameRules:
             current_col = from_col + step
 
             # 寻找第一个被跨越的棋子
-            while 0 <= current_col < 13 and current_col != to_col:
+            while 0 <= current_col < geometry.cols and current_col != to_col:
                 if GameRules.get_piece_at(pieces, from_row, current_col):
                     crossed_piece_pos = current_col
                     break
@@ -1459,7 +1416,7 @@ class GameRules:
             # 从跨越点的下一个位置开始，检查到目标位置之间是否有棋子
             current_col = crossed_piece_pos + step
             while current_col != to_col:
-                if 0 <= current_col < 13:
+                if 0 <= current_col < geometry.cols:
                     if GameRules.get_piece_at(pieces, from_row, current_col):
                         # 在跨越棋子后的路径中遇到棋子，无效
                         return False
@@ -1488,7 +1445,7 @@ class GameRules:
             current_row = from_row + step
 
             # 寻找第一个被跨越的棋子
-            while 0 <= current_row < 13 and current_row != to_row:
+            while 0 <= current_row < geometry.rows and current_row != to_row:
                 if GameRules.get_piece_at(pieces, current_row, from_col):
                     crossed_piece_pos = current_row
                     break
@@ -1501,7 +1458,7 @@ class GameRules:
             # 从跨越点的下一个位置开始，检查到目标位置之间是否有棋子
             current_row = crossed_piece_pos + step
             while current_row != to_row:
-                if 0 <= current_row < 13:
+                if 0 <= current_row < geometry.rows:
                     if GameRules.get_piece_at(pieces, current_row, from_col):
                         # 在跨越棋子后的路径中遇到棋子，无效
                         return False
@@ -1524,7 +1481,7 @@ class GameRules:
         return False
 
     @staticmethod
-    def is_valid_xun_move(pieces, from_row, from_col, to_row, to_col):
+    def is_valid_xun_move(pieces, from_row, from_col, to_row, to_col, rule_set=None):
         """检查巡/廵的移动是否合法
 
         巡/廵规则：
@@ -1540,22 +1497,17 @@ class GameRules:
         if not xun_piece or not isinstance(xun_piece, Xun):
             return False
 
-        # 检查目标位置是否在棋盘范围内（根据模式选择棋盘大小）
-        if game_config.get_setting("traditional_mode", False):
-            # 传统中国象棋：9列 x 10行 (0-8列, 0-9行)
-            if not (0 <= to_row < 10 and 0 <= to_col < 9):
-                return False
-        else:
-            # 匈汉象棋：13列 x 13行 (0-12列, 0-12行)
-            if not (0 <= to_row < 13 and 0 <= to_col < 13):
-                return False
+        # 检查目标位置是否在棋盘范围内（棋盘大小由规则给出）
+        rule_set = GameRules.get_rule_set(pieces, rule_set)
+        if not rule_set.on_board(to_row, to_col):
+            return False
 
-        # 巡/廵只能在河界（第5行和第7行）活动，检查是否在河界
-        if from_row != 5 and from_row != 7:
+        # 巡/廵只能在河界（长城所在的第5行和第7行）活动，检查是否在河界
+        if from_row not in XIONGHAN_GEOMETRY.river_rows:
             return False
 
         # 巡/廵只能在河界（第5行和第7行）活动，检查目标位置是否仍在河界
-        if to_row != 5 and to_row != 7:
+        if to_row not in XIONGHAN_GEOMETRY.river_rows:
             return False
 
         # 巡/廵只能横向移动，检查是否改变了行
@@ -1599,323 +1551,28 @@ class GameRules:
         return True
 
     @staticmethod
-    def calculate_possible_moves(pieces, piece):
+    def calculate_possible_moves(pieces, piece, rule_set=None):
         """计算棋子所有可能的移动位置
-        
+
+        走法由位棋盘生成（见 program.core.bitboard），结果与逐格调用 is_valid_move 的校验一致。
+
         Args:
             pieces (list): 棋子列表
             piece (ChessPiece): 要计算的棋子
+            rule_set (RuleSet): 对局规则，默认使用棋子列表所属对局的规则
             
         Returns:
             list: 可能移动的位置列表 [(row, col), ...]
         """
-        moves = []
-        capturable = []
-
-        # 根据棋子类型优化可能的移动范围
-        if isinstance(piece, She):  # 射/䠶，斜向移动，限制在3格范围内
-            # 对于射/䠶，限制检查范围
-            for dr in range(-3, 4):  # 限制在3格范围内
-                for dc in range(-3, 4):
-                    # 只有斜向移动
-                    if abs(dr) == abs(dc) and (dr != 0 and dc != 0):
-                        to_row, to_col = piece.row + dr, piece.col + dc
-                        if utils.is_position_on_board(to_row, to_col):  # 在棋盘范围内
-                            if GameRules.is_valid_move(pieces, piece, piece.row, piece.col, to_row, to_col):
-                                # 检查目标位置是否有对方棋子（可吃子）
-                                target = GameRules.get_piece_at(pieces, to_row, to_col)
-                                if target and target.color != piece.color:
-                                    capturable.append((to_row, to_col))
-                                moves.append((to_row, to_col))
-        elif isinstance(piece, Lei):  # 檑/礌，直线和斜线无限移动
-            # 檑/礌可以沿直线和斜线无限移动，需要按方向检查
-            directions = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)]  # 8个方向
-            for dr, dc in directions:
-                # 沿着方向一直移动直到边界或遇到障碍
-                current_row, current_col = piece.row + dr, piece.col + dc
-                while utils.is_position_on_board(current_row, current_col):
-                    if GameRules.is_valid_move(pieces, piece, piece.row, piece.col, current_row, current_col):
-                        target = GameRules.get_piece_at(pieces, current_row, current_col)
-                        if target and target.color != piece.color:
-                            capturable.append((current_row, current_col))
-                        moves.append((current_row, current_col))
-
-                        # 如果目标位置有棋子，停止移动
-                        if target is not None:
-                            break  # 檑/礌遇到障碍就停止
-                    current_row += dr
-                    current_col += dc
-        elif isinstance(piece, (Ju, Pao, Ci, Dun)):  # 车/炮/刺/盾，直线移动
-            # 对于车/炮/刺/盾，只需要沿着4个方向检查
-            directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]  # 上下左右
-            for dr, dc in directions:
-                # 沿着方向一直移动直到边界或遇到障碍
-                current_row, current_col = piece.row + dr, piece.col + dc
-                while utils.is_position_on_board(current_row, current_col):
-                    if GameRules.is_valid_move(pieces, piece, piece.row, piece.col, current_row, current_col):
-                        target = GameRules.get_piece_at(pieces, current_row, current_col)
-                        if target and target.color != piece.color:
-                            capturable.append((current_row, current_col))
-                        moves.append((current_row, current_col))
-
-                        # 如果目标位置有棋子，根据棋子类型决定是否停止
-                        if target is not None:
-                            if isinstance(piece, Pao):  # 炮的特殊规则
-                                # 炮可以越过一个棋子后继续移动，直到遇到第二个棋子
-                                current_row += dr
-                                current_col += dc
-                                while utils.is_position_on_board(current_row, current_col):
-                                    if GameRules.is_valid_move(pieces, piece, piece.row, piece.col, current_row,
-                                                               current_col):
-                                        target2 = GameRules.get_piece_at(pieces, current_row, current_col)
-                                        if target2:
-                                            if target2.color != piece.color:
-                                                capturable.append((current_row, current_col))
-                                            moves.append((current_row, current_col))
-                                            break  # 炮在攻击后停止
-                                        else:
-                                            moves.append((current_row, current_col))
-                                    current_row += dr
-                                    current_col += dc
-                                break  # 炮在越过一个棋子后停止
-                            else:
-                                break  # 车、刺、盾遇到障碍就停止
-                    current_row += dr
-                    current_col += dc
-        elif isinstance(piece, Wei):  # 尉，现在支持直线和斜线移动
-            # 尉的移动范围包括直线和斜线
-            directions = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)]  # 8个方向
-            for dr, dc in directions:
-                # 沿着方向一直移动直到边界或遇到障碍
-                current_row, current_col = piece.row + dr, piece.col + dc
-                while utils.is_position_on_board(current_row, current_col):
-                    if GameRules.is_valid_move(pieces, piece, piece.row, piece.col, current_row, current_col):
-                        target = GameRules.get_piece_at(pieces, current_row, current_col)
-                        if target and target.color != piece.color:
-                            capturable.append((current_row, current_col))
-                        moves.append((current_row, current_col))
-
-                        # 尉遇到棋子就停止
-                        if target is not None:
-                            break  # 尉遇到障碍就停止
-                    current_row += dr
-                    current_col += dc
-        elif isinstance(piece, Ma):  # 马，包含传统日字和直走三格
-            # 马的所有可能移动位置
-            knight_moves = [
-                (-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                (1, -2), (1, 2), (2, -1), (2, 1)
-            ]
-
-            # 如果设置了马可以直走三格，则添加这些移动
-            if game_config.get_setting("ma_can_straight_three", True):
-                knight_moves.extend([
-                    (-3, 0), (3, 0), (0, -3), (0, 3)  # 直走三格
-                ])
-
-            for dr, dc in knight_moves:
-                to_row, to_col = piece.row + dr, piece.col + dc
-                if utils.is_position_on_board(to_row, to_col):  # 在棋盘范围内
-                    if GameRules.is_valid_move(pieces, piece, piece.row, piece.col, to_row, to_col):
-                        target = GameRules.get_piece_at(pieces, to_row, to_col)
-                        if target and target.color != piece.color:
-                            capturable.append((to_row, to_col))
-                        moves.append((to_row, to_col))
-        elif isinstance(piece, Xiang):  # 相/象，走田字等
-            # 相可移动位置
-            elephant_moves = [
-                (-2, -2), (-2, 2), (2, -2), (2, 2)  # 田字
-            ]
-
-            # 如果设置了相可以在敌方区域获得隔两格的能力，则添加这些移动
-            if game_config.get_setting("xiang_gain_jump_two_outside_river", True):
-                # 检查相是否在敌方区域
-                is_in_enemy_territory = False
-                if piece.color == "red":
-                    # 红方相在黑方区域（0-6行）
-                    if piece.row <= 6:
-                        is_in_enemy_territory = True
-                else:  # black
-                    # 黑方相在红方区域（6-12行）
-                    if piece.row >= 6:
-                        is_in_enemy_territory = True
-
-                # 如果在敌方区域，添加隔一格直线移动
-                if is_in_enemy_territory:
-                    elephant_moves.extend([
-                        (-2, 0), (2, 0), (0, -2), (0, 2)  # 隔一格直线
-                    ])
-            else:
-                # 如果没开启特殊能力，仍保留隔一格直线移动
-                elephant_moves.extend([
-                    (-2, 0), (2, 0), (0, -2), (0, 2)  # 隔一格直线
-                ])
-
-            for dr, dc in elephant_moves:
-                to_row, to_col = piece.row + dr, piece.col + dc
-                if utils.is_position_on_board(to_row, to_col):  # 在棋盘范围内
-                    if GameRules.is_valid_move(pieces, piece, piece.row, piece.col, to_row, to_col):
-                        target = GameRules.get_piece_at(pieces, to_row, to_col)
-                        if target and target.color != piece.color:
-                            capturable.append((to_row, to_col))
-                        moves.append((to_row, to_col))
-        elif isinstance(piece, Shi):  # 士/仕，包含对角线和直线移动
-            # 士的可能移动位置（对角线1格）
-            advisor_moves = [
-                (-1, -1), (-1, 1), (1, -1), (1, 1)
-            ]
-
-            # 检查士是否在九宫外
-            if game_config.get_setting("traditional_mode", False):
-                # 中象九宫
-                if piece.color == "red":
-                    in_palace = (7 <= piece.row <= 9 and 3 <= piece.col <= 5)  # 红方九宫
-                else:  # black
-                    in_palace = (0 <= piece.row <= 2 and 3 <= piece.col <= 5)  # 黑方九宫
-            else:
-                if piece.color == "red":
-                    in_palace = (9 <= piece.row <= 11 and 5 <= piece.col <= 7)  # 红方九宫
-                else:  # black
-                    in_palace = (1 <= piece.row <= 3 and 5 <= piece.col <= 7)  # 黑方九宫
-            # 如果士可以离开九宫且设置了出九宫后获得直走能力，则添加直走移动
-            if game_config.get_setting("shi_can_leave_palace", True) and game_config.get_setting("shi_gain_straight_outside_palace", True) and not in_palace:
-                # 添加直走移动（横竖各一格）
-                advisor_moves.extend([
-                    (-1, 0), (1, 0), (0, -1), (0, 1)  # 横竖移动
-                ])
-
-            for dr, dc in advisor_moves:
-                to_row, to_col = piece.row + dr, piece.col + dc
-                if utils.is_position_on_board(to_row, to_col):  # 在棋盘范围内
-                    if GameRules.is_valid_move(pieces, piece, piece.row, piece.col, to_row, to_col):
-                        target = GameRules.get_piece_at(pieces, to_row, to_col)
-                        if target and target.color != piece.color:
-                            capturable.append((to_row, to_col))
-                        moves.append((to_row, to_col))
-        elif isinstance(piece, King):  # 将/帅/汉/汗
-            # 检查是否在九宫内
-
-            if game_config.get_setting("traditional_mode", False):
-                if piece.color == "red":
-                    in_own_palace = (7 <= piece.row <= 9 and 3 <= piece.col <= 5)  # 红方九宫
-                else:  # black
-                    in_own_palace = (0 <= piece.row <= 2 and 3 <= piece.col <= 5)  # 黑方九宫
-            else:
-                if piece.color == "red":
-                    in_own_palace = (9 <= piece.row <= 11 and 5 <= piece.col <= 7)  # 红方九宫
-                else:  # black
-                    in_own_palace = (1 <= piece.row <= 3 and 5 <= piece.col <= 7)  # 黑方九宫
-
-            # 根据位置和设置确定可能的移动
-            if in_own_palace:
-                # 在九宫内，根据设置决定是否可以斜走
-                if game_config.get_setting("king_can_diagonal_in_palace", True):
-                    # 在九宫内，可以横竖斜走一格
-                    king_moves = [
-                        (-1, -1), (-1, 0), (-1, 1),  # 斜向和上
-                        (0, -1), (0, 1),  # 横向
-                        (1, -1), (1, 0), (1, 1)  # 斜向和下
-                    ]
-                else:
-                    # 在九宫内，只能横竖走一格
-                    king_moves = [
-                        (-1, 0),  # 上
-                        (0, -1), (0, 1),  # 横向
-                        (1, 0)  # 下
-                    ]
-            else:
-                # 在九宫外，根据设置决定是否失去斜走能力
-                if game_config.get_setting("king_lose_diagonal_outside_palace", True):
-                    # 在九宫外，失去斜走能力，只能横竖走一格
-                    king_moves = [
-                        (-1, 0),  # 上
-                        (0, -1), (0, 1),  # 横向
-                        (1, 0)  # 下
-                    ]
-                else:
-                    # 在九宫外，仍可斜走一格
-                    king_moves = [
-                        (-1, -1), (-1, 0), (-1, 1),  # 斜向和上
-                        (0, -1), (0, 1),  # 横向
-                        (1, -1), (1, 0), (1, 1)  # 斜向和下
-                    ]
-
-            for dr, dc in king_moves:
-                to_row, to_col = piece.row + dr, piece.col + dc
-                if utils.is_position_on_board(to_row, to_col):  # 在棋盘范围内
-                    if GameRules.is_valid_move(pieces, piece, piece.row, piece.col, to_row, to_col):
-                        target = GameRules.get_piece_at(pieces, to_row, to_col)
-                        if target and target.color != piece.color:
-                            capturable.append((to_row, to_col))
-                        moves.append((to_row, to_col))
-        elif isinstance(piece, Pawn):  # 兵/卒
-            # 兵/卒的可能移动位置（根据位置和规则）
-            if game_config.get_setting("traditional_mode", False):
-                for to_row in range(10):
-                    for to_col in range(9):
-                        # 检查移动是否合法
-                        if GameRules.is_valid_move(pieces, piece, piece.row, piece.col, to_row, to_col):
-                            target = GameRules.get_piece_at(pieces, to_row, to_col)
-                            if target and target.color != piece.color:
-                                capturable.append((to_row, to_col))
-                            moves.append((to_row, to_col))
-            else:
-                for to_row in range(13):
-                    for to_col in range(13):
-                        # 检查移动是否合法
-                        if GameRules.is_valid_move(pieces, piece, piece.row, piece.col, to_row, to_col):
-                            target = GameRules.get_piece_at(pieces, to_row, to_col)
-                            if target and target.color != piece.color:
-                                capturable.append((to_row, to_col))
-                            moves.append((to_row, to_col))
-
-        elif isinstance(piece, Xun):  # 巡/廵，河界专属控场棋子
-            # 巡/廵只能在河界（第5行和第7行）横向移动，移动偶数格（2, 4, 6等）
-            if piece.row == 5 or piece.row == 7:  # 确保在河界
-                # 尝试左右移动偶数格
-                for step in [2, 4, 6, 8, 10, 12]:  # 移动2, 4, 6, 8, 10, 12格
-                    # 向右移动
-                    to_col_right = piece.col + step
-                    if to_col_right < 13:
-                        if GameRules.is_valid_move(pieces, piece, piece.row, piece.col, piece.row, to_col_right):
-                            target = GameRules.get_piece_at(pieces, piece.row, to_col_right)
-                            if target and target.color != piece.color:
-                                capturable.append((piece.row, to_col_right))
-                            moves.append((piece.row, to_col_right))
-
-                    # 向左移动
-                    to_col_left = piece.col - step
-                    if to_col_left >= 0:
-                        if GameRules.is_valid_move(pieces, piece, piece.row, piece.col, piece.row, to_col_left):
-                            target = GameRules.get_piece_at(pieces, piece.row, to_col_left)
-                            if target and target.color != piece.color:
-                                capturable.append((piece.row, to_col_left))
-                            moves.append((piece.row, to_col_left))
-        else:  # 其他情况，遍历所有位置
-            # 遍历所有可能的位置
-
-            if game_config.get_setting("traditional_mode", False):
-                for to_row in range(10):
-                    for to_col in range(9):
-                        # 检查移动是否合法
-                        if GameRules.is_valid_move(pieces, piece, piece.row, piece.col, to_row, to_col):
-                            target = GameRules.get_piece_at(pieces, to_row, to_col)
-                            if target and target.color != piece.color:
-                                capturable.append((to_row, to_col))
-                            moves.append((to_row, to_col))
-            else:
-                for to_row in range(13):
-                    for to_col in range(13):
-                        # 检查移动是否合法
-                        if GameRules.is_valid_move(pieces, piece, piece.row, piece.col, to_row, to_col):
-                            target = GameRules.get_piece_at(pieces, to_row, to_col)
-                            if target and target.color != piece.color:
-                                capturable.append((to_row, to_col))
-                            moves.append((to_row, to_col))
+        board = Bitboard.of(pieces, rule_set)
+        move_mask, capture_mask = board.piece_targets(piece)
+        moves = board.positions(move_mask)
+        capturable = board.positions(capture_mask)
+
         # 特殊处理甲/胄的吃子规则
         if isinstance(piece, Jia):
             # 查找可以形成的2己1敌三子横竖连线
-            jia_captures = GameRules.find_jia_capture_moves(pieces, piece)
+            jia_captures = GameRules.find_jia_capture_moves(pieces, piece, rule_set)
             for captured_piece in jia_captures:
                 pos = (captured_piece.row, captured_piece.col)
                 if pos not in capturable:
@@ -1923,36 +1580,37 @@ class GameRules:
                 if pos not in moves:
                     moves.append(pos)
 
-        # 特殊处理檑/礌的吃子规则
-        if isinstance(piece, Lei):
-            # 检查周围8个格子中是否有落单的敌方棋子
-            for target_piece in pieces:
-                if GameRules.can_lei_attack(piece, target_piece, pieces):
-                    pos = (target_piece.row, target_piece.col)
-                    if pos not in capturable:
-                        capturable.append(pos)
-                    if pos not in moves:
-                        moves.append(pos)
-
-        # 特殊处理刺的兑子规则
-        if isinstance(piece, Ci):
-            # 刺的移动规则比较特殊，它本身不能吃子，但移动时可能触发兑子
-            # 这里我们暂时不做额外处理，因为兑子在move_piece中处理
-            pass
+        # 檑/礌攻击相邻落单敌子、刺的兑子均已在位棋盘走法中处理，兑子的执行在move_piece中
 
         return moves, capturable
 
     @staticmethod
-    def find_jia_capture_moves(pieces, jia_piece):
-        """查找甲/胄可以吃的子（形成2己1敌三子连线）"""
+    def find_jia_capture_moves(pieces, jia_piece, rule_set=None):
+        """查找甲/胄可以吃的子（形成2己1敌三子连线）
+
+        由位棋盘只检查经过己方甲/胄的连线；棋子列表不能完全由位棋盘表示时（重叠或越界的棋子）
+        退回全盘扫描。rule_set 默认使用棋子列表所属对局的规则。
+        """
+        board = Bitboard.of(pieces, rule_set)
+        if popcount(board.occupied) != len(pieces):
+            return GameRules.scan_jia_capture_moves(pieces, jia_piece, board.rule_set)
+        return board.jia_captures(jia_piece.color)
+
+    @staticmethod
+    def scan_jia_capture_moves(pieces, jia_piece, rule_set=None):
+        """全盘扫描所有三子连线，查找甲/胄可以吃的子（形成2己1敌三子连线）
+
+        扫描范围为规则的棋盘几何，rule_set 默认使用棋子列表所属对局的规则。
+        """
         captures = []
         color = jia_piece.color
+        geometry = GameRules.get_rule_set(pieces, rule_set).geometry
 
         # 检查所有可能的三子连线（水平和垂直）
 
         # 检查水平连线（行不变，列变化）
-        for row in range(13):
-            for col in range(11):  # 最多检查到第11列，因为需要连续3格
+        for row in range(geometry.rows):
+            for col in range(geometry.cols - 2):  # 需要连续3格，最后两列不能作为起点
                 # 获取三个连续位置的棋子
                 piece1 = GameRules.get_piece_at(pieces, row, col)
                 piece2 = GameRules.get_piece_at(pieces, row, col + 1)
@@ -2012,8 +1670,8 @@ class GameRules:
                             captures.append(enemy)
 
         # 检查垂直连线（列不变，行变化）
-        for col in range(13):
-            for row in range(11):  # 最多检查到第11行，因为需要连续3格
+        for col in range(geometry.cols):
+            for row in range(geometry.rows - 2):  # 需要连续3格，最后两行不能作为起点
                 # 获取三个连续位置的棋子
                 piece1 = GameRules.get_piece_at(pieces, row, col)
                 piece2 = GameRules.get_piece_at(pieces, row + 1, col)
@@ -2073,8 +1731,8 @@ class GameRules:
                             captures.append(enemy)
 
         # 检查对角线方向的连线（斜向连线）
-        for row in range(11):  # 最多检查到第11行，因为需要连续3格
-            for col in range(11):  # 最多检查到第11列，因为需要连续3格
+        for row in range(geometry.rows - 2):  # 需要连续3格，最后两行不能作为起点
+            for col in range(geometry.cols - 2):  # 需要连续3格，最后两列不能作为起点
                 # 检查左上到右下的对角线
                 piece1 = GameRules.get_piece_at(pieces, row, col)
                 piece2 = GameRules.get_piece_at(pieces, row + 1, col + 1)
@@ -2132,8 +1790,8 @@ class GameRules:
                                 captures.append(enemy)
 
         # 检查右上到左下的对角线
-        for row in range(11):  # 最多检查到第11行，因为需要连续3格
-            for col in range(2, 13):  # 从第2列开始，因为需要向左下连续3格
+        for row in range(geometry.rows - 2):  # 需要连续3格，最后两行不能作为起点
+            for col in range(2, geometry.cols):  # 从第2列开始，因为需要向左下连续3格
                 piece1 = GameRules.get_piece_at(pieces, row, col)
                 piece2 = GameRules.get_piece_at(pieces, row + 1, col - 1)
                 piece3 = GameRules.get_piece_at(pieces, row + 2, col - 2)
@@ -2192,60 +1850,24 @@ class GameRules:
         return captures
 
     @staticmethod
-    def is_check(pieces, color):
+    def is_check(pieces, color, rule_set=None):
         """检查是否将军
+
+        车、炮、马以及将帅对脸只检查路径，其他棋子按普通走法（含照面与盾的限制）判断，
+        具体由位棋盘完成。
         
         Args:
             pieces (list): 棋子列表
             color (str): 要检查的方的颜色
+            rule_set (RuleSet): 对局规则，默认使用棋子列表所属对局的规则
             
         Returns:
             bool: 是否将军
         """
-        # 找出该方的将/帅
-        king = None
-        for piece in pieces:
-            if isinstance(piece, King) and piece.color == color:
-                king = piece
-                break
-
-        if not king:
-            return True  # 没有找到将/帅，视为被将死
-
-        # 检查对方每个棋子是否能攻击到将/帅
-        for piece in pieces:
-            if piece.color != color:  # 对方棋子
-                # 根据棋子类型使用相应的攻击检测方法
-                if isinstance(piece, Ju):  # 车
-                    if GameRules.can_ju_attack(pieces, piece.row, piece.col, king.row, king.col):
-                        return True
-                elif isinstance(piece, Pao):  # 炮
-                    if GameRules.can_pao_attack(pieces, piece.row, piece.col, king.row, king.col):
-                        return True
-                elif isinstance(piece, Ma):  # 马
-                    if GameRules.can_ma_attack(pieces, piece.row, piece.col, king.row, king.col):
-                        return True
-                elif isinstance(piece, King):  # 将/帅
-                    # 将帅对脸规则
-                    if piece.col == king.col:
-                        # 检查中间是否有其他棋子
-                        start_row = min(piece.row, king.row) + 1
-                        end_row = max(piece.row, king.row)
-                        has_piece_between = False
-                        for r in range(start_row, end_row):
-                            if GameRules.get_piece_at(pieces, r, piece.col):
-                                has_piece_between = True
-                                break
-                        if not has_piece_between:
-                            return True
-                else:  # 其他棋子（兵/卒、相/象、士/仕等）
-                    if GameRules.is_valid_move(pieces, piece, piece.row, piece.col, king.row, king.col):
-                        return True
-
-        return False
+        return Bitboard.of(pieces, rule_set).is_check(color, pieces)
 
     @staticmethod
-    def would_be_in_check_after_move(pieces, piece, to_row, to_col):
+    def would_be_in_check_after_move(pieces, piece, to_row, to_col, rule_set=None):
         """检查移动后是否会导致被将军
         
         Args:
@@ -2253,165 +1875,87 @@ class GameRules:
             piece (ChessPiece): 要移动的棋子
             to_row (int): 目标行
             to_col (int): 目标列
+            rule_set (RuleSet): 对局规则，默认使用棋子列表所属对局的规则
             
         Returns:
             bool: 移动后是否会被将军
         """
         # 使用虚拟移动工具函数
         from program.utils.utils import virtual_move
-        return virtual_move(pieces, piece, to_row, to_col, GameRules.is_check, piece.color)
+        return virtual_move(pieces, piece, to_row, to_col, GameRules.is_check, piece.color, rule_set)
 
     @staticmethod
-    def is_checkmate(pieces, color):
+    def is_checkmate(pieces, color, rule_set=None):
         """检查是否将死（无法逃脱的将军）
         
         Args:
             pieces (list): 棋子列表
             color (str): 要检查的方的颜色
+            rule_set (RuleSet): 对局规则，默认使用棋子列表所属对局的规则
             
         Returns:
             bool: 是否将死
         """
         # 首先检查是否将军
-        if not GameRules.is_check(pieces, color):
+        if not GameRules.is_check(pieces, color, rule_set):
             return False
 
         # 检查该方是否有任何合法移动可以解除将军
-        for piece in pieces:
-            if piece.color == color:  # 该方的棋子
-                # 尝试所有可能的移动
-                if game_config.get_setting("traditional_mode", False):
-                    # 中象检查
-                    for row in range(10):
-                        for col in range(9):
-                            if GameRules.is_valid_move(pieces, piece, piece.row, piece.col, row, col):
-                                # 检查这个移动是否会解除将军（送将检测）
-                                if not GameRules.would_be_in_check_after_move(pieces, piece, row, col):
-                                    return False  # 找到一个可以解除将军的移动，不是将死
-                else:
-                    for row in range(13):
-                        for col in range(13):
-                            if GameRules.is_valid_move(pieces, piece, piece.row, piece.col, row, col):
-                                # 检查这个移动是否会解除将军（送将检测）
-                                if not GameRules.would_be_in_check_after_move(pieces, piece, row, col):
-                                    return False  # 找到一个可以解除将军的移动，不是将死
+        from program.core.move_generator import has_any_legal_move
+        if has_any_legal_move(pieces, color, rule_set):
+            return False  # 找到一个可以解除将军的移动，不是将死
         # 没有合法移动可以解除将军，是将死
         return True
 
     @staticmethod
-    def can_move_to(pieces, piece, to_row, to_col):
+    def can_move_to(pieces, piece, to_row, to_col, rule_set=None):
         """检查棋子是否可以移动到指定位置"""
-        return GameRules.is_valid_move(pieces, piece, piece.row, piece.col, to_row, to_col)
+        return GameRules.is_valid_move(pieces, piece, piece.row, piece.col, to_row, to_col, rule_set)
 
     @staticmethod
-    def is_game_over(pieces, player_color):
+    def is_game_over(pieces, player_color, rule_set=None):
         """检查游戏是否结束
         
         Args:
             pieces (list): 棋子列表
             player_color (str): 当前玩家颜色
+            rule_set (RuleSet): 对局规则，默认使用棋子列表所属对局的规则
             
         Returns:
             bool: 游戏是否结束
             str or None: 获胜方，如果游戏未结束则为None
         """
         # 检查是否有汉/汗进入敌方九宫
-        for piece in pieces:
-            if isinstance(piece, King):
-
-                if game_config.get_setting("traditional_mode", False):
-                    # 检查红方汉是否进入黑方九宫
-                    if piece.color == "red" and 0 <= piece.row <= 2 and 3 <= piece.col <= 5:
-                        return True, "red"
-                    # 检查黑方汗是否进入红方九宫
-                    if piece.color == "black" and 7 <= piece.row <= 9 and 3 <= piece.col <= 5:
-                        return True, "black"
-                else:
-                    # 检查红方汉是否进入黑方九宫
-                    if piece.color == "red" and 1 <= piece.row <= 3 and 5 <= piece.col <= 7:
-                        return True, "red"
-                    # 检查黑方汗是否进入红方九宫
-                    if piece.color == "black" and 9 <= piece.row <= 11 and 5 <= piece.col <= 7:
-                        return True, "black"
+        rule_set = GameRules.get_rule_set(pieces, rule_set)
+        board = Bitboard.of(pieces, rule_set)
+        for color, enemy in (("red", "black"), ("black", "red")):
+            for king in board.pieces_of(color, King):
+                if rule_set.in_palace(enemy, king.row, king.col):
+                    return True, color
 
         # 检查是否存在将帅照面的情况（违规方失败）
-        red_king = None
-        black_king = None
-
-        # 找到双方的将/帅
-        for piece in pieces:
-            if isinstance(piece, King):
-                if piece.color == "red":
-                    red_king = piece
-                else:
-                    black_king = piece
-
-        # 如果双方将/帅都在场上
-        if red_king and black_king:
-            # 检查是否在同一列
-            if red_king.col == black_king.col:
-                # 检查中间是否有其他棋子
-                start_row = min(red_king.row, black_king.row) + 1
-                end_row = max(red_king.row, black_king.row)
-                has_piece_between = False
-
-                for row in range(start_row, end_row):
-                    if GameRules.get_piece_at(pieces, row, red_king.col):
-                        has_piece_between = True
-                        break
-
-                # 如果中间没有棋子，说明将帅照面，当前移动的一方失败
-                if not has_piece_between:
-                    # 违规方是当前玩家，所以对手获胜
-                    winner = "black" if player_color == "red" else "red"
-                    return True, winner
-
-        # 检查对方是否被将死
-        opponent_color = "black" if player_color == "red" else "red"
-
-        # 找出对方的将/帅
-        opponent_king = None
-        for piece in pieces:
-            if isinstance(piece, King) and piece.color == opponent_color:
-                opponent_king = piece
-                break
+        red_king = board.king("red", pieces)
+        black_king = board.king("black", pieces)
+
+        # 如果双方将/帅都在场上且在同一列，中间没有其他棋子说明将帅照面
+        if red_king and black_king and red_king.col == black_king.col:
+            start_row = min(red_king.row, black_king.row) + 1
+            end_row = max(red_king.row, black_king.row)
+            if not any(board.piece_at(row, red_king.col) for row in range(start_row, end_row)):
+                # 违规方是当前玩家，所以对手获胜
+                winner = "black" if player_color == "red" else "red"
+                return True, winner
 
         # 没有找到对方的将/帅，当前玩家获胜
-        if not opponent_king:
+        opponent_color = "black" if player_color == "red" else "red"
+        if not board.count(opponent_color, King):
             return True, player_color
 
         # 检查对方是否被将军
-        if GameRules.is_check(pieces, opponent_color):
+        if GameRules.is_check(pieces, opponent_color, rule_set):
             # 检查对方是否有合法移动可以解除将军
-            has_valid_move = False
-            for piece in pieces:
-                if piece.color == opponent_color:
-
-                    if game_config.get_setting("traditional_mode", False):
-                        # 中象检查
-                        for row in range(10):
-                            for col in range(9):
-                                # 尝试移动
-                                if GameRules.is_valid_move(pieces, piece, piece.row, piece.col, row, col):
-                                    # 检查这个移动是否会解除将军（送将检测）
-                                    if not GameRules.would_be_in_check_after_move(pieces, piece, row, col):
-                                        has_valid_move = True
-                                        break
-                            if has_valid_move:
-                                break
-                    else:
-                        for row in range(13):
-                            for col in range(13):
-                                # 尝试移动
-                                if GameRules.is_valid_move(pieces, piece, piece.row, piece.col, row, col):
-                                    # 检查这个移动是否会解除将军（送将检测）
-                                    if not GameRules.would_be_in_check_after_move(pieces, piece, row, col):
-                                        has_valid_move = True
-                                        break
-                            if has_valid_move:
-                                break
-                if has_valid_move:
-                    break
+            from program.core.move_generator import has_any_legal_move
+            has_valid_move = has_any_legal_move(pieces, opponent_color, rule_set)
 
             # 如果对方没有合法移动可以解除将军，则当前玩家获胜（将死）
             if not has_valid_move:
@@ -2425,13 +1969,18 @@ class GameRules:
         if not isinstance(piece, Wei):
             return False
 
+        board = Bitboard.of(pieces)
+        if popcount(board.occupied) == len(pieces) and board.piece_at(piece.row, piece.col) is piece:
+            # 所有棋子都在位棋盘上时直接沿射线查找第一个阻挡
+            return board.facing_target(piece.row * board.cols + piece.col) is not None
+
         # 检查4个方向是否有敌方棋子直接照面（无遮挡）
         directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
 
         for dr, dc in directions:
             # 沿着这个方向逐步检查
             r, c = piece.row + dr, piece.col + dc
-            while 0 <= r < 13 and 0 <= c < 13:
+            while board.tables.on_board(r, c):
                 target = GameRules.get_piece_at(pieces, r, c)
                 if target:
                     # 如果是敌方棋子，则形成照面
@@ -2451,13 +2000,18 @@ class GameRules:
         if not isinstance(wei_piece, Wei):
             return None
 
+        board = Bitboard.of(pieces)
+        if popcount(board.occupied) == len(pieces) and board.piece_at(wei_piece.row, wei_piece.col) is wei_piece:
+            # 所有棋子都在位棋盘上时直接沿射线查找第一个阻挡
+            return board.facing_target(wei_piece.row * board.cols + wei_piece.col)
+
         # 检查4个方向是否有敌方棋子直接照面（无遮挡）
         directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
 
         for dr, dc in directions:
             # 沿着这个方向逐步检查
             r, c = wei_piece.row + dr, wei_piece.col + dc
-            while 0 <= r < 13 and 0 <= c < 13:
+            while board.tables.on_board(r, c):
                 target = GameRules.get_piece_at(pieces, r, c)
                 if target:
                     # 如果是敌方棋子，则返回该棋子
@@ -2472,87 +2026,38 @@ class GameRules:
         return None
 
     @staticmethod
-    def has_insufficient_material(pieces):
-        """检查是否为不可能取胜的简单局势（简单残局）
-        
+    def has_insufficient_material(pieces, rule_set=None):
+        """检查是否为双方都不可能取胜的死和局势
+
+        由残局分类表按子力签名查询（见 program.core.endgame），子力签名随走子增量维护。
+
         Args:
             pieces (list): 棋子列表
-            
+            rule_set (RuleSet): 对局规则，默认使用棋子列表所属对局的规则
+
         Returns:
             bool: 是否为不可能取胜的简单局势
         """
-        # 统计双方棋子数量
-        red_pieces = [p for p in pieces if p.color == "red"]
-        black_pieces = [p for p in pieces if p.color == "black"]
-
-        # 统计各方棋子类型
-        red_types = {}
-        black_types = {}
-
-        for piece in red_pieces:
-            piece_type = type(piece).__name__
-            red_types[piece_type] = red_types.get(piece_type, 0) + 1
-
-        for piece in black_pieces:
-            piece_type = type(piece).__name__
-            black_types[piece_type] = black_types.get(piece_type, 0) + 1
-
-        # 如果某一方只剩下将/帅，而对方只有将/帅+1个棋子，或者将/帅+2个棋子但都是不能杀王的棋子（如相/象、士/仕等）
-        # 简单判断：如果一方只剩下将/帅，而对方棋子数量不足以形成杀局，则为和棋
-        if len(red_pieces) == 1 and isinstance(red_pieces[0], King):  # 红方只剩将/帅
-            if len(black_pieces) <= 2:
-                # 黑方只有1-2个棋子，检查是否无法形成杀局
-                if len(black_pieces) == 1 and isinstance(black_pieces[0], King):
-                    return True  # 双王残局
-                elif len(black_pieces) == 2:
-                    # 检查黑方第二个棋子是否无法杀王（如相、士等）
-                    other_piece = black_pieces[1] if not isinstance(black_pieces[0], King) else black_pieces[0]
-                    if isinstance(other_piece, (Shi, Xiang)):
-                        return True
-
-        if len(black_pieces) == 1 and isinstance(black_pieces[0], King):  # 黑方只剩将/帅
-            if len(red_pieces) <= 2:
-                # 红方只有1-2个棋子，检查是否无法形成杀局
-                if len(red_pieces) == 1 and isinstance(red_pieces[0], King):
-                    return True  # 双王残局
-                elif len(red_pieces) == 2:
-                    # 检查红方第二个棋子是否无法杀王（如相、士等）
-                    other_piece = red_pieces[1] if not isinstance(red_pieces[0], King) else red_pieces[0]
-                    if isinstance(other_piece, (Shi, Xiang)):
-                        return True
-
-        return False
+        rule_set = GameRules.get_rule_set(pieces, rule_set)
+        signature = Bitboard.of(pieces, rule_set).material_signature()
+        return classify_endgame(signature, rule_set)[0] == DRAW
 
     @staticmethod
-    def is_stalemate(pieces, player_color):
+    def is_stalemate(pieces, player_color, rule_set=None):
         """检查是否为困毙（无子可走）
         
         Args:
             pieces (list): 棋子列表
             player_color (str): 当前玩家颜色
+            rule_set (RuleSet): 对局规则，默认使用棋子列表所属对局的规则
             
         Returns:
             bool: 是否为困毙
         """
         # 检查当前玩家是否有任何合法移动
-        for piece in pieces:
-            if piece.color == player_color:
-                if game_config.get_setting("traditional_mode", False):
-                    # 尝试所有可能的移动
-                    for row in range(10):
-                        for col in range(9):
-                            if GameRules.is_valid_move(pieces, piece, piece.row, piece.col, row, col):
-                                # 检查这个移动是否会送将
-                                if not GameRules.would_be_in_check_after_move(pieces, piece, row, col):
-                                    return False  # 找到了一个合法移动，不是困毙
-                else:
-                    # 尝试所有可能的移动
-                    for row in range(13):
-                        for col in range(13):
-                            if GameRules.is_valid_move(pieces, piece, piece.row, piece.col, row, col):
-                                # 检查这个移动是否会送将
-                                if not GameRules.would_be_in_check_after_move(pieces, piece, row, col):
-                                    return False  # 找到了一个合法移动，不是困毙
+        from program.core.move_generator import has_any_legal_move
+        if has_any_legal_move(pieces, player_color, rule_set):
+            return False  # 找到了一个合法移动，不是困毙
         # 没有任何合法移动，是困毙
         return True
 
@@ -2587,17 +2092,12 @@ class GameRules:
     def get_board_hash(pieces):
         """获取棋盘局面的哈希值
         
+        使用Zobrist键：带棋盘索引的棋子列表在走子时增量维护该键，可直接O(1)读取。
+        
         Args:
             pieces (list): 棋子列表
             
         Returns:
-            str: 棋盘局面的哈希表示
+            int: 棋盘局面的64位Zobrist键（不含走子方）
         """
-        # 按照位置和棋子类型排序，生成局面字符串
-        sorted_pieces = sorted(pieces, key=lambda p: (p.row, p.col, p.name))
-        board_str = ""
-        for piece in sorted_pieces:
-            board_str += f"{piece.row},{piece.col},{piece.name},{piece.color};"
-
-        import hashlib
-        return hashlib.md5(board_str.encode()).hexdigest()
+        return Bitboard.of(pieces).zobrist
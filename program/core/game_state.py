@@ -1,12 +1,21 @@
 import time
 
 import program.utils.tools as tools
-from program.controllers.game_config_manager import game_config
-from program.controllers.statistics_manager import statistics_manager
 from program.controllers.step_counter import step_counter
-from program.core.chess_pieces import create_initial_pieces, King, Jia, Ci, Dun, Pawn, Wei
+from program.core.bitboard import ZOBRIST_BLACK_TO_MOVE
+from program.core.chess_pieces import create_initial_pieces, King, Jia, Ci, Dun, Pawn, PAWN
+from program.core.encoding import encode_position, decode_position, position_to_fen, FEN_CHARS, FEN_CODES, \
+    CODE_PIECES, MOVE_CAPTURE, MOVE_JIA_CAPTURE, MOVE_CI_EXCHANGE
+from program.core.endgame import classify as classify_endgame
+from program.core.game_events import GameEvents, PIECE_MOVED, PIECE_CAPTURED, CHECK, PROMOTION_PENDING, \
+    TURN_CHANGED, GAME_OVER
 from program.core.game_rules import GameRules
-from program.utils.utils import print_board
+from program.core.move_generator import generate_legal_moves
+from program.core.move_log import MoveLog
+from program.core.piece_list import PieceList
+from program.core.repetition import RepetitionTracker
+from program.core.rule_set import current_rule_set
+from program.core.snapshot import PositionSnapshot
 
 
 class GameState:
@@ -23,18 +32,27 @@ class GameState:
         Returns:
             bool: 位置是否在棋盘范围内
         """
-        if game_config.get_setting("traditional_mode", False):
-            # 传统中国象棋：9列 x 10行 (0-8列, 0-9行)
-            return 0 <= row < 10 and 0 <= col < 9
-        else:
-            # 匈汉象棋：13列 x 13行 (0-12列, 0-12行)
-            return 0 <= row < 13 and 0 <= col < 13
+        # 传统中国象棋9列 x 10行，匈汉象棋13列 x 13行
+        return current_rule_set().on_board(row, col)
 
     def __init__(self):
         """初始化游戏状态"""
+        # 对局规则：开局时由当前配置编译，对局过程中不再变化
+        rule_set = current_rule_set()
+        self._init_fields(rule_set, create_initial_pieces())
+
+    def _init_fields(self, rule_set, pieces):
+        """设置全部字段的初始值（__init__、clone 和 from_snapshot 共用，新增字段只需在这里添加）
+
+        Args:
+            rule_set (RuleSet): 对局规则
+            pieces: 场上棋子
+        """
+        self.rule_set = rule_set
+
         # 初始化棋子
         self.is_game_over = None
-        self.pieces = create_initial_pieces()
+        self.pieces = pieces
 
         # 游戏状态
         self.player_turn = "red"  # 红方先行
@@ -46,8 +64,8 @@ class GameState:
         self.check_animation_time = 0  # 将军动画开始的时间戳
         self.check_animation_duration = 4.0  # 将军动画持续时间（秒），延长为4秒
 
-        # 历史记录 - 用于悔棋功能
-        self.move_history = []  # 存储 (piece, from_row, from_col, to_row, to_col, captured_piece)
+        # 历史记录 - 用于悔棋功能，每步一条 MoveRecord
+        self.move_history = MoveLog()
 
         # 阵亡棋子记录
         self.captured_pieces = {"red": [], "black": []}  # 记录双方阵亡的棋子
@@ -67,30 +85,121 @@ class GameState:
         # 升变完成标志
         self.just_completed_promotion = False  # 记录是否刚刚完成升变
 
-        # 添加局面历史记录，用于检测重复局面
-        self.board_position_history = []  # 记录局面哈希值的历史
-        self.repetition_count = {}  # 记录每个局面出现的次数
+        # 事件订阅表：打印棋盘、统计、音效等副作用由订阅者处理，新建的游戏状态没有订阅者
+        self.events = GameEvents()
+
+        # 局面出现次数，用于检测重复局面（走子时加一、悔棋时减一）
+        self.repetition = RepetitionTracker()
 
         # 统计数据跟踪
         self.moves_count = 0  # 当前对局走子数
 
         self.history_scroll_y = 0
 
-        # 尉照面追踪：记录当前被尉照面的棋子
-        self.facing_pairs = []  # 存储 (wei_piece, facing_target_piece) 的元组
+        # make_move 的撤销记录栈（AI搜索时在原局面上走子/撤销）
+        self._undo_records = []
+
+        # 最近一次生成的局面快照，局面未变化时直接复用
+        self._snapshot = None
+
+    @property
+    def pieces(self):
+        """场上棋子列表（带棋盘索引的PieceList）"""
+        return self._pieces
+
+    @pieces.setter
+    def pieces(self, pieces):
+        """设置场上棋子，普通列表会被转换为PieceList以维护棋盘索引"""
+        if not isinstance(pieces, PieceList):
+            pieces = PieceList(pieces, rule_set=self.rule_set)
+        self._pieces = pieces
+
+    @property
+    def move_history(self):
+        """走子历史（MoveLog）"""
+        return self._move_history
+
+    @move_history.setter
+    def move_history(self, records):
+        """设置走子历史，走子元组的列表会被转换为MoveLog"""
+        if not isinstance(records, MoveLog):
+            records = MoveLog(records)
+        self._move_history = records
+
+    @property
+    def zobrist_key(self):
+        """当前局面（棋子布局 + 走子方）的64位Zobrist键
+
+        棋子布局部分由棋盘索引在走子、吃子、甲/胄连线吃子、刺兑子、升变、复活和悔棋时增量维护，
+        可用于重复局面检测、AI置换表以及联机状态校验。
+        """
+        return self.position_key(self.player_turn)
+
+    def position_key(self, side_to_move):
+        """当前棋子布局在指定走子方下的Zobrist键"""
+        key = self._pieces.bitboard.zobrist
+        if side_to_move == "black":
+            key ^= ZOBRIST_BLACK_TO_MOVE
+        return key
+
+    @property
+    def board_position_history(self):
+        """局面键的历史记录（按走子顺序）"""
+        return self.repetition.keys
+
+    @property
+    def repetition_count(self):
+        """最近一次吃子之后各局面的出现次数 {局面键: 次数}"""
+        return self.repetition.counts
 
     def get_piece_at(self, row, col):
-        """获取指定位置的棋子"""
-        return GameRules.get_piece_at(self.pieces, row, col)
+        """获取指定位置的棋子（通过棋盘索引O(1)查找）"""
+        return self._pieces.get_piece_at(row, col)
+
+    def get_king(self, color):
+        """获取某方的将/帅（由棋盘索引的类型掩码O(1)得到），没有返回None"""
+        return self._pieces.bitboard.king(color, self._pieces)
+
+    def king_position(self, color):
+        """某方将/帅的位置 (row, col)，没有返回None"""
+        king = self.get_king(color)
+        return (king.row, king.col) if king else None
+
+    def get_piece_count(self, color, piece_type):
+        """某方某类棋子的在局数量（随走子增量维护）"""
+        return self._pieces.bitboard.count(color, piece_type)
+
+    def get_pieces_of(self, color, piece_type):
+        """某方某类的在局棋子"""
+        return self._pieces.bitboard.pieces_of(color, piece_type)
+
+    @property
+    def material_signature(self):
+        """子力签名（各方各类棋子的数量，bytes），可作为残局表、评估缓存的键"""
+        return self._pieces.bitboard.material_signature()
+
+    def endgame_verdict(self, rule_set=None):
+        """按子力查询残局分类表（见 program.core.endgame）
+
+        Args:
+            rule_set (RuleSet): 判断使用的规则，默认为对局规则
+
+        Returns:
+            tuple: (DRAW/WIN/UNKNOWN, 胜方)
+        """
+        return classify_endgame(self.material_signature, rule_set or self.rule_set)
+
+    @property
+    def facing_pairs(self):
+        """尉照面关系 [(wei_piece, facing_target_piece), ...]
+
+        由棋盘索引随走子增量维护，只重新计算行列上有变动的尉，始终对应当前局面。
+        """
+        return self._pieces.bitboard.facing_pairs()
 
     def update_facing_pairs(self):
-        """更新尉照面关系"""
-        self.facing_pairs = []
-        for piece in self.pieces:
-            if isinstance(piece, Wei) and GameRules.is_facing_enemy(piece, self.pieces):
-                facing_target = GameRules.get_facing_piece(piece, self.pieces)
-                if facing_target:
-                    self.facing_pairs.append((piece, facing_target))
+        """更新尉照面关系（照面关系已随棋盘增量维护，这里只确保待更新的部分计算完毕）"""
+        self._pieces.bitboard.facing_restricted()
 
     def move_piece(self, from_row, from_col, to_row, to_col):
         """移动棋子
@@ -109,8 +218,6 @@ class GameState:
         if not piece or piece.color != self.player_turn:
             return False
 
-        # 更新尉照面关系，然后再检查移动是否合法
-        self.update_facing_pairs()
         if not GameRules.is_valid_move(self.pieces, piece, from_row, from_col, to_row, to_col):
             return False
 
@@ -121,17 +228,6 @@ class GameState:
         # 获取目标位置的棋子（如果有）
         captured_piece = self.get_piece_at(to_row, to_col)
 
-        # 记录移动历史 - 暂时不包括甲/胄连线吃子和刺兑子（因为需要在移动后检测）
-        # 先创建临时记录
-        temp_move_record = (
-            piece,
-            from_row,
-            from_col,
-            to_row,
-            to_col,
-            captured_piece
-        )
-
         # 更新当前玩家的用时
         current_time = time.time()
         elapsed = max(0.0, current_time - self.current_turn_start_time)  # 确保elapsed不为负数
@@ -145,9 +241,7 @@ class GameState:
 
             self.pieces.remove(captured_piece)
             self.captured_pieces[captured_piece.color].append(captured_piece)
-
-            piece_type = captured_piece.__class__.__name__.lower()
-            statistics_manager.update_pieces_captured(piece_type, 1)
+            self.events.emit(PIECE_CAPTURED, self, captured_piece)
 
             # 如果吃掉的是对方将/帅/汉/汗，游戏结束
             if isinstance(captured_piece, King):
@@ -155,13 +249,12 @@ class GameState:
                 self.winner = piece.color
                 # 更新游戏总时长
                 self.total_time = max(0.0, current_time - self.start_time)
+                self.events.emit(GAME_OVER, self, self.winner, self.total_time)
                 return True
 
         # 执行移动
         piece.move_to(to_row, to_col)
-
-        # 打印当前棋局状态
-        print_board(self.pieces, [step_counter.get_step()], show_step=True)
+        self.events.emit(PIECE_MOVED, self, piece, from_row, from_col, to_row, to_col, captured_piece)
 
         # 增加步数计数器
         step_counter.increment()
@@ -170,128 +263,107 @@ class GameState:
         jia_captured_pieces = []
         if isinstance(piece, Jia):
             # 查找所有被吃掉的敌方棋子 - 在棋子移动到新位置后检查
-            jia_captured_pieces = GameRules.find_jia_capture_moves(self.pieces, piece)
+            jia_captured_pieces = GameRules.find_jia_capture_moves(self.pieces, piece, self.rule_set)
 
         # 处理刺的兑子规则
         ci_captured_pieces = []  # 记录刺兑子时涉及的棋子
         if isinstance(piece, Ci):
             # 检查移动前起始位置的反方向一格是否有敌棋（兑子条件）
-            row_diff = to_row - from_row
-            col_diff = to_col - from_col
-
-            # 计算起始位置的反方向
-            reverse_row = from_row - row_diff
-            reverse_col = from_col - col_diff
-
-            # 检查反方向位置是否在棋盘范围内
-            if GameState.is_position_on_board(reverse_row, reverse_col):
-                reverse_piece = GameRules.get_piece_at(self.pieces, reverse_row, reverse_col)
-                # 如果反方向有敌方棋子，则进行兑子（双方都阵亡）
-                if reverse_piece and reverse_piece.color != piece.color:
-                    # 检查反方向的棋子是否是盾（盾不可被兑子）
-                    if not isinstance(reverse_piece, Dun):
-                        # 检查移动的刺是否与敌方盾相邻（8邻域），如果是则不能触发兑子
-                        shield_nearby = False
-                        for p in self.pieces:
-                            if isinstance(p, Dun) and p.color != piece.color:
-                                # 检查该敌方盾是否与移动的刺相邻（8邻域）
-                                row_diff_to_dun = abs(p.row - to_row)  # 检查移动后的位置
-                                col_diff_to_dun = abs(p.col - to_col)
-                                if row_diff_to_dun <= 1 and col_diff_to_dun <= 1 and (
-                                        row_diff_to_dun != 0 or col_diff_to_dun != 0):
-                                    shield_nearby = True
-                                    break
-
-                        if not shield_nearby:
-                            # 执行兑子：移除刺和反方向的敌棋
-                            if piece in self.pieces:
-                                self.pieces.remove(piece)
-                                self.captured_pieces[piece.color].append(piece)
-                                ci_captured_pieces.append(piece)  # 记录刺自身（虽然它不是被吃掉的，但参与了兑子）
-                            # 移除反方向的敌方棋子
-                            if reverse_piece in self.pieces:
-                                self.pieces.remove(reverse_piece)
-                                self.captured_pieces[reverse_piece.color].append(reverse_piece)
-                                ci_captured_pieces.append(reverse_piece)  # 记录被兑掉的敌方棋子
-
-                                # 如果吃掉的是对方将/帅/汉/汗，游戏结束
-                                if isinstance(reverse_piece, King):
-                                    self.game_over = True
-                                    self.winner = piece.color
-                                    # 更新游戏总时长
-                                    current_time = time.time()
-                                    self.total_time = max(0.0, current_time - self.start_time)
-                                    # 现在将完整的记录添加到历史中，包括甲/胄吃子信息和刺兑子信息
-                                    self.move_history.append(temp_move_record + (
-                                    jia_captured_pieces[:], ci_captured_pieces[:]))  # 添加甲/胄吃子信息和刺兑子信息
-                                    return True
-
-                            # 由于刺和敌棋都被移除了，无需继续处理
-                            # 切换玩家
-                            opponent_color = "black" if self.player_turn == "red" else "red"
-
-                            # 检查是否将军
-                            self.is_check = GameRules.is_check(self.pieces, opponent_color)
-                            if self.is_check:
-                                # 设置将军动画计时器
-                                self.check_animation_time = current_time
-
-                            # 检查是否将死或获胜
-                            game_over, winner = GameRules.is_game_over(self.pieces, self.player_turn)
-
-                            if game_over:
-                                self.game_over = True
-                                self.winner = winner
-                                # 更新游戏总时长
-                                self.total_time = max(0.0, current_time - self.start_time)
-                            else:
-                                # 切换玩家回合
-                                self.player_turn = opponent_color
-                                # 重置当前回合开始时间
-                                self.current_turn_start_time = current_time
-
-                            # 现在将完整的记录添加到历史中，包括甲/胄吃子信息和刺兑子信息
-                            self.move_history.append(
-                                temp_move_record + (jia_captured_pieces[:], ci_captured_pieces[:]))  # 添加甲/胄吃子信息和刺兑子信息
-
-                            return True
-
-        # 现在将完整的记录添加到历史中
-        self.move_history.append(temp_move_record + (jia_captured_pieces[:], ci_captured_pieces[:]))  # 添加甲/胄吃子信息和刺兑子信息
+            reverse_piece = self._find_ci_exchange_target(piece, from_row, from_col, to_row, to_col)
+            if reverse_piece is not None:
+                # 执行兑子：移除刺和反方向的敌棋
+                if piece in self.pieces:
+                    self.pieces.remove(piece)
+                    self.captured_pieces[piece.color].append(piece)
+                    ci_captured_pieces.append(piece)  # 记录刺自身（虽然它不是被吃掉的，但参与了兑子）
+                # 移除反方向的敌方棋子
+                if reverse_piece in self.pieces:
+                    self.pieces.remove(reverse_piece)
+                    self.captured_pieces[reverse_piece.color].append(reverse_piece)
+                    ci_captured_pieces.append(reverse_piece)  # 记录被兑掉的敌方棋子
+                    self.events.emit(PIECE_CAPTURED, self, reverse_piece)
+
+                    # 如果吃掉的是对方将/帅/汉/汗，游戏结束
+                    if isinstance(reverse_piece, King):
+                        self.game_over = True
+                        self.winner = piece.color
+                        # 更新游戏总时长
+                        current_time = time.time()
+                        self.total_time = max(0.0, current_time - self.start_time)
+                        self._record_move(piece, from_row, from_col, to_row, to_col, captured_piece,
+                                          jia_captured_pieces, ci_captured_pieces)
+                        self.events.emit(GAME_OVER, self, self.winner, self.total_time)
+                        return True
+
+                # 由于刺和敌棋都被移除了，无需继续处理
+                self._record_move(piece, from_row, from_col, to_row, to_col, captured_piece,
+                                  jia_captured_pieces, ci_captured_pieces)
+
+                # 切换玩家
+                opponent_color = "black" if self.player_turn == "red" else "red"
+
+                # 检查是否将军
+                self.is_check = GameRules.is_check(self.pieces, opponent_color)
+                if self.is_check:
+                    # 设置将军动画计时器
+                    self.check_animation_time = current_time
+                    self.events.emit(CHECK, self, opponent_color)
+
+                # 检查是否将死或获胜
+                game_over, winner = GameRules.is_game_over(self.pieces, self.player_turn)
+
+                if game_over:
+                    self.game_over = True
+                    self.winner = winner
+                    # 更新游戏总时长
+                    self.total_time = max(0.0, current_time - self.start_time)
+                    self.events.emit(GAME_OVER, self, self.winner, self.total_time)
+                else:
+                    # 切换玩家回合
+                    self.player_turn = opponent_color
+                    # 重置当前回合开始时间
+                    self.current_turn_start_time = current_time
+                    self.events.emit(TURN_CHANGED, self, opponent_color)
+
+                return True
 
         # 更新走子计数
         self.moves_count += 1
-        statistics_manager.update_total_moves(1)
 
-        # 实际移除甲/胄连线吃掉的棋子
+        # 实际移除甲/胄连线吃掉的棋子（吃掉将/帅时其余连线不再处理，只记录实际移除的棋子）
+        removed_pieces = []
+        king_captured = False
         for captured in jia_captured_pieces:
             if captured in self.pieces:
                 self.pieces.remove(captured)
                 self.captured_pieces[captured.color].append(captured)
+                removed_pieces.append(captured)
+                self.events.emit(PIECE_CAPTURED, self, captured)
+                if isinstance(captured, King):
+                    king_captured = True
+                    break
 
-                # 直接使用类名作为统计类型
-                piece_type = captured_piece.__class__.__name__.lower()
-
-                # 更新统计数据
-                statistics_manager.update_pieces_captured(piece_type, 1)
+        # 现在将完整的记录添加到历史中，包括甲/胄吃子信息和刺兑子信息
+        self._record_move(piece, from_row, from_col, to_row, to_col, captured_piece, removed_pieces, ci_captured_pieces)
 
-                # 如果吃掉的是对方将/帅/汉/汗，游戏结束
-                if isinstance(captured, King):
-                    self.game_over = True
-                    self.winner = piece.color
-                    # 更新游戏总时长
-                    current_time = time.time()
-                    self.total_time = max(0.0, current_time - self.start_time)
-                    return True
+        # 如果吃掉的是对方将/帅/汉/汗，游戏结束
+        if king_captured:
+            self.game_over = True
+            self.winner = piece.color
+            # 更新游戏总时长
+            current_time = time.time()
+            self.total_time = max(0.0, current_time - self.start_time)
+            self.events.emit(GAME_OVER, self, self.winner, self.total_time)
+            return True
 
         # 检查兵/卒是否到达对方底线，触发升变
         if (isinstance(piece, Pawn) and tools.is_pawn_at_opponent_base(piece, to_row) and
-                game_config.get_setting("pawn_promotion_enabled", True)):
-            print(f"[DEBUG] 兵到达对方底线: {piece.color}兵从({from_row},{from_col})移动到({to_row},{to_col})")
+                self.rule_set.pawn_promotion_enabled):
             # 标记需要进行升变，但实际升变将在游戏主循环中处理
             self.needs_promotion = True
             self.promotion_pawn = piece
             self.available_promotion_pieces = self.get_available_promotion_pieces(piece.color)
+            self.events.emit(PROMOTION_PENDING, self, piece)
 
             # 不立即切换玩家回合，等待升变完成后再切换
         else:
@@ -308,7 +380,7 @@ class GameState:
             if self.is_check:
                 # 设置将军动画计时器
                 self.check_animation_time = current_time
-                print(f"[DEBUG] 检测到将军状态，被将军方: {opponent_color}")
+                self.events.emit(CHECK, self, opponent_color)
 
             # 检查是否将死或获胜
             game_over, winner = GameRules.is_game_over(self.pieces, self.player_turn)
@@ -318,23 +390,33 @@ class GameState:
                 self.winner = winner
                 # 更新游戏总时长
                 self.total_time = max(0.0, current_time - self.start_time)
-                # 更新统计数据
-                statistics_manager.update_games_played(1)
-                statistics_manager.update_game_result(winner, self.total_time)
+                self.events.emit(GAME_OVER, self, winner, self.total_time)
             else:
                 # 检查是否和棋
                 if self.is_draw():
                     self.game_over = True
                     self.winner = None  # 和棋没有获胜方
+                    self.total_time = max(0.0, current_time - self.start_time)
 
                 # 切换玩家回合
                 self.player_turn = opponent_color
                 # 重置当前回合开始时间
                 self.current_turn_start_time = current_time
-                print(f"[DEBUG] 移动后切换玩家: {opponent_color}")
+                if self.game_over:
+                    self.events.emit(GAME_OVER, self, None, self.total_time)
+                else:
+                    self.events.emit(TURN_CHANGED, self, opponent_color)
 
         return True
 
+    def _record_move(self, piece, from_row, from_col, to_row, to_col, captured_piece,
+                     jia_captured_pieces, ci_captured_pieces):
+        """记录走子历史，并将走后局面（对方走子）计入重复局面计数，两者一一对应，悔棋时一起撤销"""
+        self.move_history.push(piece, from_row, from_col, to_row, to_col, captured_piece,
+                               jia_captured_pieces, ci_captured_pieces)
+        opponent_color = "black" if self.player_turn == "red" else "red"
+        self.repetition.push(self.position_key(opponent_color), len(self.pieces))
+
     def handle_captured_piece(self, captured_piece, current_time=time.time()):
         """处理被吃掉的棋子
 
@@ -348,13 +430,11 @@ class GameState:
         # 从棋盘上移除棋子并记录到阵亡列表
         self.pieces.remove(captured_piece)
         self.captured_pieces[captured_piece.color].append(captured_piece)
+        self.events.emit(PIECE_CAPTURED, self, captured_piece)
 
         # 直接使用类名作为统计类型
         piece_type = captured_piece.__class__.__name__.lower()
 
-        # 更新统计数据
-        statistics_manager.update_pieces_captured(piece_type, 1)
-
         # 检查是否吃掉了对方将/帅/汉/汗，游戏结束
         if isinstance(captured_piece, King):
             # 更新游戏总时长
@@ -370,40 +450,19 @@ class GameState:
             bool: 是否和棋
         """
         # 检查是否为不可能取胜的简单局势
-        if GameRules.has_insufficient_material(self.pieces):
+        if GameRules.has_insufficient_material(self.pieces, self.rule_set):
             return True
 
         # 检查是否出现困毙
         if GameRules.is_stalemate(self.pieces, self.player_turn):
             return True
 
-        # 检查是否出现循环反复的局面（重复三次）
-        # 这里需要先更新局面历史
-        board_hash = GameRules.get_board_hash(self.pieces)
-
-        # 更新局面历史记录
-        self.board_position_history.append(board_hash)
-
-        # 更新重复计数
-        if board_hash in self.repetition_count:
-            self.repetition_count[board_hash] += 1
-        else:
-            self.repetition_count[board_hash] = 1
-
-        # 如果某个局面出现了3次或以上，视为和棋
-        if self.repetition_count[board_hash] >= 3:
-            return True
-
-        # 使用GameRules中的方法检测重复局面
-        if GameRules.is_repeated_move(self.board_position_history, 3):
-            return True
-
-        return False
+        # 检查是否出现循环反复的局面（重复三次）：走后局面在记录走子时已计入，出现3次或以上视为和棋
+        return self.repetition.is_repeated(3)
 
     def reset_draw_tracking(self):
         """重置和棋追踪数据"""
-        self.board_position_history = []
-        self.repetition_count = {}
+        self.repetition.clear()
 
     def get_draw_reason(self):
         """获取和棋原因
@@ -411,14 +470,13 @@ class GameState:
         Returns:
             str: 和棋原因描述
         """
-        if GameRules.has_insufficient_material(self.pieces):
+        if GameRules.has_insufficient_material(self.pieces, self.rule_set):
             return "双方均无可能取胜的简单局势"
         if GameRules.is_stalemate(self.pieces, self.player_turn):
             return "困毙（无子可走）"
 
         # 检查重复局面
-        board_hash = GameRules.get_board_hash(self.pieces)
-        if board_hash in self.repetition_count and self.repetition_count[board_hash] >= 3:
+        if self.repetition.count(self.zobrist_key) >= 3:
             return "循环反复三次局面"
 
         return "未知原因"
@@ -433,57 +491,28 @@ class GameState:
             return False
 
         # 获取上一步移动记录
-        # 注意：现在历史记录包含额外的甲/胄吃子信息和刺兑子信息
-        if len(self.move_history[-1]) == 8:  # 包含甲/胄吃子信息和刺兑子信息
-            piece, from_row, from_col, to_row, to_col, captured_piece, jia_captured_pieces, ci_captured_pieces = self.move_history.pop()
-        elif len(self.move_history[-1]) == 7:  # 包含甲/胄吃子信息
-            piece, from_row, from_col, to_row, to_col, captured_piece, jia_captured_pieces = self.move_history.pop()
-            ci_captured_pieces = []
-        else:  # 旧格式（不包含甲/胄吃子信息和刺兑子信息）
-            piece, from_row, from_col, to_row, to_col, captured_piece = self.move_history.pop()
-            jia_captured_pieces = []
-            ci_captured_pieces = []
-
-        # 将棋子移回原位置
+        piece, from_row, from_col, to_row, to_col, captured_piece, jia_captured_pieces, ci_captured_pieces = \
+            self.move_history.pop()
+
+        # 将棋子移回原位置（刺兑子时刺已离场，先放回棋盘再移动）
+        if ci_captured_pieces and ci_captured_pieces[0] is piece:
+            self._restore_piece(piece)
+            ci_captured_pieces = ci_captured_pieces[1:]
         piece.move_to(from_row, from_col)
 
-        # 恢复被直接吃掉的棋子
+        # 按移除的相反顺序恢复被直接吃掉、甲/胄连线吃掉和刺兑子中失去的棋子
+        for captured in reversed(ci_captured_pieces):
+            self._restore_piece(captured)
+        for captured in reversed(jia_captured_pieces):
+            self._restore_piece(captured)
         if captured_piece:
-            self.pieces.append(captured_piece)
-            # 从阵亡列表中移除
-            if captured_piece in self.captured_pieces[captured_piece.color]:
-                self.captured_pieces[captured_piece.color].remove(captured_piece)
+            self._restore_piece(captured_piece)
 
-        # 恢复甲/胄连线吃掉的棋子
-        for captured in jia_captured_pieces:
-            if captured not in self.pieces:  # 避免重复添加
-                self.pieces.append(captured)
-                # 从阵亡列表中移除
-                if captured in self.captured_pieces[captured.color]:
-                    self.captured_pieces[captured.color].remove(captured)
-
-        # 恢复刺兑子中失去的棋子
-        for captured in ci_captured_pieces:
-            if captured not in self.pieces:  # 避免重复添加
-                self.pieces.append(captured)
-                # 从阵亡列表中移除
-                if captured in self.captured_pieces[captured.color]:
-                    self.captured_pieces[captured.color].remove(captured)
-
-        # 悔棋时也需要回退局面历史记录
-        if self.board_position_history:
-            self.board_position_history.pop()
-
-        # 重新计算重复计数（重新统计当前局面历史）
-        self.repetition_count = {}
-        for board_hash in self.board_position_history:
-            if board_hash in self.repetition_count:
-                self.repetition_count[board_hash] += 1
-            else:
-                self.repetition_count[board_hash] = 1
+        # 悔棋时也需要回退局面历史记录（出现次数随之减一）
+        self.repetition.pop()
 
-        # 切换玩家回合
-        self.player_turn = "black" if self.player_turn == "red" else "red"
+        # 回到走子方的回合（将死、等待升变时走子后并未切换回合，不能简单地切换）
+        self.player_turn = piece.color
 
         # 重置游戏状态
         self.game_over = False
@@ -497,6 +526,157 @@ class GameState:
 
         return True
 
+    def _restore_piece(self, piece):
+        """悔棋时把离场的棋子放回棋盘，并从阵亡列表中移除（通常就是列表末尾的棋子）"""
+        self.pieces.append(piece)
+        captured = self.captured_pieces[piece.color]
+        if captured and captured[-1] is piece:
+            captured.pop()
+        elif piece in captured:
+            # 升变、复活改变过阵亡列表时按值查找
+            captured.remove(piece)
+
+    def _find_ci_exchange_target(self, piece, from_row, from_col, to_row, to_col):
+        """查找刺移动后触发兑子的敌方棋子
+
+        刺移动后，若起始位置反方向一格有敌方棋子（盾除外），且移动后的刺不与敌方盾相邻（8邻域），
+        则刺与该敌棋同归于尽。
+
+        Returns:
+            ChessPiece or None: 被兑掉的敌方棋子，不触发兑子时返回None
+        """
+        row_diff = to_row - from_row
+        col_diff = to_col - from_col
+
+        # 计算起始位置的反方向
+        reverse_row = from_row - row_diff
+        reverse_col = from_col - col_diff
+
+        # 检查反方向位置是否在棋盘范围内
+        if not self.rule_set.on_board(reverse_row, reverse_col):
+            return None
+        reverse_piece = GameRules.get_piece_at(self.pieces, reverse_row, reverse_col)
+        # 反方向必须是敌方棋子，且盾不可被兑子
+        if not reverse_piece or reverse_piece.color == piece.color or isinstance(reverse_piece, Dun):
+            return None
+
+        # 检查移动的刺是否与敌方盾相邻（8邻域），如果是则不能触发兑子
+        for p in self.pieces:
+            if isinstance(p, Dun) and p.color != piece.color:
+                row_diff_to_dun = abs(p.row - to_row)  # 检查移动后的位置
+                col_diff_to_dun = abs(p.col - to_col)
+                if row_diff_to_dun <= 1 and col_diff_to_dun <= 1 and (
+                        row_diff_to_dun != 0 or col_diff_to_dun != 0):
+                    return None
+        return reverse_piece
+
+    def _take_piece(self, piece, removed):
+        """搜索用：将棋子移出棋盘并记入阵亡列表，同时记录其在列表中的下标以便原样恢复"""
+        index = self.pieces.index(piece)
+        self.pieces.pop(index)
+        self.captured_pieces[piece.color].append(piece)
+        removed.append((index, piece))
+        if isinstance(piece, King):
+            self.game_over = True
+            self.winner = "black" if piece.color == "red" else "red"
+
+    def make_move(self, from_row, from_col, to_row, to_col):
+        """在当前局面上执行一步可撤销的走子（供AI搜索使用，避免为每个节点克隆游戏状态）
+
+        与 move_piece 一样处理直接吃子、甲/胄连线吃子和刺兑子，吃掉将/帅时结束对局，
+        然后切换走子方并更新将军状态；但不做合法性检查，也不计时、不写统计、不打印棋盘、
+        不记入走子历史（兵/卒到底线时不触发升变）。走后局面计入重复局面计数，搜索中可O(1)查询。
+        每次成功调用都会压入一条撤销记录，必须与 unmake_move 成对使用。
+
+        Args:
+            from_row (int): 起始行
+            from_col (int): 起始列
+            to_row (int): 目标行
+            to_col (int): 目标列
+
+        Returns:
+            bool: 是否执行了走子（起始位置没有棋子时返回False）
+        """
+        piece = self.get_piece_at(from_row, from_col)
+        if piece is None:
+            return False
+
+        # 撤销记录：恢复走子方、将军状态和对局结果所需的全部信息（尉照面关系随棋盘自动恢复）
+        removed = []  # (原下标, 棋子)，按移除顺序记录
+        self._undo_records.append((piece, from_row, from_col, removed, self.player_turn,
+                                   self.is_check, self.game_over, self.winner))
+
+        # 直接吃子
+        captured_piece = self.get_piece_at(to_row, to_col)
+        if captured_piece is not None and captured_piece is not piece:
+            self._take_piece(captured_piece, removed)
+
+        piece.move_to(to_row, to_col)
+
+        if isinstance(piece, Jia):
+            # 甲/胄连线吃子（与 move_piece 一致，吃掉将/帅后其余连线不再处理）
+            for captured in GameRules.find_jia_capture_moves(self.pieces, piece, self.rule_set):
+                if captured in self.pieces:
+                    self._take_piece(captured, removed)
+                    if isinstance(captured, King):
+                        break
+        elif isinstance(piece, Ci):
+            # 刺兑子：刺与反方向的敌棋一同离场
+            reverse_piece = self._find_ci_exchange_target(piece, from_row, from_col, to_row, to_col)
+            if reverse_piece is not None:
+                self._take_piece(piece, removed)
+                if reverse_piece in self.pieces:
+                    self._take_piece(reverse_piece, removed)
+
+        self.player_turn = "black" if self.player_turn == "red" else "red"
+        self.is_check = GameRules.is_check(self.pieces, self.player_turn)
+        self.repetition.push(self.zobrist_key, len(self.pieces))
+        return True
+
+    def last_move_flags(self):
+        """最近一次 make_move 的副作用（局面已撤销时不可用）
+
+        Returns:
+            int: MOVE_CAPTURE、MOVE_JIA_CAPTURE、MOVE_CI_EXCHANGE 的组合（见 program.core.encoding），
+                没有未撤销的 make_move 时返回0
+        """
+        if not self._undo_records:
+            return 0
+        piece, _, _, removed = self._undo_records[-1][:4]
+        flags = 0
+        for _, captured in removed:
+            if captured is piece:
+                flags |= MOVE_CI_EXCHANGE
+            elif captured.row == piece.row and captured.col == piece.col:
+                # 直接吃子：被吃的棋子留在走子的目标格上
+                flags |= MOVE_CAPTURE
+            elif isinstance(piece, Jia):
+                flags |= MOVE_JIA_CAPTURE
+        return flags
+
+    def unmake_move(self):
+        """撤销最近一次 make_move，将局面恢复到走子前的状态
+
+        Returns:
+            bool: 是否成功撤销
+        """
+        if not self._undo_records:
+            return False
+        piece, from_row, from_col, removed, player_turn, is_check, game_over, winner = self._undo_records.pop()
+        self.repetition.pop()
+
+        # 按移除的相反顺序放回棋子，保证棋子列表顺序与走子前完全一致
+        for index, captured in reversed(removed):
+            self.captured_pieces[captured.color].pop()
+            self.pieces.insert(index, captured)
+        piece.move_to(from_row, from_col)
+
+        self.player_turn = player_turn
+        self.is_check = is_check
+        self.game_over = game_over
+        self.winner = winner
+        return True
+
     def update_times(self):
         """更新当前时间计数，但不切换回合"""
         if not self.game_over:
@@ -533,11 +713,7 @@ class GameState:
         # 确定被将军的一方 - 根据player_turn确定当前受威胁方
         # player_turn表示当前轮到谁走，因此被将军的是当前回合的对手
         checked_color = "red" if self.player_turn == "red" else "black"  # 修正：被将军的是当前玩家，而不是对手
-        for piece in self.pieces:
-            if isinstance(piece, King) and piece.color == checked_color:
-                return piece.row, piece.col
-
-        return None
+        return self.king_position(checked_color)
 
     def calculate_possible_moves(self, row, col):
         """计算指定位置棋子的所有可能移动
@@ -553,22 +729,29 @@ class GameState:
         if not piece:
             return [], []
 
-        moves, capturable = GameRules.calculate_possible_moves(self.pieces, piece)
+        # 由合法走法生成器统一过滤送将和被尉照面限制的走法
+        legal_moves = generate_legal_moves(self, piece.color, piece)
+        safe_moves = [(move.to_row, move.to_col) for move in legal_moves]
+        # 盾不可被吃（檑/礌攻击落单棋子时目标也可能是盾，此时不作为吃子位置）
+        safe_capturable = [(move.to_row, move.to_col) for move in legal_moves
+                           if move.capture and not isinstance(self.get_piece_at(move.to_row, move.to_col), Dun)]
 
-        # 过滤掉会导致被将军的移动（送将）和被尉照面限制的移动
-        safe_moves = self.filter_safe_moves_and_regular_moves(moves, piece)
+        return safe_moves, safe_capturable
 
-        # 过滤掉会导致被将军的吃子移动和被尉照面限制的吃子移动
-        safe_capturable = self.filter_safe_moves(capturable, piece)
+    def generate_legal_moves(self, color):
+        """生成指定方的全部合法走法
 
-        return safe_moves, safe_capturable
+        Args:
+            color (str): 走子方颜色
+
+        Returns:
+            list: Move 记录列表
+        """
+        return generate_legal_moves(self, color)
 
     def is_piece_facing_restricted(self, piece):
-        """检查棋子是否被尉照面限制移动"""
-        for wei_piece, facing_target in self.facing_pairs:
-            if facing_target == piece and piece != wei_piece:
-                return True
-        return False
+        """检查棋子是否被尉照面限制移动（O(1)查询）"""
+        return piece in self._pieces.bitboard.facing_restricted()
 
     def filter_safe_moves(self, capturable, piece):
         safe_capturable = []
@@ -615,11 +798,7 @@ class GameState:
         Returns:
             int: 兵/卒数量
         """
-        count = 0
-        for piece in self.pieces:
-            if isinstance(piece, Pawn) and piece.color == color:
-                count += 1
-        return count
+        return self._pieces.bitboard.count(color, Pawn)
 
     def can_perform_pawn_resurrection(self, color, position):
         """检查是否可以执行兵/卒复活
@@ -632,7 +811,7 @@ class GameState:
             bool: 是否可以执行复活
         """
         # 检查复活机制是否启用
-        if not game_config.get_setting("pawn_resurrection_enabled", True):
+        if not self.rule_set.pawn_resurrection_enabled:
             return False
 
         row, col = position
@@ -642,26 +821,20 @@ class GameState:
         if target_piece is not None:
             return False
 
-        # 检查是否是兵/卒的初始位置
-        # 黑方兵初始位置：第4行的 (4,0), (4,2), (4,4), (4,6), (4,8), (4,10), (4,12)
-        # 红方兵初始位置：第8行的 (8,0), (8,2), (8,4), (8,6), (8,8), (8,10), (8,12)
-        if color == "red":
-            # 红方兵的初始位置行是8，列必须是偶数
-            if row != 8 or col % 2 != 0:
-                return False
-        else:  # black
-            # 黑方兵的初始位置行是4，列必须是偶数
-            if row != 4 or col % 2 != 0:
-                return False
+        # 检查是否是兵/卒的初始位置（由棋盘几何给出）
+        # 匈汉象棋：红方第8行、黑方第4行的偶数列，共7个；传统象棋：红方第6行、黑方第3行的偶数列，共5个
+        pawn_squares = self.rule_set.geometry.pawn_squares(color)
+        if (row, col) not in pawn_squares:
+            return False
 
-        # 检查该玩家在局的兵/卒数量是否小于7
+        # 检查该玩家在局的兵/卒数量是否少于初始数量
         alive_pawns = self.get_pawn_count(color)
-        if alive_pawns >= 7:
+        if alive_pawns >= len(pawn_squares):
             return False
 
         # 检查是否有阵亡的兵/卒可以复活
         has_dead_pawn = any(isinstance(piece, Pawn) and piece.color == color for piece in self.captured_pieces[color])
-        if not has_dead_pawn and alive_pawns >= 6:  # 如果没有阵亡兵卒，且在局数量已经>=6，则无法复活
+        if not has_dead_pawn and alive_pawns >= len(pawn_squares) - 1:  # 没有阵亡兵卒且只差一个满员时无法复活
             return False
 
         return True
@@ -711,8 +884,10 @@ class GameState:
 
     def reset(self):
         """重置游戏状态"""
-        # 重新创建棋子，以便根据当前设置使用正确的布局
+        # 重新创建棋子，以便根据当前设置使用正确的布局（保留事件订阅者）
+        events = self.events
         self.__init__()
+        self.events = events
 
         step_counter.reset()
 
@@ -773,117 +948,44 @@ class GameState:
         resurrection_positions = {"red": [], "black": []}
 
         # 检查复活机制是否启用
-        if not game_config.get_setting("pawn_resurrection_enabled", True):
+        if not self.rule_set.pawn_resurrection_enabled:
             return resurrection_positions
 
-        # 检查红方兵初始行（第8行）
-        for col in range(13):
-            row = 8
-            if self.can_perform_pawn_resurrection("red", (row, col)):
-                resurrection_positions["red"].append((row, col))
-
-        # 检查黑方兵初始行（第4行）
-        for col in range(13):
-            row = 4
-            if self.can_perform_pawn_resurrection("black", (row, col)):
-                resurrection_positions["black"].append((row, col))
+        # 检查双方兵/卒的初始位置
+        for color, positions in resurrection_positions.items():
+            for position in self.rule_set.geometry.pawn_squares(color):
+                if self.can_perform_pawn_resurrection(color, position):
+                    positions.append(position)
 
         return resurrection_positions
 
     def export_position(self):
         """导出当前棋局位置
         Returns:
-            str: FEN格式的棋盘表示
+            str: FEN格式的棋盘表示（传统象棋为10行9列，匈汉象棋为13行13列）
         """
-        if game_config.get_setting("traditional_mode", False):
-            # 传统中国象棋的FEN映射和处理
-            piece_fen_map = {
-                '汗': 'k',  # 黑方将/帅
-                '車': 'r', '馬': 'n', '象': 'b', '士': 'a', '砲': 'c', '卒': 'p',
-                '汉': 'K',  # 红方将/帅
-                '俥': 'R', '傌': 'N', '相': 'B', '仕': 'A', '炮': 'C', '兵': 'P',
-            }
-
-            # 创建9x10的传统象棋棋盘
-            board = [['.' for _ in range(9)] for _ in range(10)]
-
-            # 只将传统象棋棋子放置到棋盘上
-            for piece in self.pieces:
-                # 只处理传统象棋的棋子
-                if piece.name in ['汗',
-                                  '車', '馬', '象', '士', '砲', '卒',
-                                  '汉',
-                                  '俥', '傌', '相', '仕', '炮', '兵']:
-                    if piece.row < 10 and piece.col < 9:  # 确保在9x10棋盘范围内
-                        board[piece.row][piece.col] = piece.name
-
-            # 将棋盘转换为FEN格式（传统象棋格式）
-            fen_parts = []
-            for row in board:
-                empty_count = 0
-                fen_row = ""
-                for cell in row:
-                    if cell == '.':
-                        empty_count += 1
-                    else:
-                        if empty_count > 0:
-                            fen_row += str(empty_count)
-                            empty_count = 0
-                        fen_char = piece_fen_map.get(cell, '?')
-                        fen_row += fen_char
-                if empty_count > 0:
-                    fen_row += str(empty_count)
-                fen_parts.append(fen_row)
+        return position_to_fen(self.encode_position(), self.rule_set.rows, self.rule_set.cols)
 
-            fen_code = '/'.join(fen_parts)
+    def encode_position(self):
+        """当前局面的紧凑编码（见 program.core.encoding）
 
-        else:
-            # 原有的匈汉象棋处理逻辑
-            piece_fen_map = {
-                # 黑方棋子（小写）
-                '汗': 'k',  # 黑方将/帅
-                '車': 'r', '馬': 'n', '象': 'b', '士': 'a', '砲': 'c', '卒': 'p',
-                '衛': 'w', '䠶': 's', '礌': 'l', '胄': 'j', '刺': 'i', '盾': 'u', '廵': 'x',
-                # 红方棋子（大写）
-                '汉': 'K',  # 红方将/帅
-                '俥': 'R', '傌': 'N', '相': 'B', '仕': 'A', '炮': 'C', '兵': 'P',
-                '尉': 'W', '射': 'S', '檑': 'L', '甲': 'J', '巡': 'X',
-            }
-
-            # 创建棋盘表示 - 使用13x13的棋盘
-            board = [['.' for _ in range(13)] for _ in range(13)]
-
-            # 将棋子放置到棋盘上
-            for piece in self.pieces:
-                board[piece.row][piece.col] = piece.name
-
-            # 将棋盘转换为FEN格式
-            fen_parts = []
-            for row in board:
-                empty_count = 0
-                fen_row = ""
-                for cell in row:
-                    if cell == '.':
-                        empty_count += 1
-                    else:
-                        if empty_count > 0:
-                            fen_row += str(empty_count)
-                            empty_count = 0
-                        fen_char = piece_fen_map.get(cell, '?')
-                        fen_row += fen_char
-                if empty_count > 0:
-                    fen_row += str(empty_count)
-                fen_parts.append(fen_row)
-
-            fen_code = '/'.join(fen_parts)
+        Returns:
+            bytes: 逐格棋子编码加走子方
+        """
+        return encode_position(self.pieces, self.player_turn)
 
-        # 添加当前玩家信息
-        current_player = 'r' if self.player_turn == 'red' else 'b'
+    def snapshot(self):
+        """当前局面的不可变快照，交给后台线程使用（见 program.core.snapshot）
 
-        # 组合完整的FEN字符串
-        fen_string = f"{fen_code} {current_player}"
+        局面和对局状态未变化时返回上一份快照，否则生成新快照并与上一份共享未变化的行。
 
-        return fen_string
+        Returns:
+            PositionSnapshot: 局面快照
+        """
+        previous = self._snapshot
+        if previous is None or not previous.matches(self):
+            self._snapshot = PositionSnapshot.from_game_state(self, previous)
+        return self._snapshot
 
     def import_position(self, fen_string):
         """导入棋局位置
@@ -903,109 +1005,41 @@ class GameState:
             fen_board = parts[0]
             fen_player = parts[1]
 
-            if game_config.get_setting("traditional_mode", False):
-                # 传统中国象棋的FEN映射
-                fen_piece_map = {
-                    # 小写为黑方，大写为红方
-                    'k': ('black', '汗'),  # 黑方将/帅
-                    'r': ('black', '車'), 'n': ('black', '馬'), 'b': ('black', '象'),
-                    'a': ('black', '士'), 'c': ('black', '砲'), 'p': ('black', '卒'),
-                    'K': ('red', '漢'),  # 红方将/帅
-                    'R': ('red', '俥'), 'N': ('red', '傌'), 'B': ('red', '相'),
-                    'A': ('red', '仕'), 'C': ('red', '炮'), 'P': ('red', '兵'),
-                }
-
-                # 从FEN解析棋盘（传统象棋：9列x10行）
-                rows = fen_board.split('/')
-                if len(rows) != 10:  # 传统象棋有10行
-                    print("FEN格式错误：传统象棋棋盘行数应为10")
-                    return False
+            # 行列数由棋盘几何给出（传统象棋10行9列，匈汉象棋13行13列）
+            geometry = self.rule_set.geometry
+            # FEN字符按棋子类型编号排列，传统象棋只识别前7种（小写为黑方，大写为红方）
+            fen_chars = FEN_CHARS[:PAWN + 1] if self.rule_set.traditional_mode else FEN_CHARS
+            rows = fen_board.split('/')
+            if len(rows) != geometry.rows:
+                print(f"FEN格式错误：棋盘行数应为{geometry.rows}")
+                return False
 
-                # 清空当前棋子
-                self.pieces.clear()
-
-                # 逐行解析传统象棋
-                for row_idx, row_str in enumerate(rows):
-                    col_idx = 0
-                    i = 0
-                    while i < len(row_str):
-                        if row_str[i].isdigit():
-                            # 处理数字（空位）
-                            num_str = ""
-                            while i < len(row_str) and row_str[i].isdigit():
-                                num_str += row_str[i]
-                                i += 1
-                            empty_spaces = int(num_str)
-                            col_idx += empty_spaces
-                        else:
-                            # 字符表示棋子
-                            if row_str[i] in fen_piece_map:
-                                color, name = fen_piece_map[row_str[i]]
-                                piece_class = tools.get_piece_class_by_name(name)
-                                if piece_class:
-                                    piece = piece_class(color, row_idx, col_idx)
-                                    self.pieces.append(piece)
-                            col_idx += 1
+            # 清空当前棋子
+            self.pieces.clear()
+
+            # 逐行解析
+            for row_idx, row_str in enumerate(rows):
+                col_idx = 0
+                i = 0
+                while i < len(row_str):
+                    if row_str[i].isdigit():
+                        # 提取整个数字（可能有多位）
+                        num_str = ""
+                        while i < len(row_str) and row_str[i].isdigit():
+                            num_str += row_str[i]
                             i += 1
-                    if col_idx != 9:  # 传统象棋有9列
-                        print(f"传统象棋FEN格式错误：第{row_idx}行列数不正确")
-                        return False
-            else:
-                # 原有的匈汉象棋处理逻辑
-                fen_piece_map = {
-                    # 小写为黑方，大写为红方
-                    'k': ('black', '汗'),  # 黑方将/帅
-                    'r': ('black', '車'), 'n': ('black', '馬'), 'b': ('black', '象'),
-                    'a': ('black', '士'), 'c': ('black', '砲'), 'p': ('black', '卒'),
-                    'w': ('black', '衛'), 's': ('black', '䠶'), 'l': ('black', '礌'),
-                    'j': ('black', '胄'), 'i': ('black', '伺'), 'u': ('black', '碷'),
-                    'x': ('black', '廵'),
-                    # 红方棋子（大写）
-                    'K': ('red', '漢'),  # 红方将/帅
-                    'R': ('red', '俥'), 'N': ('red', '傌'), 'B': ('red', '相'),
-                    'A': ('red', '仕'), 'C': ('red', '炮'), 'P': ('red', '兵'),
-                    'W': ('red', '尉'), 'S': ('red', '射'), 'L': ('red', '檑'),
-                    'J': ('red', '甲'), 'I': ('red', '刺'), 'U': ('red', '楯'),
-                    'X': ('red', '巡'),
-                }
-
-                # 从FEN解析棋盘（匈汉象棋：13x13）
-                rows = fen_board.split('/')
-                if len(rows) != 13:
-                    print("FEN格式错误：棋盘行数不正确")
+                        col_idx += int(num_str)
+                    else:
+                        # 字符表示棋子
+                        if row_str[i].lower() in fen_chars:
+                            piece_class, color = CODE_PIECES[FEN_CODES[row_str[i]]]
+                            self.pieces.append(piece_class(color, row_idx, col_idx))
+                        col_idx += 1
+                        i += 1
+                if col_idx != geometry.cols:
+                    print(f"FEN格式错误：第{row_idx}行列数不正确，实际为{col_idx}，期望为{geometry.cols}")
                     return False
 
-                # 清空当前棋子
-                self.pieces.clear()
-
-                # 逐行解析匈汉象棋
-                for row_idx, row_str in enumerate(rows):
-                    col_idx = 0
-                    i = 0
-                    while i < len(row_str):
-                        if row_str[i].isdigit():
-                            # 提取整个数字（可能有多位）
-                            num_str = ""
-                            while i < len(row_str) and row_str[i].isdigit():
-                                num_str += row_str[i]
-                                i += 1
-                            empty_spaces = int(num_str)
-                            col_idx += empty_spaces
-                        else:
-                            # 字符表示棋子
-                            if row_str[i] in fen_piece_map:
-                                color, name = fen_piece_map[row_str[i]]
-                                # 根据颜色和名称创建对应的棋子类
-                                piece_class = tools.get_piece_class_by_name(name)
-                                if piece_class:
-                                    piece = piece_class(color, row_idx, col_idx)
-                                    self.pieces.append(piece)
-                            col_idx += 1
-                            i += 1
-                    if col_idx != 13:
-                        print(f"FEN格式错误：第{row_idx}行列数不正确，实际为{col_idx}，期望为13")
-                        return False
-
             # 设置当前玩家
             self.player_turn = 'red' if fen_player.lower() in ['r', 'red'] else 'black'
 
@@ -1018,7 +1052,7 @@ class GameState:
             self.check_animation_time = 0
 
             # 重置历史记录
-            self.move_history = []
+            self.move_history.clear()
             self.captured_pieces = {"red": [], "black": []}
 
             # 重置升变相关
@@ -1028,8 +1062,7 @@ class GameState:
             self.just_completed_promotion = False
 
             # 重置局面历史
-            self.board_position_history = []
-            self.repetition_count = {}
+            self.repetition.clear()
 
             # 重置步数计数器
             self.moves_count = 0
@@ -1050,14 +1083,9 @@ class GameState:
         """
         import copy
 
-        # 创建新的游戏状态实例
+        # 创建新的游戏状态实例（规则不可变，直接共享），深拷贝棋子列表及其状态
         cloned_state = GameState.__new__(GameState)
-
-        # 深拷贝棋子列表及其状态
-        cloned_state.pieces = []
-        for piece in self.pieces:
-            cloned_piece = copy.deepcopy(piece)
-            cloned_state.pieces.append(cloned_piece)
+        cloned_state._init_fields(self.rule_set, [copy.deepcopy(piece) for piece in self.pieces])
 
         # 复制基本属性
         cloned_state.player_turn = self.player_turn
@@ -1065,7 +1093,7 @@ class GameState:
         cloned_state.winner = self.winner
         cloned_state.is_check = self.is_check
         cloned_state.check_animation_time = self.check_animation_time
-        cloned_state.move_history = [move[:] for move in self.move_history]  # 浅拷贝历史记录
+        cloned_state.move_history = self.move_history.copy()  # 浅拷贝历史记录
         cloned_state.captured_pieces = {
             "red": [copy.deepcopy(piece) for piece in self.captured_pieces["red"]],
             "black": [copy.deepcopy(piece) for piece in self.captured_pieces["black"]]
@@ -1085,13 +1113,29 @@ class GameState:
         cloned_state.just_completed_promotion = self.just_completed_promotion
 
         # 复制局面历史记录
-        cloned_state.board_position_history = self.board_position_history[:]
-        cloned_state.repetition_count = self.repetition_count.copy()
+        cloned_state.repetition = self.repetition.copy()
 
-        # 复制统计数据
+        # 复制统计数据（订阅者属于原游戏状态，副本不继承；撤销记录和快照从空开始）
         cloned_state.moves_count = self.moves_count
 
-        # 复制尉照面追踪
-        cloned_state.facing_pairs = [(copy.deepcopy(wei), copy.deepcopy(target)) for wei, target in self.facing_pairs]
-
         return cloned_state
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """由局面快照创建游戏状态（走子历史、重复局面记录和阵亡棋子从空开始）
+
+        Args:
+            snapshot (PositionSnapshot): 局面快照
+
+        Returns:
+            GameState: 与快照局面相同的新游戏状态
+        """
+        state = cls.__new__(cls)
+        state._init_fields(snapshot.rule_set, decode_position(snapshot.encode_position())[0])
+        state.player_turn = snapshot.player_turn
+        state.game_over = snapshot.game_over
+        state.winner = snapshot.winner
+        state.is_check = snapshot.is_check
+        state.moves_count = snapshot.moves_count
+        state._snapshot = snapshot
+        return state
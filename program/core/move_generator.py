@@ -0,0 +1,347 @@
+"""整方合法走法生成
+
+一次遍历某方全部棋子生成伪合法走法（共用同一个位棋盘和照面限制），再用每个局面只计算一次的
+将军分析（PositionAnalysis）过滤送将的走法，返回紧凑的走法记录。
+AI搜索、界面高亮、困毙/将死判断以及MCTS适配器都通过这里获取合法走法。
+"""
+from collections import namedtuple, OrderedDict
+
+from program.core.bitboard import Bitboard, ORTHOGONAL, POSITIVE, iter_squares, popcount
+from program.core.chess_pieces import Ju, Xiang, Shi, King, Pao, Pawn, Wei, She, Lei, Jia, Dun, Xun
+from program.core.game_rules import GameRules
+
+# 紧凑走法记录：起点、终点以及是否吃子
+Move = namedtuple("Move", ["from_row", "from_col", "to_row", "to_col", "capture"])
+
+
+# 合法走法缓存的容量（局面数），超过容量时淘汰最久未使用的局面
+LEGAL_MOVE_CACHE_SIZE = 2048
+HAS_MOVE_CACHE_SIZE = 4096
+
+# 在将帅附近按普通走法吃子、受尉照面和盾限制的棋子类型（与 Bitboard.is_check 的判断一致）
+SHORT_RANGE_ATTACKERS = (Xiang, Shi, Pawn, She, Lei, Xun)
+
+
+class LegalMoveCache:
+    """按局面缓存结果的LRU缓存，记录命中和未命中次数
+
+    键为 (棋子布局的Zobrist键, 走子方, 是否按 GameState 规则限制被照面的棋子, 对局规则)，
+    同一回合内界面点击、AI、困毙/将死判断等对同一局面的查询只生成一次走法。
+    """
+
+    __slots__ = ("maxsize", "hits", "misses", "_entries")
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """查询缓存，未命中返回None"""
+        try:
+            value = self._entries[key]
+            self._entries.move_to_end(key)
+        except KeyError:
+            # 未缓存（AI线程同时淘汰了该局面时同样按未命中处理）
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def peek(self, key):
+        """查询缓存但不计入命中统计、不调整淘汰顺序，未缓存返回None"""
+        return self._entries.get(key)
+
+    def put(self, key, value):
+        """写入缓存，超过容量时淘汰最久未使用的局面"""
+        entries = self._entries
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.maxsize:
+            try:
+                entries.popitem(last=False)
+            except KeyError:
+                break
+
+    def clear(self):
+        """清空缓存和计数"""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        """缓存统计：命中次数、未命中次数、当前局面数和容量"""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
+
+
+# 合法走法列表缓存，以及只需判断是否存在合法走法时的结果缓存
+legal_move_cache = LegalMoveCache(LEGAL_MOVE_CACHE_SIZE)
+_has_move_cache = LegalMoveCache(HAS_MOVE_CACHE_SIZE)
+
+
+class PositionAnalysis:
+    """某方将帅的将军分析，每个局面只计算一次
+
+    匈汉象棋的将军判断除了车、炮、将帅的直线攻击和马的蹩腿以外，还受射/檑的夹逼点、
+    盾的相邻限制以及尉照面限制的影响，无法只用传统的牵制线描述。这里求出所有可能影响将军判断的格子：
+      - 将军线：将帅四条直线上直到最远的敌方车/炮（纵向还有敌方将帅）为止的格子，阻挡或吃掉攻击者都在这里；
+      - 将帅周围3格范围：马腿、象眼、射的夹逼点、落单判断以及各短程攻击棋子；
+      - 附近有受照面限制的敌方棋子时，己方尉所在格及其四条直线。
+    走子的起点和终点都不在这些格子上时，走子前后的将军状态不变：原本未被将军则合法，
+    原本被将军则无法解将，只需集合判断。站在这些格子上的己方棋子（可能被牵制）、
+    落到这些格子上的走法以及会改变盾限制的盾才需要实际检验。
+    """
+
+    def __init__(self, board, color, pieces=None):
+        """分析局面
+
+        Args:
+            board (Bitboard): 当前局面的位棋盘
+            color (str): 被分析的一方
+            pieces (list): 棋子列表（同色多个将帅时按列表顺序确定将帅）
+        """
+        self.board = board
+        self.color = color
+        self.king_square = board.find_king_square(color, pieces)
+        self.in_check = board.is_check(color, pieces)
+        self.sensitive = 0  # 影响将军判断的格子
+        self.dun_sensitive = False  # 盾的移动是否可能改变附近攻击者能否吃子
+        if self.king_square >= 0:
+            self._analyze()
+        # 站在敏感格上的己方棋子：移动后可能暴露将帅（牵制），或本身就在阻挡将军线
+        self.pinned = self.sensitive & board.color_masks.get(color, 0)
+
+    def _analyze(self):
+        board = self.board
+        tables = board.tables
+        type_masks = board.type_masks
+        king_square = self.king_square
+        color = self.color
+        enemy = "black" if color == "red" else "red"
+
+        sensitive = tables.near3[king_square]
+
+        # 将军线：到最远一个可能沿直线攻击的敌子为止
+        sliders = type_masks.get((enemy, Ju), 0) | type_masks.get((enemy, Pao), 0)
+        enemy_kings = type_masks.get((enemy, King), 0)
+        for d in ORTHOGONAL:
+            attackers = sliders | enemy_kings if d < 2 else sliders
+            hits = tables.rays[d][king_square] & attackers
+            if not hits:
+                continue
+            if POSITIVE[d]:
+                farthest = hits.bit_length() - 1
+            else:
+                farthest = (hits & -hits).bit_length() - 1
+            sensitive |= board._between(d, king_square, farthest) | (1 << farthest)
+
+        # 附近的短程攻击者受尉照面和盾的限制
+        short_range = 0
+        for piece_type in SHORT_RANGE_ATTACKERS:
+            short_range |= type_masks.get((enemy, piece_type), 0)
+        if short_range & tables.near3[king_square]:
+            self.dun_sensitive = True
+            for wei_square in iter_squares(type_masks.get((color, Wei), 0)):
+                sensitive |= 1 << wei_square
+                for d in ORTHOGONAL:
+                    sensitive |= tables.rays[d][wei_square]
+
+        self.sensitive = sensitive
+
+    def requires_test(self, piece, from_square, to_square):
+        """走法是否需要实际检验（否则走子后的将军状态与 in_check 相同）"""
+        if (self.sensitive >> from_square | self.sensitive >> to_square) & 1:
+            return True
+        return self.dun_sensitive and isinstance(piece, Dun)
+
+    def is_legal(self, piece, from_square, to_square, pieces=None):
+        """判断走法是否不会让己方处于被将军状态"""
+        if not self.requires_test(piece, from_square, to_square):
+            return not self.in_check
+        return not _leaves_king_in_check(self.board, pieces, piece, from_square, to_square, self.color)
+
+
+def _position_pieces(position):
+    """position 可以是 GameState 或棋子列表"""
+    return getattr(position, "pieces", position)
+
+
+def _blocks_facing_targets(position):
+    """position 为 GameState 时，被尉照面的棋子完全不能移动（与 GameRules.is_valid_move 一致）；
+    棋子列表则与 GameRules.calculate_possible_moves 一致，被照面的檑/礌仍可攻击相邻落单的敌子"""
+    return _position_pieces(position) is not position
+
+
+def _leaves_king_in_check(board, pieces, piece, from_square, to_square, color):
+    """在位棋盘上虚拟走子后检查己方是否被将军，不修改棋子列表和棋子坐标
+
+    与 GameRules.would_be_in_check_after_move 的结果一致。
+    """
+    captured = board.board[to_square]
+    board.put(from_square, None)
+    board.put(to_square, piece)
+    try:
+        return board.is_check(color, pieces)
+    finally:
+        board.put(to_square, captured)
+        board.put(from_square, piece)
+
+
+def _piece_moves(board, pieces, piece, restricted):
+    """单个棋子的伪合法走法，顺序与 GameRules.calculate_possible_moves 一致
+
+    Returns:
+        list: [(to_row, to_col, 是否吃子), ...]
+    """
+    move_mask, capture_mask = board.piece_targets(piece, restricted)
+    cols = board.cols
+    moves = []
+    seen = set()
+    mask = move_mask
+    while mask:
+        low = mask & -mask
+        square = low.bit_length() - 1
+        moves.append((square // cols, square % cols, bool(capture_mask & low)))
+        seen.add(square)
+        mask ^= low
+    if isinstance(piece, Jia):
+        # 甲/胄的三子连线吃子
+        for captured_piece in GameRules.find_jia_capture_moves(pieces, piece, board.rule_set):
+            square = captured_piece.row * cols + captured_piece.col
+            if square not in seen:
+                seen.add(square)
+                moves.append((captured_piece.row, captured_piece.col, True))
+    return moves
+
+
+def iter_legal_moves(position, color, piece=None, rule_set=None):
+    """按需逐个生成某方的合法走法，只需判断是否存在合法走法时可以在第一个结果处停止
+
+    参数与顺序同 generate_legal_moves，结果不经过缓存。
+    """
+    pieces = _position_pieces(position)
+    return _iter_moves(position, pieces, Bitboard.of(pieces, rule_set), color, piece)
+
+
+def _iter_moves(position, pieces, board, color, piece=None):
+    rule_set = board.rule_set
+    rows, cols = board.rows, board.cols
+    has_wei = board._has_wei()
+    blocks_facing = _blocks_facing_targets(position)
+    kings = board.type_masks.get((color, King), 0)
+    multiple_kings = bool(kings & (kings - 1))
+    analysis = PositionAnalysis(board, color, pieces)
+
+    candidates = (piece,) if piece is not None else pieces
+    for moving in candidates:
+        if moving.color != color:
+            continue
+        # 照面关系在棋盘上增量维护，虚拟走子并还原后只需重新计算相关行列上的尉
+        restricted = board.facing_restricted() if has_wei else ()
+        if blocks_facing and moving in restricted:
+            continue  # 被尉照面限制的棋子不能移动
+        from_row, from_col = moving.row, moving.col
+        if not (0 <= from_row < rows and 0 <= from_col < cols) or board.board[from_row * cols + from_col] is not moving:
+            # 不在棋盘索引中的棋子（越界或与其他棋子重叠）按原有逐步方式校验
+            moves, capturable = GameRules.calculate_possible_moves(pieces, moving, rule_set)
+            capture_set = set(capturable)
+            for to_row, to_col in moves:
+                if not GameRules.would_be_in_check_after_move(pieces, moving, to_row, to_col, rule_set):
+                    yield Move(from_row, from_col, to_row, to_col, (to_row, to_col) in capture_set)
+            continue
+
+        from_square = from_row * cols + from_col
+        for to_row, to_col, capture in _piece_moves(board, pieces, moving, restricted):
+            to_square = to_row * cols + to_col
+            if isinstance(moving, King) and multiple_kings and analysis.requires_test(moving, from_square, to_square):
+                # 同色多个将帅时以列表顺序确定被将军的将帅，需要真实改变坐标
+                is_legal = not GameRules.would_be_in_check_after_move(pieces, moving, to_row, to_col, rule_set)
+            else:
+                is_legal = analysis.is_legal(moving, from_square, to_square, pieces)
+            if is_legal:
+                yield Move(from_row, from_col, to_row, to_col, capture)
+
+
+def generate_legal_moves(position, color, piece=None, rule_set=None):
+    """生成某方的全部合法走法，结果按局面缓存（见 LegalMoveCache）
+
+    Args:
+        position: GameState 或棋子列表。为 GameState 时被尉照面的棋子不能移动
+        color (str): 走子方颜色
+        piece (ChessPiece): 只生成该棋子的走法，默认生成全部棋子的走法
+        rule_set (RuleSet): 对局规则，默认使用棋子列表所属对局的规则
+
+    Returns:
+        list: Move 记录列表，按棋子在列表中的顺序、目标格编号从小到大排列（甲/胄连线吃子在后）
+    """
+    pieces = _position_pieces(position)
+    board = Bitboard.of(pieces, rule_set)
+    key = _position_cache_key(position, pieces, board, color)
+    if key is None:
+        return list(_iter_moves(position, pieces, board, color, piece))
+
+    moves = legal_move_cache.get(key)
+    if moves is None:
+        moves = tuple(_iter_moves(position, pieces, board, color))
+        legal_move_cache.put(key, moves)
+    if piece is None:
+        return list(moves)
+    # 单个棋子的走法即整方走法中从该棋子所在格出发的部分，顺序不变
+    return [move for move in moves if move.from_row == piece.row and move.from_col == piece.col]
+
+
+def _position_cache_key(position, pieces, board, color):
+    """局面缓存键：棋子布局的Zobrist键、走子方、是否按 GameState 规则限制被照面的棋子以及对局规则
+
+    棋子列表不能完全由位棋盘表示时（重叠、越界的棋子，同色多个将帅依赖列表顺序）返回None，不做缓存。
+    """
+    if popcount(board.occupied) != len(pieces):
+        return None
+    kings = board.type_masks.get((color, King), 0)
+    if kings & (kings - 1):
+        return None
+    return board.zobrist, color, _blocks_facing_targets(position), board.rule_set
+
+
+def has_any_legal_move(position, color, rule_set=None):
+    """某方是否还有合法走法（找到第一个合法走法即返回），结果按局面缓存
+
+    将死、困毙、游戏结束判断以及将军/绝杀提示共用这里的结果；已缓存整方走法的局面直接由走法列表判断。
+
+    Args:
+        position: GameState 或棋子列表
+        color (str): 走子方颜色
+        rule_set (RuleSet): 对局规则，默认使用棋子列表所属对局的规则
+
+    Returns:
+        bool: 是否存在合法走法
+    """
+    pieces = _position_pieces(position)
+    board = Bitboard.of(pieces, rule_set)
+    key = _position_cache_key(position, pieces, board, color)
+    if key is not None:
+        moves = legal_move_cache.peek(key)
+        if moves is not None:
+            return bool(moves)
+        cached = _has_move_cache.get(key)
+        if cached is not None:
+            return cached
+    result = next(_iter_moves(position, pieces, board, color), None) is not None
+    if key is not None:
+        _has_move_cache.put(key, result)
+    return result
+
+
+def cache_info():
+    """合法走法缓存与合法走法存在性缓存的命中统计"""
+    return {"legal_moves": legal_move_cache.info(), "has_move": _has_move_cache.info()}
+
+
+def clear_caches():
+    """清空全部局面缓存"""
+    legal_move_cache.clear()
+    _has_move_cache.clear()
@@ -0,0 +1,119 @@
+"""走子历史
+
+MoveLog 以定长的紧凑数组保存每一步走子：起点、终点和副作用标志编码为一个走法整数
+（见 program.core.encoding），走子的棋子和被移出棋盘的棋子只保存引用。
+每步只占几十字节，数百步的对局也不再为每一步保留元组和列表。
+
+按下标读取时生成 MoveRecord，字段与原来的8元组 (piece, from_row, from_col, to_row, to_col,
+captured_piece, jia_captured_pieces, ci_captured_pieces) 一致，可以直接按元组解包。
+"""
+from array import array
+from collections import namedtuple
+
+from program.core.encoding import encode_move, decode_move, MOVE_CAPTURE, MOVE_JIA_CAPTURE, MOVE_CI_EXCHANGE
+
+MoveRecord = namedtuple("MoveRecord", ["piece", "from_row", "from_col", "to_row", "to_col", "captured_piece",
+                                       "jia_captured_pieces", "ci_captured_pieces"])
+
+
+class MoveLog:
+    """走子历史，支持 len、下标、切片、迭代以及 append/pop
+
+    - _moves: 每步一个走法编码（含吃子、甲/胄连线吃子、刺兑子标志）
+    - _pieces: 每步走子的棋子
+    - _removed: 各步被移出棋盘的棋子依次排列（直接吃掉的棋子在前，甲/胄或刺兑子涉及的棋子在后）
+    - _offsets: 每步在 _removed 中的起始位置
+    """
+
+    __slots__ = ("_moves", "_pieces", "_removed", "_offsets")
+
+    def __init__(self, records=()):
+        self._moves = array("I")
+        self._pieces = []
+        self._removed = []
+        self._offsets = array("I")
+        for record in records:
+            self.append(record)
+
+    def __len__(self):
+        return len(self._moves)
+
+    def __iter__(self):
+        for index in range(len(self._moves)):
+            yield self._record(index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._record(i) for i in range(*index.indices(len(self._moves)))]
+        if index < 0:
+            index += len(self._moves)
+        if not 0 <= index < len(self._moves):
+            raise IndexError("走子历史下标越界")
+        return self._record(index)
+
+    def _record(self, index):
+        move = self._moves[index]
+        start = self._offsets[index]
+        end = self._offsets[index + 1] if index + 1 < len(self._offsets) else len(self._removed)
+        removed = self._removed[start:end]
+        captured_piece = None
+        if move & MOVE_CAPTURE:
+            captured_piece = removed.pop(0)
+        jia_captured_pieces = removed if move & MOVE_JIA_CAPTURE else []
+        ci_captured_pieces = removed if move & MOVE_CI_EXCHANGE else []
+        return MoveRecord(self._pieces[index], *decode_move(move), captured_piece,
+                          jia_captured_pieces, ci_captured_pieces)
+
+    def push(self, piece, from_row, from_col, to_row, to_col, captured_piece=None,
+             jia_captured_pieces=(), ci_captured_pieces=()):
+        """记录一步走子"""
+        flags = 0
+        self._offsets.append(len(self._removed))
+        if captured_piece is not None:
+            flags |= MOVE_CAPTURE
+            self._removed.append(captured_piece)
+        if jia_captured_pieces:
+            flags |= MOVE_JIA_CAPTURE
+            self._removed.extend(jia_captured_pieces)
+        elif ci_captured_pieces:
+            flags |= MOVE_CI_EXCHANGE
+            self._removed.extend(ci_captured_pieces)
+        self._moves.append(encode_move(from_row, from_col, to_row, to_col, flags))
+        self._pieces.append(piece)
+
+    def append(self, record):
+        """记录一步走子，record 为6~8个元素的走子元组（旧存档中没有甲/胄、刺的字段）"""
+        self.push(*record)
+
+    def pop(self):
+        """移除并返回最后一步
+
+        Returns:
+            MoveRecord: 最后一步的记录
+
+        Raises:
+            IndexError: 历史为空
+        """
+        if not self._moves:
+            raise IndexError("走子历史为空")
+        record = self._record(len(self._moves) - 1)
+        del self._removed[self._offsets.pop():]
+        self._moves.pop()
+        self._pieces.pop()
+        return record
+
+    def clear(self):
+        """清空历史"""
+        self._moves = array("I")
+        self._pieces = []
+        self._removed = []
+        self._offsets = array("I")
+
+    def copy(self):
+        """复制历史（棋子引用共享）"""
+        log = MoveLog()
+        log._moves = array("I", self._moves)
+        log._pieces = self._pieces[:]
+        log._removed = self._removed[:]
+        log._offsets = array("I", self._offsets)
+        return log
@@ -0,0 +1,219 @@
+"""走法树叶子节点计数（perft）
+
+从初始局面或任意FEN局面出发，按走子方的全部合法走法逐层展开到指定深度，统计叶子节点数，
+用于校验走法生成的正确性并测量走法生成速度（每秒节点数）。支持13×13匈汉象棋与10×9传统象棋两套规则。
+
+走法树与AI搜索一样通过 GameState.make_move/unmake_move 展开：吃掉将/帅后对局结束，不再继续展开；
+兵/卒到达底线不触发升变。默认使用 program.core.move_generator 生成走法，--rules 改用
+GameRules 逐格校验的参照实现（is_valid_move + would_be_in_check_after_move）。
+perft_reference.json 中的参考计数由参照实现生成（默认规则设置），新的走法生成器启用前应先通过 --check 校验。
+
+用法:
+    python -m program.core.perft --depth 3
+    python -m program.core.perft --ruleset traditional --depth 4 --divide
+    python -m program.core.perft --fen "<FEN>" --depth 2
+    python -m program.core.perft --check
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+from program.controllers.game_config_manager import game_config
+from program.core.chess_pieces import Jia
+from program.core.game_rules import GameRules
+from program.core.move_generator import generate_legal_moves
+from program.core.rule_set import RULE_SETTINGS
+
+RULESETS = ("xionghan", "traditional")
+REFERENCE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perft_reference.json")
+
+
+@contextlib.contextmanager
+def reference_settings(ruleset):
+    """临时切换到参考计数使用的默认规则设置，退出时恢复原有的全局配置
+
+    Args:
+        ruleset (str): "xionghan" 或 "traditional"
+    """
+    saved = game_config.get_all_settings()
+    settings = dict(RULE_SETTINGS)
+    settings["traditional_mode"] = ruleset == "traditional"
+    game_config.update_settings(settings)
+    try:
+        yield
+    finally:
+        game_config.update_settings(saved)
+
+
+def create_position(ruleset="xionghan", fen=None):
+    """创建perft的起始局面
+
+    Args:
+        ruleset (str): "xionghan" 或 "traditional"
+        fen (str): FEN局面（格式同 GameState.export_position），默认为初始局面
+
+    Returns:
+        GameState: 起始局面
+
+    Raises:
+        ValueError: 规则名称未知或FEN无法导入
+    """
+    if ruleset not in RULESETS:
+        raise ValueError(f"未知的规则: {ruleset}")
+    from program.core.game_state import GameState
+
+    # 对局规则和初始布局在创建 GameState 时由配置决定，之后只使用 GameState 自带的规则
+    with reference_settings(ruleset):
+        game_state = GameState()
+    if fen:
+        with contextlib.redirect_stdout(io.StringIO()):
+            imported = game_state.import_position(fen)
+        if not imported:
+            raise ValueError(f"无法导入FEN: {fen}")
+    return game_state
+
+
+def legal_moves(game_state):
+    """走子方的全部合法走法（走法生成器）"""
+    return [move[:4] for move in generate_legal_moves(game_state, game_state.player_turn)]
+
+
+def rules_legal_moves(game_state):
+    """走子方的全部合法走法（GameRules逐格校验的参照实现，与走法生成器相互独立）"""
+    pieces = game_state.pieces
+    rule_set = game_state.rule_set
+    color = game_state.player_turn
+    moves = []
+    for piece in list(pieces):
+        if piece.color != color:
+            continue
+        from_row, from_col = piece.row, piece.col
+        targets = [(row, col) for row in range(rule_set.rows) for col in range(rule_set.cols)
+                   if GameRules.is_valid_move(pieces, piece, from_row, from_col, row, col)]
+        if isinstance(piece, Jia):
+            # 甲/胄的三子连线吃子
+            for captured in GameRules.scan_jia_capture_moves(pieces, piece, rule_set):
+                if (captured.row, captured.col) not in targets:
+                    targets.append((captured.row, captured.col))
+        for to_row, to_col in targets:
+            if not GameRules.would_be_in_check_after_move(pieces, piece, to_row, to_col):
+                moves.append((from_row, from_col, to_row, to_col))
+    return moves
+
+
+def perft(game_state, depth, move_source=legal_moves):
+    """统计从当前局面展开 depth 层后的叶子节点数
+
+    Args:
+        game_state (GameState): 局面（展开结束后恢复原状）
+        depth (int): 展开深度
+        move_source: 走法来源，legal_moves 或 rules_legal_moves
+
+    Returns:
+        int: 叶子节点数
+    """
+    if depth == 0:
+        return 1
+    if game_state.game_over:
+        return 0
+    moves = move_source(game_state)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        game_state.make_move(*move)
+        nodes += perft(game_state, depth - 1, move_source)
+        game_state.unmake_move()
+    return nodes
+
+
+def divide(game_state, depth, move_source=legal_moves):
+    """按第一步走法分别统计叶子节点数
+
+    Returns:
+        list: [((from_row, from_col, to_row, to_col), 叶子节点数), ...]
+    """
+    results = []
+    for move in move_source(game_state):
+        game_state.make_move(*move)
+        results.append((move, perft(game_state, depth - 1, move_source)))
+        game_state.unmake_move()
+    return results
+
+
+def format_move(move):
+    """走法的文本表示：起点行,列-终点行,列"""
+    from_row, from_col, to_row, to_col = move
+    return f"{from_row},{from_col}-{to_row},{to_col}"
+
+
+def load_reference():
+    """读取参考计数"""
+    with open(REFERENCE_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check_reference(move_source=legal_moves, max_nodes=None, out=sys.stdout):
+    """用参考计数校验走法生成
+
+    Args:
+        move_source: 被校验的走法来源
+        max_nodes (int): 跳过参考计数超过该值的条目，默认全部校验
+        out: 输出流
+
+    Returns:
+        bool: 是否全部一致
+    """
+    all_passed = True
+    for entry in load_reference()["positions"]:
+        game_state = create_position(entry["ruleset"], entry.get("fen"))
+        for depth, expected in enumerate(entry["counts"], start=1):
+            if max_nodes is not None and expected > max_nodes:
+                break
+            start = time.perf_counter()
+            nodes = perft(game_state, depth, move_source)
+            elapsed = time.perf_counter() - start
+            passed = nodes == expected
+            all_passed = all_passed and passed
+            print(f"{'✓' if passed else '✗'} {entry['name']} depth {depth}: {nodes} "
+                  f"(参考 {expected}, {elapsed:.2f}s)", file=out)
+    return all_passed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="走法树叶子节点计数（perft）")
+    parser.add_argument("--ruleset", choices=RULESETS, default="xionghan", help="规则：匈汉象棋或传统象棋")
+    parser.add_argument("--fen", help="起始局面的FEN，默认为初始局面")
+    parser.add_argument("--depth", type=int, default=2, help="展开深度")
+    parser.add_argument("--divide", action="store_true", help="按第一步走法分别输出叶子节点数")
+    parser.add_argument("--rules", action="store_true", help="使用GameRules逐格校验的参照实现生成走法")
+    parser.add_argument("--check", action="store_true", help="用 perft_reference.json 中的参考计数校验走法生成")
+    parser.add_argument("--max-nodes", type=int, help="--check 时跳过参考计数超过该值的条目")
+    args = parser.parse_args(argv)
+
+    move_source = rules_legal_moves if args.rules else legal_moves
+    if args.check:
+        return 0 if check_reference(move_source, args.max_nodes) else 1
+
+    game_state = create_position(args.ruleset, args.fen)
+    start = time.perf_counter()
+    if args.divide:
+        results = divide(game_state, args.depth, move_source)
+        for move, count in results:
+            print(f"{format_move(move)}: {count}")
+        nodes = sum(count for _, count in results)
+        print(f"走法数: {len(results)}")
+    else:
+        nodes = perft(game_state, args.depth, move_source)
+    elapsed = time.perf_counter() - start
+    nps = nodes / elapsed if elapsed > 0 else 0
+    print(f"{args.ruleset} depth {args.depth}: {nodes} 个节点, {elapsed:.3f}s, {nps:.0f} nodes/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+from program.core.bitboard import Bitboard
+
+
+class PieceList(list):
+    """带棋盘索引的棋子列表
+
+    在普通列表的基础上维护一个按格子编号的位棋盘（匈汉象棋13×13，传统象棋10×9），
+    棋子的增删以及行列坐标的修改都会同步到占位数组和各颜色、各类型的掩码中，
+    使按坐标查找棋子变为O(1)操作，走法生成与将军判断可以直接使用位运算。
+    其余代码仍可以像使用普通列表一样遍历、增删棋子。
+    """
+
+    def __init__(self, iterable=(), rows=None, cols=None, rule_set=None):
+        """初始化棋子列表
+
+        Args:
+            iterable: 初始棋子
+            rows (int): 棋盘行数，默认根据规则决定
+            cols (int): 棋盘列数，默认根据规则决定
+            rule_set (RuleSet): 所属对局的规则，默认由当前配置编译
+
+        Raises:
+            ValueError: 给出的棋盘尺寸与规则的棋盘几何不一致
+        """
+        super().__init__()
+        self.bitboard = Bitboard(rows, cols, rule_set)
+        self.rows = self.bitboard.rows
+        self.cols = self.bitboard.cols
+        self.rule_set = self.bitboard.rule_set
+        # 同一格子上暂时重叠的棋子（例如先改行后改列的过渡状态），离开后依次恢复
+        self._stacked = {}
+        self.extend(iterable)
+
+    def __reduce_ex__(self, protocol):
+        """深拷贝和序列化时只保存棋子本身，索引在重建时重新生成"""
+        return self.__class__, (list(self), self.rows, self.cols, self.rule_set)
+
+    def __copy__(self):
+        """浅拷贝得到普通列表（与list.copy()一致），避免两个索引争用同一批棋子"""
+        return list(self)
+
+    # ---------- 查询 ----------
+
+    def get_piece_at(self, row, col):
+        """获取指定位置的棋子
+
+        Args:
+            row (int): 行坐标
+            col (int): 列坐标
+
+        Returns:
+            ChessPiece or None: 位置上的棋子，如果没有则返回None
+        """
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return self.bitboard.board[row * self.cols + col]
+        # 超出索引范围时退回线性查找
+        for piece in self:
+            if piece.row == row and piece.col == col:
+                return piece
+        return None
+
+    # ---------- 索引维护 ----------
+
+    def _square(self, row, col):
+        """坐标转换为格子编号，超出索引范围返回None"""
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row * self.cols + col
+        return None
+
+    def _place(self, piece):
+        """将棋子登记到当前坐标"""
+        square = self._square(piece.row, piece.col)
+        if square is None:
+            return
+        occupant = self.bitboard.board[square]
+        if occupant is not None and occupant is not piece:
+            self._stacked.setdefault(square, []).append(occupant)
+        self.bitboard.put(square, piece)
+
+    def _unplace(self, piece, row, col):
+        """将棋子从指定坐标注销"""
+        square = self._square(row, col)
+        if square is None:
+            return
+        stacked = self._stacked.get(square)
+        if self.bitboard.board[square] is piece:
+            self.bitboard.put(square, None)
+            while stacked:
+                candidate = stacked.pop()
+                if candidate._owner is self and candidate.row == row and candidate.col == col:
+                    self.bitboard.put(square, candidate)
+                    break
+        elif stacked and piece in stacked:
+            stacked.remove(piece)
+        if square in self._stacked and not self._stacked[square]:
+            del self._stacked[square]
+
+    def _relocate(self, piece, old_row, old_col):
+        """棋子坐标改变后更新索引（由ChessPiece在修改坐标时调用）"""
+        self._unplace(piece, old_row, old_col)
+        self._place(piece)
+
+    def _attach(self, piece):
+        piece._owner = self
+        self._place(piece)
+
+    def _detach(self, piece):
+        self._unplace(piece, piece.row, piece.col)
+        if piece._owner is self:
+            piece._owner = None
+
+    def _release_all(self):
+        """解除所有棋子与本列表的关联"""
+        for piece in self:
+            if piece._owner is self:
+                piece._owner = None
+
+    def _rebuild(self):
+        """根据列表内容重建整个索引"""
+        self.bitboard.clear()
+        self._stacked = {}
+        for piece in self:
+            self._attach(piece)
+
+    # ---------- 列表操作 ----------
+
+    def append(self, piece):
+        super().append(piece)
+        self._attach(piece)
+
+    def extend(self, pieces):
+        for piece in pieces:
+            self.append(piece)
+
+    def __iadd__(self, pieces):
+        self.extend(pieces)
+        return self
+
+    def insert(self, index, piece):
+        super().insert(index, piece)
+        self._attach(piece)
+
+    def remove(self, piece):
+        super().remove(piece)
+        self._detach(piece)
+
+    def pop(self, index=-1):
+        piece = super().pop(index)
+        self._detach(piece)
+        return piece
+
+    def clear(self):
+        self._release_all()
+        super().clear()
+        self.bitboard.clear()
+        self._stacked = {}
+
+    def __setitem__(self, index, value):
+        self._release_all()
+        super().__setitem__(index, value)
+        self._rebuild()
+
+    def __delitem__(self, index):
+        self._release_all()
+        super().__delitem__(index)
+        self._rebuild()
@@ -0,0 +1,95 @@
+"""重复局面计数
+
+RepetitionTracker 以局面的Zobrist键为索引记录每个局面出现的次数：走子时加一、悔棋时减一，
+查询某局面的出现次数是一次字典读取，不再随对局长度线性扫描历史。
+
+计数只统计最近一次不可逆走子（场上棋子数发生变化，即吃子、甲/胄连线吃子或刺兑子）之后的局面，
+在此之前的局面棋子数不同，不可能与之后的局面重复。每进入一个新的窗口都会保存旧窗口的计数，
+悔棋退回窗口起点时原样恢复，因此走子和撤销都是O(1)。
+"""
+
+
+class RepetitionTracker:
+    """局面出现次数的增量计数器
+
+    - keys: 按走子顺序记录的局面键
+    - counts: 当前窗口（最近一次不可逆走子之后）内各局面键的出现次数
+    """
+
+    __slots__ = ("keys", "counts", "_materials", "_saved_counts")
+
+    def __init__(self):
+        self.keys = []
+        self.counts = {}
+        self._materials = []  # 与 keys 对应的场上棋子数
+        self._saved_counts = []  # 各个已结束窗口的计数，按窗口顺序保存
+
+    def __len__(self):
+        return len(self.keys)
+
+    def push(self, key, material):
+        """记录走子后出现的局面
+
+        Args:
+            key (int): 局面键（含走子方）
+            material (int): 场上棋子数，与上一局面不同时开始新的窗口
+
+        Returns:
+            int: 该局面在当前窗口内的出现次数
+        """
+        if self._materials and self._materials[-1] != material:
+            self._saved_counts.append(self.counts)
+            self.counts = {}
+        self.keys.append(key)
+        self._materials.append(material)
+        count = self.counts.get(key, 0) + 1
+        self.counts[key] = count
+        return count
+
+    def pop(self):
+        """撤销最近一次 push
+
+        Returns:
+            int: 被撤销的局面键，没有记录时返回None
+        """
+        if not self.keys:
+            return None
+        key = self.keys.pop()
+        material = self._materials.pop()
+        count = self.counts[key] - 1
+        if count:
+            self.counts[key] = count
+        else:
+            del self.counts[key]
+        if self._materials and self._materials[-1] != material:
+            # 退回到窗口起点之前，恢复上一个窗口的计数
+            self.counts = self._saved_counts.pop()
+        return key
+
+    def count(self, key=None):
+        """局面在当前窗口内的出现次数，默认查询最近一个局面"""
+        if key is None:
+            if not self.keys:
+                return 0
+            key = self.keys[-1]
+        return self.counts.get(key, 0)
+
+    def is_repeated(self, times=3):
+        """最近一个局面是否已出现至少 times 次"""
+        return self.count() >= times
+
+    def clear(self):
+        """清空全部记录"""
+        self.keys = []
+        self.counts = {}
+        self._materials = []
+        self._saved_counts = []
+
+    def copy(self):
+        """复制计数器（已结束窗口的计数只在悔棋时恢复，复制时逐个拷贝）"""
+        tracker = RepetitionTracker()
+        tracker.keys = self.keys[:]
+        tracker.counts = self.counts.copy()
+        tracker._materials = self._materials[:]
+        tracker._saved_counts = [counts.copy() for counts in self._saved_counts]
+        return tracker
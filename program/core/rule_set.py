@@ -0,0 +1,106 @@
+"""对局规则快照
+
+RuleSet 在对局开始时由全局配置编译而成，包含棋盘尺寸、九宫和河界范围以及全部变体规则开关，
+创建后不可修改。GameState、位棋盘、GameRules 以及 AI 都从这里读取规则，
+规则判断只是一次属性读取，AI 线程也不再需要临时修改全局配置。
+"""
+from collections import namedtuple
+
+from program.controllers.game_config_manager import game_config
+from program.core.board_geometry import XIONGHAN_GEOMETRY, geometry_for
+from program.core.chess_pieces import COLOR_CODES
+
+# 影响对局的规则设置及其默认值（与 GameRules 中读取设置时的默认值一致）
+RULE_SETTINGS = (
+    ("traditional_mode", False),
+    ("classic_mode", False),
+    ("ma_can_straight_three", True),
+    ("xiang_can_cross_river", True),
+    ("xiang_gain_jump_two_outside_river", True),
+    ("shi_can_leave_palace", True),
+    ("shi_gain_straight_outside_palace", True),
+    ("king_can_diagonal_in_palace", True),
+    ("king_lose_diagonal_outside_palace", True),
+    ("king_can_leave_palace", True),
+    ("pawn_full_movement_at_base_enabled", False),
+    ("pawn_backward_at_base_enabled", False),
+    ("pawn_promotion_enabled", True),
+    ("pawn_resurrection_enabled", True),
+)
+
+# 由模式决定的棋盘几何字段（见 program.core.board_geometry.BoardGeometry）
+GEOMETRY_FIELDS = XIONGHAN_GEOMETRY._fields
+
+_active_rule_set = {}  # 配置版本号 -> RuleSet（只保留最近一次）
+
+
+class RuleSet(namedtuple("RuleSet", [key for key, _ in RULE_SETTINGS] + list(GEOMETRY_FIELDS))):
+    """不可变的对局规则
+
+    每个规则设置对应一个同名属性；另有棋盘几何（完整的几何对象见 geometry 属性）：
+      - rows, cols: 棋盘行列数
+      - palaces: 按颜色编号排列的九宫范围 (起始行, 结束行, 起始列, 结束列)
+      - river_rows: (红方过河行, 黑方过河行)，红方到达该行及以上、黑方到达该行及以下即为过河
+        （匈汉象棋为长城所在行）
+      - pawn_rows: 按颜色编号排列的兵/卒初始行
+    RuleSet 可以作为缓存键，相同的设置编译出的规则相等。
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_settings(cls, settings=None, **overrides):
+        """由设置编译规则
+
+        Args:
+            settings (dict): 设置名 -> 取值，默认使用当前全局配置
+            **overrides: 覆盖部分设置
+
+        Returns:
+            RuleSet: 编译得到的规则
+        """
+        if settings is None:
+            settings = game_config.get_all_settings()
+        values = {key: settings.get(key, default) for key, default in RULE_SETTINGS}
+        values.update(overrides)
+        values.update(zip(GEOMETRY_FIELDS, geometry_for(values["traditional_mode"])))
+        return cls(**values)
+
+    def with_settings(self, **changes):
+        """修改部分设置后重新编译（棋盘几何随模式一起更新）"""
+        return RuleSet.from_settings(self.settings(), **changes)
+
+    def settings(self):
+        """规则设置名 -> 取值"""
+        return {key: getattr(self, key) for key, _ in RULE_SETTINGS}
+
+    @property
+    def geometry(self):
+        """本规则使用的棋盘几何（BoardGeometry 单例）"""
+        return geometry_for(self.traditional_mode)
+
+    def on_board(self, row, col):
+        """坐标是否在棋盘范围内"""
+        return 0 <= row < self.rows and 0 <= col < self.cols
+
+    def in_palace(self, color, row, col):
+        """坐标是否在指定颜色的九宫内"""
+        first_row, last_row, first_col, last_col = self.palaces[COLOR_CODES[color]]
+        return first_row <= row <= last_row and first_col <= col <= last_col
+
+    @property
+    def move_tables(self):
+        """本规则下跳跃类与九宫类棋子的走法表（见 program.core.bitboard.MoveTables）"""
+        from program.core.bitboard import get_move_tables
+        return get_move_tables(self.rows, self.cols, self)
+
+
+def current_rule_set():
+    """由当前全局配置编译的规则，配置未修改（版本号不变）时直接复用"""
+    revision = game_config.revision
+    rule_set = _active_rule_set.get(revision)
+    if rule_set is None:
+        rule_set = RuleSet.from_settings()
+        _active_rule_set.clear()
+        _active_rule_set[revision] = rule_set
+    return rule_set
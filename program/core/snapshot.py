@@ -0,0 +1,79 @@
+"""局面快照
+
+PositionSnapshot 是某一时刻局面的不可变副本，供后台线程（搜索AI、MCTS、提示等）使用：
+界面线程调用 GameState.snapshot() 取得快照交给工作线程，之后继续修改游戏状态也不会影响快照，
+工作线程需要走子时再由快照 clone() 出自己的 GameState。
+
+快照按行保存局面编码（见 program.core.encoding），与上一份快照内容相同的行直接复用同一个 bytes 对象；
+局面未变化时 GameState.snapshot() 直接返回上一份快照，因此界面每回合取快照只需几微秒。
+快照只包含局面、走子方和对局状态，不含走子历史、阵亡棋子和用时。
+"""
+from collections import namedtuple
+
+from program.core.chess_pieces import COLOR_CODES, COLOR_NAMES
+from program.core.encoding import BOARD_STRIDE, BOARD_SQUARES, CODE_PIECES, encode_position
+
+
+class PositionSnapshot(namedtuple("PositionSnapshot", ["rows", "player_turn", "rule_set", "zobrist_key",
+                                                       "is_check", "game_over", "winner", "moves_count"])):
+    """不可变的局面快照
+
+    - rows: 13个 bytes，每行13格的棋子编码
+    - player_turn: 走子方
+    - rule_set: 对局规则（RuleSet 本身不可变，直接共享）
+    - zobrist_key: 局面键（含走子方）
+    - is_check, game_over, winner, moves_count: 对局状态
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_game_state(cls, game_state, previous=None):
+        """由游戏状态生成快照
+
+        Args:
+            game_state (GameState): 游戏状态
+            previous (PositionSnapshot): 上一份快照，内容未变的行与它共享
+        """
+        position = encode_position(game_state.pieces, game_state.player_turn)
+        rows = [position[start:start + BOARD_STRIDE] for start in range(0, BOARD_SQUARES, BOARD_STRIDE)]
+        if previous is not None:
+            rows = [old if old == row else row for old, row in zip(previous.rows, rows)]
+        return cls(tuple(rows), game_state.player_turn, game_state.rule_set, game_state.zobrist_key,
+                   game_state.is_check, game_state.game_over, game_state.winner, game_state.moves_count)
+
+    @classmethod
+    def from_position(cls, position, rule_set):
+        """由局面编码生成快照（局面键未知，对局状态为未结束、未将军）
+
+        Args:
+            position (bytes): POSITION_BYTES 字节的局面编码
+            rule_set (RuleSet): 对局规则
+        """
+        rows = tuple(bytes(position[start:start + BOARD_STRIDE]) for start in range(0, BOARD_SQUARES, BOARD_STRIDE))
+        return cls(rows, COLOR_NAMES[position[BOARD_SQUARES]], rule_set, None, False, False, None, 0)
+
+    def matches(self, game_state):
+        """快照是否仍与游戏状态一致（局面键、走子方和对局状态都未变化）"""
+        return (self.zobrist_key == game_state.zobrist_key and self.is_check == game_state.is_check
+                and self.game_over == game_state.game_over and self.winner == game_state.winner
+                and self.moves_count == game_state.moves_count)
+
+    def encode_position(self):
+        """局面编码（与 GameState.encode_position 相同）"""
+        return b"".join(self.rows) + bytes((COLOR_CODES[self.player_turn],))
+
+    def piece_at(self, row, col):
+        """指定位置的棋子
+
+        Returns:
+            tuple: (棋子类, 颜色)，没有棋子时返回None
+        """
+        if not (0 <= row < BOARD_STRIDE and 0 <= col < BOARD_STRIDE):
+            return None
+        return CODE_PIECES[self.rows[row][col]]
+
+    def clone(self):
+        """由快照创建一个独立的游戏状态，供工作线程走子、搜索"""
+        from program.core.game_state import GameState
+        return GameState.from_snapshot(self)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+测试共用的随机对局：各测试在同一组规则配置下随机走子，逐步检查局面
+
+规则配置（CONFIGS）：
+  - xionghan、traditional: perft 参考计数使用的规则设置（见 program.core.perft.reference_settings）
+  - defaults: 游戏配置的出厂默认设置，兵/卒底线后退、底线完整移动等能力均开启
+"""
+
+import contextlib
+import io
+import random
+
+from program.controllers.game_config_manager import GameConfigManager, game_config
+from program.core import encoding, perft
+
+CONFIGS = perft.RULESETS + ("defaults",)
+
+
+@contextlib.contextmanager
+def default_settings():
+    """临时切换到游戏配置的出厂默认设置，退出时恢复原有的全局配置"""
+    saved = game_config.get_all_settings()
+    game_config.update_settings(GameConfigManager().settings)
+    try:
+        yield
+    finally:
+        game_config.update_settings(saved)
+
+
+def create_position(config, fen=None):
+    """创建指定规则配置的起始局面（不向控制台输出）
+
+    Args:
+        config (str): CONFIGS 中的规则配置
+        fen (str): FEN局面，默认为初始局面
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        if config != "defaults":
+            return perft.create_position(config, fen)
+        from program.core.game_state import GameState
+        with default_settings():
+            game_state = GameState()
+        if fen and not game_state.import_position(fen):
+            raise ValueError(f"无法导入FEN: {fen}")
+        return game_state
+
+
+def choose_without_promotion(game_state, moves, rnd):
+    """随机选择一步不触发升变的走法（升变需要界面选择棋子），没有时返回None"""
+    moves = [move for move in moves
+             if not encoding.encode_game_move(game_state, *move) & encoding.MOVE_PROMOTION]
+    return rnd.choice(moves) if moves else None
+
+
+def iter_games(games, configs=CONFIGS):
+    """每种规则配置各创建 games 局起始局面
+
+    Yields:
+        tuple: (规则配置, 游戏状态)
+    """
+    for config in configs:
+        for _ in range(games):
+            yield config, create_position(config)
+
+
+def iter_plies(game_state, plies, rnd, choose=None, play=None):
+    """在游戏状态上随机走子，每一步走子前产出当前的合法走法，调用方检查完局面后再走这一步
+
+    对局结束、没有可走的棋或走子失败时停止。
+
+    Args:
+        game_state (GameState): 游戏状态
+        plies (int): 最多走的步数
+        rnd (random.Random): 随机数生成器
+        choose: choose(game_state, moves, rnd) 返回要走的一步，返回None时停止，默认随机选择
+        play: play(*move) 执行走子并返回是否成功，默认为 game_state.make_move
+
+    Yields:
+        list: 当前局面的合法走法 (from_row, from_col, to_row, to_col)
+    """
+    play = play or game_state.make_move
+    for _ in range(plies):
+        moves = perft.legal_moves(game_state)
+        yield moves
+        if game_state.game_over or not moves:
+            return
+        move = choose(game_state, moves, rnd) if choose else rnd.choice(moves)
+        if move is None:
+            return
+        with contextlib.redirect_stdout(io.StringIO()):
+            if not play(*move):
+                return
+
+
+def random_positions(games, plies, seed, configs=CONFIGS, choose=None):
+    """随机对局中逐步产出的局面（make_move 走子）
+
+    Yields:
+        tuple: (规则配置, 游戏状态, 当前局面的合法走法)
+    """
+    rnd = random.Random(seed)
+    for config, game_state in iter_games(games, configs):
+        for moves in iter_plies(game_state, plies, rnd, choose):
+            yield config, game_state, moves
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+批量局面分析测试：批量API给出的合法走法掩码、吃子掩码、将军标志和子力统计与逐个局面计算的结果一致
+"""
+
+import numpy as np
+
+from program.core import batch, encoding
+from program.core.game_rules import GameRules
+from program.core.move_generator import generate_legal_moves
+from program.core.test.random_games import CONFIGS, create_position, random_positions
+
+
+def _sample_positions(config, games=4, plies=60, seed=0):
+    """随机对局中的局面，返回 (局面编码列表, 对局规则, 逐个计算的 (合法走法集合, 吃子走法集合, 将军标志) 列表)"""
+    positions = []
+    expected = []
+    rule_set = None
+    for _, game_state, _ in random_positions(games, plies, f"{seed}:{config}", configs=(config,)):
+        rule_set = game_state.rule_set
+        legal = set()
+        captures = set()
+        for move in generate_legal_moves(game_state, game_state.player_turn):
+            move_id = encoding.move_to_mcts_id(encoding.encode_move(*move[:4]))
+            if move_id is not None:
+                legal.add(move_id)
+                if move.capture:
+                    captures.add(move_id)
+        in_check = tuple(GameRules.is_check(game_state.pieces, color) for color in ("red", "black"))
+        positions.append(game_state.encode_position())
+        expected.append((legal, captures, in_check))
+    return positions, rule_set, expected
+
+
+def test_batch_matches_single_positions():
+    """批量结果与逐个局面的走法生成、将军判断一致，重复局面与并行计算不影响结果"""
+    print("测试批量局面分析...")
+    mismatches = 0
+    total = 0
+    for config in CONFIGS:
+        positions, rule_set, expected = _sample_positions(config)
+        # 重复一遍局面，检查去重后结果仍按原顺序展开
+        boards, players = batch.positions_to_boards(positions + positions)
+        for workers in (1, 2):
+            analysis = batch.analyze_positions(boards, players, rule_set, workers=workers)
+            for index, (legal, captures, in_check) in enumerate(expected + expected):
+                total += 1
+                if (set(np.flatnonzero(analysis.legal[index])) != legal
+                        or set(np.flatnonzero(analysis.captures[index])) != captures
+                        or tuple(analysis.in_check[index]) != in_check):
+                    mismatches += 1
+        if not np.array_equal(batch.check_flags(boards, rule_set), analysis.in_check):
+            mismatches += 1
+        if batch.boards_to_positions(boards, players) != positions + positions:
+            mismatches += 1
+
+    if mismatches == 0:
+        print(f"✓ {total}个局面的批量结果全部一致")
+    else:
+        print(f"✗ {total}个局面中{mismatches}处不一致")
+    assert mismatches == 0, f"{total}个局面中{mismatches}处不一致"
+
+
+def test_check_flags_random_boards(count=2000, seed=0):
+    """随机摆放的局面（含大量短程棋子贴近将/帅、缺少将/帅的局面）上，整批将军判断与逐个判断一致"""
+    print("测试随机局面的将军判断...")
+    rnd = np.random.default_rng(seed)
+    mismatches = 0
+    for config in CONFIGS:
+        rule_set = create_position(config).rule_set
+        boards = np.zeros((count, 13, 13), dtype=np.int8)
+        for board in boards:
+            piece_count = rnd.integers(4, 30)
+            squares = rnd.choice(rule_set.rows * rule_set.cols, size=piece_count + 2, replace=False)
+            codes = rnd.integers(1, batch.CODE_COUNT, size=piece_count + 2)
+            codes[:2] = (5, 19)  # 红帅、黑将，偶尔去掉红帅
+            if rnd.random() < 0.05:
+                codes[0] = 1
+            for square, code in zip(squares, codes):
+                board[divmod(int(square), rule_set.cols)] = code
+        flags = batch.check_flags(boards, rule_set)
+        for index, position in enumerate(batch.boards_to_positions(boards)):
+            pieces, _ = encoding.decode_position(position)
+            expected = tuple(GameRules.is_check(pieces, color, rule_set) for color in ("red", "black"))
+            if tuple(flags[index]) != expected:
+                mismatches += 1
+
+    total = len(CONFIGS) * count
+    if mismatches == 0:
+        print(f"✓ {total}个随机局面的将军判断全部一致")
+    else:
+        print(f"✗ {total}个随机局面中{mismatches}个不一致")
+    assert mismatches == 0, f"{total}个随机局面中{mismatches}个不一致"
+
+
+def test_material_counts():
+    """子力统计与位棋盘的子力签名一致"""
+    print("测试批量子力统计...")
+    game_state = create_position("xionghan")
+    boards, _ = batch.positions_to_boards([game_state.encode_position()])
+    passed = bytes(batch.material_counts(boards)[0].astype(np.uint8)) == game_state.material_signature
+    table = batch.get_action_table()
+    passed = passed and batch.ACTION_COUNT == np.count_nonzero(table >= 0)
+    print("✓ 子力统计一致" if passed else "✗ 子力统计不一致")
+    assert passed, "子力统计不一致"
+
+
+def test_invalid_boards():
+    """棋子编码越界、棋子超出传统象棋棋盘时报错"""
+    print("测试非法局面张量...")
+    from program.core.rule_set import RuleSet
+    traditional = RuleSet.from_settings({}, traditional_mode=True)
+    boards = np.zeros((1, 13, 13), dtype=np.int8)
+    boards[0, 12, 12] = 1
+    passed = True
+    for arguments in ((boards, None, traditional), (boards - 1, None, None), (boards, [2], None)):
+        try:
+            batch.legal_move_masks(*arguments)
+            passed = False
+        except ValueError:
+            pass
+    print("✓ 非法输入均被拒绝" if passed else "✗ 非法输入未被拒绝")
+    assert passed, "非法输入未被拒绝"
+
+
+if __name__ == "__main__":
+    test_batch_matches_single_positions()
+    test_check_flags_random_boards()
+    test_material_counts()
+    test_invalid_boards()
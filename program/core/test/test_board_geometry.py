@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+棋盘几何测试：两种棋盘的格子编号、九宫、河界与规则给出的几何一致，传统象棋使用90格的紧凑编号
+"""
+
+import contextlib
+import io
+
+from program.core import perft
+from program.core.board_geometry import TRADITIONAL_GEOMETRY, XIONGHAN_GEOMETRY
+from program.core.chess_pieces import Pawn
+from program.core.rule_set import RuleSet
+from program.core.test.random_games import random_positions
+
+
+def test_geometry_matches_rule_set():
+    """RuleSet.geometry 与规则中的行列数、九宫、河界一致，且为共享的几何单例"""
+    print("测试规则的棋盘几何...")
+    passed = True
+    for traditional_mode, geometry in ((True, TRADITIONAL_GEOMETRY), (False, XIONGHAN_GEOMETRY)):
+        rule_set = RuleSet.from_settings({}, traditional_mode=traditional_mode)
+        passed = passed and rule_set.geometry is geometry
+        passed = passed and (rule_set.rows, rule_set.cols, rule_set.palaces, rule_set.river_rows,
+                             rule_set.pawn_rows) == tuple(geometry)
+        for row in range(-1, 14):
+            for col in range(-1, 14):
+                passed = passed and rule_set.on_board(row, col) == geometry.on_board(row, col)
+                for color in ("red", "black"):
+                    passed = passed and rule_set.in_palace(color, row, col) == geometry.in_palace(color, row, col)
+    print("✓ 规则与几何一致" if passed else "✗ 规则与几何不一致")
+    assert passed, "规则与几何不一致"
+
+
+def test_square_indexing():
+    """格子编号与坐标一一对应，传统象棋共90格"""
+    print("测试格子编号...")
+    passed = TRADITIONAL_GEOMETRY.size == 90 and XIONGHAN_GEOMETRY.size == 169
+    for geometry in (TRADITIONAL_GEOMETRY, XIONGHAN_GEOMETRY):
+        coords = [geometry.coords(square) for square in geometry.squares()]
+        passed = passed and all(geometry.on_board(row, col) for row, col in coords)
+        passed = passed and len(set(coords)) == geometry.size
+        passed = passed and all(geometry.square(row, col) == square for square, (row, col) in enumerate(coords))
+    # 传统象棋过河：红兵到第4行、黑卒到第5行
+    passed = passed and TRADITIONAL_GEOMETRY.has_crossed_river("red", 4)
+    passed = passed and not TRADITIONAL_GEOMETRY.has_crossed_river("red", 5)
+    passed = passed and TRADITIONAL_GEOMETRY.has_crossed_river("black", 5)
+    passed = passed and not TRADITIONAL_GEOMETRY.has_crossed_river("black", 4)
+    print("✓ 格子编号正确" if passed else "✗ 格子编号不正确")
+    assert passed, "格子编号不正确"
+
+
+def test_pawn_squares():
+    """兵/卒初始位置与开局布局一致，兵/卒阵亡后只能在本方初始位置复活"""
+    print("测试兵/卒初始位置...")
+    passed = True
+    for ruleset in perft.RULESETS:
+        with contextlib.redirect_stdout(io.StringIO()):
+            game_state = perft.create_position(ruleset)
+            geometry = game_state.rule_set.geometry
+            for color in ("red", "black"):
+                pawns = [piece for piece in game_state.pieces if isinstance(piece, Pawn) and piece.color == color]
+                passed = passed and sorted((pawn.row, pawn.col) for pawn in pawns) == geometry.pawn_squares(color)
+            passed = passed and game_state.get_resurrection_positions() == {"red": [], "black": []}
+            # 红方一个兵阵亡后，只有它的初始位置可以复活
+            pawn = next(piece for piece in game_state.pieces if isinstance(piece, Pawn) and piece.color == "red")
+            game_state.pieces.remove(pawn)
+            game_state.captured_pieces["red"].append(pawn)
+            positions = game_state.get_resurrection_positions()
+        passed = passed and positions == {"red": [(pawn.row, pawn.col)], "black": []}
+    print("✓ 兵/卒初始位置正确" if passed else "✗ 兵/卒初始位置不正确")
+    assert passed, "兵/卒初始位置不正确"
+
+
+def test_traditional_move_generation(games=6, plies=120, seed=0):
+    """传统象棋随机对局中，走法生成器与 GameRules 逐格校验一致，目标都在10x9棋盘内，兵/卒过河后才能横走"""
+    print("测试传统象棋走法生成...")
+    geometry = TRADITIONAL_GEOMETRY
+    mismatches = 0
+    positions = 0
+    sideways = 0
+    for _, game_state, moves in random_positions(games, plies, seed, configs=("traditional",)):
+        positions += 1
+        if sorted(moves) != sorted(perft.rules_legal_moves(game_state)):
+            mismatches += 1
+        for from_row, from_col, to_row, to_col in moves:
+            if not geometry.on_board(to_row, to_col):
+                mismatches += 1
+            piece = game_state.get_piece_at(from_row, from_col)
+            if isinstance(piece, Pawn):
+                forward = -1 if piece.color == "red" else 1
+                if to_row == from_row:
+                    sideways += 1
+                    if abs(to_col - from_col) != 1 or not geometry.has_crossed_river(piece.color, from_row):
+                        mismatches += 1
+                elif (to_row - from_row, to_col) != (forward, from_col):
+                    mismatches += 1
+
+    passed = mismatches == 0 and sideways > 0
+    if passed:
+        print(f"✓ {positions}个局面的走法全部一致（过河兵/卒横走{sideways}次）")
+    else:
+        print(f"✗ {positions}个局面中{mismatches}处不一致（过河兵/卒横走{sideways}次）")
+    assert passed, f"{positions}个局面中{mismatches}处不一致（过河兵/卒横走{sideways}次）"
+
+
+if __name__ == "__main__":
+    test_geometry_matches_rule_set()
+    test_square_indexing()
+    test_pawn_squares()
+    test_traditional_move_generation()
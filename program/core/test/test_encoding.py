@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+紧凑编码测试：随机对局中的局面和走法在紧凑编码与FEN、MCTS棋盘、走法字符串之间往返转换后保持不变
+"""
+
+from program.core import encoding
+from program.core.test.random_games import create_position, random_positions
+
+
+def test_position_round_trip(games=10, plies=80, seed=0):
+    """局面编码经 FEN、MCTS棋盘、棋子列表往返后不变，并与 import_position 导入的结果一致"""
+    print("测试局面编码往返转换...")
+    mismatches = 0
+    positions = 0
+    for config, game_state, _ in random_positions(games, plies, seed):
+        position = game_state.encode_position()
+        pieces, player_turn = encoding.decode_position(position)
+        mcts_color = encoding.MCTS_COLOR_PREFIXES[position[encoding.BOARD_SQUARES]]
+        fen = game_state.export_position()
+        imported = create_position(config, fen)
+        round_trips = (
+            encoding.fen_to_position(fen),
+            encoding.state_list_to_position(encoding.position_to_state_list(position), mcts_color),
+            encoding.encode_position(pieces, player_turn),
+            imported.encode_position(),
+        )
+        positions += 1
+        if any(result != position for result in round_trips):
+            mismatches += 1
+
+    if mismatches == 0:
+        print(f"✓ {positions}个局面往返转换全部一致")
+    else:
+        print(f"✗ {positions}个局面中{mismatches}个不一致")
+    assert mismatches == 0, f"{positions}个局面中{mismatches}个不一致"
+
+
+def test_move_round_trip():
+    """走法编码与走法元组、MCTS走法字符串和走法编号之间往返转换不变"""
+    print("测试走法编码往返转换...")
+    from program.ai.mcts.mcts_game import move_id2move_action
+
+    all_passed = True
+    for move_id, action in move_id2move_action.items():
+        move = encoding.action_to_move(action)
+        from_pos, to_pos = encoding.move_to_positions(move | encoding.MOVE_FLAGS)
+        if (encoding.move_to_action(move) != action or encoding.move_to_mcts_id(move) != move_id
+                or encoding.positions_to_move(from_pos, to_pos) != move or move > encoding.MOVE_MASK):
+            all_passed = False
+            print(f"✗ 走法{action}往返转换不一致")
+            break
+
+    if all_passed:
+        print(f"✓ {len(move_id2move_action)}个走法往返转换全部一致")
+    assert all_passed, "走法往返转换不一致"
+
+
+if __name__ == "__main__":
+    test_position_round_trip()
+    test_move_round_trip()
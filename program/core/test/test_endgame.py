@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+残局分类表测试：按规则给出死和、必胜和需要搜索的结论，走子过程中与游戏状态的判断一致
+"""
+
+import contextlib
+import io
+
+from program.core import endgame
+from program.core.chess_pieces import PIECE_TYPE_COUNT, JU, MA, XIANG, SHI, KING, PAO
+from program.core.rule_set import RuleSet
+from program.core.test.random_games import random_positions
+
+CLASSICAL = RuleSet.from_settings({}, traditional_mode=True, king_can_leave_palace=False,
+                                  king_can_diagonal_in_palace=False, shi_can_leave_palace=False,
+                                  xiang_can_cross_river=False)
+XIONGHAN = RuleSet.from_settings({})
+
+
+def _signature(red=(), black=()):
+    material = bytearray(2 * PIECE_TYPE_COUNT)
+    for type_code in (KING,) + tuple(red):
+        material[type_code] += 1
+    for type_code in (KING,) + tuple(black):
+        material[PIECE_TYPE_COUNT + type_code] += 1
+    return bytes(material)
+
+
+def test_classification():
+    """典型残局的分类结果"""
+    print("测试残局分类...")
+    cases = [
+        (CLASSICAL, _signature(), (endgame.DRAW, None)),
+        (CLASSICAL, _signature((SHI, SHI, XIANG, XIANG), (SHI, XIANG)), (endgame.DRAW, None)),
+        (CLASSICAL, _signature((JU,), (SHI, XIANG)), (endgame.WIN, "red")),
+        (CLASSICAL, _signature((SHI,), (MA,)), (endgame.WIN, "black")),
+        (CLASSICAL, _signature((PAO,)), (endgame.DRAW, None)),
+        (CLASSICAL, _signature((JU,), (SHI, SHI, XIANG, XIANG)), (endgame.UNKNOWN, None)),
+        (CLASSICAL, _signature((JU,), (PAO,)), (endgame.UNKNOWN, None)),
+        # 默认规则下汉/汗可以出九宫，走进敌方九宫即可获胜，单将对单将不是死和
+        (XIONGHAN, _signature(), (endgame.UNKNOWN, None)),
+    ]
+    all_passed = True
+    for rule_set, signature, expected in cases:
+        result = endgame.classify(signature, rule_set)
+        if result != expected:
+            all_passed = False
+            print(f"✗ 子力{list(signature)}的结论为{result}，应为{expected}")
+    if all_passed:
+        print(f"✓ {len(cases)}个残局分类正确")
+    assert all_passed, "残局分类不正确"
+
+
+def test_table_matches_evaluation(games=10, plies=120, seed=0):
+    """预先计算的表项与现场判断一致，游戏状态的死和判断与分类表一致"""
+    print("测试残局表查询...")
+    mismatches = 0
+    table = endgame.EndgameTable.for_rule_set(CLASSICAL)
+    for signature, entry in table._entries.items():
+        if table._evaluate(signature) != entry:
+            mismatches += 1
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _, game_state, _ in random_positions(games, plies, seed):
+            verdict = game_state.endgame_verdict()
+            insufficient = game_state.get_draw_reason() == "双方均无可能取胜的简单局势"
+            if (verdict[0] == endgame.DRAW) != insufficient:
+                mismatches += 1
+
+    if mismatches == 0:
+        print(f"✓ {len(table)}个表项及随机对局的判断全部一致")
+    else:
+        print(f"✗ {mismatches}处不一致")
+    assert mismatches == 0, f"{mismatches}处不一致"
+
+
+if __name__ == "__main__":
+    test_classification()
+    test_table_matches_evaluation()
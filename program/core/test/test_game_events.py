@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+对局事件测试：订阅表按订阅顺序分发事件，控制台调试输出默认关闭，move_piece 发出的事件与走子结果一致
+"""
+
+import contextlib
+import io
+import random
+
+from program.core.game_events import (CHECK, GAME_OVER, PIECE_CAPTURED, PIECE_MOVED, PROMOTION_PENDING,
+                                      TURN_CHANGED, GameEvents, subscribe_console_output)
+from program.core.test.random_games import choose_without_promotion, create_position, iter_games, iter_plies
+
+
+def test_subscription():
+    """重复订阅只生效一次，按订阅顺序调用，处理函数中取消订阅不影响本次分发"""
+    print("测试事件订阅...")
+    events = GameEvents()
+    calls = []
+
+    def first(value):
+        calls.append(("first", value))
+        events.unsubscribe(CHECK, first)
+
+    def second(value):
+        calls.append(("second", value))
+
+    passed = not events
+    events.subscribe(CHECK, first)
+    events.subscribe(CHECK, second)
+    events.subscribe(CHECK, first)
+    events.emit(CHECK, 1)
+    events.emit(CHECK, 2)
+    events.emit(TURN_CHANGED, 3)
+    passed = passed and calls == [("first", 1), ("second", 1), ("second", 2)]
+    events.unsubscribe(CHECK, second)
+    events.unsubscribe(CHECK, second)
+    passed = passed and not events
+    events.subscribe(GAME_OVER, second)
+    events.clear()
+    events.emit(GAME_OVER, 4)
+    passed = passed and not events and len(calls) == 3
+    print("✓ 事件订阅正确" if passed else f"✗ 事件订阅不正确: {calls}")
+    assert passed, f"事件订阅不正确: {calls}"
+
+
+def test_console_output_debug():
+    """控制台输出默认只订阅棋盘打印，debug=True 时才输出将军、升变和换手的调试信息"""
+    print("测试控制台调试输出...")
+    game_state = create_position("xionghan")
+    pawn = next(piece for piece in game_state.pieces if piece.__class__.__name__ == "Pawn")
+    outputs = []
+    for debug in (False, True):
+        events = GameEvents()
+        subscribe_console_output(events, debug=debug)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            events.emit(CHECK, game_state, "red")
+            events.emit(PROMOTION_PENDING, game_state, pawn)
+            events.emit(TURN_CHANGED, game_state, "black")
+        outputs.append(output.getvalue())
+    passed = outputs[0] == "" and outputs[1].count("[DEBUG]") == 3
+    print("✓ 调试输出默认关闭" if passed else f"✗ 调试输出不正确: {outputs}")
+    assert passed, f"调试输出不正确: {outputs}"
+
+
+def test_move_events(games=4, plies=120, seed=0):
+    """随机对局中 move_piece 每步发出的事件与走子结果一致，make_move 和复制出的游戏状态不发出事件"""
+    print("测试走子事件...")
+    rnd = random.Random(seed)
+    mismatches = 0
+    moves_played = 0
+    for _, game_state in iter_games(games):
+        received = []
+        for event in (PIECE_MOVED, PIECE_CAPTURED, CHECK, PROMOTION_PENDING, TURN_CHANGED, GAME_OVER):
+            game_state.events.subscribe(event, lambda state, *args, event=event: received.append((event, args)))
+
+        def play(*move, game_state=game_state):
+            nonlocal mismatches, moves_played
+            piece = game_state.get_piece_at(*move[:2])
+            captured_before = {color: len(pieces) for color, pieces in game_state.captured_pieces.items()}
+            received.clear()
+            if not game_state.move_piece(*move):
+                return False
+            moves_played += 1
+            names = [event for event, _ in received]
+            # 刺兑子时刺自身也进入阵亡列表，但不发出 PIECE_CAPTURED
+            captured = [captured for color, pieces in game_state.captured_pieces.items()
+                        for captured in pieces[captured_before[color]:] if captured is not piece]
+            emitted = [args[0] for event, args in received if event == PIECE_CAPTURED]
+            moved = [args for event, args in received if event == PIECE_MOVED]
+            # 直接吃将/帅时棋子不再移动，其余走子恰好发出一次 PIECE_MOVED
+            if sorted(map(id, captured)) != sorted(map(id, emitted)) or len(moved) > 1:
+                mismatches += 1
+            elif moved and moved[0][1:5] != move:
+                mismatches += 1
+            if game_state.game_over:
+                expected = (GAME_OVER, (game_state.winner, game_state.total_time))
+            else:
+                expected = (TURN_CHANGED, (game_state.player_turn,))
+                if (CHECK in names) != game_state.is_check:
+                    mismatches += 1
+            if received[-1] != expected or names.count(expected[0]) != 1:
+                mismatches += 1
+
+            # 复制出的游戏状态没有订阅者，make_move 不发出事件
+            received.clear()
+            cloned = game_state.clone()
+            moves = [] if cloned.game_over else cloned.generate_legal_moves(cloned.player_turn)
+            if moves:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    game_state.make_move(*moves[0][:4])
+                game_state.unmake_move()
+            if cloned.events or received:
+                mismatches += 1
+            return True
+
+        for _ in iter_plies(game_state, plies, rnd, choose_without_promotion, play):
+            pass
+
+    if mismatches == 0:
+        print(f"✓ {moves_played}步走子的事件全部一致")
+    else:
+        print(f"✗ {moves_played}步走子中{mismatches}处不一致")
+    assert mismatches == 0, f"{moves_played}步走子中{mismatches}处不一致"
+
+
+if __name__ == "__main__":
+    test_subscription()
+    test_console_output_debug()
+    test_move_events()
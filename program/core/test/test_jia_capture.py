@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+甲/胄连线吃子的差分测试：对比只检查甲/胄所在连线的实现与全盘扫描的结果
+"""
+
+import random
+
+from program.core.chess_pieces import Ju, Ma, Xiang, Shi, King, Pao, Pawn, Wei, She, Lei, Jia, Ci, Dun, Xun
+from program.core.game_rules import GameRules
+from program.core.piece_list import PieceList
+from program.core.rule_set import RuleSet
+
+PIECE_TYPES = [Ju, Ma, Xiang, Shi, King, Pao, Pawn, Wei, She, Lei, Jia, Ci, Dun, Xun]
+
+
+def random_position(rnd):
+    """生成随机局面：棋子较密集，并提高甲/胄和盾的比例以覆盖各种连线"""
+    count = rnd.randint(3, 90)
+    squares = rnd.sample(range(13 * 13), count)
+    pieces = []
+    for square in squares:
+        row, col = divmod(square, 13)
+        roll = rnd.random()
+        if roll < 0.3:
+            piece_class = Jia
+        elif roll < 0.45:
+            piece_class = Dun
+        else:
+            piece_class = rnd.choice(PIECE_TYPES)
+        pieces.append(piece_class(rnd.choice(("red", "black")), row, col))
+    return pieces
+
+
+def test_jia_capture_differential(rounds=2000, seed=0):
+    """对比 find_jia_capture_moves 与 scan_jia_capture_moves（普通列表与带索引的棋子列表）"""
+    print("测试甲/胄连线吃子...")
+    rnd = random.Random(seed)
+    # 显式使用匈汉象棋规则，结果不受全局配置影响
+    rule_set = RuleSet.from_settings({}, traditional_mode=False)
+    mismatches = 0
+    captured_total = 0
+    for index in range(rounds):
+        pieces = random_position(rnd)
+        indexed = PieceList(pieces, 13, 13, rule_set)
+        for color in ("red", "black"):
+            jia_piece = Jia(color, 0, 0)
+            expected = GameRules.scan_jia_capture_moves(pieces, jia_piece, rule_set)
+            captured_total += len(expected)
+            for position in (pieces, indexed):
+                actual = GameRules.find_jia_capture_moves(position, jia_piece, rule_set)
+                if [id(p) for p in actual] != [id(p) for p in expected]:
+                    mismatches += 1
+                    if mismatches <= 5:
+                        print(f"✗ 第{index}个局面 {color} 结果不一致")
+                        print(f"  全盘扫描: {[(p.name, p.row, p.col) for p in expected]}")
+                        print(f"  局部检查: {[(p.name, p.row, p.col) for p in actual]}")
+        indexed._release_all()
+
+    if mismatches == 0:
+        print(f"✓ {rounds}个局面结果全部一致（共{captured_total}个可吃子）")
+    else:
+        print(f"✗ 共{mismatches}处不一致")
+    assert mismatches == 0, f"共{mismatches}处不一致"
+
+
+if __name__ == "__main__":
+    test_jia_capture_differential()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+增量局面键测试：随机对局（含甲/胄连线吃子和刺兑子）中，make_move 和 unmake_move 后增量维护的局面键、
+局面编码和子力签名与用同一批棋子新建的 PieceList 重新计算的结果一致，unmake_move 逐步恢复走子前的局面；
+make_move 与 move_piece 的走子结果一致
+"""
+
+import contextlib
+import copy
+import io
+import random
+
+from program.core import encoding, perft
+from program.core.bitboard import ZOBRIST_BLACK_TO_MOVE
+from program.core.chess_pieces import Jia, Ju, King, Pao
+from program.core.piece_list import PieceList
+from program.core.test.random_games import iter_games, iter_plies, random_positions
+
+SPECIAL_FLAGS = encoding.MOVE_JIA_CAPTURE | encoding.MOVE_CI_EXCHANGE
+
+
+def _incremental(game_state):
+    """游戏状态增量维护的 (局面键, 局面编码, 子力签名)"""
+    return game_state.zobrist_key, game_state.encode_position(), game_state.material_signature
+
+
+def _recomputed(game_state):
+    """用棋子副本新建 PieceList 重新计算 (局面键, 局面编码, 子力签名)
+
+    棋子副本不属于任何列表，新建的索引不会接管对局中的棋子
+    """
+    pieces = PieceList([copy.copy(piece) for piece in game_state.pieces], rule_set=game_state.rule_set)
+    key = pieces.bitboard.zobrist
+    if game_state.player_turn == "black":
+        key ^= ZOBRIST_BLACK_TO_MOVE
+    return key, encoding.encode_position(pieces, game_state.player_turn), pieces.bitboard.material_signature()
+
+
+class _SpecialMoveChooser:
+    """随机选择走法，优先选择甲/胄连线吃子和刺兑子；升变需要界面选择棋子，跳过会触发升变的走法
+
+    chosen 按顺序记录选中走法的标志
+    """
+
+    def __init__(self):
+        self.chosen = []
+
+    def __call__(self, game_state, moves, rnd):
+        candidates = []
+        special = []
+        for move in moves:
+            flags = encoding.encode_game_move(game_state, *move)
+            if flags & encoding.MOVE_PROMOTION:
+                continue
+            candidates.append((move, flags))
+            if flags & SPECIAL_FLAGS:
+                special.append((move, flags))
+        if not candidates:
+            return None
+        move, flags = rnd.choice(special if special and rnd.random() < 0.5 else candidates)
+        self.chosen.append(flags)
+        return move
+
+    def count(self, flag):
+        """选中的走法中带有指定标志的数量"""
+        return sum(1 for flags in self.chosen if flags & flag)
+
+
+def test_make_move_keys(games=10, plies=120, seed=0):
+    """每次 make_move 后增量结果与重新计算一致"""
+    print("测试走子后的增量局面键...")
+    chooser = _SpecialMoveChooser()
+    mismatches = 0
+    for _, game_state, _ in random_positions(games, plies, seed, choose=chooser):
+        if _incremental(game_state) != _recomputed(game_state):
+            mismatches += 1
+
+    moves_played = len(chooser.chosen)
+    jia_count = chooser.count(encoding.MOVE_JIA_CAPTURE)
+    ci_count = chooser.count(encoding.MOVE_CI_EXCHANGE)
+    passed = mismatches == 0 and jia_count > 0 and ci_count > 0
+    if passed:
+        print(f"✓ {moves_played}步走子（甲/胄连线吃子{jia_count}次、刺兑子{ci_count}次）后局面键全部一致")
+    else:
+        print(f"✗ {moves_played}步走子中{mismatches}处不一致（甲/胄连线吃子{jia_count}次、刺兑子{ci_count}次）")
+    assert passed, f"{moves_played}步走子中{mismatches}处不一致（甲/胄连线吃子{jia_count}次、刺兑子{ci_count}次）"
+
+
+def test_unmake_move_keys(games=10, plies=80, seed=1):
+    """随机走子后逐步 unmake_move，每一步都与重新计算一致并恢复到走子前的局面"""
+    print("测试撤销走子后的增量局面键...")
+    rnd = random.Random(seed)
+    chooser = _SpecialMoveChooser()
+    mismatches = 0
+    moves_undone = 0
+    for _, game_state in iter_games(games):
+        history = [_incremental(game_state) for _ in iter_plies(game_state, plies, rnd, chooser)]
+        if history[-1] == _incremental(game_state):
+            history.pop()  # 最后一次产出后没有再走子
+        while history:
+            game_state.unmake_move()
+            moves_undone += 1
+            after = _incremental(game_state)
+            if after != history.pop() or after != _recomputed(game_state):
+                mismatches += 1
+
+    special_undone = chooser.count(SPECIAL_FLAGS)
+    passed = mismatches == 0 and special_undone > 0
+    if passed:
+        print(f"✓ 撤销{moves_undone}步走子（甲/胄连线吃子、刺兑子{special_undone}次）后局面键全部一致")
+    else:
+        print(f"✗ 撤销{moves_undone}步走子中{mismatches}处不一致（甲/胄连线吃子、刺兑子{special_undone}次）")
+    assert passed, f"撤销{moves_undone}步走子中{mismatches}处不一致（甲/胄连线吃子、刺兑子{special_undone}次）"
+
+
+def test_make_move_matches_move_piece(games=6, plies=80, seed=2):
+    """make_move 与 move_piece 移出相同的棋子，吃掉将/帅时给出相同的对局结果"""
+    print("测试 make_move 与 move_piece 一致...")
+    rnd = random.Random(seed)
+    chooser = _SpecialMoveChooser()
+    mismatches = 0
+    for _, game_state in iter_games(games):
+        def play(*move, game_state=game_state):
+            nonlocal mismatches
+            played = game_state.clone()
+            played.move_piece(*move)
+            game_state.make_move(*move)
+            # 只比较棋盘部分：对局结束时 move_piece 不切换走子方；
+            # make_move 只在吃掉将/帅时结束对局，move_piece 还会判断将死等情况
+            if (game_state.encode_position()[:-1] != played.encode_position()[:-1]
+                    or game_state.game_over and (played.game_over, played.winner) != (True, game_state.winner)):
+                mismatches += 1
+            return True
+
+        for _ in iter_plies(game_state, plies, rnd, chooser, play):
+            pass
+
+    moves_played = len(chooser.chosen)
+    if mismatches == 0:
+        print(f"✓ {moves_played}步走子结果一致")
+    else:
+        print(f"✗ {moves_played}步走子中{mismatches}处不一致")
+    assert mismatches == 0, f"{moves_played}步走子中{mismatches}处不一致"
+
+
+def test_jia_king_capture():
+    """甲走后同时形成两条连线，先处理的连线吃掉将/帅后其余连线不再处理（与 move_piece 一致）"""
+    print("测试甲连线吃将...")
+    with contextlib.redirect_stdout(io.StringIO()):
+        game_state = perft.create_position("xionghan")
+    # 甲走到(6,6)：横线 车-甲-汗 吃掉黑汗，竖线 砲-车-甲 的黑砲保留
+    game_state.pieces = [King("red", 11, 6), Jia("red", 7, 6), Ju("red", 6, 5), King("black", 6, 7),
+                         Ju("red", 5, 6), Pao("black", 4, 6)]
+    before = _incremental(game_state)
+    played = game_state.clone()
+    with contextlib.redirect_stdout(io.StringIO()):
+        played.move_piece(7, 6, 6, 6)
+    game_state.make_move(7, 6, 6, 6)
+    passed = game_state.encode_position()[:-1] == played.encode_position()[:-1]
+    passed = passed and game_state.get_piece_at(4, 6) is not None
+    passed = passed and (game_state.game_over, game_state.winner) == (played.game_over, played.winner) == (True, "red")
+    passed = passed and game_state.last_move_flags() == encoding.MOVE_JIA_CAPTURE
+    game_state.unmake_move()
+    passed = passed and _incremental(game_state) == before and not game_state.game_over
+    passed = passed and game_state.last_move_flags() == 0
+    print("✓ 吃将后停止处理连线" if passed else "✗ 吃将后仍处理其余连线")
+    assert passed, "吃将后仍处理其余连线"
+
+
+if __name__ == "__main__":
+    test_make_move_keys()
+    test_unmake_move_keys()
+    test_make_move_matches_move_piece()
+    test_jia_king_capture()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+子力索引测试：走子、悔棋过程中将/帅位置、各类棋子数量、子力签名以及相邻计数与逐个遍历棋子的结果一致
+"""
+
+import random
+
+from program.core.chess_pieces import COLOR_NAMES, PIECE_CLASSES, King, Pawn, Dun
+from program.core.test.random_games import iter_games, iter_plies, random_positions
+
+
+def _expected(game_state):
+    kings = {color: next((piece for piece in game_state.pieces if isinstance(piece, King) and piece.color == color),
+                         None) for color in COLOR_NAMES}
+    counts = bytes(sum(1 for piece in game_state.pieces if type(piece) is piece_class and piece.color == color)
+                   for color in COLOR_NAMES for piece_class in PIECE_CLASSES)
+    pawns = {color: sum(1 for piece in game_state.pieces if isinstance(piece, Pawn) and piece.color == color)
+             for color in COLOR_NAMES}
+    return kings, counts, pawns
+
+
+def _expected_neighbors(game_state):
+    board = game_state.pieces.bitboard
+    neighbors = tuple(bytearray(board.rows * board.cols) for _ in COLOR_NAMES)
+    dun_neighbors = tuple(bytearray(board.rows * board.cols) for _ in COLOR_NAMES)
+    for row in range(board.rows):
+        for col in range(board.cols):
+            for piece in game_state.pieces:
+                row_diff, col_diff = abs(piece.row - row), abs(piece.col - col)
+                if row_diff + col_diff == 1:
+                    neighbors[piece.color_code][row * board.cols + col] += 1
+                if isinstance(piece, Dun) and max(row_diff, col_diff) == 1:
+                    dun_neighbors[piece.color_code][row * board.cols + col] += 1
+    return neighbors, dun_neighbors
+
+
+def _indexed(game_state):
+    kings = {color: game_state.get_king(color) for color in COLOR_NAMES}
+    pawns = {color: game_state.get_pawn_count(color) for color in COLOR_NAMES}
+    return kings, game_state.material_signature, pawns
+
+
+def test_neighbor_counts(games=4, plies=60, seed=0):
+    """随机对局中增量维护的相邻计数与逐格统计一致"""
+    print("测试相邻计数...")
+    mismatches = 0
+    positions = 0
+    for _, game_state, _ in random_positions(games, plies, seed):
+        board = game_state.pieces.bitboard
+        positions += 1
+        if (board.neighbors, board.dun_neighbors) != _expected_neighbors(game_state):
+            mismatches += 1
+
+    if mismatches == 0:
+        print(f"✓ {positions}个局面的相邻计数全部一致")
+    else:
+        print(f"✗ {positions}个局面中{mismatches}个不一致")
+    assert mismatches == 0, f"{positions}个局面中{mismatches}个不一致"
+
+
+def test_material_index(games=10, plies=120, seed=0):
+    """随机对局中 make_move/unmake_move 后索引与遍历结果一致"""
+    print("测试子力索引...")
+    rnd = random.Random(seed)
+    mismatches = 0
+    positions = 0
+    for _, game_state in iter_games(games):
+        made = []
+
+        def play(*move, game_state=game_state, made=made):
+            if not game_state.make_move(*move):
+                return False
+            made.append(move)
+            return True
+
+        for _ in iter_plies(game_state, plies, rnd, play=play):
+            positions += 1
+            if _indexed(game_state) != _expected(game_state):
+                mismatches += 1
+        for _ in made:
+            game_state.unmake_move()
+            positions += 1
+            if _indexed(game_state) != _expected(game_state):
+                mismatches += 1
+
+    if mismatches == 0:
+        print(f"✓ {positions}个局面的子力索引全部一致")
+    else:
+        print(f"✗ {positions}个局面中{mismatches}个不一致")
+    assert mismatches == 0, f"{positions}个局面中{mismatches}个不一致"
+
+
+if __name__ == "__main__":
+    test_material_index()
+    test_neighbor_counts()
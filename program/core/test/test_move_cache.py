@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+合法走法缓存测试：缓存给出的整方/单个棋子走法与不经缓存生成的结果一致，同一局面只生成一次
+"""
+
+import contextlib
+import io
+
+from program.core import move_generator, perft
+from program.core.test.random_games import random_positions
+
+
+def test_cached_moves(games=10, plies=80, seed=0):
+    """随机对局中对比缓存结果与 iter_legal_moves 直接生成的结果"""
+    print("测试合法走法缓存...")
+    mismatches = 0
+    positions = 0
+    for _, game_state, _ in random_positions(games, plies, seed):
+        # 走子时已查询过当前局面，清空缓存后重新比较未命中和命中两种情况
+        move_generator.clear_caches()
+        color = game_state.player_turn
+        expected = list(move_generator.iter_legal_moves(game_state, color))
+        positions += 1
+        if move_generator.generate_legal_moves(game_state, color) != expected:
+            mismatches += 1
+        for piece in game_state.pieces:
+            if (move_generator.generate_legal_moves(game_state, color, piece)
+                    != list(move_generator.iter_legal_moves(game_state, color, piece))):
+                mismatches += 1
+
+    if mismatches == 0:
+        print(f"✓ {positions}个局面的缓存结果全部一致")
+    else:
+        print(f"✗ {positions}个局面中{mismatches}处不一致")
+    assert mismatches == 0, f"{positions}个局面中{mismatches}处不一致"
+
+
+def test_cache_hits():
+    """同一局面第二次查询命中缓存，走子后的新局面未命中"""
+    print("测试缓存命中统计...")
+    with contextlib.redirect_stdout(io.StringIO()):
+        game_state = perft.create_position("xionghan")
+    move_generator.clear_caches()
+    moves = game_state.generate_legal_moves(game_state.player_turn)
+    game_state.calculate_possible_moves(moves[0].from_row, moves[0].from_col)
+    has_move = move_generator.has_any_legal_move(game_state, game_state.player_turn)
+    info = move_generator.legal_move_cache.info()
+    passed = has_move and info["hits"] == 1 and info["misses"] == 1 and info["size"] == 1
+
+    game_state.make_move(*moves[0][:4])
+    game_state.generate_legal_moves(game_state.player_turn)
+    info = move_generator.legal_move_cache.info()
+    passed = passed and info["misses"] == 2 and info["size"] == 2
+
+    print("✓ 命中统计正确" if passed else f"✗ 命中统计不正确: {move_generator.cache_info()}")
+    assert passed, f"命中统计不正确: {move_generator.cache_info()}"
+
+
+if __name__ == "__main__":
+    test_cached_moves()
+    test_cache_hits()
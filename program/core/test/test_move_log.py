@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+走子历史测试：随机对局逐步悔棋，每一步都恢复到走子前的局面、阵亡列表和重复局面计数
+"""
+
+import contextlib
+import io
+import random
+
+from program.core.test.random_games import choose_without_promotion, iter_games, iter_plies
+
+
+def _snapshot(game_state):
+    return (game_state.encode_position(),
+            {color: list(pieces) for color, pieces in game_state.captured_pieces.items()},
+            dict(game_state.repetition.counts))
+
+
+def test_undo_restores_positions(games=10, plies=120, seed=0):
+    """move_piece 后 undo_move 逐步回到每一步之前的状态"""
+    print("测试悔棋恢复局面...")
+    rnd = random.Random(seed)
+    mismatches = 0
+    moves_played = 0
+    for _, game_state in iter_games(games):
+        snapshots = []
+
+        def play(*move, game_state=game_state, snapshots=snapshots):
+            snapshot = _snapshot(game_state)
+            if not game_state.move_piece(*move):
+                return False
+            snapshots.append(snapshot)
+            return True
+
+        for _ in iter_plies(game_state, plies, rnd, choose_without_promotion, play):
+            pass
+        moves_played += len(snapshots)
+        if len(game_state.move_history) != len(snapshots):
+            mismatches += 1
+        with contextlib.redirect_stdout(io.StringIO()):
+            while snapshots:
+                game_state.undo_move()
+                if _snapshot(game_state) != snapshots.pop():
+                    mismatches += 1
+        if game_state.move_history or len(game_state.repetition):
+            mismatches += 1
+
+    if mismatches == 0:
+        print(f"✓ {moves_played}步悔棋后全部恢复一致")
+    else:
+        print(f"✗ {moves_played}步中{mismatches}处不一致")
+    assert mismatches == 0, f"{moves_played}步中{mismatches}处不一致"
+
+
+if __name__ == "__main__":
+    test_undo_restores_positions()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+perft测试：走法生成器的叶子节点数与参考计数一致，并与GameRules逐格校验的结果一致
+"""
+
+from program.core import perft
+
+
+def test_perft_reference(max_nodes=200000):
+    """走法生成器与 perft_reference.json 中的参考计数对比（跳过节点数过多的深度）"""
+    print("测试perft参考计数...")
+    passed = perft.check_reference(perft.legal_moves, max_nodes)
+    print("✓ 参考计数全部一致" if passed else "✗ 参考计数不一致")
+    assert passed, "参考计数不一致"
+
+
+def test_perft_divide(depth=2):
+    """按第一步走法对比走法生成器与GameRules逐格校验的叶子节点数"""
+    print("测试perft divide...")
+    all_passed = True
+    for ruleset in perft.RULESETS:
+        game_state = perft.create_position(ruleset)
+        expected = dict(perft.divide(game_state, depth, perft.rules_legal_moves))
+        actual = dict(perft.divide(game_state, depth, perft.legal_moves))
+        if actual == expected:
+            print(f"✓ {ruleset} depth {depth}: {len(actual)}个走法, {sum(actual.values())}个节点")
+            continue
+        all_passed = False
+        for move in sorted(set(expected) | set(actual)):
+            if expected.get(move) != actual.get(move):
+                print(f"✗ {ruleset} {perft.format_move(move)}: "
+                      f"GameRules {expected.get(move)}, 走法生成器 {actual.get(move)}")
+    assert all_passed, "分支节点数与参照实现不一致"
+
+
+if __name__ == "__main__":
+    test_perft_reference()
+    test_perft_divide()
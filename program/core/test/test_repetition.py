@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+重复局面计数测试：随机走子/悔棋后，增量计数与按历史重新统计的结果一致
+"""
+
+import random
+
+from program.core.repetition import RepetitionTracker
+from program.core.test.random_games import iter_games, iter_plies
+
+
+def recount(keys, materials):
+    """按历史重新统计最近一次棋子数变化之后的局面出现次数"""
+    start = 0
+    for index in range(len(materials) - 1, 0, -1):
+        if materials[index] != materials[index - 1]:
+            start = index
+            break
+    counts = {}
+    for key in keys[start:]:
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def test_repetition_tracker(rounds=20000, seed=0):
+    """随机 push/pop 后对比 RepetitionTracker 与重新统计的结果"""
+    print("测试重复局面计数...")
+    rnd = random.Random(seed)
+    tracker = RepetitionTracker()
+    keys = []
+    materials = []
+    mismatches = 0
+    for index in range(rounds):
+        if keys and rnd.random() < 0.45:
+            tracker.pop()
+            keys.pop()
+            materials.pop()
+        else:
+            key = rnd.randrange(6)
+            material = materials[-1] if materials else 32
+            if rnd.random() < 0.1:
+                material -= 1  # 吃子：开始新的窗口
+            tracker.push(key, material)
+            keys.append(key)
+            materials.append(material)
+        if tracker.counts != recount(keys, materials):
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"✗ 第{index}步计数不一致: {tracker.counts} != {recount(keys, materials)}")
+
+    if mismatches == 0:
+        print(f"✓ {rounds}次走子/悔棋后计数全部一致")
+    else:
+        print(f"✗ 共{mismatches}处不一致")
+    assert mismatches == 0, f"共{mismatches}处不一致"
+
+
+def test_game_repetition(games=4, plies=120, seed=0):
+    """随机对局中 make_move/unmake_move 后游戏状态的计数与按走子历史重新统计的结果一致"""
+    print("测试对局中的重复局面计数...")
+    rnd = random.Random(seed)
+    mismatches = 0
+    positions = 0
+    for _, game_state in iter_games(games):
+        keys = []
+        materials = []
+
+        def record(game_state=game_state, keys=keys, materials=materials):
+            # 每次产出的局面之前最多走了一步；最后一次产出之后也可能又走了一步
+            if len(game_state.repetition) > len(keys):
+                keys.append(game_state.zobrist_key)
+                materials.append(len(game_state.pieces))
+
+        for _ in iter_plies(game_state, plies, rnd):
+            record()
+            positions += 1
+            if game_state.repetition.keys != keys or game_state.repetition.counts != recount(keys, materials):
+                mismatches += 1
+        record()
+        while keys:
+            game_state.unmake_move()
+            keys.pop()
+            materials.pop()
+            if game_state.repetition.keys != keys or game_state.repetition.counts != recount(keys, materials):
+                mismatches += 1
+
+    if mismatches == 0:
+        print(f"✓ {positions}个局面的计数全部一致")
+    else:
+        print(f"✗ {positions}个局面中{mismatches}处不一致")
+    assert mismatches == 0, f"{positions}个局面中{mismatches}处不一致"
+
+
+if __name__ == "__main__":
+    test_repetition_tracker()
+    test_game_repetition()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+局面快照测试：快照不随游戏状态变化，由快照恢复的游戏状态与原局面一致，局面未变时复用同一份快照
+"""
+
+import contextlib
+import io
+import random
+
+from program.core import perft
+from program.core.test.random_games import iter_games, iter_plies
+
+
+def test_snapshot_round_trip(games=10, plies=80, seed=0):
+    """随机对局中每一步的快照在之后走子后保持不变，clone 出的游戏状态与取快照时的局面和走法一致"""
+    print("测试局面快照...")
+    rnd = random.Random(seed)
+    mismatches = 0
+    positions = 0
+    for _, game_state in iter_games(games):
+        taken = []
+        for moves in iter_plies(game_state, plies, rnd):
+            taken.append((game_state.snapshot(), game_state.encode_position(), game_state.zobrist_key, moves))
+            positions += 1
+        for snapshot, position, key, moves in taken:
+            restored = snapshot.clone()
+            if (snapshot.encode_position() != position or restored.encode_position() != position
+                    or restored.zobrist_key != key or perft.legal_moves(restored) != moves):
+                mismatches += 1
+
+    if mismatches == 0:
+        print(f"✓ {positions}个局面的快照全部一致")
+    else:
+        print(f"✗ {positions}个局面中{mismatches}个不一致")
+    assert mismatches == 0, f"{positions}个局面中{mismatches}个不一致"
+
+
+def test_snapshot_reuse():
+    """局面未变时返回同一份快照，走子后的新快照与旧快照共享未变化的行"""
+    print("测试快照复用...")
+    with contextlib.redirect_stdout(io.StringIO()):
+        game_state = perft.create_position("xionghan")
+    first = game_state.snapshot()
+    passed = game_state.snapshot() is first
+
+    from_row, from_col, to_row, to_col = perft.legal_moves(game_state)[0]
+    game_state.make_move(from_row, from_col, to_row, to_col)
+    second = game_state.snapshot()
+    changed_rows = {from_row, to_row}
+    passed = passed and second is not first and all(
+        (second.rows[row] is first.rows[row]) == (row not in changed_rows) for row in range(len(first.rows)))
+
+    print("✓ 快照复用正确" if passed else "✗ 快照复用不正确")
+    assert passed, "快照复用不正确"
+
+
+def test_restored_fields():
+    """由快照恢复和 clone 得到的游戏状态与新建的游戏状态有相同的字段"""
+    print("测试恢复后的字段...")
+    with contextlib.redirect_stdout(io.StringIO()):
+        game_state = perft.create_position("xionghan")
+    fields = set(vars(game_state))
+    passed = set(vars(game_state.snapshot().clone())) == fields and set(vars(game_state.clone())) == fields
+    print("✓ 字段完整" if passed else "✗ 字段不完整")
+    assert passed, "恢复后的游戏状态缺少字段"
+
+
+if __name__ == "__main__":
+    test_snapshot_round_trip()
+    test_snapshot_reuse()
+    test_restored_fields()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+尉/衛照面测试：GameRules 的照面判断、棋盘索引增量维护的照面关系与逐格扫描的结果一致
+"""
+
+import contextlib
+import io
+
+from program.core.chess_pieces import Ju, King, Ma, Wei
+from program.core.game_rules import GameRules
+from program.core.test.random_games import create_position, random_positions
+
+DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+def _scan_facing(wei, pieces, rule_set):
+    """沿上、下、左、右逐格扫描，第一个以敌子为第一个阻挡的方向上的敌子"""
+    occupied = {(piece.row, piece.col): piece for piece in pieces}
+    for dr, dc in DIRECTIONS:
+        row, col = wei.row + dr, wei.col + dc
+        while rule_set.on_board(row, col):
+            target = occupied.get((row, col))
+            if target is not None:
+                if target.color != wei.color:
+                    return target
+                break
+            row += dr
+            col += dc
+    return None
+
+
+def _expected(game_state):
+    """逐格扫描得到的 (照面关系, 被照面棋子 -> 照面它的尉的数量)"""
+    pairs = []
+    restricted = {}
+    for wei in sorted((piece for piece in game_state.pieces if isinstance(piece, Wei)),
+                      key=lambda piece: (piece.row, piece.col)):
+        target = _scan_facing(wei, game_state.pieces, game_state.rule_set)
+        if target is not None:
+            pairs.append((wei, target))
+            restricted[target] = restricted.get(target, 0) + 1
+    return pairs, restricted
+
+
+def test_facing_matches_scan(games=6, plies=120, seed=0):
+    """随机对局中 is_facing_enemy/get_facing_piece（棋盘索引与临时构建的位棋盘）及增量照面关系与逐格扫描一致"""
+    print("测试尉照面判断...")
+    mismatches = 0
+    facing = 0
+    for _, game_state, _ in random_positions(games, plies, seed):
+        pairs, restricted = _expected(game_state)
+        facing += len(pairs)
+        if game_state.facing_pairs != pairs or dict(game_state.pieces.bitboard.facing_restricted()) != restricted:
+            mismatches += 1
+        targets = dict(pairs)
+        plain = list(game_state.pieces)
+        for piece in game_state.pieces:
+            target = targets.get(piece)
+            for pieces in (game_state.pieces, plain):
+                if (GameRules.get_facing_piece(piece, pieces) is not target
+                        or GameRules.is_facing_enemy(piece, pieces) != (target is not None)):
+                    mismatches += 1
+
+    passed = mismatches == 0 and facing > 0
+    if passed:
+        print(f"✓ {facing}处照面全部一致")
+    else:
+        print(f"✗ {facing}处照面中{mismatches}处不一致")
+    assert passed, f"{facing}处照面中{mismatches}处不一致"
+
+
+def test_facing_blocked():
+    """同色棋子挡住的方向不形成照面，照面对象按上、下、左、右的顺序选取"""
+    print("测试尉照面遮挡...")
+    game_state = create_position("xionghan")
+    wei = Wei("red", 6, 6)
+    black_ju = Ju("black", 6, 2)
+    black_ma = Ma("black", 6, 10)
+    game_state.pieces = [King("red", 11, 6), King("black", 1, 6), wei, Ju("red", 3, 6), black_ju, black_ma]
+    # 上方被己方车挡住，下方是己方帅，左右两侧都是敌子：先找到左侧的敌车
+    passed = GameRules.get_facing_piece(wei, game_state.pieces) is black_ju
+    passed = passed and game_state.facing_pairs == [(wei, black_ju)]
+    passed = passed and game_state.is_piece_facing_restricted(black_ju)
+    passed = passed and not game_state.is_piece_facing_restricted(black_ma)
+    with contextlib.redirect_stdout(io.StringIO()):
+        game_state.make_move(6, 2, 5, 2)
+    # 敌车离开后照面对象变为右侧的敌马
+    passed = passed and game_state.facing_pairs == [(wei, black_ma)]
+    passed = passed and GameRules.get_facing_piece(wei, list(game_state.pieces)) is black_ma
+    print("✓ 照面遮挡正确" if passed else "✗ 照面遮挡不正确")
+    assert passed, "照面遮挡不正确"
+
+
+if __name__ == "__main__":
+    test_facing_matches_scan()
+    test_facing_blocked()
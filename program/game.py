@@ -49,8 +49,12 @@ class ChessGame:
             # 如果没有传入特定设置，使用当前全局配置
             game_settings = game_config.get_all_settings()
 
+        # 音效管理器（包含背景音乐功能）
+        self.sound_manager = sound_manager
+
         # 初始化游戏状态
         self.game_state = GameState()
+        self.subscribe_game_events()
 
         # 初始化AI管理器（如果需要）
         from program.controllers.ai_manager import AIManager
@@ -77,9 +81,6 @@ class ChessGame:
         self.stats_dialog = None
         self.about_screen = None
 
-
-        # 音效管理器（包含背景音乐功能）
-        self.sound_manager = sound_manager
         # 启动背景音乐
         self.sound_manager.toggle_music_style()  # 设置为QQ风格，如果需要FC风格，可以再次调用toggle_music_style()
 
@@ -88,6 +89,15 @@ class ChessGame:
         self.check_checkmate_tip_manager = CheckCheckmateTipManager()
 
 
+    def subscribe_game_events(self):
+        """为当前游戏状态挂上副作用订阅者：控制台棋盘输出、统计数据和走子音效"""
+        from program.core.game_events import subscribe_console_output
+        from program.controllers.statistics_manager import statistics_manager
+        events = self.game_state.events
+        subscribe_console_output(events)
+        statistics_manager.subscribe(events)
+        self.sound_manager.subscribe(events)
+
     def init_window(self):
         """初始化窗口"""
         self.window_width = DEFAULT_WINDOW_WIDTH
@@ -101,9 +111,6 @@ class ChessGame:
         """执行走法"""
         from_row, from_col, to_row, to_col = move
 
-        # 检查目标位置是否有棋子（吃子）
-        captured_piece = self.game_state.get_piece_at(to_row, to_col)
-
         self.game_state.move_piece(from_row, from_col, to_row, to_col)
 
         # 更新棋盘上的棋子位置
@@ -145,11 +152,7 @@ class ChessGame:
                 self.sound_manager.play_sound('capture')  # 播放旧版音效
             except (AttributeError, Exception):
                 pass
-        # 检查是否有棋子被吃掉
-        elif captured_piece:
-            self.sound_manager.play_sound('eat')
-        else:
-            self.sound_manager.play_sound('drop')
+        # 落子/吃子音效由游戏状态的走子事件触发（见 subscribe_game_events）
 
         # 检查将军/绝杀状态并播放相应音效
         # 注意：这里需要在移动完成后立即检查，以确保状态正确
@@ -193,6 +196,7 @@ class ChessGame:
         """重新开始游戏"""
         # 重新初始化游戏状态，确保使用当前设置
         self.game_state = GameState()
+        self.subscribe_game_events()
         self.selected_piece = None
         self.last_move = None
         self.last_move_notation = ""
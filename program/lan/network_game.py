@@ -206,18 +206,9 @@ class NetworkChessGame(ChessGame):
                         self.sound_manager.play_sound('choose')
                     except (AttributeError, KeyError):
                         pass
-                
-                # 播放移动音效
-                if captured_piece:
-                    try:
-                        self.sound_manager.play_sound('eat')
-                    except (AttributeError, KeyError):
-                        pass
-                else:
-                    try:
-                        self.sound_manager.play_sound('drop')
-                    except (AttributeError, KeyError):
-                        pass
+
+
+                # 落子/吃子音效由游戏状态的走子事件触发（见 ChessGame.subscribe_game_events）
 
                 # 记录最后移动的玩家（当前玩家）
                 self.last_moved_player = self.player_camp
@@ -319,19 +310,6 @@ class NetworkChessGame(ChessGame):
                 from program.utils import tools
                 self.last_move_notation = tools.generate_move_notation(piece, from_row, from_col, to_row, to_col)
 
-            # 播放音效
-            captured_piece = self.game_state.get_piece_at(to_row, to_col)
-            if captured_piece:
-                try:
-                    self.sound_manager.play_sound('eat')
-                except (AttributeError, KeyError):
-                    pass
-            else:
-                try:
-                    self.sound_manager.play_sound('drop')
-                except:
-                    pass
-
             # 更新头像状态
             self.update_avatars()
 
@@ -461,10 +439,6 @@ class NetworkChessGame(ChessGame):
         """发送状态同步确认信息，确保双方状态一致"""
         if hasattr(XiangqiNetworkGame, 'api_instance') and XiangqiNetworkGame.api_instance:
             try:
-                # 计算当前游戏状态的哈希值
-                import hashlib
-                import json
-                
                 # 创建状态快照
                 state_snapshot = {
                     'player_turn': self.game_state.player_turn,
@@ -477,9 +451,8 @@ class NetworkChessGame(ChessGame):
                     'last_moved_player': self.last_moved_player
                 }
                 
-                # 计算哈希
-                state_str = json.dumps(state_snapshot, sort_keys=True)
-                state_hash = hashlib.md5(state_str.encode()).hexdigest()
+                # 使用局面的Zobrist键作为状态哈希（由棋盘索引增量维护，双方生成规则一致）
+                state_hash = self.game_state.zobrist_key
                 
                 # 发送状态同步确认
                 XiangqiNetworkGame.api_instance.send(state_sync={'hash': state_hash, 'snapshot': state_snapshot})
@@ -490,9 +463,6 @@ class NetworkChessGame(ChessGame):
     def handle_state_sync_confirmation(self, state_data):
         """处理状态同步确认"""
         try:
-            import hashlib
-            import json
-            
             # 重建本地状态快照
             local_snapshot = {
                 'player_turn': self.game_state.player_turn,
@@ -510,9 +480,8 @@ class NetworkChessGame(ChessGame):
                 'available_promotion_pieces': self.game_state.available_promotion_pieces[:]
             }
             
-            # 计算本地哈希
-            local_str = json.dumps(local_snapshot, sort_keys=True)
-            local_hash = hashlib.md5(local_str.encode()).hexdigest()
+            # 计算本地哈希（局面的Zobrist键）
+            local_hash = self.game_state.zobrist_key
             
             remote_hash = state_data['hash']
             
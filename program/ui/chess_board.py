@@ -902,20 +902,8 @@ class ChessBoard:
                         sound_manager.play_sound('choose')  # 使用chess-master的选子音效
                     except (pygame.error, KeyError, FileNotFoundError):
                         pass
-                
-                # 播放移动音效
-                if captured_piece:
-                    try:
-                        from program.controllers.sound_manager import sound_manager
-                        sound_manager.play_sound('eat')  # 使用chess-master的吃子音效
-                    except (pygame.error, KeyError, FileNotFoundError):
-                        pass
-                else:
-                    try:
-                        from program.controllers.sound_manager import sound_manager
-                        sound_manager.play_sound('drop')  # 使用chess-master的落子音效
-                    except (pygame.error, KeyError, FileNotFoundError):
-                        pass
+
+                # 落子/吃子音效由游戏状态的走子事件触发（见 ChessGame.subscribe_game_events）
 
                 # 更新头像状态
                 game_instance.game_screen.update_avatars(game_state)
@@ -969,17 +969,11 @@ class GameScreen:
             line_spacing = 25  # 行间距
 
             for i, move_record in enumerate(recent_moves):
-                # 处理新旧格式的历史记录
-                if len(move_record) >= 8:  # 新格式：包含甲/胄吃子信息和刺兑子信息
-                    piece, from_row, from_col, to_row, to_col, captured_piece, jia_captured_pieces, ci_captured_pieces = move_record
-                elif len(move_record) >= 7:  # 新格式：包含甲/胄吃子信息
-                    piece, from_row, from_col, to_row, to_col, captured_piece, jia_captured_pieces = move_record
-                else:  # 旧格式：6个元素
-                    piece, from_row, from_col, to_row, to_col, captured_piece = move_record
-
                 # 生成棋谱记号
                 from program.utils import tools
-                notation = tools.generate_move_notation(piece, from_row, from_col, to_row, to_col)
+                piece = move_record.piece
+                notation = tools.generate_move_notation(piece, move_record.from_row, move_record.from_col,
+                                                        move_record.to_row, move_record.to_col)
 
                 # 计算正确编号，避免负数
                 move_index = max(0, len(game_state.move_history) - 10) + i + 1
@@ -1020,16 +1014,15 @@ class GameScreen:
                 # 如果还有移动历史，更新上一步记录
                 if hasattr(game.game_state, 'move_history') and len(game.game_state.move_history) > 0:
                     last_history = game.game_state.move_history[-1]
-                    if 'from_pos' in last_history and 'to_pos' in last_history:
-                        from_row, from_col = last_history['from_pos']
-                        to_row, to_col = last_history['to_pos']
-                        game.last_move = (from_row, from_col, to_row, to_col)
-                        piece = game.game_state.get_piece_at(to_row, to_col)
-                        if piece:
-                            from program.utils import tools
-                            game.last_move_notation = tools.generate_move_notation(
-                                piece, from_row, from_col, to_row, to_col
-                            )
+                    from_row, from_col = last_history.from_row, last_history.from_col
+                    to_row, to_col = last_history.to_row, last_history.to_col
+                    game.last_move = (from_row, from_col, to_row, to_col)
+                    piece = game.game_state.get_piece_at(to_row, to_col)
+                    if piece:
+                        from program.utils import tools
+                        game.last_move_notation = tools.generate_move_notation(
+                            piece, from_row, from_col, to_row, to_col
+                        )
 
                 return True
         else:  # 人机模式
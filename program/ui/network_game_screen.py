@@ -354,17 +354,11 @@ class NetworkGameScreen:
             line_spacing = 25  # 行间距
 
             for i, move_record in enumerate(recent_moves):
-                # 处理新旧格式的历史记录
-                if len(move_record) >= 8:  # 新格式：包含甲/胄吃子信息和刺兑子信息
-                    piece, from_row, from_col, to_row, to_col, captured_piece, jia_captured_pieces, ci_captured_pieces = move_record
-                elif len(move_record) >= 7:  # 新格式：包含甲/胄吃子信息
-                    piece, from_row, from_col, to_row, to_col, captured_piece, jia_captured_pieces = move_record
-                else:  # 旧格式：6个元素
-                    piece, from_row, from_col, to_row, to_col, captured_piece = move_record
-
                 # 生成棋谱记号
                 from program.utils import tools
-                notation = tools.generate_move_notation(piece, from_row, from_col, to_row, to_col)
+                piece = move_record.piece
+                notation = tools.generate_move_notation(piece, move_record.from_row, move_record.from_col,
+                                                        move_record.to_row, move_record.to_col)
 
                 # 计算正确编号，避免负数
                 move_index = max(0, len(game_state.move_history) - 10) + i + 1
@@ -1,7 +1,5 @@
 """工具函数模块，包含导入导出棋局和复盘等功能"""
-from program.core.chess_pieces import (
-    King, Ju, Ma, Xiang, Shi, Pao, Pawn, Wei, She, Lei, Jia, Ci, Dun, Xun
-)
+from program.core.chess_pieces import Ma, Xiang, Shi, Pawn, Wei, She, PIECE_CLASS_BY_NAME
 
 """通用的设置界面分类绘制函数"""
 
@@ -240,19 +238,14 @@ def generate_move_notation(piece, from_row, from_col, to_row, to_col):
     return notation
 
 def get_valid_moves(game_state, color):
-    """获取指定颜色棋子的所有有效走法"""
-    valid_moves = []
+    """获取指定颜色棋子的所有有效走法
 
-    for piece in game_state.pieces:
-        if piece.color == color:
-            # 获取该棋子所有可能的移动位置
-            possible_moves, _ = game_state.calculate_possible_moves(piece.row, piece.col)
-
-            # 添加到有效走法列表
-            for to_row, to_col in possible_moves:
-                valid_moves.append(((piece.row, piece.col), (to_row, to_col)))
-
-    return valid_moves
+    Returns:
+        list: [((from_row, from_col), (to_row, to_col)), ...]
+    """
+    from program.core.move_generator import generate_legal_moves
+    return [((move.from_row, move.from_col), (move.to_row, move.to_col))
+            for move in generate_legal_moves(game_state, color)]
 
 def is_pawn_at_opponent_base(piece, to_row):
     """检查兵/卒是否移动到对方底线
@@ -284,23 +277,4 @@ def get_piece_class_by_name(name):
     Returns:
         class: 棋子类
     """
-
-
-    name_to_class = {
-         '汗': King, '漢': King, # 漢/汗
-        '車': Ju, '俥': Ju, # 俥/車
-        '馬': Ma, '傌': Ma, # 馬/傌
-        '象': Xiang, '相': Xiang,  # 相/象
-        '士': Shi, '仕': Shi,  # 士/仕
-        '砲': Pao, '炮': Pao,  # 炮/砲
-        '卒': Pawn, '兵': Pawn,  # 兵/卒
-        '衛': Wei, '尉': Wei, # 卫/尉
-        '䠶': She, '射': She,  # 射/䠶
-        '礌': Lei, '檑': Lei,  # 檑/礌
-        '胄': Jia, '甲': Jia,  # 甲/胄
-        '刺': Ci,  '伺': Ci, # 刺/伺
-        '楯': Dun, '碷': Dun,# 楯/碷
-        '廵': Xun, '巡': Xun,  # 巡/廵
-    }
-
-    return name_to_class.get(name)
\ No newline at end of file
+    return PIECE_CLASS_BY_NAME.get(name)
\ No newline at end of file
@@ -3,7 +3,7 @@ import sys
 
 import pygame
 
-from program.controllers.game_config_manager import game_config
+from program.core.rule_set import current_rule_set
 
 # 字体缓存
 _font_cache = {}
@@ -144,26 +144,37 @@ def virtual_move(pieces, piece, to_row, to_col, check_function, *args):
     original_row, original_col = piece.row, piece.col
     target_piece = None
     
+    target_index = None
+
     # 查找并移除目标位置的棋子（如果存在）
-    for p in pieces[:]:  # 使用切片副本以安全地修改列表
-        if p.row == to_row and p.col == to_col:
-            target_piece = p
-            pieces.remove(p)
-            break
+    get_piece_at = getattr(pieces, "get_piece_at", None)
+    if get_piece_at is not None:
+        # 带棋盘索引的棋子列表可直接按坐标取子
+        target_piece = get_piece_at(to_row, to_col)
+        if target_piece:
+            target_index = pieces.index(target_piece)
+            pieces.pop(target_index)
+    else:
+        for index, p in enumerate(pieces):
+            if p.row == to_row and p.col == to_col:
+                target_piece = p
+                target_index = index
+                pieces.pop(index)
+                break
     
     # 移动棋子到目标位置
-    piece.row, piece.col = to_row, to_col
+    piece.move_to(to_row, to_col)
     
     # 执行检查函数
     result = check_function(pieces, *args)
     
     # 恢复棋子到原始位置
-    piece.row, piece.col = original_row, original_col
+    piece.move_to(original_row, original_col)
     
-    # 如果目标位置原本有棋子，将其放回
+    # 如果目标位置原本有棋子，将其放回原来的列表位置（保持遍历顺序不变）
     if target_piece:
         target_piece.row, target_piece.col = to_row, to_col
-        pieces.append(target_piece)
+        pieces.insert(target_index, target_piece)
     
     return result
 
@@ -203,13 +214,10 @@ def print_board(pieces, step=None, show_step=True):
         step[0] += 1
         print('\033[36mSTEP\033[0m:', step[0])
     
-    # 根据GameRules的设置确定棋盘尺寸
-    if game_config.get_setting("traditional_mode", False):
-        # 传统中国象棋：9列 x 10行
-        board = [[None for _ in range(9)] for _ in range(10)]
-    else:
-        # 匈汉象棋：13列 x 13行
-        board = [[None for _ in range(13)] for _ in range(13)]
+    # 棋盘尺寸由当前规则的棋盘几何给出（传统象棋10行9列，匈汉象棋13行13列）
+    from program.core.game_rules import GameRules
+    geometry = GameRules.get_rule_set(pieces).geometry
+    board = [[None for _ in range(geometry.cols)] for _ in range(geometry.rows)]
     
     # 将棋子放置到棋盘上
     for piece in pieces:
@@ -312,9 +320,4 @@ def is_position_on_board(row, col):
     Returns:
         bool: 位置是否在棋盘范围内
     """
-    if game_config.get_setting("traditional_mode", False):
-        # 传统中国象棋：9列 x 10行 (0-8列, 0-9行)
-        return 0 <= row < 10 and 0 <= col < 9
-    else:
-        # 匈汉象棋：13列 x 13行 (0-12列, 0-12行)
-        return 0 <= row < 13 and 0 <= col < 13
\ No newline at end of file
+    return current_rule_set().on_board(row, col)
\ No newline at end of file